@@ -0,0 +1,161 @@
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Recorded LDAP response streams used by the codec benchmark, stored in the captures folder as the BER encoded
+# messages received from the server, one file for each stream. The streams are synthetic but mimic the responses of
+# an Active Directory server, they are built with a fixed seed so they can be recorded again with identical content
+# usage: python -m benchmark.captures  (records the captures again)
+
+from os import path
+from random import Random
+from struct import pack
+
+from ldap3.strategy.base import BaseStrategy
+from ldap3.utils.asn1 import encode_message_fast, encode_sequence_fast, encode_octet_string_fast, encode_integer_fast
+
+CAPTURES_PATH = path.join(path.dirname(path.abspath(__file__)), 'captures')
+CAPTURES = ['ad_users', 'big_groups', 'schema', 'paged_search']
+BASE_DN = 'DC=example,DC=com'
+
+
+def search_result_entry(dn, attributes):
+    attribute_list = [encode_sequence_fast([encode_octet_string_fast(attribute), encode_sequence_fast([encode_octet_string_fast(value) for value in values], 0x31)]) for attribute, values in attributes]
+    return encode_sequence_fast([encode_octet_string_fast(dn), encode_sequence_fast(attribute_list)], 0x64)  # [APPLICATION 4] SearchResultEntry
+
+
+def search_result_done():
+    return encode_sequence_fast([encode_integer_fast(0, 0x0A), encode_octet_string_fast(''), encode_octet_string_fast('')], 0x65)  # [APPLICATION 5] SearchResultDone
+
+
+def paged_search_control(size, cookie):
+    return [('1.2.840.113556.1.4.319', False, encode_sequence_fast([encode_integer_fast(size), encode_octet_string_fast(cookie)]))]
+
+
+def object_sid(random, rid):
+    return b'\x01\x05\x00\x00\x00\x00\x00\x05\x15\x00\x00\x00' + pack('<IIII', random.randint(0, 0xFFFFFFFF), random.randint(0, 0xFFFFFFFF), random.randint(0, 0xFFFFFFFF), rid)
+
+
+def ad_user(random, index):
+    name = 'User %05d' % index
+    dn = 'CN=%s,OU=Users,OU=Department %d,%s' % (name, index % 20, BASE_DN)
+    timestamp = str(132000000000000000 + random.randint(0, 10 ** 15))
+    return dn, [('objectClass', ['top', 'person', 'organizationalPerson', 'user']),
+                ('cn', [name]),
+                ('sn', ['Surname%05d' % index]),
+                ('givenName', ['User']),
+                ('distinguishedName', [dn]),
+                ('instanceType', ['4']),
+                ('whenCreated', ['2019%02d%02d%02d%02d%02d.0Z' % (random.randint(1, 12), random.randint(1, 28), random.randint(0, 23), random.randint(0, 59), random.randint(0, 59))]),
+                ('whenChanged', ['2020%02d%02d%02d%02d%02d.0Z' % (random.randint(1, 12), random.randint(1, 28), random.randint(0, 23), random.randint(0, 59), random.randint(0, 59))]),
+                ('displayName', ['User %05d (Department %d)' % (index, index % 20)]),
+                ('uSNCreated', [str(random.randint(10000, 900000))]),
+                ('memberOf', ['CN=Group %d,OU=Groups,%s' % (group, BASE_DN) for group in random.sample(range(200), random.randint(1, 15))]),
+                ('uSNChanged', [str(random.randint(10000, 900000))]),
+                ('department', ['Department %d' % (index % 20)]),
+                ('name', [name]),
+                ('objectGUID', [bytes(bytearray(random.randint(0, 255) for _ in range(16)))]),
+                ('userAccountControl', [random.choice(['512', '514', '66048'])]),
+                ('badPwdCount', ['0']),
+                ('codePage', ['0']),
+                ('countryCode', ['0']),
+                ('badPasswordTime', [timestamp]),
+                ('lastLogoff', ['0']),
+                ('lastLogon', [timestamp]),
+                ('pwdLastSet', [timestamp]),
+                ('primaryGroupID', ['513']),
+                ('objectSid', [object_sid(random, 1000 + index)]),
+                ('accountExpires', ['9223372036854775807']),
+                ('logonCount', [str(random.randint(0, 3000))]),
+                ('sAMAccountName', ['user%05d' % index]),
+                ('sAMAccountType', ['805306368']),
+                ('userPrincipalName', ['user%05d@example.com' % index]),
+                ('objectCategory', ['CN=Person,CN=Schema,CN=Configuration,%s' % BASE_DN]),
+                ('dSCorePropagationData', ['20200101000000.0Z', '16010101000000.0Z']),
+                ('lastLogonTimestamp', [timestamp]),
+                ('mail', ['user%05d@example.com' % index])]
+
+
+def ad_group(random, name, members, member_attribute='member'):
+    dn = 'CN=%s,OU=Groups,%s' % (name, BASE_DN)
+    return dn, [('objectClass', ['top', 'group']),
+                ('cn', [name]),
+                (member_attribute, ['CN=User %05d,OU=Users,OU=Department %d,%s' % (index, index % 20, BASE_DN) for index in range(members)]),
+                ('distinguishedName', [dn]),
+                ('instanceType', ['4']),
+                ('whenCreated', ['20190101120000.0Z']),
+                ('whenChanged', ['20200101120000.0Z']),
+                ('name', [name]),
+                ('objectGUID', [bytes(bytearray(random.randint(0, 255) for _ in range(16)))]),
+                ('objectSid', [object_sid(random, 5000)]),
+                ('sAMAccountName', [name]),
+                ('sAMAccountType', ['268435456']),
+                ('groupType', ['-2147483646']),
+                ('objectCategory', ['CN=Group,CN=Schema,CN=Configuration,%s' % BASE_DN])]
+
+
+def schema_entry(random):
+    syntaxes = ['1.3.6.1.4.1.1466.115.121.1.15', '1.3.6.1.4.1.1466.115.121.1.27', '1.3.6.1.4.1.1466.115.121.1.12', '1.3.6.1.4.1.1466.115.121.1.24', '1.3.6.1.4.1.1466.115.121.1.40']
+    attribute_types = ["( 1.2.840.113556.1.4.%d NAME 'attribute%d' SYNTAX '%s'%s )" % (index, index, random.choice(syntaxes), random.choice([' SINGLE-VALUE', '', ' SINGLE-VALUE NO-USER-MODIFICATION'])) for index in range(1000)]
+    object_classes = ["( 1.2.840.113556.1.5.%d NAME 'class%d' SUP top %s MUST (cn ) MAY (%s ) )" % (index, index, random.choice(['STRUCTURAL', 'AUXILIARY', 'ABSTRACT']), ' $ '.join('attribute%d' % attribute for attribute in random.sample(range(1000), 20))) for index in range(200)]
+    dit_content_rules = ["( 1.2.840.113556.1.5.%d NAME 'class%d' AUX ( class%d ) MAY (%s ) )" % (index, index, index + 1, ' $ '.join('attribute%d' % attribute for attribute in random.sample(range(1000), 10))) for index in range(100)]
+    return 'CN=Aggregate,CN=Schema,CN=Configuration,%s' % BASE_DN, [('objectClass', ['top', 'subSchema']),
+                                                                    ('cn', ['Aggregate']),
+                                                                    ('attributeTypes', attribute_types),
+                                                                    ('objectClasses', object_classes),
+                                                                    ('dITContentRules', dit_content_rules),
+                                                                    ('modifyTimeStamp', ['20200101120000.0Z'])]
+
+
+def record():
+    random = Random(20201120)
+    streams = dict()  # lists of encoded messages
+    streams['ad_users'] = [encode_message_fast(2, search_result_entry(*ad_user(random, index))) for index in range(200)]
+    streams['big_groups'] = [encode_message_fast(2, search_result_entry(*ad_group(random, 'Big group', 1500, 'member;range=0-1499'))),
+                             encode_message_fast(2, search_result_entry(*ad_group(random, 'Huge group', 5000)))]
+    streams['schema'] = [encode_message_fast(2, search_result_entry(*schema_entry(random)))]
+    for name in ['ad_users', 'big_groups', 'schema']:
+        streams[name].append(encode_message_fast(2, search_result_done()))
+    streams['paged_search'] = []
+    for page in range(10):  # a message id for each page
+        streams['paged_search'] += [encode_message_fast(page + 2, search_result_entry('CN=User %05d,OU=Users,%s' % (page * 100 + index, BASE_DN), [('cn', ['User %05d' % (page * 100 + index)]), ('mail', ['user%05d@example.com' % (page * 100 + index)])])) for index in range(100)]
+        streams['paged_search'].append(encode_message_fast(page + 2, search_result_done(), paged_search_control(0, ('cookie-%d' % page) if page < 9 else '')))
+    for name in CAPTURES:
+        with open(path.join(CAPTURES_PATH, name + '.ber'), 'wb') as capture_file:
+            capture_file.write(b''.join(streams[name]))
+
+
+def load(name):
+    """
+    Returns the list of the BER encoded messages of a recorded stream
+    """
+    with open(path.join(CAPTURES_PATH, name + '.ber'), 'rb') as capture_file:
+        data = capture_file.read()
+    messages = []
+    while data:
+        length = BaseStrategy.compute_ldap_message_size(data)
+        messages.append(data[:length])
+        data = data[length:]
+    return messages
+
+
+if __name__ == '__main__':
+    record()
+    for name in CAPTURES:
+        messages = load(name)
+        print('%-14s %5d messages %9d bytes' % (name, len(messages), sum(len(message) for message in messages)))
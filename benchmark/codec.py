@@ -0,0 +1,187 @@
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Codec micro-benchmark on the recorded response streams of benchmark.captures
+# Measures, for each stream, the BER decoding with the fast decoder and with pyasn1 and the conversion of the decoded
+# messages to the response dicts (with and without the schema formatters), and the encoding of the most common
+# requests with the fast encoder and with pyasn1. Reports operations/sec and the peak of memory allocated while
+# running each benchmark once (Python 3 only)
+# usage: python -m benchmark.codec [--repeat n] [--save results.json] [--compare results.json] [--threshold percent]
+# with --compare the exit code is 1 if any benchmark is slower than the saved one by more than threshold percent
+
+import sys
+import json
+from argparse import ArgumentParser
+from time import time
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+from ldap3 import Server, Connection, SUBTREE, DEREF_ALWAYS, OFFLINE_AD_2012_R2
+from ldap3.operation.add import add_operation, add_operation_fast
+from ldap3.operation.modify import modify_operation, modify_operation_fast
+from ldap3.operation.search import search_operation, search_operation_fast
+from ldap3.protocol.rfc4511 import LDAPMessage, MessageID, ProtocolOp
+from ldap3.utils.asn1 import decoder, decode_message_fast, encode, encode_message_fast
+from benchmark.captures import CAPTURES, load
+
+SEARCH_REQUEST = ('DC=example,DC=com', '(&(objectClass=person)(|(sAMAccountName=user00042)(mail=user00042@example.com)))', SUBTREE, DEREF_ALWAYS, ['cn', 'mail', 'memberOf', 'objectGUID'], 0, 0, False, True, True)
+ADD_REQUEST = ('CN=User 99999,OU=Users,DC=example,DC=com', {'objectClass': ['top', 'person', 'organizationalPerson', 'user'], 'cn': 'User 99999', 'sn': 'Surname99999', 'givenName': 'User', 'sAMAccountName': 'user99999', 'mail': 'user99999@example.com', 'userAccountControl': '512'}, True)
+MODIFY_REQUEST = ('CN=User 00042,OU=Users,DC=example,DC=com', {'mail': [(2, ['user00042@example.org'])], 'memberOf': [(0, ['CN=Group %d,OU=Groups,DC=example,DC=com' % group for group in range(5)])]}, True)
+ENCODING_OPERATIONS = 1000
+
+
+def pyasn1_message(message_id, message_type, request):
+    ldap_message = LDAPMessage()
+    ldap_message['messageID'] = MessageID(message_id)
+    ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
+    return ldap_message
+
+
+def decode_fast(messages, strategy):
+    for message in messages:
+        decode_message_fast(message)
+
+
+def decode_pyasn1(messages, strategy):
+    for message in messages:
+        decoder.decode(message, asn1Spec=LDAPMessage())
+
+
+def to_dict_fast(decoded_messages, strategy):
+    for decoded_message in decoded_messages:
+        strategy.decode_response_fast(decoded_message)
+
+
+def to_dict_pyasn1(decoded_messages, strategy):
+    for decoded_message in decoded_messages:
+        strategy.decode_response(decoded_message)
+
+
+def encode_search_fast(operations, strategy):
+    for message_id in range(operations):
+        encode_message_fast(message_id, search_operation_fast(*SEARCH_REQUEST))
+
+
+def encode_search_pyasn1(operations, strategy):
+    for message_id in range(operations):
+        encode(pyasn1_message(message_id, 'searchRequest', search_operation(*SEARCH_REQUEST)))
+
+
+def encode_add_fast(operations, strategy):
+    for message_id in range(operations):
+        encode_message_fast(message_id, add_operation_fast(*ADD_REQUEST))
+
+
+def encode_add_pyasn1(operations, strategy):
+    for message_id in range(operations):
+        encode(pyasn1_message(message_id, 'addRequest', add_operation(*ADD_REQUEST)))
+
+
+def encode_modify_fast(operations, strategy):
+    for message_id in range(operations):
+        encode_message_fast(message_id, modify_operation_fast(*MODIFY_REQUEST))
+
+
+def encode_modify_pyasn1(operations, strategy):
+    for message_id in range(operations):
+        encode(pyasn1_message(message_id, 'modifyRequest', modify_operation(*MODIFY_REQUEST)))
+
+
+def measure(function, data, operations, strategy, repeat):
+    """
+    Returns the best operations/sec of repeat runs and the peak of memory allocated in KB while running once
+    """
+    best = None
+    for _ in range(repeat):
+        start = time()
+        function(data, strategy)
+        elapsed = time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = None
+    if tracemalloc:
+        tracemalloc.start()
+        function(data, strategy)
+        peak = tracemalloc.get_traced_memory()[1] / 1024.0
+        tracemalloc.stop()
+    return operations / best if best else float('inf'), peak
+
+
+def benchmarks():
+    """
+    Yields name, function, data, number of operations and strategy of each benchmark
+    """
+    schema_strategy = Connection(Server('dummy', get_info=OFFLINE_AD_2012_R2)).strategy  # entries formatted with the AD schema
+    raw_strategy = Connection(Server('dummy'), check_names=False).strategy
+    for capture in CAPTURES:
+        messages = load(capture)
+        fast_decoded = [decode_message_fast(message) for message in messages]
+        pyasn1_decoded = [decoder.decode(message, asn1Spec=LDAPMessage())[0] for message in messages]
+        yield 'decode %s fast' % capture, decode_fast, messages, len(messages), None
+        yield 'decode %s pyasn1' % capture, decode_pyasn1, messages, len(messages), None
+        yield 'to dict %s fast' % capture, to_dict_fast, fast_decoded, len(messages), raw_strategy
+        yield 'to dict %s fast schema' % capture, to_dict_fast, fast_decoded, len(messages), schema_strategy
+        yield 'to dict %s pyasn1 schema' % capture, to_dict_pyasn1, pyasn1_decoded, len(messages), schema_strategy
+    for operation, fast_function, pyasn1_function in (('search', encode_search_fast, encode_search_pyasn1),
+                                                      ('add', encode_add_fast, encode_add_pyasn1),
+                                                      ('modify', encode_modify_fast, encode_modify_pyasn1)):
+        yield 'encode %s fast' % operation, fast_function, ENCODING_OPERATIONS, ENCODING_OPERATIONS, raw_strategy
+        yield 'encode %s pyasn1' % operation, pyasn1_function, ENCODING_OPERATIONS, ENCODING_OPERATIONS, raw_strategy
+
+
+def main(arguments):
+    parser = ArgumentParser(description='ldap3 codec benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each benchmark, the best is reported')
+    parser.add_argument('--save', help='save the results in a json file')
+    parser.add_argument('--compare', help='compare the results with the ones saved in a json file')
+    parser.add_argument('--threshold', type=float, default=10.0, help='percent of slowdown reported as a regression')
+    options = parser.parse_args(arguments)
+    baseline = None
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    results = dict()
+    regressions = []
+    print('%-36s %14s %14s %10s' % ('benchmark', 'ops/sec', 'peak KB', 'change'))
+    for name, function, data, operations, strategy in benchmarks():
+        operations_per_second, peak = measure(function, data, operations, strategy, options.repeat)
+        results[name] = {'ops': operations_per_second, 'peak': peak}
+        change = ''
+        if baseline and name in baseline:
+            percent = (operations_per_second / baseline[name]['ops'] - 1.0) * 100.0
+            change = '%+.1f%%' % percent
+            if percent < -options.threshold:
+                regressions.append(name)
+                change += ' !'
+        print('%-36s %14.1f %14s %10s' % (name, operations_per_second, '%.1f' % peak if peak is not None else 'n/a', change))
+
+    if options.save:
+        with open(options.save, 'w') as results_file:
+            json.dump(results, results_file, indent=4, sort_keys=True)
+    if regressions:
+        print('%d benchmarks slower than the baseline by more than %.1f%%: %s' % (len(regressions), options.threshold, ', '.join(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
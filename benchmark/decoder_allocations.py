@@ -0,0 +1,90 @@
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Measures time and memory allocated by the fast BER decoder while decoding a search response stream
+# usage: python -m benchmark.decoder_allocations [number of entries]
+
+import sys
+from time import time
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+from ldap3 import Server, Connection
+from ldap3.protocol.rfc4511 import LDAPMessage
+from ldap3.utils.asn1 import decoder, decode_message_fast, encode_message_fast, encode_sequence_fast, encode_octet_string_fast, encode_integer_fast
+
+
+def search_result_entry(dn, attributes):
+    attribute_list = [encode_sequence_fast([encode_octet_string_fast(attribute), encode_sequence_fast([encode_octet_string_fast(value) for value in values], 0x31)]) for attribute, values in attributes]
+    return encode_sequence_fast([encode_octet_string_fast(dn), encode_sequence_fast(attribute_list)], 0x64)  # [APPLICATION 4] SearchResultEntry
+
+
+def search_response(entries):
+    messages = []
+    for index in range(entries):
+        dn = 'CN=User %d,OU=Users,DC=example,DC=com' % index
+        messages.append(encode_message_fast(2, search_result_entry(dn, [('objectClass', ['top', 'person', 'organizationalPerson', 'user']),
+                                                                         ('cn', ['User %d' % index]),
+                                                                         ('sAMAccountName', ['user%d' % index]),
+                                                                         ('mail', ['user%d@example.com' % index]),
+                                                                         ('memberOf', ['CN=Group %d,OU=Groups,DC=example,DC=com' % group for group in range(10)]),
+                                                                         ('objectGUID', [b'\x01\x02\x03\x04' * 4]),
+                                                                         ('userAccountControl', ['512'])])))
+    messages.append(encode_message_fast(2, encode_sequence_fast([encode_integer_fast(0, 0x0A), encode_octet_string_fast(''), encode_octet_string_fast('')], 0x65)))  # [APPLICATION 5] SearchResultDone
+    return messages
+
+
+def decode_fast(strategy, messages):
+    for message in messages:  # decoded responses are discarded, so the peak is the memory needed to decode a single message
+        strategy.decode_response_fast(decode_message_fast(message))
+
+
+def decode_pyasn1(strategy, messages):
+    for message in messages:
+        strategy.decode_response(decoder.decode(message, asn1Spec=LDAPMessage())[0])
+
+
+def measure(name, function, strategy, messages):
+    start = time()
+    function(strategy, messages)
+    elapsed = time() - start
+    if tracemalloc:
+        tracemalloc.start()
+        function(strategy, messages)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocations = 'peak %.1f KB' % (peak / 1024.0)
+    else:
+        allocations = 'not available'
+    print('%-8s %6d messages in %.3f seconds (%d messages/sec) - allocated memory: %s' % (name, len(messages), elapsed, len(messages) / elapsed, allocations))
+
+
+def main(entries):
+    strategy = Connection(Server('dummy'), check_names=False).strategy
+    messages = search_response(entries)
+    print('%d bytes in the search response' % sum(len(message) for message in messages))
+    measure('fast', decode_fast, strategy, messages)
+    measure('pyasn1', decode_pyasn1, strategy, messages)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -82,6 +82,8 @@ REUSABLE = 'REUSABLE'
 MOCK_SYNC = 'MOCK_SYNC'
 MOCK_ASYNC = 'MOCK_ASYNC'
 ASYNC_STREAM = 'ASYNC_STREAM'
+ASYNCIO = 'ASYNCIO'
+MULTIPLEXED = 'MULTIPLEXED'
 
 # get rootDSE info
 NONE = 'NO_INFO'
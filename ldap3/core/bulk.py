@@ -0,0 +1,173 @@
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+from time import time
+
+from .. import STRING_TYPES
+from .exceptions import LDAPOperationResult, LDAPExceptionError, LDAPCommunicationError, LDAPResponseTimeoutError, LDAPMaximumRetriesError, LDAPInvalidValueError
+from .results import RESULT_SUCCESS, RESULT_COMPARE_TRUE, RESULT_COMPARE_FALSE
+from ..utils.log import log, log_enabled, BASIC, ERROR, PROTOCOL
+
+BULK_OPERATIONS = ['add', 'delete', 'modify', 'modify_dn', 'compare']
+
+
+class BulkResult(object):
+    """
+    Outcome of an operation executed by Connection.bulk()
+    result is the result of the operation as in connection.result, None if the request has not been sent,
+    error is the exception raised by the operation, if any
+    """
+    __slots__ = ('index', 'operation', 'result', 'error', 'message_id')
+
+    def __init__(self, index, operation):
+        self.index = index
+        self.operation = operation
+        self.result = None
+        self.error = None
+        self.message_id = None
+
+    @property
+    def succeeded(self):
+        return self.error is None and self.result is not None and self.result['result'] in [RESULT_SUCCESS, RESULT_COMPARE_TRUE, RESULT_COMPARE_FALSE]
+
+    def __repr__(self):
+        return 'BulkResult(index={0.index!r}, operation={0.operation!r}, result={0.result!r}, error={0.error!r})'.format(self)
+
+
+class BulkOperation(object):
+    """
+    Iterator returned by Connection.bulk()
+    Keeps up to window requests in flight and yields a BulkResult for each operation, in the order of the operations.
+    Failed operations are collected in failures, the run is stopped only by communication errors
+    """
+
+    def __init__(self, connection, operations, window):
+        self.connection = connection
+        self.window = window
+        self.completed = 0
+        self.failures = []
+        self.start_time = None
+        self.stop_time = None
+        self._results = self._run(operations)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._results)
+
+    next = __next__  # Python 2
+
+    def __repr__(self):
+        return 'BulkOperation(window={0.window!r}, completed={0.completed!r}, failures={1}, ops_per_second={0.ops_per_second:.1f})'.format(self, len(self.failures))
+
+    @property
+    def elapsed(self):
+        if self.start_time is None:
+            return 0.0
+        return (self.stop_time or time()) - self.start_time
+
+    @property
+    def ops_per_second(self):
+        elapsed = self.elapsed
+        return self.completed / elapsed if elapsed else 0.0
+
+    def run(self):
+        """
+        Executes all the operations, returns the failures
+        """
+        for _ in self:
+            pass
+        return self.failures
+
+    def _run(self, operations):
+        in_flight = deque()
+        self.start_time = time()
+        if log_enabled(BASIC):
+            log(BASIC, 'start BULK operations with window <%d> via <%s>', self.window, self.connection)
+        try:
+            for index, operation in enumerate(operations):
+                while len(in_flight) >= self.window:
+                    yield self._complete(in_flight.popleft())
+                in_flight.append(self._send(BulkResult(index, operation)))
+            while in_flight:
+                yield self._complete(in_flight.popleft())
+        finally:
+            self.stop_time = time()
+        if log_enabled(BASIC):
+            log(BASIC, 'done BULK operations, %d completed with %d failures at %.1f operations per second', self.completed, len(self.failures), self.ops_per_second)
+
+    def _send(self, bulk_result):
+        """
+        Sends the request of the operation, the response is read later when the window is full
+        """
+        connection = self.connection
+        strategy = connection.strategy
+        try:
+            if isinstance(bulk_result.operation, STRING_TYPES) or not bulk_result.operation or bulk_result.operation[0] not in BULK_OPERATIONS:
+                raise LDAPInvalidValueError('invalid bulk operation ' + repr(bulk_result.operation))
+            method = getattr(connection, bulk_result.operation[0])
+            if strategy.sync and not strategy.no_real_dsa:  # the response is read by get_response() as in the asynchronous strategies
+                with connection.connection_lock:
+                    strategy._pipelining = True
+                    try:
+                        return_value = method(*bulk_result.operation[1:])
+                    finally:
+                        strategy._pipelining = False
+            else:
+                return_value = method(*bulk_result.operation[1:])
+            if strategy.thread_safe:  # status, result, response, request
+                return_value = return_value[0]
+            if strategy.sync and strategy.no_real_dsa:  # operation already executed by the mock strategy
+                bulk_result.result = connection.result
+            else:
+                bulk_result.message_id = return_value
+        except LDAPOperationResult as e:
+            bulk_result.result = self._exception_result(e)
+            bulk_result.error = e
+        except (LDAPCommunicationError, LDAPResponseTimeoutError, LDAPMaximumRetriesError):
+            raise
+        except LDAPExceptionError as e:
+            bulk_result.error = e
+
+        return bulk_result
+
+    def _complete(self, bulk_result):
+        """
+        Waits for the response of the operation and collects the failure
+        """
+        if bulk_result.message_id is not None:
+            try:
+                _, bulk_result.result = self.connection.get_response(bulk_result.message_id)
+            except LDAPOperationResult as e:  # raise_exceptions
+                bulk_result.result = self._exception_result(e)
+                bulk_result.error = e
+        self.completed += 1
+        if not bulk_result.succeeded:
+            if log_enabled(ERROR):
+                log(ERROR, 'bulk operation <%d> failed with <%s> via <%s>', bulk_result.index, bulk_result.error or bulk_result.result, self.connection)
+            self.failures.append(bulk_result)
+        elif log_enabled(PROTOCOL):
+            log(PROTOCOL, 'bulk operation <%d> result <%s> via <%s>', bulk_result.index, bulk_result.result, self.connection)
+        return bulk_result
+
+    @staticmethod
+    def _exception_result(e):
+        return {'result': e.result, 'description': e.description, 'dn': e.dn, 'message': e.message, 'type': e.type, 'referrals': None}
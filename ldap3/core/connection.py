@@ -23,13 +23,14 @@
 # along with ldap3 in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 from copy import deepcopy, copy
+from contextlib import contextmanager
 from os import linesep
-from threading import RLock, Lock
+from threading import RLock, Lock, local
 from functools import reduce
 import json
 
 from .. import ANONYMOUS, SIMPLE, SASL, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE, get_config_parameter, DEREF_ALWAYS, \
-    SUBTREE, ASYNC, SYNC, NO_ATTRIBUTES, ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, MODIFY_INCREMENT, LDIF, ASYNC_STREAM, \
+    SUBTREE, ASYNC, SYNC, NO_ATTRIBUTES, ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, MODIFY_INCREMENT, LDIF, ASYNC_STREAM, ASYNCIO, MULTIPLEXED, \
     RESTARTABLE, ROUND_ROBIN, REUSABLE, AUTO_BIND_DEFAULT, AUTO_BIND_NONE, AUTO_BIND_TLS_BEFORE_BIND, SAFE_SYNC, \
     AUTO_BIND_TLS_AFTER_BIND, AUTO_BIND_NO_TLS, STRING_TYPES, SEQUENCE_TYPES, MOCK_SYNC, MOCK_ASYNC, NTLM, EXTERNAL,\
     DIGEST_MD5, GSSAPI, PLAIN, DSA, SCHEMA, ALL
@@ -38,15 +39,15 @@ from .results import RESULT_SUCCESS, RESULT_COMPARE_TRUE, RESULT_COMPARE_FALSE
 from ..extend import ExtendedOperationsRoot
 from .pooling import ServerPool
 from .server import Server
-from ..operation.abandon import abandon_operation, abandon_request_to_dict
-from ..operation.add import add_operation, add_request_to_dict
-from ..operation.bind import bind_operation, bind_request_to_dict
-from ..operation.compare import compare_operation, compare_request_to_dict
-from ..operation.delete import delete_operation, delete_request_to_dict
-from ..operation.extended import extended_operation, extended_request_to_dict
-from ..operation.modify import modify_operation, modify_request_to_dict
-from ..operation.modifyDn import modify_dn_operation, modify_dn_request_to_dict
-from ..operation.search import search_operation, search_request_to_dict
+from ..operation.abandon import abandon_operation, abandon_operation_fast, abandon_request_to_dict, abandon_request_to_dict_fast
+from ..operation.add import add_operation, add_operation_fast, add_request_to_dict, add_request_to_dict_fast
+from ..operation.bind import bind_operation, bind_operation_fast, bind_request_to_dict, bind_request_to_dict_fast
+from ..operation.compare import compare_operation, compare_operation_fast, compare_request_to_dict, compare_request_to_dict_fast
+from ..operation.delete import delete_operation, delete_operation_fast, delete_request_to_dict, delete_request_to_dict_fast
+from ..operation.extended import extended_operation, extended_operation_fast, extended_request_to_dict, extended_request_to_dict_fast
+from ..operation.modify import modify_operation, modify_operation_fast, modify_request_to_dict, modify_request_to_dict_fast
+from ..operation.modifyDn import modify_dn_operation, modify_dn_operation_fast, modify_dn_request_to_dict, modify_dn_request_to_dict_fast
+from ..operation.search import search_operation, search_operation_fast, search_operation_template, search_request_to_dict, search_request_to_dict_fast, FILTER_PLACEHOLDER
 from ..protocol.rfc2849 import operation_to_ldif, add_ldif_header
 from ..protocol.sasl.digestMd5 import sasl_digest_md5
 from ..protocol.sasl.external import sasl_external
@@ -60,17 +61,25 @@ from ..strategy.restartable import RestartableStrategy
 from ..strategy.ldifProducer import LdifProducerStrategy
 from ..strategy.mockSync import MockSyncStrategy
 from ..strategy.asyncStream import AsyncStreamStrategy
-from ..operation.unbind import unbind_operation
+try:
+    from ..strategy.asyncioStrategy import AsyncioStrategy
+except (ImportError, SyntaxError):  # Python 2
+    AsyncioStrategy = None
+from ..strategy.multiplexed import MultiplexedStrategy
+from ..operation.unbind import unbind_operation, unbind_operation_fast
 from ..protocol.rfc2696 import paged_search_control
 from .usage import ConnectionUsage
+from .bulk import BulkOperation
 from .tls import Tls
 from .exceptions import LDAPUnknownStrategyError, LDAPBindError, LDAPUnknownAuthenticationMethodError, \
     LDAPSASLMechanismNotSupportedError, LDAPObjectClassError, LDAPConnectionIsReadOnlyError, LDAPChangeError, LDAPExceptionError, \
-    LDAPObjectError, LDAPSocketReceiveError, LDAPAttributeError, LDAPInvalidValueError, LDAPInvalidPortError, LDAPStartTLSError
+    LDAPObjectError, LDAPSocketReceiveError, LDAPAttributeError, LDAPInvalidValueError, LDAPInvalidPortError, LDAPStartTLSError, \
+    LDAPInvalidFilterError
 
-from ..utils.conv import escape_bytes, prepare_for_stream, check_json_dict, format_json, to_unicode
+from ..utils.conv import escape_bytes, prepare_for_stream, check_json_dict, format_json, to_unicode, escape_filter_chars
 from ..utils.log import log, log_enabled, ERROR, BASIC, PROTOCOL, EXTENDED, get_library_log_hide_sensitive_data
 from ..utils.dn import safe_dn
+from ..utils.asn1 import decode_request_fast
 from ..utils.port_validators import check_port_and_port_list
 
 
@@ -87,7 +96,11 @@ CLIENT_STRATEGIES = [SYNC,
                      REUSABLE,
                      MOCK_SYNC,
                      MOCK_ASYNC,
-                     ASYNC_STREAM]
+                     ASYNC_STREAM,
+                     MULTIPLEXED]
+
+if AsyncioStrategy:  # not available in Python 2
+    CLIENT_STRATEGIES.append(ASYNCIO)
 
 
 def _format_socket_endpoint(endpoint):
@@ -117,6 +130,79 @@ def _format_socket_endpoints(sock):
     return '<no socket>'
 
 
+class OperationState(object):
+    """
+    Outcome of the last operation performed on a Connection
+    """
+    def __init__(self):
+        self.request = None
+        self.response = None
+        self.result = None
+        self.last_error = None
+        self.entries = []
+
+
+class ThreadOperationState(OperationState, local):
+    """
+    Outcome of the last operation performed on a Connection, each thread has its own
+    """
+
+
+class OperationStateAttribute(object):
+    """
+    Connection attribute stored in the operation state of the connection
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return getattr(instance._state, self.name)
+
+    def __set__(self, instance, value):
+        setattr(instance._state, self.name, value)
+
+
+class NoLock(object):
+    """
+    Used as connection_lock when operations from different threads must not be serialized
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+class PreparedSearch(object):
+    """
+    A search prepared by Connection.prepare_search(), executed with search(value, ...)
+    """
+    def __init__(self, connection, template, search_base, search_filter, search_scope, dereference_aliases, attributes, size_limit, time_limit, types_only, controls, auto_escape):
+        self.connection = connection
+        self.template = template
+        self.search_base = search_base
+        self.search_filter = search_filter
+        self.search_scope = search_scope
+        self.dereference_aliases = dereference_aliases
+        self.attributes = attributes
+        self.size_limit = size_limit
+        self.time_limit = time_limit
+        self.types_only = types_only
+        self.controls = controls
+        self.auto_escape = auto_escape
+
+    def __repr__(self):
+        return 'PreparedSearch(search_base={0.search_base!r}, search_filter={0.search_filter!r}, attributes={0.attributes!r})'.format(self)
+
+    def search(self, *values):
+        """
+        Perform the search with the values in place of the placeholders of the filter, returns as Connection.search()
+        """
+        return self.connection._search_prepared(self, values)
+
+
 class Connection(object):
     """Main ldap connection class.
 
@@ -180,7 +266,27 @@ class Connection(object):
     :type source_port: int
     :param source_port_list: a list of source ports to choose from when opening the connection to the server. Cannot be specified with source_port
     :type source_port_list: list
+    :param fast_encoder: build the BER encoded requests directly, without using pyasn1 objects
+    :type fast_encoder: bool
+    :param lazy_attributes: convert the attribute values of search result entries only when they are read (requires fast_decoder)
+    :type lazy_attributes: bool
+    :param pool_min_size: minimum number of connections kept in the pool of pooled strategies, defaults to pool_size
+    :type pool_min_size: int
+    :param pool_max_size: maximum number of connections the pool of pooled strategies can grow to, defaults to pool_size
+    :type pool_max_size: int
+    :param decode_executor: a concurrent.futures Executor (thread or process pool) that decodes the search result entries in parallel (requires fast_decoder)
+    :type decode_executor: Executor
+    :param max_buffered_entries: maximum number of responses received by the ASYNC strategy and not yet read, the socket is not read while the limit is exceeded (not available for the MULTIPLEXED strategy)
+    :type max_buffered_entries: int
+    :param max_buffered_bytes: maximum size of the responses received by the ASYNC strategy and not yet read, the socket is not read while the limit is exceeded
+    :type max_buffered_bytes: int
     """
+    request = OperationStateAttribute('request')
+    response = OperationStateAttribute('response')
+    result = OperationStateAttribute('result')
+    last_error = OperationStateAttribute('last_error')
+    _entries = OperationStateAttribute('entries')
+
     def __init__(self,
                  server,
                  user=None,
@@ -211,9 +317,17 @@ class Connection(object):
                  pool_keepalive=None,
                  source_address=None,
                  source_port=None,
-                 source_port_list=None):
+                 source_port_list=None,
+                 fast_encoder=False,
+                 lazy_attributes=False,
+                 pool_min_size=None,
+                 pool_max_size=None,
+                 decode_executor=None,
+                 max_buffered_entries=None,
+                 max_buffered_bytes=None):
 
         conf_default_pool_name = get_config_parameter('DEFAULT_THREADED_POOL_NAME')
+        self._state = OperationState()
         self.connection_lock = RLock()  # re-entrant lock to ensure that operations in the Connection object are executed atomically in the same thread
         with self.connection_lock:
             if client_strategy not in CLIENT_STRATEGIES:
@@ -272,6 +386,8 @@ class Connection(object):
             self.cred_store = cred_store
             self.pool_lifetime = pool_lifetime
             self.pool_keepalive = pool_keepalive
+            self.pool_min_size = pool_min_size
+            self.pool_max_size = pool_max_size
             self.starting_tls = False
             self.check_names = check_names
             self.raise_exceptions = raise_exceptions
@@ -279,6 +395,11 @@ class Connection(object):
             self.extend = ExtendedOperationsRoot(self)
             self._entries = []
             self.fast_decoder = fast_decoder
+            self.fast_encoder = fast_encoder
+            self.lazy_attributes = lazy_attributes
+            self.decode_executor = decode_executor
+            self.max_buffered_entries = max_buffered_entries
+            self.max_buffered_bytes = max_buffered_bytes
             self.receive_timeout = receive_timeout
             self.empty_attributes = return_empty_attributes
             self.use_referral_cache = use_referral_cache
@@ -339,20 +460,41 @@ class Connection(object):
                 self.strategy = MockAsyncStrategy(self)
             elif self.strategy_type == ASYNC_STREAM:
                 self.strategy = AsyncStreamStrategy(self)
+            elif self.strategy_type == ASYNCIO:
+                self.strategy = AsyncioStrategy(self)
+                self.lazy = False
+                self.auto_referrals = False  # referrals and ranges would be followed with blocking operations
+                self.auto_range = False
+            elif self.strategy_type == MULTIPLEXED:
+                self.strategy = MultiplexedStrategy(self)
+                self.lazy = False
             else:
                 self.last_error = 'unknown strategy'
                 if log_enabled(ERROR):
                     log(ERROR, '%s for <%s>', self.last_error, self)
                 raise LDAPUnknownStrategyError(self.last_error)
 
+            if self.strategy.no_real_dsa:  # mock and ldif strategies work on the pyasn1 request objects
+                self.fast_encoder = False
+
+            if self.strategy.multiplexed:  # operations from different threads run at the same time, each thread sees its own request, response and result
+                if self.max_buffered_entries is not None or self.max_buffered_bytes is not None:  # a large response read by a thread would stop the responses of the other threads
+                    self.last_error = 'max_buffered_entries and max_buffered_bytes are not available for the ' + self.strategy_type + ' strategy'
+                    if log_enabled(ERROR):
+                        log(ERROR, '%s for <%s>', self.last_error, self)
+                    raise LDAPInvalidValueError(self.last_error)
+                self._state = ThreadOperationState()
+                self.connection_lock = NoLock()
+
             # maps strategy functions to connection functions
             self.send = self.strategy.send
             self.open = self.strategy.open
             self.get_response = self.strategy.get_response
+            self.iter_response = self.strategy.iter_response
             self.post_send_single_response = self.strategy.post_send_single_response
             self.post_send_search = self.strategy.post_send_search
 
-            if not self.strategy.no_real_dsa:
+            if not self.strategy.no_real_dsa and not self.strategy.awaitable:  # ASYNCIO performs the automatic bind when the connection is opened
                 self._do_auto_bind()
             # else:  # for strategies with a fake server set get_info to NONE if server hasn't a schema
             #     if self.server and not self.server.schema:
@@ -415,7 +557,8 @@ class Connection(object):
             'tls not started' if not self.tls_started else('deferred start_tls' if self._deferred_start_tls else 'tls started'),
             'listening' if self.listening else 'not listening',
             self.strategy.__class__.__name__ if hasattr(self, 'strategy') else 'No strategy',
-            'internal decoder' if self.fast_decoder else 'pyasn1 decoder'
+            'internal decoder' if self.fast_decoder else 'pyasn1 decoder',
+            'internal encoder' if self.fast_encoder else 'pyasn1 encoder'
         ]
         return ' - '.join(s)
 
@@ -445,6 +588,13 @@ class Connection(object):
         r += '' if self.pool_keepalive is None else ', pool_keepalive={0.pool_keepalive!r}'.format(self)
         r += '' if self.cred_store is None else (', cred_store=' + repr(self.cred_store))
         r += '' if self.fast_decoder is None else (', fast_decoder=' + ('True' if self.fast_decoder else 'False'))
+        r += '' if self.fast_encoder is None else (', fast_encoder=' + ('True' if self.fast_encoder else 'False'))
+        r += '' if self.lazy_attributes is None else (', lazy_attributes=' + ('True' if self.lazy_attributes else 'False'))
+        r += '' if self.pool_min_size is None else ', pool_min_size={0.pool_min_size!r}'.format(self)
+        r += '' if self.pool_max_size is None else ', pool_max_size={0.pool_max_size!r}'.format(self)
+        r += '' if self.decode_executor is None else (', decode_executor=' + repr(self.decode_executor))
+        r += '' if self.max_buffered_entries is None else ', max_buffered_entries={0.max_buffered_entries!r}'.format(self)
+        r += '' if self.max_buffered_bytes is None else ', max_buffered_bytes={0.max_buffered_bytes!r}'.format(self)
         r += '' if self.auto_range is None else (', auto_range=' + ('True' if self.auto_range else 'False'))
         r += '' if self.receive_timeout is None else ', receive_timeout={0.receive_timeout!r}'.format(self)
         r += '' if self.empty_attributes is None else (', return_empty_attributes=' + ('True' if self.empty_attributes else 'False'))
@@ -484,6 +634,13 @@ class Connection(object):
         r += '' if self.pool_keepalive is None else ', pool_keepalive={0.pool_keepalive!r}'.format(self)
         r += '' if self.cred_store is None else (', cred_store=' + repr(self.cred_store))
         r += '' if self.fast_decoder is None else (', fast_decoder=' + 'True' if self.fast_decoder else 'False')
+        r += '' if self.fast_encoder is None else (', fast_encoder=' + ('True' if self.fast_encoder else 'False'))
+        r += '' if self.lazy_attributes is None else (', lazy_attributes=' + ('True' if self.lazy_attributes else 'False'))
+        r += '' if self.pool_min_size is None else ', pool_min_size={0.pool_min_size!r}'.format(self)
+        r += '' if self.pool_max_size is None else ', pool_max_size={0.pool_max_size!r}'.format(self)
+        r += '' if self.decode_executor is None else (', decode_executor=' + repr(self.decode_executor))
+        r += '' if self.max_buffered_entries is None else ', max_buffered_entries={0.max_buffered_entries!r}'.format(self)
+        r += '' if self.max_buffered_bytes is None else ', max_buffered_bytes={0.max_buffered_bytes!r}'.format(self)
         r += '' if self.auto_range is None else (', auto_range=' + ('True' if self.auto_range else 'False'))
         r += '' if self.receive_timeout is None else ', receive_timeout={0.receive_timeout!r}'.format(self)
         r += '' if self.empty_attributes is None else (', return_empty_attributes=' + 'True' if self.empty_attributes else 'False')
@@ -552,6 +709,48 @@ class Connection(object):
                     log(ERROR, '%s for <%s>', exc_type, self)
                 return False  # re-raise LDAPExceptionError
 
+    @contextmanager
+    def batch(self, flush_size=None):
+        """Collects the requests sent in the with block and sends them with a single write
+
+        Messages are sent when the block is exited, when a response is requested or, if flush_size
+        is specified, as soon as the collected messages reach flush_size bytes. Operations return their
+        message id as usual. Useful with the asynchronous strategies to pipeline many requests
+
+        :param flush_size: number of collected bytes that triggers a write
+        :type flush_size: int
+        """
+        with self.connection_lock:
+            self._fire_deferred()
+            self.strategy.start_batch(flush_size)
+        try:
+            yield self
+        finally:
+            with self.connection_lock:
+                self.strategy.stop_batch()
+
+    def bulk(self, operations, window=None):
+        """Executes many add, delete, modify, modify_dn and compare operations keeping up to window requests in flight
+
+        Each operation is a tuple with the name of the Connection method followed by its positional
+        arguments, i.e. ('add', 'cn=user,o=test', 'inetOrgPerson', {'sn': 'user'}). Returns a BulkOperation,
+        an iterator that yields a BulkResult for each operation in the same order of the operations.
+        Failed operations are collected in its failures attribute, its ops_per_second attribute reports the achieved throughput
+
+        :param operations: the operations to execute, can be a generator
+        :type operations: iterable of tuple
+        :param window: maximum number of requests sent and waiting for the response, defaults to the BULK_WINDOW config parameter
+        :type window: int
+        :return: BulkOperation
+        """
+        if self.strategy.awaitable or self.strategy_type == LDIF:
+            self.last_error = 'bulk operations are not available for the ' + self.strategy_type + ' strategy'
+            if log_enabled(ERROR):
+                log(ERROR, '%s for <%s>', self.last_error, self)
+            raise LDAPInvalidValueError(self.last_error)
+
+        return BulkOperation(self, operations, window or get_config_parameter('BULK_WINDOW'))
+
     def bind(self,
              read_server_info=True,
              controls=None):
@@ -578,15 +777,17 @@ class Connection(object):
             else:
                 self._deferred_bind = False
                 self._bind_controls = None
+                if self.strategy.awaitable:  # the connection is opened and the response is waited for in the event loop
+                    return self.strategy.bind(read_server_info, controls)
                 if self.closed:  # try to open connection if closed
                     self.open(read_server_info=False)
                 if self.authentication == ANONYMOUS:
                     if log_enabled(PROTOCOL):
                         log(PROTOCOL, 'performing anonymous BIND for <%s>', self)
                     if not self.strategy.pooled:
-                        request = bind_operation(self.version, self.authentication, self.user, '', auto_encode=self.auto_encode)
+                        request = (bind_operation_fast if self.fast_encoder else bind_operation)(self.version, self.authentication, self.user, '', auto_encode=self.auto_encode)
                         if log_enabled(PROTOCOL):
-                            log(PROTOCOL, 'anonymous BIND request <%s> sent via <%s>', bind_request_to_dict(request), self)
+                            log(PROTOCOL, 'anonymous BIND request <%s> sent via <%s>', bind_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else bind_request_to_dict(request), self)
                         response = self.post_send_single_response(self.send('bindRequest', request, controls))
                     else:
                         response = self.strategy.validate_bind(controls)  # only for REUSABLE
@@ -594,9 +795,9 @@ class Connection(object):
                     if log_enabled(PROTOCOL):
                         log(PROTOCOL, 'performing simple BIND for <%s>', self)
                     if not self.strategy.pooled:
-                        request = bind_operation(self.version, self.authentication, self.user, self.password, auto_encode=self.auto_encode)
+                        request = (bind_operation_fast if self.fast_encoder else bind_operation)(self.version, self.authentication, self.user, self.password, auto_encode=self.auto_encode)
                         if log_enabled(PROTOCOL):
-                            log(PROTOCOL, 'simple BIND request <%s> sent via <%s>', bind_request_to_dict(request), self)
+                            log(PROTOCOL, 'simple BIND request <%s> sent via <%s>', bind_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else bind_request_to_dict(request), self)
                         response = self.post_send_single_response(self.send('bindRequest', request, controls))
                     else:
                         response = self.strategy.validate_bind(controls)  # only for REUSABLE
@@ -739,7 +940,7 @@ class Connection(object):
                 self._deferred_bind = False
                 self._deferred_start_tls = False
             elif not self.closed:
-                request = unbind_operation()
+                request = unbind_operation_fast() if self.fast_encoder else unbind_operation()
                 if log_enabled(PROTOCOL):
                     log(PROTOCOL, 'UNBIND request sent via <%s>', self)
                 self.send('unbindRequest', request, controls)
@@ -748,6 +949,8 @@ class Connection(object):
             if log_enabled(BASIC):
                 log(BASIC, 'done UNBIND operation, result <%s>', True)
 
+            if self.strategy.awaitable:
+                return self.strategy.wait_closed()
             return self._prepare_return_value(True)
 
     def search(self,
@@ -764,7 +967,9 @@ class Connection(object):
                paged_size=None,
                paged_criticality=False,
                paged_cookie=None,
-               auto_escape=None):
+               auto_escape=None,
+               value_callback=None,
+               stream=False):
         """
         Perform an ldap search:
 
@@ -780,8 +985,13 @@ class Connection(object):
           LDAP operation is performed
         - If mssing_attributes == True then an attribute not returned by the server is set to None
         - If auto_escape is set it overrides the Connection auto_escape
+        - If value_callback is set (synchronous strategies only) entries are decoded while
+          they are received and value_callback(dn, attribute_type, raw_value) is called for
+          each attribute value, values are not kept in the response
+        - If stream == True (synchronous strategies only) an iterator is returned instead of the usual return value,
+          responses are received and decoded one at a time while iterating and are not kept in the response,
+          the result is available in the result attribute of the iterator and in connection.result when it is exhausted
         """
-        conf_attributes_excluded_from_check = [v.lower() for v in get_config_parameter('ATTRIBUTES_EXCLUDED_FROM_CHECK')]
         if log_enabled(BASIC):
             log(BASIC, 'start SEARCH operation via <%s>', self)
 
@@ -790,20 +1000,21 @@ class Connection(object):
             if log_enabled(EXTENDED):
                 log(EXTENDED, 'search base sanitized to <%s> for SEARCH operation via <%s>', search_base, self)
 
-        with self.connection_lock:
-            self._fire_deferred()
-            if not attributes:
-                attributes = [NO_ATTRIBUTES]
-            elif attributes == ALL_ATTRIBUTES:
-                attributes = [ALL_ATTRIBUTES]
+        if value_callback and (not self.strategy.sync or self.strategy.no_real_dsa or self.strategy.multiplexed):
+            self.last_error = 'value_callback is not available for the ' + self.strategy_type + ' strategy'
+            if log_enabled(ERROR):
+                log(ERROR, '%s for <%s>', self.last_error, self)
+            raise LDAPInvalidValueError(self.last_error)
 
-            if isinstance(attributes, STRING_TYPES):
-                attributes = [attributes]
+        if stream and (not self.strategy.sync or self.strategy.no_real_dsa or self.strategy.multiplexed or value_callback):
+            self.last_error = 'stream is not available for the ' + self.strategy_type + ' strategy' if not value_callback else 'stream and value_callback cannot be used together'
+            if log_enabled(ERROR):
+                log(ERROR, '%s for <%s>', self.last_error, self)
+            raise LDAPInvalidValueError(self.last_error)
 
-            if get_operational_attributes and isinstance(attributes, list):
-                attributes.append(ALL_OPERATIONAL_ATTRIBUTES)
-            elif get_operational_attributes and isinstance(attributes, tuple):
-                attributes += (ALL_OPERATIONAL_ATTRIBUTES, )  # concatenate tuple
+        with self.connection_lock:
+            self._fire_deferred()
+            attributes = self._search_attributes(attributes, get_operational_attributes)
 
             if isinstance(paged_size, int):
                 if log_enabled(PROTOCOL):
@@ -816,56 +1027,165 @@ class Connection(object):
                     controls = list(controls)
                 controls.append(paged_search_control(paged_criticality, paged_size, paged_cookie))
 
-            if self.server and self.server.schema and self.check_names:
-                for attribute_name in attributes:
-                    if ';' in attribute_name:  # remove tags
-                        attribute_name_to_check = attribute_name.split(';')[0]
-                    else:
-                        attribute_name_to_check = attribute_name
-                    if self.server.schema and attribute_name_to_check.lower() not in conf_attributes_excluded_from_check and attribute_name_to_check not in self.server.schema.attribute_types:
-                        self.last_error = 'invalid attribute type ' + attribute_name_to_check
-                        if log_enabled(ERROR):
-                            log(ERROR, '%s for <%s>', self.last_error, self)
-                        raise LDAPAttributeError(self.last_error)
+            self._check_search_attributes(attributes)
+
+            request = (search_operation_fast if self.fast_encoder else search_operation)(search_base,
+                                                                                         search_filter,
+                                                                                         search_scope,
+                                                                                         dereference_aliases,
+                                                                                         attributes,
+                                                                                         size_limit,
+                                                                                         time_limit,
+                                                                                         types_only,
+                                                                                         self.auto_escape if auto_escape is None else auto_escape,
+                                                                                         self.auto_encode,
+                                                                                         self.server.schema if self.server else None,
+                                                                                         validator=self.server.custom_validator,
+                                                                                         check_names=self.check_names,
+                                                                                         usage=self._usage)
+            if log_enabled(PROTOCOL):
+                log(PROTOCOL, 'SEARCH request <%s> sent via <%s>', search_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else search_request_to_dict(request), self)
+            if stream:
+                self._entries = []
+                return self.strategy.stream_search(self.send('searchRequest', request, controls))
+            if value_callback:
+                self.strategy.value_callback = value_callback
+                try:
+                    response = self.post_send_search(self.send('searchRequest', request, controls))
+                finally:
+                    self.strategy.value_callback = None
+            else:
+                response = self.post_send_search(self.send('searchRequest', request, controls))
+
+            return self._search_return_value(response)
+
+    def _search_attributes(self, attributes, get_operational_attributes):
+        if not attributes:
+            attributes = [NO_ATTRIBUTES]
+        elif attributes == ALL_ATTRIBUTES:
+            attributes = [ALL_ATTRIBUTES]
+
+        if isinstance(attributes, STRING_TYPES):
+            attributes = [attributes]
+
+        if get_operational_attributes and isinstance(attributes, list):
+            attributes.append(ALL_OPERATIONAL_ATTRIBUTES)
+        elif get_operational_attributes and isinstance(attributes, tuple):
+            attributes += (ALL_OPERATIONAL_ATTRIBUTES, )  # concatenate tuple
+
+        return attributes
 
-            request = search_operation(search_base,
-                                       search_filter,
-                                       search_scope,
-                                       dereference_aliases,
-                                       attributes,
-                                       size_limit,
-                                       time_limit,
-                                       types_only,
-                                       self.auto_escape if auto_escape is None else auto_escape,
-                                       self.auto_encode,
-                                       self.server.schema if self.server else None,
-                                       validator=self.server.custom_validator,
-                                       check_names=self.check_names)
+    def _check_search_attributes(self, attributes):
+        if self.server and self.server.schema and self.check_names:
+            conf_attributes_excluded_from_check = [v.lower() for v in get_config_parameter('ATTRIBUTES_EXCLUDED_FROM_CHECK')]
+            for attribute_name in attributes:
+                if ';' in attribute_name:  # remove tags
+                    attribute_name_to_check = attribute_name.split(';')[0]
+                else:
+                    attribute_name_to_check = attribute_name
+                if self.server.schema and attribute_name_to_check.lower() not in conf_attributes_excluded_from_check and attribute_name_to_check not in self.server.schema.attribute_types:
+                    self.last_error = 'invalid attribute type ' + attribute_name_to_check
+                    if log_enabled(ERROR):
+                        log(ERROR, '%s for <%s>', self.last_error, self)
+                    raise LDAPAttributeError(self.last_error)
+
+    def _search_return_value(self, response):
+        self._entries = []
+
+        if isinstance(response, int):  # asynchronous strategy
+            return_value = response
             if log_enabled(PROTOCOL):
-                log(PROTOCOL, 'SEARCH request <%s> sent via <%s>', search_request_to_dict(request), self)
-            response = self.post_send_search(self.send('searchRequest', request, controls))
-            self._entries = []
+                log(PROTOCOL, 'async SEARCH response id <%s> received via <%s>', return_value, self)
+        else:
+            return_value = True if self.result['type'] == 'searchResDone' and len(response) > 0 else False
+            if not return_value and self.result['result'] not in [RESULT_SUCCESS] and not self.last_error:
+                self.last_error = self.result['description']
 
-            if isinstance(response, int):  # asynchronous strategy
-                return_value = response
-                if log_enabled(PROTOCOL):
-                    log(PROTOCOL, 'async SEARCH response id <%s> received via <%s>', return_value, self)
-            else:
-                return_value = True if self.result['type'] == 'searchResDone' and len(response) > 0 else False
-                if not return_value and self.result['result'] not in [RESULT_SUCCESS] and not self.last_error:
-                    self.last_error = self.result['description']
+            if log_enabled(PROTOCOL):
+                for entry in response:
+                    if entry['type'] == 'searchResEntry':
+                        log(PROTOCOL, 'SEARCH response entry <%s> received via <%s>', entry, self)
+                    elif entry['type'] == 'searchResRef':
+                        log(PROTOCOL, 'SEARCH response reference <%s> received via <%s>', entry, self)
 
-                if log_enabled(PROTOCOL):
-                    for entry in response:
-                        if entry['type'] == 'searchResEntry':
-                            log(PROTOCOL, 'SEARCH response entry <%s> received via <%s>', entry, self)
-                        elif entry['type'] == 'searchResRef':
-                            log(PROTOCOL, 'SEARCH response reference <%s> received via <%s>', entry, self)
+        if log_enabled(BASIC):
+            log(BASIC, 'done SEARCH operation, result <%s>', return_value)
+
+        return self._prepare_return_value(return_value, response=True)
+
+    def prepare_search(self,
+                       search_base,
+                       search_filter,
+                       search_scope=SUBTREE,
+                       dereference_aliases=DEREF_ALWAYS,
+                       attributes=None,
+                       size_limit=0,
+                       time_limit=0,
+                       types_only=False,
+                       get_operational_attributes=False,
+                       controls=None,
+                       auto_escape=None):
+        """
+        Prepare a search to be executed many times with different assertion values:
+
+        - each assertion value in search_filter equal to '?' is a placeholder, i.e. '(&(objectClass=person)(uid=?))'
+        - the request is validated and encoded once, when the returned PreparedSearch is executed with
+          prepared.search(value, ...) only the values are encoded and escaped
+        - values are literal, filter special characters in values are escaped
+        - a '?' in a literal assertion value must be escaped as '\\3f'
+        """
+        if log_enabled(BASIC):
+            log(BASIC, 'start PREPARE SEARCH via <%s>', self)
+
+        if self.check_names and search_base:
+            search_base = safe_dn(search_base)
+
+        with self.connection_lock:
+            self._fire_deferred()
+            attributes = self._search_attributes(attributes, get_operational_attributes)
+            self._check_search_attributes(attributes)
+            template = search_operation_template(search_base,
+                                                 search_filter,
+                                                 search_scope,
+                                                 dereference_aliases,
+                                                 attributes,
+                                                 size_limit,
+                                                 time_limit,
+                                                 types_only,
+                                                 self.auto_escape if auto_escape is None else auto_escape,
+                                                 self.auto_encode,
+                                                 self.server.schema if self.server else None,
+                                                 validator=self.server.custom_validator,
+                                                 check_names=self.check_names)
+            if search_filter.count(FILTER_PLACEHOLDER) != len(template.slots):
+                self.last_error = 'placeholders must be whole assertion values in prepared search filter'
+                if log_enabled(ERROR):
+                    log(ERROR, '%s for <%s>', self.last_error, self)
+                raise LDAPInvalidFilterError(self.last_error)
 
             if log_enabled(BASIC):
-                log(BASIC, 'done SEARCH operation, result <%s>', return_value)
+                log(BASIC, 'done PREPARE SEARCH with %d placeholders via <%s>', len(template.slots), self)
 
-            return self._prepare_return_value(return_value, response=True)
+            return PreparedSearch(self, template, search_base, search_filter, search_scope, dereference_aliases, attributes, size_limit, time_limit, types_only, controls, auto_escape)
+
+    def _search_prepared(self, prepared, values):
+        if log_enabled(BASIC):
+            log(BASIC, 'start prepared SEARCH operation via <%s>', self)
+
+        if self.strategy.no_real_dsa:  # mock and ldif strategies work on the pyasn1 request objects
+            filter_parts = prepared.search_filter.split(FILTER_PLACEHOLDER)
+            search_filter = filter_parts[0] + ''.join([escape_filter_chars(value) + filter_part for value, filter_part in zip(values, filter_parts[1:])])
+            return self.search(prepared.search_base, search_filter, prepared.search_scope, prepared.dereference_aliases, prepared.attributes,
+                               prepared.size_limit, prepared.time_limit, prepared.types_only, controls=prepared.controls, auto_escape=prepared.auto_escape)
+
+        with self.connection_lock:
+            self._fire_deferred()
+            request = prepared.template.encode(values)
+            if log_enabled(PROTOCOL):
+                log(PROTOCOL, 'SEARCH request <%s> sent via <%s>', search_request_to_dict_fast(decode_request_fast(request)), self)
+            response = self.post_send_search(self.send('searchRequest', request, prepared.controls))
+
+            return self._search_return_value(response)
 
     def compare(self,
                 dn,
@@ -905,9 +1225,9 @@ class Connection(object):
 
         with self.connection_lock:
             self._fire_deferred()
-            request = compare_operation(dn, attribute, value, self.auto_encode, self.server.schema if self.server else None, validator=self.server.custom_validator if self.server else None, check_names=self.check_names)
+            request = (compare_operation_fast if self.fast_encoder else compare_operation)(dn, attribute, value, self.auto_encode, self.server.schema if self.server else None, validator=self.server.custom_validator if self.server else None, check_names=self.check_names)
             if log_enabled(PROTOCOL):
-                log(PROTOCOL, 'COMPARE request <%s> sent via <%s>', compare_request_to_dict(request), self)
+                log(PROTOCOL, 'COMPARE request <%s> sent via <%s>', compare_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else compare_request_to_dict(request), self)
             response = self.post_send_single_response(self.send('compareRequest', request, controls))
             self._entries = []
             if isinstance(response, int):
@@ -1000,9 +1320,9 @@ class Connection(object):
                             log(ERROR, '%s for <%s>', self.last_error, self)
                         raise LDAPAttributeError(self.last_error)
 
-            request = add_operation(dn, _attributes, self.auto_encode, self.server.schema if self.server else None, validator=self.server.custom_validator if self.server else None, check_names=self.check_names)
+            request = (add_operation_fast if self.fast_encoder else add_operation)(dn, _attributes, self.auto_encode, self.server.schema if self.server else None, validator=self.server.custom_validator if self.server else None, check_names=self.check_names)
             if log_enabled(PROTOCOL):
-                log(PROTOCOL, 'ADD request <%s> sent via <%s>', add_request_to_dict(request), self)
+                log(PROTOCOL, 'ADD request <%s> sent via <%s>', add_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else add_request_to_dict(request), self)
             response = self.post_send_single_response(self.send('addRequest', request, controls))
             self._entries = []
 
@@ -1044,9 +1364,9 @@ class Connection(object):
                     log(ERROR, '%s for <%s>', self.last_error, self)
                 raise LDAPConnectionIsReadOnlyError(self.last_error)
 
-            request = delete_operation(dn)
+            request = (delete_operation_fast if self.fast_encoder else delete_operation)(dn)
             if log_enabled(PROTOCOL):
-                log(PROTOCOL, 'DELETE request <%s> sent via <%s>', delete_request_to_dict(request), self)
+                log(PROTOCOL, 'DELETE request <%s> sent via <%s>', delete_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else delete_request_to_dict(request), self)
             response = self.post_send_single_response(self.send('delRequest', request, controls))
             self._entries = []
 
@@ -1137,9 +1457,9 @@ class Connection(object):
                                 log(ERROR, '%s for <%s>', self.last_error, self)
                             raise LDAPChangeError(self.last_error)
                     changelist[attribute_name] = change
-            request = modify_operation(dn, changelist, self.auto_encode, self.server.schema if self.server else None, validator=self.server.custom_validator if self.server else None, check_names=self.check_names)
+            request = (modify_operation_fast if self.fast_encoder else modify_operation)(dn, changelist, self.auto_encode, self.server.schema if self.server else None, validator=self.server.custom_validator if self.server else None, check_names=self.check_names)
             if log_enabled(PROTOCOL):
-                log(PROTOCOL, 'MODIFY request <%s> sent via <%s>', modify_request_to_dict(request), self)
+                log(PROTOCOL, 'MODIFY request <%s> sent via <%s>', modify_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else modify_request_to_dict(request), self)
             response = self.post_send_single_response(self.send('modifyRequest', request, controls))
             self._entries = []
 
@@ -1194,9 +1514,9 @@ class Connection(object):
             #         log(ERROR, '%s for <%s>', self.last_error, self)
             #     raise LDAPChangeError(self.last_error)
 
-            request = modify_dn_operation(dn, relative_dn, delete_old_dn, new_superior)
+            request = (modify_dn_operation_fast if self.fast_encoder else modify_dn_operation)(dn, relative_dn, delete_old_dn, new_superior)
             if log_enabled(PROTOCOL):
-                log(PROTOCOL, 'MODIFY DN request <%s> sent via <%s>', modify_dn_request_to_dict(request), self)
+                log(PROTOCOL, 'MODIFY DN request <%s> sent via <%s>', modify_dn_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else modify_dn_request_to_dict(request), self)
             response = self.post_send_single_response(self.send('modDNRequest', request, controls))
             self._entries = []
 
@@ -1232,9 +1552,9 @@ class Connection(object):
                 # only current  operation should be abandoned, abandon, bind and unbind cannot ever be abandoned,
                 # messagiId 0 is invalid and should be used as a "ping" to keep alive the connection
                 if (self.strategy._outstanding and message_id in self.strategy._outstanding and self.strategy._outstanding[message_id]['type'] not in ['abandonRequest', 'bindRequest', 'unbindRequest']) or message_id == 0:
-                    request = abandon_operation(message_id)
+                    request = (abandon_operation_fast if self.fast_encoder else abandon_operation)(message_id)
                     if log_enabled(PROTOCOL):
-                        log(PROTOCOL, 'ABANDON request: <%s> sent via <%s>', abandon_request_to_dict(request), self)
+                        log(PROTOCOL, 'ABANDON request: <%s> sent via <%s>', abandon_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else abandon_request_to_dict(request), self)
                     self.send('abandonRequest', request, controls)
                     self.result = None
                     self.response = None
@@ -1262,9 +1582,9 @@ class Connection(object):
         self.last_error = None
         with self.connection_lock:
             self._fire_deferred()
-            request = extended_operation(request_name, request_value, no_encode=no_encode)
+            request = (extended_operation_fast if self.fast_encoder else extended_operation)(request_name, request_value, no_encode=no_encode)
             if log_enabled(PROTOCOL):
-                log(PROTOCOL, 'EXTENDED request <%s> sent via <%s>', extended_request_to_dict(request), self)
+                log(PROTOCOL, 'EXTENDED request <%s> sent via <%s>', extended_request_to_dict_fast(decode_request_fast(request)) if self.fast_encoder else extended_request_to_dict(request), self)
             response = self.post_send_single_response(self.send('extendedReq', request, controls))
             self._entries = []
             if isinstance(response, int):
@@ -1302,6 +1622,8 @@ class Connection(object):
                     log(BASIC, 'deferring START TLS for <%s>', self)
             else:
                 self._deferred_start_tls = False
+                if self.strategy.awaitable:  # the connection is opened and the response is waited for in the event loop
+                    return self.strategy.start_tls(read_server_info)
                 if self.closed:
                     self.open()
                 if self.server.tls.start_tls(self) and self.strategy.sync:  # for asynchronous connections _start_tls is run by the strategy
@@ -1410,7 +1732,9 @@ class Connection(object):
         # if self.strategy.no_real_dsa:  # do not refresh for mock strategies
         #     return
 
-        if not self.strategy.pooled:
+        if self.strategy.awaitable:
+            return self.strategy.refresh_server_info()
+        elif not self.strategy.pooled:
             with self.connection_lock:
                 if not self.closed:
                     if log_enabled(BASIC):
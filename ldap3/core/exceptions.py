@@ -524,6 +524,10 @@ class LDAPSocketOpenError(LDAPCommunicationError):
     pass
 
 
+class LDAPCircuitBreakerOpenError(LDAPSocketOpenError):
+    pass
+
+
 class LDAPSocketCloseError(LDAPCommunicationError):
     pass
 
@@ -49,6 +49,7 @@ class ServerPoolState(object):
         self.strategy = server_pool.strategy
         self.server_pool = server_pool
         self.last_used_server = 0
+        self.failed_server = None  # server excluded from the next choice
         self.refresh()
         self.initialize_time = datetime.now()
 
@@ -78,6 +79,17 @@ class ServerPoolState(object):
 
     def get_server(self):
         if self.server_states:
+            failed_server = self.failed_server
+            self.failed_server = None
+            if failed_server and len(self.server_states) > 1:  # fails over to the next healthy server
+                servers = [server_state.server for server_state in self.server_states]
+                failed_index = servers.index(failed_server) if failed_server in servers else self.last_used_server
+                healthy_server = self.find_healthy_server(failed_index + 1, failed_server)
+                if healthy_server is not None:
+                    self.last_used_server = healthy_server
+                    if log_enabled(BASIC):
+                        log(BASIC, 'server failed over in Server Pool: <%s>', self.last_used_server)
+                    return self.server_states[self.last_used_server].server
             if self.server_pool.strategy == FIRST:
                 if self.server_pool.active:
                     # returns the first active server
@@ -102,6 +114,10 @@ class ServerPoolState(object):
                 if log_enabled(ERROR):
                     log(ERROR, 'unknown server pooling strategy <%s>', self.server_pool.strategy)
                 raise LDAPUnknownStrategyError('unknown server pooling strategy')
+            if not self.server_pool.active and self.server_states[self.last_used_server].server.circuit_open and len(self.server_states) > 1:
+                healthy_server = self.find_healthy_server(self.last_used_server + 1, self.server_states[self.last_used_server].server)
+                if healthy_server is not None:
+                    self.last_used_server = healthy_server
             if log_enabled(BASIC):
                 log(BASIC, 'server returned from Server Pool: <%s>', self.last_used_server)
             return self.server_states[self.last_used_server].server
@@ -110,6 +126,26 @@ class ServerPoolState(object):
                 log(ERROR, 'no servers in Server Pool <%s>', self)
             raise LDAPServerPoolError('no servers in server pool')
 
+    def find_healthy_server(self, starting, excluded):
+        """
+        Returns the index of the first server, in circular order, that is not excluded and whose circuit breaker is closed
+        In an active pool the server must also be available. Returns None if there is no such server
+        """
+        pool_size = len(self.server_states)
+        for index in range(pool_size):
+            server_state = self.server_states[(starting + index) % pool_size]
+            if server_state.server is excluded or server_state.server.circuit_open:
+                continue
+            if self.server_pool.active:
+                if not server_state.available and ((isinstance(self.server_pool.exhaust, bool) and self.server_pool.exhaust) or (datetime.now() - server_state.last_checked_time).seconds < self.server_pool.exhaust):  # keeps server offline
+                    continue
+                server_state.last_checked_time = datetime.now()
+                server_state.available = server_state.server.check_availability()
+                if not server_state.available:
+                    continue
+            return (starting + index) % pool_size
+        return None
+
     def find_active_random_server(self):
         counter = self.server_pool.active  # can be True for "forever" or the number of cycles to try
         while counter:
@@ -120,6 +156,10 @@ class ServerPoolState(object):
                 # pops a random server from a temp list and checks its
                 # availability, if not available tries another one
                 server_state = temp_list.pop(randint(0, len(temp_list) - 1))
+                if server_state.server.circuit_open:
+                    if log_enabled(NETWORK):
+                        log(NETWORK, 'server <%s> excluded from checking because its circuit breaker is open', server_state.server)
+                    continue
                 if not server_state.available:  # server is offline
                     if (isinstance(self.server_pool.exhaust, bool) and self.server_pool.exhaust) or (datetime.now() - server_state.last_checked_time).seconds < self.server_pool.exhaust:  # keeps server offline
                         if log_enabled(NETWORK):
@@ -157,6 +197,10 @@ class ServerPoolState(object):
                 index += 1
                 offset = index + starting if index + starting < pool_size else index + starting - pool_size
                 server_state = self.server_states[offset]
+                if server_state.server.circuit_open:
+                    if log_enabled(NETWORK):
+                        log(NETWORK, 'server <%s> excluded from checking because its circuit breaker is open', server_state.server)
+                    continue
                 if not server_state.available:  # server is offline
                     if (isinstance(self.server_pool.exhaust, bool) and self.server_pool.exhaust) or (datetime.now() - server_state.last_checked_time).seconds < self.server_pool.exhaust:  # keeps server offline
                         if log_enabled(NETWORK):
@@ -320,6 +364,17 @@ class ServerPool(object):
                 log(ERROR, 'connection <%s> not in Server Pool State <%s>', connection, self)
             raise LDAPServerPoolError('connection not in ServerPoolState')
 
+    def report_failure(self, connection, server):
+        """
+        The next server returned to the connection is the next healthy server in the pool, if any
+        """
+        if connection in self.pool_states:
+            self.pool_states[connection].failed_server = server
+        else:
+            if log_enabled(ERROR):
+                log(ERROR, 'connection <%s> not in Server Pool State <%s>', connection, self)
+            raise LDAPServerPoolError('connection not in ServerPoolState')
+
     def get_current_server(self, connection):
         if connection in self.pool_states:
             return self.pool_states[connection].get_current_server()
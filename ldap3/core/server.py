@@ -49,6 +49,32 @@ try:  # try to discover if unix sockets are available for LDAP over IPC (ldapi:/
 except ImportError:
     unix_socket_available = False
 
+DSA_INFO_ATTRIBUTES = ('altServer',  # requests specific dsa info attributes
+                       'namingContexts',
+                       'supportedControl',
+                       'supportedExtension',
+                       'supportedFeatures',
+                       'supportedCapabilities',
+                       'supportedLdapVersion',
+                       'supportedSASLMechanisms',
+                       'vendorName',
+                       'vendorVersion',
+                       'subschemaSubentry',
+                       '*',
+                       '+')  # requests all remaining attributes (other), a tuple because search() appends to lists
+
+SCHEMA_INFO_ATTRIBUTES = ('objectClasses',  # requests specific subschema attributes
+                          'attributeTypes',
+                          'ldapSyntaxes',
+                          'matchingRules',
+                          'matchingRuleUse',
+                          'dITContentRules',
+                          'dITStructureRules',
+                          'nameForms',
+                          'createTimestamp',
+                          'modifyTimestamp',
+                          '*')  # requests all remaining attributes (other)
+
 
 class Server(object):
     """
@@ -195,6 +221,9 @@ class Server(object):
         self._address_info = []  # property self.address_info resolved at open time (or when check_availability is called)
         self._address_info_resolved_time = datetime(MINYEAR, 1, 1)  # smallest date ever
         self.current_address = None
+        self._circuit_failures = 0  # consecutive failed connections
+        self._circuit_opened_time = None
+        self._circuit_lock = Lock()
         self.connect_timeout = connect_timeout
         self.mode = mode
 
@@ -285,6 +314,37 @@ class Server(object):
             address[5] = None
             address[6] = None
 
+    def circuit_breaker_failure(self):
+        """
+        Counts a failed connection to the server, after CIRCUIT_BREAKER_THRESHOLD consecutive failures the circuit is opened
+        and the server is not tried for CIRCUIT_BREAKER_TIMEOUT seconds. A failure while the circuit is half open opens it again
+        """
+        conf_threshold = get_config_parameter('CIRCUIT_BREAKER_THRESHOLD')
+        with self._circuit_lock:
+            self._circuit_failures += 1
+            if conf_threshold and self._circuit_failures >= conf_threshold:
+                self._circuit_opened_time = datetime.now()
+                if log_enabled(NETWORK):
+                    log(NETWORK, 'circuit breaker opened for <%s> after %d failures', self, self._circuit_failures)
+
+    def circuit_breaker_success(self):
+        """
+        Closes the circuit after a successful connection to the server
+        """
+        with self._circuit_lock:
+            if self._circuit_opened_time and log_enabled(NETWORK):
+                log(NETWORK, 'circuit breaker closed for <%s>', self)
+            self._circuit_failures = 0
+            self._circuit_opened_time = None
+
+    @property
+    def circuit_open(self):
+        """
+        True if the server must not be tried, after CIRCUIT_BREAKER_TIMEOUT seconds the circuit is half open and the server can be tried again
+        """
+        opened_time = self._circuit_opened_time
+        return opened_time is not None and (datetime.now() - opened_time).total_seconds() < get_config_parameter('CIRCUIT_BREAKER_TIMEOUT')
+
     def check_availability(self, source_address=None, source_port=None, source_port_list=None):
         """
         Tries to open, connect and close a socket to specified address and port to check availability.
@@ -404,19 +464,7 @@ class Server(object):
             result = connection.search(search_base='',
                                        search_filter='(objectClass=*)',
                                        search_scope=BASE,
-                                       attributes=['altServer',  # requests specific dsa info attributes
-                                                   'namingContexts',
-                                                   'supportedControl',
-                                                   'supportedExtension',
-                                                   'supportedFeatures',
-                                                   'supportedCapabilities',
-                                                   'supportedLdapVersion',
-                                                   'supportedSASLMechanisms',
-                                                   'vendorName',
-                                                   'vendorVersion',
-                                                   'subschemaSubentry',
-                                                   '*',
-                                                   '+'],  # requests all remaining attributes (other),
+                                       attributes=DSA_INFO_ATTRIBUTES,
                                        get_operational_attributes=True)
 
             if connection.strategy.thread_safe:
@@ -475,17 +523,7 @@ class Server(object):
             result = connection.search(schema_entry,
                                        search_filter='(objectClass=subschema)',
                                        search_scope=BASE,
-                                       attributes=['objectClasses',  # requests specific subschema attributes
-                                                   'attributeTypes',
-                                                   'ldapSyntaxes',
-                                                   'matchingRules',
-                                                   'matchingRuleUse',
-                                                   'dITContentRules',
-                                                   'dITStructureRules',
-                                                   'nameForms',
-                                                   'createTimestamp',
-                                                   'modifyTimestamp',
-                                                   '*'],  # requests all remaining attributes (other)
+                                       attributes=SCHEMA_INFO_ATTRIBUTES,
                                        get_operational_attributes=True
                                        )
             if connection.strategy.thread_safe:
@@ -498,22 +536,28 @@ class Server(object):
                 self._schema_info = None
                 if status:
                     if connection.strategy.sync:  # sync request
-                        self._schema_info = SchemaInfo(schema_entry, response[0]['attributes'], response[0]['raw_attributes'])
+                        self._set_schema_info(schema_entry, response[0])
                     else:  # asynchronous request, must check if attributes in response
                         results, result = connection.get_response(status)
                         if len(results) == 1 and 'attributes' in results[0] and 'raw_attributes' in results[0]:
-                            self._schema_info = SchemaInfo(schema_entry, results[0]['attributes'], results[0]['raw_attributes'])
-                    if self._schema_info and not self._schema_info.is_valid():  # flaky servers can return an empty schema, checks if it is so and set schema to None
-                        self._schema_info = None
-                    if self._schema_info:  # if schema is valid tries to apply formatter to the "other" dict with raw values for schema and info
-                        for attribute in self._schema_info.other:
-                            self._schema_info.other[attribute] = format_attribute_values(self._schema_info, attribute, self._schema_info.raw[attribute], self.custom_formatter)
-                        if self._dsa_info:  # try to apply formatter to the "other" dict with dsa info raw values
-                            for attribute in self._dsa_info.other:
-                                self._dsa_info.other[attribute] = format_attribute_values(self._schema_info, attribute, self._dsa_info.raw[attribute], self.custom_formatter)
+                            self._set_schema_info(schema_entry, results[0])
             if log_enabled(BASIC):
                 log(BASIC, 'schema read for <%s> via <%s>', self, connection)
 
+    def _set_schema_info(self, schema_entry, entry):
+        """
+        Sets the schema info from the subschema entry read from the server
+        """
+        self._schema_info = SchemaInfo(schema_entry, entry['attributes'], entry['raw_attributes'])
+        if not self._schema_info.is_valid():  # flaky servers can return an empty schema, checks if it is so and set schema to None
+            self._schema_info = None
+        if self._schema_info:  # if schema is valid tries to apply formatter to the "other" dict with raw values for schema and info
+            for attribute in self._schema_info.other:
+                self._schema_info.other[attribute] = format_attribute_values(self._schema_info, attribute, self._schema_info.raw[attribute], self.custom_formatter)
+            if self._dsa_info:  # try to apply formatter to the "other" dict with dsa info raw values
+                for attribute in self._dsa_info.other:
+                    self._dsa_info.other[attribute] = format_attribute_values(self._schema_info, attribute, self._dsa_info.raw[attribute], self.custom_formatter)
+
     def get_info_from_server(self, connection):
         """
         reads info from DSE and from subschema
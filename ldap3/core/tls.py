@@ -168,36 +168,48 @@ class Tls(object):
         r = 'Tls(' + r[2:] + ')'
         return r
 
+    def ssl_context(self):
+        """
+        Returns a SSLContext configured with the parameters of this Tls object
+        """
+        if not use_ssl_context:
+            if log_enabled(ERROR):
+                log(ERROR, 'SSLContext not available')
+            raise LDAPSSLNotSupportedError('SSLContext not available')
+
+        if self.version is None:  # uses the default ssl context for reasonable security
+            ssl_context = create_default_context(purpose=Purpose.SERVER_AUTH,
+                                                 cafile=self.ca_certs_file,
+                                                 capath=self.ca_certs_path,
+                                                 cadata=self.ca_certs_data)
+        else:  # code from create_default_context in the Python standard library 3.5.1, creates a ssl context with the specificd protocol version
+            ssl_context = ssl.SSLContext(self.version)
+            if self.ca_certs_file or self.ca_certs_path or self.ca_certs_data:
+                ssl_context.load_verify_locations(self.ca_certs_file, self.ca_certs_path, self.ca_certs_data)
+            elif self.validate != ssl.CERT_NONE:
+                ssl_context.load_default_certs(Purpose.SERVER_AUTH)
+
+        if self.certificate_file:
+            ssl_context.load_cert_chain(self.certificate_file, keyfile=self.private_key_file, password=self.private_key_password)
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = self.validate
+        for option in self.ssl_options:
+            ssl_context.options |= option
+
+        if self.ciphers:
+            try:
+                ssl_context.set_ciphers(self.ciphers)
+            except ssl.SSLError:
+                pass
+
+        return ssl_context
+
     def wrap_socket(self, connection, do_handshake=False):
         """
         Adds TLS to the connection socket
         """
         if use_ssl_context:
-            if self.version is None:  # uses the default ssl context for reasonable security
-                ssl_context = create_default_context(purpose=Purpose.SERVER_AUTH,
-                                                     cafile=self.ca_certs_file,
-                                                     capath=self.ca_certs_path,
-                                                     cadata=self.ca_certs_data)
-            else:  # code from create_default_context in the Python standard library 3.5.1, creates a ssl context with the specificd protocol version
-                ssl_context = ssl.SSLContext(self.version)
-                if self.ca_certs_file or self.ca_certs_path or self.ca_certs_data:
-                    ssl_context.load_verify_locations(self.ca_certs_file, self.ca_certs_path, self.ca_certs_data)
-                elif self.validate != ssl.CERT_NONE:
-                    ssl_context.load_default_certs(Purpose.SERVER_AUTH)
-
-            if self.certificate_file:
-                ssl_context.load_cert_chain(self.certificate_file, keyfile=self.private_key_file, password=self.private_key_password)
-            ssl_context.check_hostname = False
-            ssl_context.verify_mode = self.validate
-            for option in self.ssl_options:
-                ssl_context.options |= option
-
-            if self.ciphers:
-                try:
-                    ssl_context.set_ciphers(self.ciphers)
-                except ssl.SSLError:
-                    pass
-
+            ssl_context = self.ssl_context()
             if self.sni:
                 wrapped_socket = ssl_context.wrap_socket(connection.socket, server_side=False, do_handshake_on_connect=do_handshake, server_hostname=self.sni)
             else:
@@ -277,6 +289,8 @@ class Tls(object):
                 raise LDAPStartTLSError(connection.last_error)
             if log_enabled(BASIC):
                 log(BASIC, 'tls started for <%s>', connection)
+            if connection.tls_started:  # socket already wrapped by the receiver thread of the MULTIPLEXED strategy
+                return True
             return self._start_tls(connection)
 
     def _start_tls(self, connection):
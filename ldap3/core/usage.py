@@ -60,6 +60,10 @@ class ConnectionUsage(object):
         self.restartable_failures = 0
         self.restartable_successes = 0
         self.servers_from_pool = 0
+        self.failovers = 0
+        self.failover_time = 0.0
+        self.filter_cache_hits = 0
+        self.filter_cache_misses = 0
         if log_enabled(BASIC):
             log(BASIC, 'reset usage metrics')
 
@@ -93,6 +97,10 @@ class ConnectionUsage(object):
         self.restartable_failures = 0
         self.restartable_successes = 0
         self.servers_from_pool = 0
+        self.failovers = 0
+        self.failover_time = 0.0
+        self.filter_cache_hits = 0
+        self.filter_cache_misses = 0
 
         if log_enabled(BASIC):
             log(BASIC, 'instantiated Usage object')
@@ -134,6 +142,11 @@ class ConnectionUsage(object):
         r += '  Restartable tries:       ' + str(self.restartable_failures + self.restartable_successes) + linesep
         r += '    Failed restarts:       ' + str(self.restartable_failures) + linesep
         r += '    Successful restarts:   ' + str(self.restartable_successes) + linesep
+        r += '  Failovers:               ' + str(self.failovers) + linesep
+        r += '    Failover time:         ' + str(self.failover_time) + linesep
+        r += '  Filter cache:            ' + linesep
+        r += '    Hits:                  ' + str(self.filter_cache_hits) + linesep
+        r += '    Misses:                ' + str(self.filter_cache_misses) + linesep
         return r
 
     def __str__(self):
@@ -167,6 +180,10 @@ class ConnectionUsage(object):
         self.restartable_failures += other.restartable_failures
         self.restartable_successes += other.restartable_successes
         self.servers_from_pool += other.servers_from_pool
+        self.failovers += other.failovers
+        self.failover_time += other.failover_time
+        self.filter_cache_hits += other.filter_cache_hits
+        self.filter_cache_misses += other.filter_cache_misses
         return self
 
     def update_transmitted_message(self, message, length):
@@ -44,7 +44,7 @@ from .novell.removeMembersFromGroups import edir_remove_members_from_groups
 from .novell.checkGroupsMemberships import edir_check_groups_memberships
 from .standard.whoAmI import WhoAmI
 from .standard.modifyPassword import ModifyPassword
-from .standard.PagedSearch import paged_search_generator, paged_search_accumulator
+from .standard.PagedSearch import paged_search_generator, paged_search_accumulator, parallel_paged_search_generator
 from .standard.PersistentSearch import PersistentSearch
 
 
@@ -93,7 +93,8 @@ class StandardExtendedOperations(ExtendedOperationContainer):
                      controls=None,
                      paged_size=100,
                      paged_criticality=False,
-                     generator=True):
+                     generator=True,
+                     prefetch=0):
 
         if generator:
             return paged_search_generator(self._connection,
@@ -108,7 +109,8 @@ class StandardExtendedOperations(ExtendedOperationContainer):
                                           get_operational_attributes,
                                           controls,
                                           paged_size,
-                                          paged_criticality)
+                                          paged_criticality,
+                                          prefetch)
         else:
             return paged_search_accumulator(self._connection,
                                             search_base,
@@ -124,6 +126,39 @@ class StandardExtendedOperations(ExtendedOperationContainer):
                                             paged_size,
                                             paged_criticality)
 
+    def parallel_paged_search(self,
+                              search_base,
+                              search_filter,
+                              search_scope=SUBTREE,
+                              dereference_aliases=DEREF_ALWAYS,
+                              attributes=None,
+                              size_limit=0,
+                              time_limit=0,
+                              types_only=False,
+                              get_operational_attributes=False,
+                              controls=None,
+                              paged_size=100,
+                              paged_criticality=False,
+                              shards=None,
+                              connections=None,
+                              workers=None):
+
+        return parallel_paged_search_generator(connections or self._connection,
+                                               search_base,
+                                               search_filter,
+                                               search_scope,
+                                               dereference_aliases,
+                                               attributes,
+                                               size_limit,
+                                               time_limit,
+                                               types_only,
+                                               get_operational_attributes,
+                                               controls,
+                                               paged_size,
+                                               paged_criticality,
+                                               shards,
+                                               workers)
+
     def persistent_search(self,
                           search_base='',
                           search_filter='(objectclass=*)',
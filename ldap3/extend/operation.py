@@ -51,6 +51,8 @@ class ExtendedOperation(object):
                 raise LDAPExtensionError('extension not in DSA list of supported extensions')
 
         resp = self.connection.extended(self.request_name, self.request_value, self.controls)
+        if self.connection.strategy.awaitable:  # the response is decoded when the returned coroutine is awaited
+            return self.connection.strategy.wait_extended_response(self, resp)
         if not self.connection.strategy.sync:
             _, result = self.connection.get_response(resp)
         else:
@@ -23,30 +23,41 @@
 # along with ldap3 in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 
-from ... import SUBTREE, DEREF_ALWAYS
+from threading import Thread, Event
+
+try:
+    from queue import Queue, Empty, Full
+except ImportError:  # Python 2
+    # noinspection PyUnresolvedReferences
+    from Queue import Queue, Empty, Full
+
+from ... import SUBTREE, LEVEL, BASE, DEREF_ALWAYS, NO_ATTRIBUTES, SEQUENCE_TYPES
 from ...utils.dn import safe_dn
+from ...utils.config import get_config_parameter
 from ...core.results import DO_NOT_RAISE_EXCEPTIONS, RESULT_SIZE_LIMIT_EXCEEDED
 from ...core.exceptions import LDAPOperationResult
 from ...utils.log import log, log_enabled, ERROR, BASIC, PROTOCOL, NETWORK, EXTENDED
 
+PARTITION_DONE = object()  # sent by a worker thread of parallel_paged_search_generator when there are no more partitions to search
+PAGES_DONE = object()  # sent by the prefetching thread of paged_search_generator when the last page has been received
 
-def paged_search_generator(connection,
-                           search_base,
-                           search_filter,
-                           search_scope=SUBTREE,
-                           dereference_aliases=DEREF_ALWAYS,
-                           attributes=None,
-                           size_limit=0,
-                           time_limit=0,
-                           types_only=False,
-                           get_operational_attributes=False,
-                           controls=None,
-                           paged_size=100,
-                           paged_criticality=False):
-    if connection.check_names and search_base:
-        search_base = safe_dn(search_base)
 
-    responses = []
+def _paged_search_pages(connection,
+                        search_base,
+                        search_filter,
+                        search_scope=SUBTREE,
+                        dereference_aliases=DEREF_ALWAYS,
+                        attributes=None,
+                        size_limit=0,
+                        time_limit=0,
+                        types_only=False,
+                        get_operational_attributes=False,
+                        controls=None,
+                        paged_size=100,
+                        paged_criticality=False):
+    """
+    Yields the responses of each page of the paged search, the next page is requested when the generator is resumed
+    """
     original_connection = None
     original_auto_referrals = connection.auto_referrals
     connection.auto_referrals = False  # disable auto referrals because it cannot handle paged searches
@@ -82,7 +93,6 @@ def paged_search_generator(connection,
             _, connection, cachekey = connection.strategy.create_referral_connection(result['referrals'])   # change connection to a valid referrals
             continue
 
-        responses.extend(response)
         try:
             cookie = result['controls']['1.2.840.113556.1.4.319']['value']['cookie']
         except KeyError:
@@ -92,12 +102,10 @@ def paged_search_generator(connection,
             if log_enabled(PROTOCOL):
                 log(PROTOCOL, 'paged search operation result <%s> for <%s>', result, connection)
             if result['result'] == RESULT_SIZE_LIMIT_EXCEEDED:
-                while responses:
-                    yield responses.pop()
+                yield response
             raise LDAPOperationResult(result=result['result'], description=result['description'], dn=result['dn'], message=result['message'], response_type=result['type'])
 
-        while responses:
-            yield responses.pop()
+        yield response
 
     if original_connection:
         connection = original_connection
@@ -110,6 +118,92 @@ def paged_search_generator(connection,
     connection.response = None
 
 
+def paged_search_generator(connection,
+                           search_base,
+                           search_filter,
+                           search_scope=SUBTREE,
+                           dereference_aliases=DEREF_ALWAYS,
+                           attributes=None,
+                           size_limit=0,
+                           time_limit=0,
+                           types_only=False,
+                           get_operational_attributes=False,
+                           controls=None,
+                           paged_size=100,
+                           paged_criticality=False,
+                           prefetch=0):
+    if connection.check_names and search_base:
+        search_base = safe_dn(search_base)
+
+    pages = _paged_search_pages(connection,
+                                search_base,
+                                search_filter,
+                                search_scope,
+                                dereference_aliases,
+                                attributes,
+                                size_limit,
+                                time_limit,
+                                types_only,
+                                get_operational_attributes,
+                                controls,
+                                paged_size,
+                                paged_criticality)
+
+    if prefetch and (not connection.strategy.sync or connection.strategy.multiplexed):
+        pages = _prefetched_pages(connection, pages, prefetch)
+    for response in pages:
+        for entry in response:  # entries in the order sent by the server
+            yield entry
+
+
+def _prefetched_pages(connection, pages, prefetch):
+    """
+    Reads the pages in a thread that requests the next page as soon as the cookie is received, while the previous pages are consumed
+    Up to prefetch pages are requested ahead of the page being consumed
+    """
+    received = Queue()
+    room = Queue()  # a token for each page that can be requested ahead
+    for _ in range(prefetch):
+        room.put(None)
+    stop = Event()
+
+    def fetch():
+        try:
+            while not stop.is_set():
+                try:
+                    room.get(timeout=0.1)
+                except Empty:
+                    continue
+                try:
+                    received.put(next(pages))
+                except StopIteration:
+                    break
+        except Exception as e:  # the exception is raised in the thread consuming the entries
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> while prefetching pages via <%s>', e, connection)
+            received.put(e)
+        pages.close()
+        received.put(PAGES_DONE)
+
+    thread = Thread(target=fetch)
+    thread.daemon = True
+    thread.start()
+    if log_enabled(BASIC):
+        log(BASIC, 'prefetching up to <%d> pages of paged search via <%s>', prefetch, connection)
+    try:
+        while True:
+            response = received.get()
+            if response is PAGES_DONE:
+                break
+            if isinstance(response, Exception):
+                raise response
+            room.put(None)  # the next page can be requested while this one is consumed
+            yield response
+    finally:
+        stop.set()
+        thread.join()
+
+
 def paged_search_accumulator(connection,
                              search_base,
                              search_filter,
@@ -144,3 +238,143 @@ def paged_search_accumulator(connection,
 
     connection.response = responses
     return responses
+
+
+def search_partitions(connection,
+                      search_base,
+                      search_filter,
+                      search_scope=SUBTREE,
+                      dereference_aliases=DEREF_ALWAYS,
+                      shards=None,
+                      paged_size=100):
+    """
+    Splits a search in disjoint partitions, each partition is a tuple of search base, search filter and search scope
+    With shards each partition searches the whole scope for the entries matching one of the filters
+    Otherwise a subtree search is split in the search of the base object and one subtree search for each of its immediate children
+    """
+    if shards:
+        return [(search_base, '(&' + search_filter + shard + ')', search_scope) for shard in shards]
+
+    if search_scope != SUBTREE:
+        return [(search_base, search_filter, search_scope)]
+
+    partitions = [(search_base, search_filter, BASE)]
+    for child in paged_search_generator(connection, search_base, '(objectClass=*)', LEVEL, dereference_aliases, NO_ATTRIBUTES, paged_size=paged_size):
+        if child['type'] == 'searchResEntry':
+            partitions.append((child['dn'], search_filter, SUBTREE))
+    if log_enabled(BASIC):
+        log(BASIC, 'search of <%s> split in <%d> partitions via <%s>', search_base, len(partitions), connection)
+    return partitions
+
+
+def parallel_paged_search_generator(connections,
+                                    search_base,
+                                    search_filter,
+                                    search_scope=SUBTREE,
+                                    dereference_aliases=DEREF_ALWAYS,
+                                    attributes=None,
+                                    size_limit=0,
+                                    time_limit=0,
+                                    types_only=False,
+                                    get_operational_attributes=False,
+                                    controls=None,
+                                    paged_size=100,
+                                    paged_criticality=False,
+                                    shards=None,
+                                    workers=None):
+    """
+    Executes a paged search for each partition of the search at the same time and yields the entries as they are received
+    Each worker thread uses a connection for a partition at a time. A connection with a REUSABLE pool or a thread safe
+    strategy is shared by all the workers, otherwise a worker is started for each connection.
+    Entries of different partitions are interleaved, referrals are not followed
+    """
+    if not isinstance(connections, SEQUENCE_TYPES):
+        connections = [connections]
+    connection = connections[0]
+    if connection.check_names and search_base:
+        search_base = safe_dn(search_base)
+
+    if len(connections) == 1 and connection.strategy.pooled:
+        worker_connections = [connection] * (workers or connection.strategy.pool.max_size)
+    elif len(connections) == 1 and connection.strategy.thread_safe:
+        worker_connections = [connection] * (workers or get_config_parameter('PARALLEL_SEARCH_WORKERS'))
+    else:
+        worker_connections = connections[:workers] if workers else list(connections)
+
+    partitions = Queue()
+    for partition in search_partitions(connection, search_base, search_filter, search_scope, dereference_aliases, shards, paged_size):
+        partitions.put(partition)
+    worker_connections = worker_connections[:partitions.qsize()]
+
+    responses = Queue(maxsize=paged_size * len(worker_connections))  # workers wait while the entries are not consumed
+    stop = Event()
+
+    def send(item):
+        while not stop.is_set():
+            try:
+                responses.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def search(worker_connection):
+        try:
+            while not stop.is_set():
+                try:
+                    base, partition_filter, scope = partitions.get_nowait()
+                except Empty:
+                    break
+                if log_enabled(PROTOCOL):
+                    log(PROTOCOL, 'searching partition <%s> with filter <%s> via <%s>', base, partition_filter, worker_connection)
+                for response in paged_search_generator(worker_connection,
+                                                       base,
+                                                       partition_filter,
+                                                       scope,
+                                                       dereference_aliases,
+                                                       attributes,
+                                                       size_limit,
+                                                       time_limit,
+                                                       types_only,
+                                                       get_operational_attributes,
+                                                       controls,
+                                                       paged_size,
+                                                       paged_criticality):
+                    if not send(response):
+                        break
+        except Exception as e:  # the exception is raised in the thread consuming the entries
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> while searching partition via <%s>', e, worker_connection)
+            send(e)
+        send(PARTITION_DONE)
+
+    auto_referrals = dict((id(worker_connection), worker_connection.auto_referrals) for worker_connection in worker_connections)
+    for worker_connection in worker_connections:  # the workers sharing a connection must not change auto_referrals while the others are searching
+        worker_connection.auto_referrals = False
+    threads = [Thread(target=search, args=(worker_connection, )) for worker_connection in worker_connections]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    running = len(threads)
+    yielded = 0
+    try:
+        while running:
+            response = responses.get()
+            if response is PARTITION_DONE:
+                running -= 1
+            elif isinstance(response, Exception):
+                raise response
+            else:
+                yield response
+                yielded += 1
+                if size_limit and yielded >= size_limit:
+                    break
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        for worker_connection in worker_connections:
+            worker_connection.auto_referrals = auto_referrals[id(worker_connection)]
+        if log_enabled(BASIC):
+            log(BASIC, 'done parallel paged search of <%s> with <%d> workers, <%d> responses returned', search_base, len(threads), yielded)
@@ -24,6 +24,7 @@
 # If not, see <http://www.gnu.org/licenses/>.
 
 from ..protocol.rfc4511 import AbandonRequest, MessageID
+from ..utils.asn1 import encode_integer_fast
 
 
 def abandon_operation(msg_id):
@@ -32,5 +33,14 @@ def abandon_operation(msg_id):
     return request
 
 
+def abandon_operation_fast(msg_id):
+    # same as abandon_operation() but returns the BER encoded AbandonRequest, built without pyasn1
+    return encode_integer_fast(msg_id, 0x50)  # [APPLICATION 16] AbandonRequest
+
+
 def abandon_request_to_dict(request):
     return {'messageId': str(request)}
+
+
+def abandon_request_to_dict_fast(request):
+    return {'messageId': str(request)}
@@ -25,7 +25,9 @@
 
 from .. import SEQUENCE_TYPES
 from ..protocol.rfc4511 import AddRequest, LDAPDN, AttributeList, Attribute, AttributeDescription, ResultCode, Vals
-from ..protocol.convert import referrals_to_list, attributes_to_dict, validate_attribute_value, prepare_for_sending
+from ..protocol.convert import referrals_to_list, attributes_to_dict, validate_attribute_value, prepare_for_sending, attributes_to_dict_fast
+from ..utils.conv import to_unicode
+from ..utils.asn1 import encode_octet_string_fast, encode_sequence_fast
 
 
 def add_operation(dn,
@@ -59,11 +61,34 @@ def add_operation(dn,
     return request
 
 
+def add_operation_fast(dn,
+                       attributes,
+                       auto_encode,
+                       schema=None,
+                       validator=None,
+                       check_names=False):
+    # same as add_operation() but returns the BER encoded AddRequest, built without pyasn1
+    attribute_list = []
+    for attribute in attributes:
+        if isinstance(attributes[attribute], SEQUENCE_TYPES):
+            vals = [encode_octet_string_fast(prepare_for_sending(validate_attribute_value(schema, attribute, value, auto_encode, validator, check_names))) for value in attributes[attribute]]
+        else:
+            vals = [encode_octet_string_fast(prepare_for_sending(validate_attribute_value(schema, attribute, attributes[attribute], auto_encode, validator, check_names)))]
+        attribute_list.append(encode_sequence_fast([encode_octet_string_fast(attribute), encode_sequence_fast(vals, 0x31)]))  # type, SET OF vals
+
+    return encode_sequence_fast([encode_octet_string_fast(dn), encode_sequence_fast(attribute_list)], 0x68)  # [APPLICATION 8] AddRequest
+
+
 def add_request_to_dict(request):
     return {'entry': str(request['entry']),
             'attributes': attributes_to_dict(request['attributes'])}
 
 
+def add_request_to_dict_fast(request):
+    return {'entry': to_unicode(request[0][3]),
+            'attributes': attributes_to_dict_fast(request[1][3])}
+
+
 def add_response_to_dict(response):
     return {'result': int(response['resultCode']),
             'description': ResultCode().getNamedValues().getName(response['resultCode']),
@@ -29,8 +29,9 @@ from ..core.exceptions import LDAPUserNameIsMandatoryError, LDAPPasswordIsMandat
 from ..protocol.sasl.sasl import validate_simple_password
 from ..protocol.rfc4511 import Version, AuthenticationChoice, Simple, BindRequest, ResultCode, SaslCredentials, BindResponse, \
     LDAPDN, LDAPString, Referral, ServerSaslCreds, SicilyPackageDiscovery, SicilyNegotiate, SicilyResponse
-from ..protocol.convert import authentication_choice_to_dict, referrals_to_list
+from ..protocol.convert import authentication_choice_to_dict, referrals_to_list, authentication_choice_to_dict_fast
 from ..utils.conv import to_unicode, to_raw
+from ..utils.asn1 import encode_integer_fast, encode_octet_string_fast, encode_sequence_fast
 
 # noinspection PyUnresolvedReferences
 def bind_operation(version,
@@ -90,12 +91,72 @@ def bind_operation(version,
     return request
 
 
+# noinspection PyUnresolvedReferences
+def bind_operation_fast(version,
+                        authentication,
+                        name='',
+                        password=None,
+                        sasl_mechanism=None,
+                        sasl_credentials=None,
+                        auto_encode=False):
+    # same as bind_operation() but returns the BER encoded BindRequest, built without pyasn1
+    if name is None:
+        name = ''
+    request_name = ''
+    if isinstance(name, STRING_TYPES):
+        request_name = to_unicode(name) if auto_encode else name
+    if authentication == SIMPLE:
+        if not name:
+            raise LDAPUserNameIsMandatoryError('user name is mandatory in simple bind')
+        if password:
+            authentication_choice = encode_octet_string_fast(validate_simple_password(password), 0x80)  # [0] simple
+        else:
+            raise LDAPPasswordIsMandatoryError('password is mandatory in simple bind')
+    elif authentication == SASL:
+        sasl_creds = [encode_octet_string_fast(sasl_mechanism)]  # mechanism
+        if sasl_credentials is not None:
+            sasl_creds.append(encode_octet_string_fast(sasl_credentials))  # credentials
+        authentication_choice = encode_sequence_fast(sasl_creds, 0xA3)  # [3] sasl
+    elif authentication == ANONYMOUS:
+        if name:
+            raise LDAPUserNameNotAllowedError('user name not allowed in anonymous bind')
+        request_name = ''
+        authentication_choice = b'\x80\x00'  # [0] simple, empty
+    elif authentication == 'SICILY_PACKAGE_DISCOVERY':  # https://msdn.microsoft.com/en-us/library/cc223501.aspx
+        request_name = ''
+        authentication_choice = b'\x89\x00'  # [9] sicilyPackageDiscovery, empty
+    elif authentication == 'SICILY_NEGOTIATE_NTLM':  # https://msdn.microsoft.com/en-us/library/cc223501.aspx
+        request_name = 'NTLM'
+        authentication_choice = encode_octet_string_fast(name.create_negotiate_message(), 0x8A)  # [10] sicilyNegotiate, ntlm client in self.name
+    elif authentication == 'SICILY_RESPONSE_NTLM':  # https://msdn.microsoft.com/en-us/library/cc223501.aspx
+        name.parse_challenge_message(password)  # server_creds returned by server in password
+        server_creds = name.create_authenticate_message()
+        if server_creds:
+            request_name = ''
+            authentication_choice = encode_octet_string_fast(server_creds, 0x8B)  # [11] sicilyResponse
+        else:
+            return None
+    else:
+        raise LDAPUnknownAuthenticationMethodError('unknown authentication method')
+
+    return encode_sequence_fast([encode_integer_fast(version),  # version
+                                 encode_octet_string_fast(request_name),  # name
+                                 authentication_choice],  # authentication
+                                0x60)  # [APPLICATION 0] BindRequest
+
+
 def bind_request_to_dict(request):
     return {'version': int(request['version']),
             'name': str(request['name']),
             'authentication': authentication_choice_to_dict(request['authentication'])}
 
 
+def bind_request_to_dict_fast(request):
+    return {'version': int(request[0][3]),
+            'name': to_unicode(request[1][3]),
+            'authentication': authentication_choice_to_dict_fast(request[2])}
+
+
 def bind_response_operation(result_code,
                             matched_dn='',
                             diagnostic_message='',
@@ -23,10 +23,12 @@
 # along with ldap3 in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 
-from ..protocol.convert import validate_attribute_value, prepare_for_sending
+from ..protocol.convert import validate_attribute_value, prepare_for_sending, ava_to_dict_fast
 from ..protocol.rfc4511 import CompareRequest, AttributeValueAssertion, AttributeDescription, LDAPDN, AssertionValue, ResultCode
 from ..operation.search import ava_to_dict
 from ..operation.bind import referrals_to_list
+from ..utils.asn1 import encode_octet_string_fast, encode_sequence_fast
+from ..utils.conv import to_unicode
 
 
 def compare_operation(dn,
@@ -50,6 +52,20 @@ def compare_operation(dn,
     return request
 
 
+def compare_operation_fast(dn,
+                           attribute,
+                           value,
+                           auto_encode,
+                           schema=None,
+                           validator=None,
+                           check_names=False):
+    # same as compare_operation() but returns the BER encoded CompareRequest, built without pyasn1
+    ava = encode_sequence_fast([encode_octet_string_fast(attribute),  # attributeDesc
+                                encode_octet_string_fast(prepare_for_sending(validate_attribute_value(schema, attribute, value, auto_encode, validator, check_names=check_names)))])  # assertionValue
+
+    return encode_sequence_fast([encode_octet_string_fast(dn), ava], 0x6E)  # [APPLICATION 14] CompareRequest
+
+
 def compare_request_to_dict(request):
     ava = ava_to_dict(request['ava'])
     return {'entry': str(request['entry']),
@@ -57,6 +73,13 @@ def compare_request_to_dict(request):
             'value': ava['value']}
 
 
+def compare_request_to_dict_fast(request):
+    ava = ava_to_dict_fast(request[1][3])
+    return {'entry': to_unicode(request[0][3]),
+            'attribute': ava['attribute'],
+            'value': ava['value']}
+
+
 def compare_response_to_dict(response):
     return {'result': int(response['resultCode']),
             'description': ResultCode().getNamedValues().getName(response['resultCode']),
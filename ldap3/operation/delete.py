@@ -25,6 +25,8 @@
 
 from ..protocol.rfc4511 import DelRequest, LDAPDN, ResultCode
 from ..operation.bind import referrals_to_list
+from ..utils.asn1 import encode_octet_string_fast
+from ..utils.conv import to_unicode
 
 
 def delete_operation(dn):
@@ -34,10 +36,19 @@ def delete_operation(dn):
     return request
 
 
+def delete_operation_fast(dn):
+    # same as delete_operation() but returns the BER encoded DelRequest, built without pyasn1
+    return encode_octet_string_fast(dn, 0x4A)  # [APPLICATION 10] DelRequest
+
+
 def delete_request_to_dict(request):
     return {'entry': str(request)}
 
 
+def delete_request_to_dict_fast(request):
+    return {'entry': to_unicode(request)}
+
+
 def delete_response_to_dict(response):
     return {'result': int(response['resultCode']),
             'description': ResultCode().getNamedValues().getName(response['resultCode']),
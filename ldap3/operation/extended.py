@@ -29,7 +29,7 @@ from pyasn1.type.base import Asn1Item
 from ..core.results import RESULT_CODES
 from ..protocol.rfc4511 import ExtendedRequest, RequestName, ResultCode, RequestValue
 from ..protocol.convert import referrals_to_list
-from ..utils.asn1 import encode
+from ..utils.asn1 import encode, encode_octet_string_fast, encode_sequence_fast
 from ..utils.conv import to_unicode
 
 # ExtendedRequest ::= [APPLICATION 23] SEQUENCE {
@@ -56,10 +56,31 @@ def extended_operation(request_name,
     return request
 
 
+def extended_operation_fast(request_name,
+                            request_value=None,
+                            no_encode=None):
+    # same as extended_operation() but returns the BER encoded ExtendedRequest, values that are pyasn1 objects are still encoded by pyasn1
+    components = [encode_octet_string_fast(request_name, 0x80)]  # [0] requestName
+    if request_value and isinstance(request_value, Asn1Item):
+        components.append(encode_octet_string_fast(encode(request_value), 0x81))  # [1] requestValue
+    elif str is not bytes and isinstance(request_value, (bytes, bytearray)):  # in Python 3 doesn't try to encode a byte value
+        components.append(encode_octet_string_fast(bytes(request_value), 0x81))
+    elif request_value and no_encode:  # doesn't encode the value
+        components.append(encode_octet_string_fast(request_value, 0x81))
+    elif request_value:  # tries to encode as a octet string
+        components.append(encode_octet_string_fast(encode(OctetString(str(request_value))), 0x81))
+
+    return encode_sequence_fast(components, 0x77)  # [APPLICATION 23] ExtendedRequest
+
+
 def extended_request_to_dict(request):
     # return {'name': str(request['requestName']), 'value': bytes(request['requestValue']) if request['requestValue'] else None}
     return {'name': str(request['requestName']), 'value': bytes(request['requestValue']) if 'requestValue' in request and request['requestValue'] is not None and request['requestValue'].hasValue()  else None}
 
+def extended_request_to_dict_fast(request):
+    return {'name': to_unicode(request[0][3]), 'value': bytes(request[1][3]) if len(request) > 1 else None}
+
+
 def extended_response_to_dict(response):
     return {'result': int(response['resultCode']),
             'dn': str(response['matchedDN']),
@@ -26,7 +26,9 @@
 from .. import SEQUENCE_TYPES, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE, MODIFY_INCREMENT
 from ..protocol.rfc4511 import ModifyRequest, LDAPDN, Changes, Change, Operation, PartialAttribute, AttributeDescription, Vals, ResultCode
 from ..operation.bind import referrals_to_list
-from ..protocol.convert import changes_to_list, validate_attribute_value, prepare_for_sending
+from ..protocol.convert import changes_to_list, validate_attribute_value, prepare_for_sending, changes_to_list_fast
+from ..utils.conv import to_unicode
+from ..utils.asn1 import encode_octet_string_fast, encode_integer_fast, encode_sequence_fast
 
 # ModifyRequest ::= [APPLICATION 6] SEQUENCE {
 #    object          LDAPDN,
@@ -83,11 +85,36 @@ def modify_operation(dn,
     return request
 
 
+def modify_operation_fast(dn,
+                          changes,
+                          auto_encode,
+                          schema=None,
+                          validator=None,
+                          check_names=False):
+    # same as modify_operation() but returns the BER encoded ModifyRequest, built without pyasn1
+    change_list = []
+    for attribute in changes:
+        for change_operation in changes[attribute]:
+            if isinstance(change_operation[1], SEQUENCE_TYPES):
+                vals = [encode_octet_string_fast(prepare_for_sending(validate_attribute_value(schema, attribute, value, auto_encode, validator, check_names=check_names))) for value in change_operation[1]]
+            else:
+                vals = [encode_octet_string_fast(prepare_for_sending(validate_attribute_value(schema, attribute, change_operation[1], auto_encode, validator, check_names=check_names)))]
+            partial_attribute = encode_sequence_fast([encode_octet_string_fast(attribute), encode_sequence_fast(vals, 0x31)])  # type, SET OF vals
+            change_list.append(encode_sequence_fast([encode_integer_fast(change_table[change_operation[0]], 0x0A), partial_attribute]))  # operation, modification
+
+    return encode_sequence_fast([encode_octet_string_fast(dn), encode_sequence_fast(change_list)], 0x66)  # [APPLICATION 6] ModifyRequest
+
+
 def modify_request_to_dict(request):
     return {'entry': str(request['object']),
             'changes': changes_to_list(request['changes'])}
 
 
+def modify_request_to_dict_fast(request):
+    return {'entry': to_unicode(request[0][3]),
+            'changes': changes_to_list_fast(request[1][3])}
+
+
 def modify_response_to_dict(response):
     return {'result': int(response['resultCode']),
             'description': ResultCode().getNamedValues().getName(response['resultCode']),
@@ -25,6 +25,8 @@
 
 from ..protocol.rfc4511 import ModifyDNRequest, LDAPDN, RelativeLDAPDN, DeleteOldRDN, NewSuperior, ResultCode
 from ..operation.bind import referrals_to_list
+from ..utils.asn1 import encode_octet_string_fast, encode_boolean_fast, encode_sequence_fast
+from ..utils.conv import to_unicode
 
 # ModifyDNRequest ::= [APPLICATION 12] SEQUENCE {
 #     entry           LDAPDN,
@@ -47,6 +49,20 @@ def modify_dn_operation(dn,
     return request
 
 
+def modify_dn_operation_fast(dn,
+                             new_relative_dn,
+                             delete_old_rdn=True,
+                             new_superior=None):
+    # same as modify_dn_operation() but returns the BER encoded ModifyDNRequest, built without pyasn1
+    components = [encode_octet_string_fast(dn),  # entry
+                  encode_octet_string_fast(new_relative_dn),  # newrdn
+                  encode_boolean_fast(delete_old_rdn)]  # deleteoldrdn
+    if new_superior:
+        components.append(encode_octet_string_fast(new_superior, 0x80))  # [0] newSuperior
+
+    return encode_sequence_fast(components, 0x6C)  # [APPLICATION 12] ModifyDNRequest
+
+
 def modify_dn_request_to_dict(request):
     return {'entry': str(request['entry']),
             'newRdn': str(request['newrdn']),
@@ -54,6 +70,13 @@ def modify_dn_request_to_dict(request):
             'newSuperior': str(request['newSuperior']) if request['newSuperior'] is not None and request['newSuperior'].hasValue() else None}
 
 
+def modify_dn_request_to_dict_fast(request):
+    return {'entry': to_unicode(request[0][3]),
+            'newRdn': to_unicode(request[1][3]),
+            'deleteOldRdn': request[2][3],
+            'newSuperior': to_unicode(request[3][3]) if len(request) > 3 else None}
+
+
 def modify_dn_response_to_dict(response):
     return {'result': int(response['resultCode']),
             'description': ResultCode().getNamedValues().getName(response['resultCode']),
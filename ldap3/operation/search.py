@@ -25,6 +25,11 @@
 
 from string import whitespace
 from os import linesep
+from threading import Lock
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ..utils.ordDict import OrderedDict  # for Python 2.6
 
 from .. import DEREF_NEVER, BASE, LEVEL, SUBTREE, DEREF_SEARCH, DEREF_BASE, DEREF_ALWAYS, NO_ATTRIBUTES, SEQUENCE_TYPES, get_config_parameter, STRING_TYPES
 
@@ -35,9 +40,10 @@ from ..protocol.rfc4511 import SearchRequest, LDAPDN, Scope, DerefAliases, Integ
     Not, And, Or, ApproxMatch, GreaterOrEqual, LessOrEqual, ExtensibleMatch, Present, SubstringFilter, \
     Substrings, Final, Initial, Any, ResultCode, Substring, MatchingRule, Type, MatchValue, DnAttributes
 from ..operation.bind import referrals_to_list
-from ..protocol.convert import ava_to_dict, attributes_to_list, search_refs_to_list, validate_assertion_value, prepare_filter_for_sending, search_refs_to_list_fast
+from ..protocol.convert import ava_to_dict, attributes_to_list, search_refs_to_list, validate_assertion_value, prepare_filter_for_sending, search_refs_to_list_fast, ava_to_dict_fast
 from ..protocol.formatters.standard import format_attribute_values
-from ..utils.conv import to_unicode, to_raw
+from ..utils.conv import to_unicode, to_raw, escape_filter_chars
+from ..utils.asn1 import encode_tlv, encode_octet_string_fast, encode_integer_fast, encode_boolean_fast, encode_sequence_fast, get_bytes
 
 ROOT = 0
 AND = 1
@@ -56,6 +62,22 @@ SEARCH_OPEN_OR_CLOSE = 21
 SEARCH_MATCH_OR_CLOSE = 22
 SEARCH_MATCH_OR_CONTROL = 23
 
+FILTER_PLACEHOLDER = '?'  # assertion value provided when a prepared search is executed
+
+FILTER_AVA_TAGS = {MATCH_EQUAL: 0xA3,  # [3] equalityMatch
+                   MATCH_GREATER_OR_EQUAL: 0xA5,  # [5] greaterOrEqual
+                   MATCH_LESS_OR_EQUAL: 0xA6,  # [6] lessOrEqual
+                   MATCH_APPROX: 0xA8}  # [8] approxMatch
+
+FILTER_AVA_OPERATORS = {3: '=',  # equalityMatch
+                        5: '>=',  # greaterOrEqual
+                        6: '<=',  # lessOrEqual
+                        8: '~='}  # approxMatch
+
+FILTER_MATCHING_RULE_ASSERTION_NAMES = {1: 'matchingRule',
+                                        2: 'type',
+                                        3: 'matchValue'}
+
 
 class FilterNode(object):
     def __init__(self, tag=None, assertion=None):
@@ -82,7 +104,66 @@ class FilterNode(object):
         return representation
 
 
-def evaluate_match(match, schema, auto_escape, auto_encode, validator, check_names):
+class FilterCache(object):
+    """
+    LRU cache of the search filters, shared by all connections
+    Only immutable forms are cached: the BER encoded filter of the fast encoder and the parsed filter tree,
+    the pyasn1 Filter is built from the tree for each request because pyasn1 objects are mutable
+    """
+    def __init__(self):
+        self.filters = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            cached = self.filters.pop(key, None)
+            if cached is not None:
+                self.filters[key] = cached  # most recently used
+            return cached
+
+    def put(self, key, value, size):
+        with self.lock:
+            self.filters.pop(key, None)
+            self.filters[key] = value
+            while len(self.filters) > size:
+                self.filters.popitem(last=False)  # least recently used
+
+    def clear(self):
+        with self.lock:
+            self.filters.clear()
+
+    def count(self, usage, hit):
+        """
+        Counts a hit or a miss in the usage metrics, the same connection can be used by many threads
+        """
+        with self.lock:
+            if hit:
+                usage.filter_cache_hits += 1
+            else:
+                usage.filter_cache_misses += 1
+
+
+filter_cache = FilterCache()
+
+
+class FilterPlaceholder(object):
+    """
+    An assertion value of a prepared search filter, provided when the search is executed
+    """
+    def __init__(self, attr):
+        self.attr = attr
+
+    def __repr__(self):
+        return '<placeholder for ' + str(self.attr) + '>'
+
+
+def validate_filter_value(schema, name, value, auto_escape, auto_encode, validator, check_names, placeholder=None):
+    if placeholder is not None and value == placeholder:  # value is provided when the prepared search is executed
+        return FilterPlaceholder(name)
+    return validate_assertion_value(schema, name, value, auto_escape, auto_encode, validator, check_names)
+
+
+def evaluate_match(match, schema, auto_escape, auto_encode, validator, check_names, placeholder=None):
     left_part, equal_sign, right_part = match.strip().partition('=')
     if not equal_sign:
         raise LDAPInvalidFilterError('invalid matching assertion')
@@ -90,17 +171,17 @@ def evaluate_match(match, schema, auto_escape, auto_encode, validator, check_nam
         tag = MATCH_APPROX
         left_part = left_part[:-1].strip()
         right_part = right_part.strip()
-        assertion = {'attr': left_part, 'value': validate_assertion_value(schema, left_part, right_part, auto_escape, auto_encode, validator, check_names)}
+        assertion = {'attr': left_part, 'value': validate_filter_value(schema, left_part, right_part, auto_escape, auto_encode, validator, check_names, placeholder)}
     elif left_part.endswith('>'):  # greater or equal match '>='
         tag = MATCH_GREATER_OR_EQUAL
         left_part = left_part[:-1].strip()
         right_part = right_part.strip()
-        assertion = {'attr': left_part, 'value': validate_assertion_value(schema, left_part, right_part, auto_escape, auto_encode, validator, check_names)}
+        assertion = {'attr': left_part, 'value': validate_filter_value(schema, left_part, right_part, auto_escape, auto_encode, validator, check_names, placeholder)}
     elif left_part.endswith('<'):  # less or equal match '<='
         tag = MATCH_LESS_OR_EQUAL
         left_part = left_part[:-1].strip()
         right_part = right_part.strip()
-        assertion = {'attr': left_part, 'value': validate_assertion_value(schema, left_part, right_part, auto_escape, auto_encode, validator, check_names)}
+        assertion = {'attr': left_part, 'value': validate_filter_value(schema, left_part, right_part, auto_escape, auto_encode, validator, check_names, placeholder)}
     elif left_part.endswith(':'):  # extensible match ':='
         tag = MATCH_EXTENSIBLE
         left_part = left_part[:-1].strip()
@@ -137,7 +218,7 @@ def evaluate_match(match, schema, auto_escape, auto_encode, validator, check_nam
             raise LDAPInvalidFilterError('invalid extensible filter')
         attribute_name = attribute_name.strip() if attribute_name else False
         matching_rule = matching_rule.strip() if matching_rule else False
-        assertion = {'attr': attribute_name, 'value': validate_assertion_value(schema, attribute_name, right_part, auto_escape, auto_encode, validator, check_names), 'matchingRule': matching_rule, 'dnAttributes': dn_attributes}
+        assertion = {'attr': attribute_name, 'value': validate_filter_value(schema, attribute_name, right_part, auto_escape, auto_encode, validator, check_names, placeholder), 'matchingRule': matching_rule, 'dnAttributes': dn_attributes}
     elif right_part == '*':  # attribute present match '=*'
         tag = MATCH_PRESENT
         left_part = left_part.strip()
@@ -147,9 +228,9 @@ def evaluate_match(match, schema, auto_escape, auto_encode, validator, check_nam
         left_part = left_part.strip()
         right_part = right_part.strip()
         substrings = right_part.split('*')
-        initial = validate_assertion_value(schema, left_part, substrings[0], auto_escape, auto_encode, validator, check_names) if substrings[0] else None
-        final = validate_assertion_value(schema, left_part, substrings[-1], auto_escape, auto_encode, validator, check_names) if substrings[-1] else None
-        any_string = [validate_assertion_value(schema, left_part, substring, auto_escape, auto_encode, validator, check_names) for substring in substrings[1:-1] if substring]
+        initial = validate_filter_value(schema, left_part, substrings[0], auto_escape, auto_encode, validator, check_names, placeholder) if substrings[0] else None
+        final = validate_filter_value(schema, left_part, substrings[-1], auto_escape, auto_encode, validator, check_names, placeholder) if substrings[-1] else None
+        any_string = [validate_filter_value(schema, left_part, substring, auto_escape, auto_encode, validator, check_names, placeholder) for substring in substrings[1:-1] if substring]
         #assertion = {'attr': left_part, 'initial': initial, 'any': any_string, 'final': final}
         assertion = {'attr': left_part}
         if initial:
@@ -162,12 +243,12 @@ def evaluate_match(match, schema, auto_escape, auto_encode, validator, check_nam
         tag = MATCH_EQUAL
         left_part = left_part.strip()
         right_part = right_part.strip()
-        assertion = {'attr': left_part, 'value': validate_assertion_value(schema, left_part, right_part, auto_escape, auto_encode, validator, check_names)}
+        assertion = {'attr': left_part, 'value': validate_filter_value(schema, left_part, right_part, auto_escape, auto_encode, validator, check_names, placeholder)}
 
     return FilterNode(tag, assertion)
 
 
-def parse_filter(search_filter, schema, auto_escape, auto_encode, validator, check_names):
+def parse_filter(search_filter, schema, auto_escape, auto_encode, validator, check_names, placeholder=None):
     if str is not bytes and isinstance(search_filter, bytes):  # python 3 with byte filter
         search_filter = to_unicode(search_filter)
     search_filter = search_filter.strip()
@@ -202,7 +283,7 @@ def parse_filter(search_filter, schema, auto_escape, auto_encode, validator, che
                     if start_pos:
                         if current_node.tag == NOT and len(current_node.elements) > 0:
                             raise LDAPInvalidFilterError('NOT (!) clause in filter cannot be multiple')
-                        current_node.append(evaluate_match(search_filter[start_pos:end_pos], schema, auto_escape, auto_encode, validator, check_names))
+                        current_node.append(evaluate_match(search_filter[start_pos:end_pos], schema, auto_escape, auto_encode, validator, check_names, placeholder))
                 start_pos = None
                 state = SEARCH_OPEN_OR_CLOSE
             elif (state == SEARCH_MATCH_OR_CLOSE or state == SEARCH_MATCH_OR_CONTROL) and c not in '()':
@@ -295,23 +376,179 @@ def compile_filter(filter_node):
     return compiled_filter
 
 
-def build_attribute_selection(attribute_list, schema):
+def compile_filter_fast(filter_node):
+    """Builds BER encoded filter without pyasn1, converts from filter LDAP escaping to bytes"""
+    if filter_node.tag == AND:
+        return encode_sequence_fast([compile_filter_fast(element) for element in filter_node.elements], 0xA0)  # [0] and
+    elif filter_node.tag == OR:
+        return encode_sequence_fast([compile_filter_fast(element) for element in filter_node.elements], 0xA1)  # [1] or
+    elif filter_node.tag == NOT:
+        return encode_tlv(0xA2, compile_filter_fast(filter_node.elements[0]))  # [2] not, explicitly tagged
+    elif filter_node.tag in (MATCH_APPROX, MATCH_GREATER_OR_EQUAL, MATCH_LESS_OR_EQUAL, MATCH_EQUAL):
+        return encode_sequence_fast([encode_octet_string_fast(filter_node.assertion['attr']),
+                                     encode_octet_string_fast(prepare_filter_for_sending(filter_node.assertion['value']))],
+                                    FILTER_AVA_TAGS[filter_node.tag])
+    elif filter_node.tag == MATCH_EXTENSIBLE:
+        components = []
+        if filter_node.assertion['matchingRule']:
+            components.append(encode_octet_string_fast(filter_node.assertion['matchingRule'], 0x81))  # [1] matchingRule
+        if filter_node.assertion['attr']:
+            components.append(encode_octet_string_fast(filter_node.assertion['attr'], 0x82))  # [2] type
+        components.append(encode_octet_string_fast(prepare_filter_for_sending(filter_node.assertion['value']), 0x83))  # [3] matchValue
+        if filter_node.assertion['dnAttributes']:  # dnAttributes is omitted when equal to the default (FALSE)
+            components.append(encode_boolean_fast(True, 0x84))  # [4] dnAttributes
+        return encode_sequence_fast(components, 0xA9)  # [9] extensibleMatch
+    elif filter_node.tag == MATCH_PRESENT:
+        return encode_octet_string_fast(filter_node.assertion['attr'], 0x87)  # [7] present
+    elif filter_node.tag == MATCH_SUBSTRING:
+        substrings = []
+        if 'initial' in filter_node.assertion and filter_node.assertion['initial']:
+            substrings.append(encode_octet_string_fast(prepare_filter_for_sending(filter_node.assertion['initial']), 0x80))  # [0] initial
+        if 'any' in filter_node.assertion and filter_node.assertion['any']:
+            for substring in filter_node.assertion['any']:
+                substrings.append(encode_octet_string_fast(prepare_filter_for_sending(substring), 0x81))  # [1] any
+        if 'final' in filter_node.assertion and filter_node.assertion['final']:
+            substrings.append(encode_octet_string_fast(prepare_filter_for_sending(filter_node.assertion['final']), 0x82))  # [2] final
+        return encode_sequence_fast([encode_octet_string_fast(filter_node.assertion['attr']),
+                                     encode_sequence_fast(substrings)], 0xA4)  # [4] substrings
+    else:
+        raise LDAPInvalidFilterError('unknown filter node tag')
+
+
+def template_value(value, tag, slots):
+    if isinstance(value, FilterPlaceholder):
+        slots.append(value.attr)
+        return tag, len(slots) - 1
+    return encode_octet_string_fast(prepare_filter_for_sending(value), tag)
+
+
+def template_sequence(components, tag=0x30):
+    if all(isinstance(component, bytes) for component in components):
+        return encode_sequence_fast(components, tag)
+    return tag, components
+
+
+def compile_filter_template(filter_node, slots):
+    """Builds BER encoded filter as compile_filter_fast(), leaving a slot for each placeholder value
+    Returns the encoded bytes when the filter has no placeholders, else a (tag, components) tuple where each
+    component is encoded bytes, a (tag, components) tuple or a (tag, slot index) tuple for an octet string
+    The attribute of each placeholder is appended to slots
+    """
+    if filter_node.tag == AND:
+        return template_sequence([compile_filter_template(element, slots) for element in filter_node.elements], 0xA0)  # [0] and
+    elif filter_node.tag == OR:
+        return template_sequence([compile_filter_template(element, slots) for element in filter_node.elements], 0xA1)  # [1] or
+    elif filter_node.tag == NOT:
+        return template_sequence([compile_filter_template(filter_node.elements[0], slots)], 0xA2)  # [2] not, explicitly tagged
+    elif filter_node.tag in (MATCH_APPROX, MATCH_GREATER_OR_EQUAL, MATCH_LESS_OR_EQUAL, MATCH_EQUAL):
+        return template_sequence([encode_octet_string_fast(filter_node.assertion['attr']),
+                                  template_value(filter_node.assertion['value'], 0x04, slots)],
+                                 FILTER_AVA_TAGS[filter_node.tag])
+    elif filter_node.tag == MATCH_EXTENSIBLE:
+        components = []
+        if filter_node.assertion['matchingRule']:
+            components.append(encode_octet_string_fast(filter_node.assertion['matchingRule'], 0x81))  # [1] matchingRule
+        if filter_node.assertion['attr']:
+            components.append(encode_octet_string_fast(filter_node.assertion['attr'], 0x82))  # [2] type
+        components.append(template_value(filter_node.assertion['value'], 0x83, slots))  # [3] matchValue
+        if filter_node.assertion['dnAttributes']:
+            components.append(encode_boolean_fast(True, 0x84))  # [4] dnAttributes
+        return template_sequence(components, 0xA9)  # [9] extensibleMatch
+    elif filter_node.tag == MATCH_SUBSTRING:
+        substrings = []
+        if 'initial' in filter_node.assertion and filter_node.assertion['initial']:
+            substrings.append(template_value(filter_node.assertion['initial'], 0x80, slots))  # [0] initial
+        if 'any' in filter_node.assertion and filter_node.assertion['any']:
+            for substring in filter_node.assertion['any']:
+                substrings.append(template_value(substring, 0x81, slots))  # [1] any
+        if 'final' in filter_node.assertion and filter_node.assertion['final']:
+            substrings.append(template_value(filter_node.assertion['final'], 0x82, slots))  # [2] final
+        return template_sequence([encode_octet_string_fast(filter_node.assertion['attr']),
+                                  template_sequence(substrings)], 0xA4)  # [4] substrings
+    return compile_filter_fast(filter_node)  # present match has no value
+
+
+class SearchRequestTemplate(object):
+    """
+    A SearchRequest encoded by search_operation_template(), only the placeholder values are encoded
+    and the lengths of the enclosing components are recomputed when values are provided
+    """
+    def __init__(self, template, slots, auto_escape, auto_encode, schema, validator, check_names):
+        self.template = template
+        self.slots = slots  # attribute of each placeholder
+        self.auto_escape = auto_escape
+        self.auto_encode = auto_encode
+        self.schema = schema
+        self.validator = validator
+        self.check_names = check_names
+
+    def encode(self, values):
+        """
+        Returns the BER encoded SearchRequest with the values in the placeholder slots
+        Values are escaped, so they are sent as they are and cannot alter the filter
+        """
+        if len(values) != len(self.slots):
+            raise LDAPInvalidFilterError('prepared search requires %d values, %d given' % (len(self.slots), len(values)))
+        encoded_values = [prepare_filter_for_sending(validate_assertion_value(self.schema, attr, escape_filter_chars(value), self.auto_escape, self.auto_encode, self.validator, self.check_names)) for attr, value in zip(self.slots, values)]
+        return self.encode_template(self.template, encoded_values)
+
+    def encode_template(self, template, encoded_values):
+        if isinstance(template, bytes):
+            return template
+        tag, content = template
+        if isinstance(content, int):
+            return encode_tlv(tag, encoded_values[content])
+        return encode_tlv(tag, b''.join([self.encode_template(component, encoded_values) for component in content]))
+
+
+def compile_search_filter(search_filter, schema, auto_escape, auto_encode, validator, check_names, fast=False, usage=None):
+    """Parses and compiles the filter with compile_filter_fast() if fast else with compile_filter()
+    Parsed and fast compiled filters are kept in filter_cache, hits and misses are counted in usage if present and the cache is enabled
+    """
+    cache_size = get_config_parameter('FILTER_CACHE_SIZE')
+    cached = None
+    if cache_size:
+        # schema and validator are kept in the cached value, so their id cannot be reused by other objects while the filter is cached
+        key = (search_filter, id(schema), id(validator), bool(auto_escape), bool(auto_encode), bool(check_names), fast)
+        cached = filter_cache.get(key)
+        if usage:
+            filter_cache.count(usage, cached is not None)
+    if cached is not None:
+        return cached[0] if fast else compile_filter(cached[0])  # a new pyasn1 Filter for each request
+    filter_tree = parse_filter(search_filter, schema, auto_escape, auto_encode, validator, check_names).elements[0]  # parse the searchFilter string starting from the root node
+    compiled_filter = (compile_filter_fast if fast else compile_filter)(filter_tree)
+    if cache_size:
+        filter_cache.put(key, (compiled_filter if fast else filter_tree, schema, validator), cache_size)
+    return compiled_filter
+
+
+def check_attribute_selection(attribute_list, schema):
     conf_attributes_excluded_from_check = [v.lower() for v in get_config_parameter('ATTRIBUTES_EXCLUDED_FROM_CHECK')]
 
-    attribute_selection = AttributeSelection()
-    for index, attribute in enumerate(attribute_list):
-        if schema and schema.attribute_types:
+    if schema and schema.attribute_types:
+        for attribute in attribute_list:
             if ';' in attribute:  # exclude tags from validation
                 if not attribute[0:attribute.index(';')] in schema.attribute_types and attribute.lower() not in conf_attributes_excluded_from_check:
                     raise LDAPAttributeError('invalid attribute type in attribute list: ' + attribute)
             else:
                 if attribute not in schema.attribute_types and attribute.lower() not in conf_attributes_excluded_from_check:
                     raise LDAPAttributeError('invalid attribute type in attribute list: ' + attribute)
+
+
+def build_attribute_selection(attribute_list, schema):
+    check_attribute_selection(attribute_list, schema)
+    attribute_selection = AttributeSelection()
+    for index, attribute in enumerate(attribute_list):
         attribute_selection[index] = Selector(attribute)
 
     return attribute_selection
 
 
+def build_attribute_selection_fast(attribute_list, schema):
+    check_attribute_selection(attribute_list, schema)
+    return encode_sequence_fast([encode_octet_string_fast(attribute) for attribute in attribute_list])
+
+
 def search_operation(search_base,
                      search_filter,
                      search_scope,
@@ -324,7 +561,8 @@ def search_operation(search_base,
                      auto_encode,
                      schema=None,
                      validator=None,
-                     check_names=False):
+                     check_names=False,
+                     usage=None):
     # SearchRequest ::= [APPLICATION 3] SEQUENCE {
     # baseObject      LDAPDN,
     #     scope           ENUMERATED {
@@ -368,7 +606,7 @@ def search_operation(search_base,
     request['sizeLimit'] = Integer0ToMax(size_limit)
     request['timeLimit'] = Integer0ToMax(time_limit)
     request['typesOnly'] = TypesOnly(True) if types_only else TypesOnly(False)
-    request['filter'] = compile_filter(parse_filter(search_filter, schema, auto_escape, auto_encode, validator, check_names).elements[0])  # parse the searchFilter string and compile it starting from the root node
+    request['filter'] = compile_search_filter(search_filter, schema, auto_escape, auto_encode, validator, check_names, usage=usage)
     if not isinstance(attributes, SEQUENCE_TYPES):
         attributes = [NO_ATTRIBUTES]
 
@@ -377,6 +615,98 @@ def search_operation(search_base,
     return request
 
 
+def search_header_fast(search_base,
+                       search_scope,
+                       dereference_aliases,
+                       size_limit,
+                       time_limit,
+                       types_only):
+    # BER encoded components of the SearchRequest that precede the filter
+    if search_scope == BASE or search_scope == 0:
+        scope = 0  # baseObject
+    elif search_scope == LEVEL or search_scope == 1:
+        scope = 1  # singleLevel
+    elif search_scope == SUBTREE or search_scope == 2:
+        scope = 2  # wholeSubtree
+    else:
+        raise LDAPInvalidScopeError('invalid scope type')
+
+    if dereference_aliases == DEREF_NEVER or dereference_aliases == 0:
+        deref_aliases = 0  # neverDerefAliases
+    elif dereference_aliases == DEREF_SEARCH or dereference_aliases == 1:
+        deref_aliases = 1  # derefInSearching
+    elif dereference_aliases == DEREF_BASE or dereference_aliases == 2:
+        deref_aliases = 2  # derefFindingBaseObj
+    elif dereference_aliases == DEREF_ALWAYS or dereference_aliases == 3:
+        deref_aliases = 3  # derefAlways
+    else:
+        raise LDAPInvalidDereferenceAliasesError('invalid dereference aliases type')
+
+    return b''.join([encode_octet_string_fast(search_base),  # baseObject
+                     encode_integer_fast(scope, 0x0A),  # scope
+                     encode_integer_fast(deref_aliases, 0x0A),  # derefAliases
+                     encode_integer_fast(size_limit),  # sizeLimit
+                     encode_integer_fast(time_limit),  # timeLimit
+                     encode_boolean_fast(types_only)])  # typesOnly
+
+
+def search_operation_fast(search_base,
+                          search_filter,
+                          search_scope,
+                          dereference_aliases,
+                          attributes,
+                          size_limit,
+                          time_limit,
+                          types_only,
+                          auto_escape,
+                          auto_encode,
+                          schema=None,
+                          validator=None,
+                          check_names=False,
+                          usage=None):
+    # same as search_operation() but returns the BER encoded SearchRequest, built without pyasn1
+    encoded_header = search_header_fast(search_base, search_scope, dereference_aliases, size_limit, time_limit, types_only)
+    encoded_filter = compile_search_filter(search_filter, schema, auto_escape, auto_encode, validator, check_names, fast=True, usage=usage)
+    if not isinstance(attributes, SEQUENCE_TYPES):
+        attributes = [NO_ATTRIBUTES]
+
+    return encode_sequence_fast([encoded_header,
+                                 encoded_filter,  # filter
+                                 build_attribute_selection_fast(attributes, schema)],  # attributes
+                                0x63)  # [APPLICATION 3] SearchRequest
+
+
+def search_operation_template(search_base,
+                              search_filter,
+                              search_scope,
+                              dereference_aliases,
+                              attributes,
+                              size_limit,
+                              time_limit,
+                              types_only,
+                              auto_escape,
+                              auto_encode,
+                              schema=None,
+                              validator=None,
+                              check_names=False):
+    # same as search_operation_fast() but the assertion values equal to FILTER_PLACEHOLDER are left as slots to fill with SearchRequestTemplate.encode()
+    slots = []
+    filter_template = compile_filter_template(parse_filter(search_filter, schema, auto_escape, auto_encode, validator, check_names, FILTER_PLACEHOLDER).elements[0], slots)
+    if not isinstance(attributes, SEQUENCE_TYPES):
+        attributes = [NO_ATTRIBUTES]
+
+    return SearchRequestTemplate(template_sequence([search_header_fast(search_base, search_scope, dereference_aliases, size_limit, time_limit, types_only),
+                                                    filter_template,
+                                                    build_attribute_selection_fast(attributes, schema)],
+                                                   0x63),  # [APPLICATION 3] SearchRequest
+                                 slots,
+                                 auto_escape,
+                                 auto_encode,
+                                 schema,
+                                 validator,
+                                 check_names)
+
+
 def decode_vals(vals):
     try:
         return [str(val) for val in vals if val] if vals else None
@@ -454,6 +784,93 @@ def checked_attributes_to_dict_fast(attribute_list, schema=None, custom_formatte
     return checked_attributes
 
 
+class LazyAttributesDict(CaseInsensitiveDict):
+    """
+    Attributes of a search result entry decoded with the fast decoder. Values of each attribute
+    are kept as decoded by the BER decoder and converted with the converter function only when the
+    attribute is read for the first time, converted values are cached
+    It is a CaseInsensitiveDict in both modes, with case_insensitive=False the keys are case sensitive as in a dict.
+    Code reading the _store of a CaseInsensitiveDict (i.e. the json formatting) gets the converted values
+    """
+    def __init__(self, attribute_list, converter, case_insensitive=True):
+        self._case_insensitive = case_insensitive
+        self._converter = converter  # converter(name, vals) -> attribute values
+        self._pending = dict()  # original key -> undecoded attribute values
+        CaseInsensitiveDict.__init__(self)
+        for attribute in attribute_list:
+            name = to_unicode(attribute[3][0][3], from_server=True)
+            self._case_insensitive_keymap[self._ci_key(name)] = name
+            self._values[name] = None
+            self._pending[name] = attribute[3][1][3]
+
+    @property
+    def _store(self):
+        self._convert_all()
+        return self._values
+
+    @_store.setter
+    def _store(self, value):
+        self._values = value
+
+    def _ci_key(self, key):
+        return CaseInsensitiveDict._ci_key(key) if self._case_insensitive else key
+
+    def _convert_all(self):
+        for key in list(self._pending):
+            self._values[key] = self._converter(key, self._pending.pop(key))
+
+    def __contains__(self, item):
+        return self._ci_key(item) in self._case_insensitive_keymap
+
+    def __getitem__(self, key):
+        key = self._case_insensitive_keymap[self._ci_key(key)]
+        if key in self._pending:
+            self._values[key] = self._converter(key, self._pending.pop(key))
+        return self._values[key]
+
+    def __setitem__(self, key, item):
+        ci_key = self._ci_key(key)
+        if ci_key in self._case_insensitive_keymap:  # updates existing value
+            key = self._case_insensitive_keymap[ci_key]
+            self._pending.pop(key, None)
+        else:  # new key
+            self._case_insensitive_keymap[ci_key] = key
+        self._values[key] = item
+
+    def __delitem__(self, key):
+        key = self._case_insensitive_keymap.pop(self._ci_key(key))
+        self._pending.pop(key, None)
+        del self._values[key]
+
+    def __iter__(self):
+        return self._values.__iter__()
+
+    def __len__(self):
+        return len(self._values)
+
+    def keys(self):
+        return self._values.keys()
+
+    def __reduce__(self):  # copy, deepcopy and pickle get the converted attributes
+        attributes = self.copy()
+        return attributes.__class__, (attributes, )
+
+    def copy(self):
+        return CaseInsensitiveDict(self._store) if self._case_insensitive else dict(self._store)
+
+
+def lazy_attributes_to_dict_fast(attribute_list):
+    return LazyAttributesDict(attribute_list, lambda name, vals: decode_vals_fast(vals), get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES'))
+
+
+def lazy_raw_attributes_to_dict_fast(attribute_list):
+    return LazyAttributesDict(attribute_list, lambda name, vals: decode_raw_vals_fast(vals), get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES'))
+
+
+def lazy_checked_attributes_to_dict_fast(attribute_list, schema=None, custom_formatter=None):
+    return LazyAttributesDict(attribute_list, lambda name, vals: format_attribute_values(schema, name, decode_raw_vals_fast(vals) or [], custom_formatter), get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES'))
+
+
 def matching_rule_assertion_to_string(matching_rule_assertion):
     return str(matching_rule_assertion)
 
@@ -521,6 +938,72 @@ def search_request_to_dict(request):
             'attributes': attributes_to_list(request['attributes'])}
 
 
+def matching_rule_assertion_to_string_fast(matching_rule_assertion):
+    # same representation of the pyasn1 MatchingRuleAssertion object, dnAttributes is always shown
+    representation = 'ExtensibleMatch:\n'
+    dn_attributes = False
+    for component in matching_rule_assertion:
+        if component[2] == 4:
+            dn_attributes = component[3]
+        else:
+            value = component[3]
+            if any(octet < 32 or octet > 126 for octet in get_bytes(value)):  # hexify if needed
+                value = '0x' + ''.join('%.2x' % octet for octet in get_bytes(value))
+            else:
+                value = to_unicode(value)
+            representation += ' ' + FILTER_MATCHING_RULE_ASSERTION_NAMES[component[2]] + '=' + value + '\n'
+    representation += ' dnAttributes=' + str(dn_attributes) + '\n'
+    return representation
+
+
+def filter_to_string_fast(filter_component):
+    filter_type = filter_component[2]
+    filter_string = '('
+    if filter_type == 0:  # and
+        filter_string += '&'
+        for f in filter_component[3]:
+            filter_string += filter_to_string_fast(f)
+    elif filter_type == 1:  # or
+        filter_string += '|'
+        for f in filter_component[3]:
+            filter_string += filter_to_string_fast(f)
+    elif filter_type == 2:  # not
+        filter_string += '!' + filter_to_string_fast(filter_component[3][0])
+    elif filter_type in FILTER_AVA_OPERATORS:  # equalityMatch, greaterOrEqual, lessOrEqual, approxMatch
+        ava = ava_to_dict_fast(filter_component[3])
+        filter_string += ava['attribute'] + FILTER_AVA_OPERATORS[filter_type] + ava['value']
+    elif filter_type == 4:  # substrings
+        filter_string += to_unicode(filter_component[3][0][3]) + '='
+        for substring in filter_component[3][1][3]:
+            if substring[2] == 0:  # initial
+                filter_string += to_unicode(substring[3]) + '*'
+            elif substring[2] == 1:  # any
+                filter_string += to_unicode(substring[3]) if filter_string.endswith('*') else '*' + to_unicode(substring[3])
+                filter_string += '*'
+            elif substring[2] == 2:  # final
+                filter_string += '*' + to_unicode(substring[3])
+    elif filter_type == 7:  # present
+        filter_string += to_unicode(filter_component[3]) + '=*'
+    elif filter_type == 9:  # extensibleMatch
+        filter_string += matching_rule_assertion_to_string_fast(filter_component[3])
+    else:
+        raise LDAPInvalidFilterError('error converting filter to string')
+    filter_string += ')'
+
+    return filter_string
+
+
+def search_request_to_dict_fast(request):
+    return {'base': to_unicode(request[0][3]),
+            'scope': request[1][3],
+            'dereferenceAlias': request[2][3],
+            'sizeLimit': request[3][3],
+            'timeLimit': request[4][3],
+            'typesOnly': request[5][3],
+            'filter': filter_to_string_fast(request[6]),
+            'attributes': [to_unicode(attribute[3]) for attribute in request[7][3]]}
+
+
 def search_result_entry_response_to_dict(response, schema, custom_formatter, check_names):
     entry = dict()
     # entry['dn'] = str(response['object'])
@@ -562,15 +1045,22 @@ def search_result_reference_response_to_dict(response):
     return {'uri': search_refs_to_list(response)}
 
 
-def search_result_entry_response_to_dict_fast(response, schema, custom_formatter, check_names):
+def search_result_entry_response_to_dict_fast(response, schema, custom_formatter, check_names, lazy_attributes=False):
     entry_dict = dict()
     entry_dict['raw_dn'] = response[0][3]
     entry_dict['dn'] = to_unicode(response[0][3], from_server=True)
-    entry_dict['raw_attributes'] = raw_attributes_to_dict_fast(response[1][3])  # attributes
-    if check_names:
-        entry_dict['attributes'] = checked_attributes_to_dict_fast(response[1][3], schema, custom_formatter)  # attributes
+    if lazy_attributes:  # attribute values are converted when read
+        entry_dict['raw_attributes'] = lazy_raw_attributes_to_dict_fast(response[1][3])  # attributes
+        if check_names:
+            entry_dict['attributes'] = lazy_checked_attributes_to_dict_fast(response[1][3], schema, custom_formatter)  # attributes
+        else:
+            entry_dict['attributes'] = lazy_attributes_to_dict_fast(response[1][3])  # attributes
     else:
-        entry_dict['attributes'] = attributes_to_dict_fast(response[1][3])  # attributes
+        entry_dict['raw_attributes'] = raw_attributes_to_dict_fast(response[1][3])  # attributes
+        if check_names:
+            entry_dict['attributes'] = checked_attributes_to_dict_fast(response[1][3], schema, custom_formatter)  # attributes
+        else:
+            entry_dict['attributes'] = attributes_to_dict_fast(response[1][3])  # attributes
 
     return entry_dict
 
@@ -30,3 +30,8 @@ def unbind_operation():
     # UnbindRequest ::= [APPLICATION 2] NULL
     request = UnbindRequest()
     return request
+
+
+def unbind_operation_fast():
+    # same as unbind_operation() but returns the BER encoded UnbindRequest
+    return b'\x42\x00'  # [APPLICATION 2] NULL
@@ -46,6 +46,25 @@ def attributes_to_dict(attributes):
     return attributes_dict
 
 
+def vals_to_list_fast(vals):
+    try:
+        return [to_unicode(val[3]) for val in vals]
+    except UnicodeError:  # invalid encoding, return bytes value
+        return [bytes(val[3]) for val in vals]
+
+
+def attribute_to_dict_fast(attribute):
+    return {'type': to_unicode(attribute[0][3]), 'values': vals_to_list_fast(attribute[1][3])}
+
+
+def attributes_to_dict_fast(attributes):
+    attributes_dict = dict()
+    for attribute in attributes:
+        attribute_dict = attribute_to_dict_fast(attribute[3])
+        attributes_dict[attribute_dict['type']] = attribute_dict['values']
+    return attributes_dict
+
+
 def referrals_to_list(referrals):
     if isinstance(referrals, list):
         return [str(referral) for referral in referrals if referral] if referrals else None
@@ -69,6 +88,14 @@ def authentication_choice_to_dict(authentication_choice):
     return {'simple': str(authentication_choice['simple']) if authentication_choice.getName() == 'simple' else None, 'sasl': sasl_to_dict(authentication_choice['sasl']) if authentication_choice.getName() == 'sasl' else None}
 
 
+def sasl_to_dict_fast(sasl):
+    return {'mechanism': to_unicode(sasl[0][3]), 'credentials': bytes(sasl[1][3]) if len(sasl) > 1 else None}
+
+
+def authentication_choice_to_dict_fast(authentication_choice):
+    return {'simple': to_unicode(authentication_choice[3]) if authentication_choice[2] == 0 else None, 'sasl': sasl_to_dict_fast(authentication_choice[3]) if authentication_choice[2] == 3 else None}
+
+
 def partial_attribute_to_dict(modification):
     try:
         return {'type': str(modification['type']), 'value': [str(value) for value in modification['vals']]}
@@ -84,6 +111,14 @@ def changes_to_list(changes):
     return [change_to_dict(change) for change in changes]
 
 
+def change_to_dict_fast(change):
+    return {'operation': int(change[0][3]), 'attribute': {'type': to_unicode(change[1][3][0][3]), 'value': vals_to_list_fast(change[1][3][1][3])}}
+
+
+def changes_to_list_fast(changes):
+    return [change_to_dict_fast(change[3]) for change in changes]
+
+
 def attributes_to_list(attributes):
     return [str(attribute) for attribute in attributes]
 
@@ -98,6 +133,16 @@ def ava_to_dict(ava):
             return {'attribute': str(ava['attributeDesc']), 'value': bytes(ava['assertionValue'])}
 
 
+def ava_to_dict_fast(ava):
+    try:
+        return {'attribute': to_unicode(ava[0][3]), 'value': escape_filter_chars(to_unicode(ava[1][3]))}
+    except Exception:  # invalid encoding, return bytes value
+        try:
+            return {'attribute': to_unicode(ava[0][3]), 'value': escape_filter_chars(bytes(ava[1][3]))}
+        except Exception:
+            return {'attribute': to_unicode(ava[0][3]), 'value': bytes(ava[1][3])}
+
+
 def substring_to_dict(substring):
     return {'initial': substring['initial'] if substring['initial'] else '', 'any': [middle for middle in substring['any']] if substring['any'] else '', 'final': substring['final'] if substring['final'] else ''}
 
@@ -23,15 +23,16 @@
 # along with ldap3 in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 
-from threading import Thread, Lock, Event
+from threading import Thread, Lock, Event, Condition
 import socket
 
 from .. import get_config_parameter
-from ..core.exceptions import LDAPSSLConfigurationError, LDAPStartTLSError, LDAPOperationResult
-from ..strategy.base import BaseStrategy, RESPONSE_COMPLETE
+from ..core.exceptions import LDAPSSLConfigurationError, LDAPStartTLSError, LDAPOperationResult, LDAPResponseTimeoutError, LDAPSessionTerminatedByServerError
+from ..core.results import DO_NOT_RAISE_EXCEPTIONS
+from ..strategy.base import BaseStrategy, RESPONSE_COMPLETE, ReceiveBuffer, ParallelDecoder
 from ..protocol.rfc4511 import LDAPMessage
-from ..utils.log import log, log_enabled, format_ldap_message, ERROR, NETWORK, EXTENDED
-from ..utils.asn1 import decoder, decode_message_fast
+from ..utils.log import log, log_enabled, format_ldap_message, ERROR, NETWORK, EXTENDED, PROTOCOL
+from ..utils.asn1 import decoder, decode_message_fast, peek_message_fast
 
 
 # noinspection PyProtectedMember
@@ -62,14 +63,18 @@ class AsyncStrategy(BaseStrategy):
             Waits for data on socket, computes the length of the message and waits for enough bytes to decode the message
             Message are appended to strategy._responses
             """
-            unprocessed = b''
+            receive_buffer = ReceiveBuffer(self.socket_size)
             get_more_data = True
             listen = True
-            data = b''
+            strategy = self.connection.strategy
+            parallel_decoder = strategy._parallel_decoder if strategy._parallel_decoder.enabled() and not strategy.can_stream else None
             while listen:
                 if get_more_data:
+                    strategy._wait_for_buffer_room()  # the socket is not read while too many responses are waiting to be read
+                    received = 0
+                    receive_buffer.release()  # the received messages have been decoded
                     try:
-                        data = self.connection.socket.recv(self.socket_size)
+                        received = receive_buffer.receive(self.connection.socket)
                     except (OSError, socket.error, AttributeError):
                         if self.connection.receive_timeout:  # a receive timeout has been detected - keep kistening on the socket
                             continue
@@ -77,24 +82,33 @@ class AsyncStrategy(BaseStrategy):
                         if log_enabled(ERROR):
                             log(ERROR, '<%s> for <%s>', str(e), self.connection)
                         raise  # unexpected exception - re-raise
-                    if len(data) > 0:
-                        unprocessed += data
-                        data = b''
-                    else:
+                    if received == 0:
                         listen = False
-                length = BaseStrategy.compute_ldap_message_size(unprocessed)
-                if length == -1 or len(unprocessed) < length:
+                message = receive_buffer.next_message()
+                if message is None:
                     get_more_data = True
-                elif len(unprocessed) >= length:  # add message to message list
+                else:  # add message to message list
+                    length = len(message)
                     if self.connection.usage:
                         self.connection._usage.update_received_message(length)
                         if log_enabled(NETWORK):
                             log(NETWORK, 'received %d bytes via <%s>', length, self.connection)
+                    if parallel_decoder:
+                        message_id, protocol_op = peek_message_fast(message)
+                        if protocol_op == 4 and message_id != 0:  # searchResEntry, decoded by the decode executor
+                            with strategy.async_lock:
+                                if message_id not in strategy._discarded:
+                                    parallel_decoder.add(message_id, message, strategy._responses.setdefault(message_id, []))
+                                    strategy._buffer_response(message_id, length)
+                            strategy._notify_stream(message_id)
+                            get_more_data = False if len(receive_buffer) else True
+                            listen = True if self.connection.listening or len(receive_buffer) else False
+                            continue
                     if self.connection.fast_decoder:
-                        ldap_resp = decode_message_fast(unprocessed[:length])
+                        ldap_resp = decode_message_fast(message)  # no copy of the message
                         dict_response = self.connection.strategy.decode_response_fast(ldap_resp)
                     else:
-                        ldap_resp = decoder.decode(unprocessed[:length], asn1Spec=LDAPMessage())[0]
+                        ldap_resp = decoder.decode(message.tobytes(), asn1Spec=LDAPMessage())[0]
                         dict_response = self.connection.strategy.decode_response(ldap_resp)
                     message_id = int(ldap_resp['messageID'])
                     if log_enabled(NETWORK):
@@ -115,22 +129,33 @@ class AsyncStrategy(BaseStrategy):
                             if log_enabled(ERROR):
                                 log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
                             raise LDAPStartTLSError(self.connection.last_error)
-                        del self.connection._awaiting_for_async_start_tls
+                        if hasattr(self.connection, '_awaiting_for_async_start_tls'):  # not set by synchronous strategies
+                            del self.connection._awaiting_for_async_start_tls
                     if message_id != 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
                         with self.connection.strategy.async_lock:
-                            if message_id in self.connection.strategy._responses:
-                                self.connection.strategy._responses[message_id].append(dict_response)
+                            if message_id in strategy._discarded:  # the consumer of iter_response() has stopped reading
+                                if parallel_decoder:
+                                    parallel_decoder.drop(message_id)
+                                if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                                    strategy._discarded.remove(message_id)
                             else:
-                                self.connection.strategy._responses[message_id] = [dict_response]
-                            if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
-                                self.connection.strategy._responses[message_id].append(RESPONSE_COMPLETE)
-                                self.connection.strategy.set_event_for_message(message_id)
+                                if parallel_decoder:  # entries still waiting to be decoded come before this response
+                                    parallel_decoder.flush(message_id, strategy._responses.setdefault(message_id, []))
+                                if message_id in self.connection.strategy._responses:
+                                    self.connection.strategy._responses[message_id].append(dict_response)
+                                else:
+                                    self.connection.strategy._responses[message_id] = [dict_response]
+                                if not strategy.can_stream:
+                                    strategy._buffer_response(message_id, length)
+                                if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                                    self.connection.strategy._responses[message_id].append(RESPONSE_COMPLETE)
+                                    self.connection.strategy.set_event_for_message(message_id)
+                        strategy._notify_stream(message_id)
 
                         if self.connection.strategy.can_stream:  # for AsyncStreamStrategy, used for PersistentSearch
                             self.connection.strategy.accumulate_stream(message_id, dict_response)
-                        unprocessed = unprocessed[length:]
-                        get_more_data = False if unprocessed else True
-                        listen = True if self.connection.listening or unprocessed else False
+                        get_more_data = False if len(receive_buffer) else True
+                        listen = True if self.connection.listening or len(receive_buffer) else False
                     else:  # Unsolicited Notification
                         if dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
                             listen = False
@@ -153,6 +178,14 @@ class AsyncStrategy(BaseStrategy):
         self.async_lock = Lock()
         self.event_lock = Lock()
         self._events = {}
+        self._stream_events = {}  # message_id: Event set when responses for iter_response() are available
+        self._discarded = set()  # message_ids whose responses are not kept, iter_response() has been closed before the end
+        self._buffered = dict()  # message_id: [number, size] of the received responses not yet read
+        self._waiting = set()  # message_ids waited for by get_response(), their responses are not counted in the buffer limits
+        self._buffered_entries = 0
+        self._buffered_bytes = 0
+        self._buffer_room = Condition(self.async_lock)  # notified when buffered responses are read
+        self.receiver_pauses = 0  # times the receiver has stopped reading the socket because the buffer limits were exceeded
 
     def open(self, reset_usage=True, read_server_info=True):
         """
@@ -161,6 +194,11 @@ class AsyncStrategy(BaseStrategy):
         with self.connection.connection_lock:
             self._responses = dict()
             self._requests = dict()
+            with self.async_lock:
+                self._buffered = dict()
+                self._waiting = set()
+                self._buffered_entries = 0
+                self._buffered_bytes = 0
             BaseStrategy.open(self, reset_usage, read_server_info)
 
         if read_server_info:
@@ -176,6 +214,63 @@ class AsyncStrategy(BaseStrategy):
         """
         with self.connection.connection_lock:
             BaseStrategy.close(self)
+        for event in list(self._stream_events.values()):  # wakes up iter_response() to detect the closed connection
+            event.set()
+        with self.async_lock:  # wakes up the receiver waiting for buffer room
+            self._buffer_room.notify_all()
+
+    def _buffer_full(self):
+        max_entries = self.connection.max_buffered_entries
+        max_bytes = self.connection.max_buffered_bytes
+        entries = self._buffered_entries
+        size = self._buffered_bytes
+        for message_id in self._waiting:  # get_response() can return only when all the responses of the operation are received
+            buffered = self._buffered.get(message_id)
+            if buffered:
+                entries -= buffered[0]
+                size -= buffered[1]
+        return bool((max_entries and entries >= max_entries) or (max_bytes and size >= max_bytes))
+
+    def _buffer_response(self, message_id, size):
+        """
+        Accounts a response added to _responses, must be called with async_lock held
+        """
+        buffered = self._buffered.get(message_id)
+        if buffered is None:
+            buffered = self._buffered[message_id] = [0, 0]
+        buffered[0] += 1
+        buffered[1] += size
+        self._buffered_entries += 1
+        self._buffered_bytes += size
+
+    def _release_responses(self, message_id):
+        """
+        Accounts the responses of message_id removed from _responses, must be called with async_lock held
+        """
+        buffered = self._buffered.pop(message_id, None)
+        if buffered:
+            self._buffered_entries -= buffered[0]
+            self._buffered_bytes -= buffered[1]
+            self._buffer_room.notify_all()
+
+    def _wait_for_buffer_room(self):
+        """
+        Executed by the receiver thread before reading the socket
+        While max_buffered_entries or max_buffered_bytes are exceeded the socket is not read, so TCP flow control stops the server
+        until the responses are read with get_response() or iter_response()
+        """
+        with self.async_lock:
+            if self._buffer_full() and self.connection.listening:
+                for message_id in list(self._parallel_decoder._chunks):  # entries not yet sent to the decode executor are made available to iter_response()
+                    self._parallel_decoder.flush(message_id, self._responses.setdefault(message_id, []))
+                    self._notify_stream(message_id)
+                self.receiver_pauses += 1
+                if log_enabled(NETWORK):
+                    log(NETWORK, 'receiver paused with %d responses (%d bytes) waiting to be read via <%s>', self._buffered_entries, self._buffered_bytes, self.connection)
+                while self._buffer_full() and self.connection.listening:
+                    self._buffer_room.wait()
+                if log_enabled(NETWORK):
+                    log(NETWORK, 'receiver resumed via <%s>', self.connection)
 
     def _add_event_for_message(self, message_id):
         with self.event_lock:
@@ -217,6 +312,78 @@ class AsyncStrategy(BaseStrategy):
         self._add_event_for_message(message_id)
         return message_id
 
+    def _notify_stream(self, message_id):
+        event = self._stream_events.get(message_id)
+        if event:
+            event.set()
+
+    def iter_response(self, message_id, timeout=None):
+        """
+        Generator that yields the responses of message_id (i.e. search result entries) as soon as they are received,
+        without waiting for the end of the operation. Returned responses are not kept in the strategy
+        The result is stored in connection.result when all the responses have been yielded
+        timeout is the maximum time to wait for the next response. Referrals and ranged attributes are not followed
+        """
+        if timeout is None:
+            timeout = get_config_parameter('RESPONSE_WAITING_TIMEOUT')
+        if not self._outstanding or message_id not in self._outstanding:
+            if log_enabled(ERROR):
+                log(ERROR, 'message id not in outstanding queue for <%s>', self.connection)
+            raise LDAPResponseTimeoutError('message id not in outstanding queue')
+        request = self._outstanding[message_id]
+        available = Event()
+        self._stream_events[message_id] = available
+        result = None
+        complete = False
+        try:
+            while result is None:
+                with self.async_lock:
+                    available.clear()
+                    responses = self._responses.get(message_id)
+                    if responses:
+                        self._responses[message_id] = []
+                        self._release_responses(message_id)
+                        if RESPONSE_COMPLETE in responses:  # the receiver doesn't send anything else for this message
+                            complete = True
+                if not responses:
+                    if self.connection.closed:
+                        self.connection.last_error = 'session terminated by server'
+                        if log_enabled(ERROR):
+                            log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+                        raise LDAPSessionTerminatedByServerError(self.connection.last_error)
+                    if not available.wait(timeout):
+                        if log_enabled(ERROR):
+                            log(ERROR, 'socket timeout, no response from server for <%s>', self.connection)
+                        raise LDAPResponseTimeoutError('no response from server')
+                    continue
+                for response in ParallelDecoder.resolve(responses):
+                    if response == RESPONSE_COMPLETE:
+                        continue
+                    if response['type'] in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                        if response['type'] == 'searchResEntry' and self.connection.empty_attributes:
+                            self._set_empty_attributes(response, request)
+                        yield response
+                    else:
+                        result = response
+        finally:
+            self._stream_events.pop(message_id, None)
+            with self.async_lock:
+                if self._responses:
+                    self._responses.pop(message_id, None)
+                self._release_responses(message_id)
+                if result is None and not complete and not self.connection.closed:  # the consumer has stopped before the end, next responses are discarded
+                    self._discarded.add(message_id)
+            with self.event_lock:
+                self._events.pop(message_id, None)
+            if self._outstanding:  # None if the connection has been closed
+                self._outstanding.pop(message_id, None)
+
+        self.connection.result = result
+        if self.connection.raise_exceptions and result['result'] not in DO_NOT_RAISE_EXCEPTIONS:
+            if log_enabled(PROTOCOL):
+                log(PROTOCOL, 'operation result <%s> for <%s>', result, self.connection)
+            raise LDAPOperationResult(result=result['result'], description=result['description'], dn=result['dn'], message=result['message'], response_type=result['type'])
+
     def _start_listen(self):
         """
         Start thread in daemon mode
@@ -233,15 +400,43 @@ class AsyncStrategy(BaseStrategy):
         The response is only complete after the event been set
         """
         event = self._get_event_for_message(message_id)
-        flag = event.wait(timeout)
+        with self.async_lock:
+            self._waiting.add(message_id)
+            self._buffer_room.notify_all()  # a receiver paused by the responses of this message can resume
+        try:
+            flag = event.wait(timeout)
+        finally:
+            with self.async_lock:
+                self._waiting.discard(message_id)
         if not flag:
             # timeout
+            if self.connection.max_buffered_entries or self.connection.max_buffered_bytes:
+                self._discard_responses(message_id)
             return None
 
         # In this stage we could ensure the response is already there
         self._events.pop(message_id)
         with self.async_lock:
-            return self._responses.pop(message_id)
+            responses = self._responses.pop(message_id)
+            self._release_responses(message_id)
+        return ParallelDecoder.resolve(responses)  # waits for the entries decoded by the decode executor
+
+    def _discard_responses(self, message_id):
+        """
+        With buffer limits the responses of an operation whose get_response() has timed out are not kept,
+        otherwise they would fill the buffer and stop the receiver forever
+        """
+        with self.async_lock:
+            responses = self._responses.pop(message_id, None) if self._responses else None
+            self._release_responses(message_id)
+            if not (responses and RESPONSE_COMPLETE in responses) and not self.connection.closed:  # next responses are discarded by the receiver
+                self._discarded.add(message_id)
+        with self.event_lock:
+            self._events.pop(message_id, None)
+        if self._outstanding:  # None if the connection has been closed
+            self._outstanding.pop(message_id, None)
+        if log_enabled(ERROR):
+            log(ERROR, 'responses of message <%d> discarded after timeout via <%s>', message_id, self.connection)
 
     def receiving(self):
         raise NotImplementedError
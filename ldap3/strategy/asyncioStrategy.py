@@ -0,0 +1,534 @@
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# This module uses the async/await syntax and can be imported only in Python 3
+
+import asyncio
+import socket
+import ssl
+
+from .. import get_config_parameter, ANONYMOUS, SIMPLE, BASE, DSA, SCHEMA, ALL, SEQUENCE_TYPES, AUTO_BIND_NO_TLS, AUTO_BIND_TLS_BEFORE_BIND, AUTO_BIND_TLS_AFTER_BIND
+from ..core.exceptions import LDAPSocketOpenError, LDAPStartTLSError, LDAPBindError, LDAPOperationResult, LDAPUnknownAuthenticationMethodError, \
+    LDAPInvalidValueError, communication_exception_factory, start_tls_exception_factory
+from ..core.results import RESULT_SUCCESS
+from ..core.server import DSA_INFO_ATTRIBUTES, SCHEMA_INFO_ATTRIBUTES
+from ..core.tls import check_hostname
+from ..operation.bind import bind_operation, bind_operation_fast
+from ..protocol.rfc4511 import LDAPMessage
+from ..protocol.rfc4512 import DsaInfo
+from .base import BaseStrategy, ReceiveBuffer, RESPONSE_COMPLETE, SESSION_TERMINATED_BY_SERVER
+from ..utils.asn1 import decoder, decode_message_fast
+from ..utils.conv import to_unicode
+from ..utils.log import log, log_enabled, format_ldap_message, ERROR, BASIC, NETWORK, EXTENDED
+
+
+class PendingResponse(int):
+    """
+    Message id of a request sent with the ASYNCIO strategy
+    Awaiting it returns the (response, result) tuple of the operation
+    """
+
+    def __new__(cls, message_id, strategy):
+        pending_response = int.__new__(cls, message_id)
+        pending_response.strategy = strategy
+        return pending_response
+
+    def __await__(self):
+        return self.strategy.wait_response(int(self)).__await__()
+
+
+# noinspection PyProtectedMember
+class AsyncioStrategy(BaseStrategy):
+    """
+    This strategy is asynchronous and runs in an asyncio event loop
+    Requests are written to an asyncio stream without waiting and responses are read by a task of the event loop
+    Operations return a PendingResponse, the messageId of the request that can be awaited to get the (response, result) tuple
+    open(), bind(), start_tls(), refresh_server_info() and unbind() return coroutines
+    Any number of operations can be outstanding at the same time on the connection
+    """
+
+    def __init__(self, ldap_connection):
+        BaseStrategy.__init__(self, ldap_connection)
+        self.sync = False
+        self.no_real_dsa = False
+        self.pooled = False
+        self.can_stream = False
+        self.awaitable = True
+        self.reader = None
+        self.writer = None
+        self.receiver = None  # task that reads responses from the stream
+        self.socket_size = get_config_parameter('SOCKET_SIZE')
+        self._responses = None
+        self._waiters = dict()  # futures of the message ids being awaited
+        self._terminated = False  # the server has closed the session
+        self._closing = None  # writer of the stream being closed
+
+    def open(self, reset_usage=True, read_server_info=True):
+        """
+        Returns a coroutine that opens the stream to the server, performs the automatic bind and reads the server info
+        """
+        return self._open(reset_usage, read_server_info)
+
+    async def _open(self, reset_usage, read_server_info, auto_bind=True):
+        if log_enabled(NETWORK):
+            log(NETWORK, 'opening connection for <%s>', self.connection)
+        if not self.connection.closed:  # try to close connection if still open
+            self.close()
+
+        self._outstanding = dict()
+        self._responses = dict()
+        self._waiters = dict()
+        self._terminated = False
+        if self.connection.usage:
+            if reset_usage or not self.connection._usage.initial_connection_start_time:
+                self.connection._usage.start()
+
+        if self.connection.server_pool:
+            new_server = self.connection.server_pool.get_server(self.connection)  # get a server from the server_pool if available
+            if self.connection.server != new_server:
+                self.connection.server = new_server
+                if self.connection.usage:
+                    self.connection._usage.servers_from_pool += 1
+
+        exception_history = []
+        for candidate_address in self.connection.server.candidate_addresses():
+            try:
+                if log_enabled(BASIC):
+                    log(BASIC, 'try to open candidate address %s', candidate_address[:-2])
+                await self._open_stream(candidate_address, self.connection.server.ssl)
+                self.connection.server.current_address = candidate_address
+                self.connection.server.update_availability(candidate_address, True)
+                break
+            except Exception as e:
+                self.connection.server.update_availability(candidate_address, False)
+                exception_history.append((type(e)(str(e)), candidate_address[4]))
+        if not self.connection.server.current_address and exception_history:
+            if len(exception_history) == 1:  # only one exception, reraise
+                if log_enabled(ERROR):
+                    log(ERROR, '<%s> for <%s>', str(exception_history[0][0]) + ' ' + str((exception_history[0][1])), self.connection)
+                raise exception_history[0][0]
+            else:
+                if log_enabled(ERROR):
+                    log(ERROR, 'unable to open socket for <%s>', self.connection)
+                raise LDAPSocketOpenError('unable to open socket', exception_history)
+        elif not self.connection.server.current_address:
+            if log_enabled(ERROR):
+                log(ERROR, 'invalid server address for <%s>', self.connection)
+            raise LDAPSocketOpenError('invalid server address')
+
+        self._start_listen()
+        if log_enabled(NETWORK):
+            log(NETWORK, 'connection open for <%s>', self.connection)
+
+        if auto_bind and self.connection.auto_bind in [AUTO_BIND_NO_TLS, AUTO_BIND_TLS_BEFORE_BIND, AUTO_BIND_TLS_AFTER_BIND]:
+            await self._auto_bind()
+        elif read_server_info:
+            await self.refresh_server_info()
+
+    async def _open_stream(self, address, use_ssl=False):
+        """
+        Connects a non blocking socket to the server and opens an asyncio stream on it
+        """
+        self._create_socket(address)
+        sock = self.connection.socket
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(asyncio.get_running_loop().sock_connect(sock, address[4]), self.connection.server.connect_timeout)
+        except (socket.error, asyncio.TimeoutError) as e:
+            sock.close()
+            self.connection.socket = None
+            self.connection.last_error = 'socket connection error while opening: ' + str(e)
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+            raise communication_exception_factory(LDAPSocketOpenError, type(e)(str(e)))(self.connection.last_error)
+
+        try:
+            if use_ssl:
+                tls = self.connection.server.tls
+                self.reader, self.writer = await asyncio.open_connection(sock=sock, limit=self.socket_size, ssl=tls.ssl_context(), server_hostname=tls.sni or '')
+                if tls.validate == ssl.CERT_REQUIRED or tls.validate == ssl.CERT_OPTIONAL:
+                    check_hostname(self.writer.get_extra_info('ssl_object'), self.connection.server.host, tls.valid_names)
+                if self.connection.usage:
+                    self.connection._usage.wrapped_sockets += 1
+            else:
+                self.reader, self.writer = await asyncio.open_connection(sock=sock, limit=self.socket_size)
+        except Exception as e:
+            sock.close()
+            self.connection.socket = None
+            self.connection.last_error = ('socket ssl wrapping error: ' if use_ssl else 'stream opening error: ') + str(e)
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+            raise communication_exception_factory(LDAPSocketOpenError, type(e)(str(e)))(self.connection.last_error)
+
+        if self.connection.usage:
+            self.connection._usage.open_sockets += 1
+
+        self.connection.closed = False
+
+    async def _auto_bind(self):
+        if log_enabled(BASIC):
+            log(BASIC, 'performing automatic bind for <%s>', self.connection)
+        if self.connection.auto_bind == AUTO_BIND_TLS_BEFORE_BIND:
+            if not await self.start_tls(read_server_info=False):
+                error = 'automatic start_tls befored bind not successful' + (' - ' + self.connection.last_error if self.connection.last_error else '')
+                if log_enabled(ERROR):
+                    log(ERROR, '%s for <%s>', error, self.connection)
+                self.close()
+                raise LDAPStartTLSError(error)
+        await self.bind(read_server_info=self.connection.auto_bind != AUTO_BIND_TLS_AFTER_BIND)
+        if self.connection.auto_bind == AUTO_BIND_TLS_AFTER_BIND:
+            if not await self.start_tls(read_server_info=True):
+                error = 'automatic start_tls after bind not successful' + (' - ' + self.connection.last_error if self.connection.last_error else '')
+                if log_enabled(ERROR):
+                    log(ERROR, '%s for <%s>', error, self.connection)
+                self.close()
+                raise LDAPStartTLSError(error)
+        if not self.connection.bound:
+            error = 'automatic bind not successful' + (' - ' + self.connection.last_error if self.connection.last_error else '')
+            if log_enabled(ERROR):
+                log(ERROR, '%s for <%s>', error, self.connection)
+            self.close()
+            raise LDAPBindError(error)
+
+    async def bind(self, read_server_info=True, controls=None):
+        """
+        Opens the connection if needed, sends the Bind request and returns the (response, result) tuple
+        Only anonymous and simple authentication are available
+        """
+        if self.connection.closed:
+            await self._open(True, False, auto_bind=False)
+        if self.connection.authentication == ANONYMOUS:
+            password = ''
+        elif self.connection.authentication == SIMPLE:
+            password = self.connection.password
+        else:
+            self.connection.last_error = 'only anonymous and simple bind are available with the ASYNCIO strategy'
+            if log_enabled(ERROR):
+                log(ERROR, '%s for <%s>', self.connection.last_error, self.connection)
+            raise LDAPUnknownAuthenticationMethodError(self.connection.last_error)
+
+        request = (bind_operation_fast if self.connection.fast_encoder else bind_operation)(self.connection.version, self.connection.authentication, self.connection.user, password, auto_encode=self.connection.auto_encode)
+        response, result = await self.wait_response(self.connection.send('bindRequest', request, controls))
+        self.connection.bound = True if result['result'] == RESULT_SUCCESS else False
+        if not self.connection.bound and result['description'] and not self.connection.last_error:
+            self.connection.last_error = result['description']
+        if log_enabled(BASIC):
+            log(BASIC, 'done BIND operation, result <%s>', self.connection.bound)
+        if read_server_info and self.connection.bound:
+            await self.refresh_server_info()
+
+        return response, result
+
+    async def start_tls(self, read_server_info=True):
+        """
+        Sends the StartTLS extended request and adds TLS to the stream, returns True if TLS has been started
+        """
+        if self.connection.closed:
+            await self._open(True, False, auto_bind=False)
+        if self.connection.server.ssl:  # ssl already established at server level
+            return False
+        if self.connection.tls_started or self._outstanding or self.connection.sasl_in_progress:  # Per RFC 4513 (3.1.1)
+            if log_enabled(ERROR):
+                log(ERROR, "can't start tls because operations are in progress for <%s>", self.connection)
+            return False
+
+        self.connection.starting_tls = True
+        try:
+            _, result = await self.connection.extended('1.3.6.1.4.1.1466.20037')
+            if result['result'] != RESULT_SUCCESS:
+                self.connection.last_error = 'startTLS failed - ' + str(result['description'])
+                if log_enabled(ERROR):
+                    log(ERROR, '%s for <%s>', self.connection.last_error, self.connection)
+                raise LDAPStartTLSError(self.connection.last_error)
+            try:
+                await self._start_tls_stream()
+            except Exception as e:
+                self.connection.last_error = 'wrap socket error: ' + str(e)
+                if log_enabled(ERROR):
+                    log(ERROR, 'error <%s> wrapping socket for TLS in <%s>', self.connection.last_error, self.connection)
+                raise start_tls_exception_factory(e)(self.connection.last_error)
+        finally:
+            self.connection.starting_tls = False
+
+        if self.connection.usage:
+            self.connection._usage.wrapped_sockets += 1
+        self.connection.tls_started = True
+        if log_enabled(BASIC):
+            log(BASIC, 'tls started for <%s>', self.connection)
+        if read_server_info:
+            await self.refresh_server_info()  # refresh server info as per RFC4515 (3.1.5)
+
+        return True
+
+    async def _start_tls_stream(self):
+        """
+        Starts TLS on the transport of the stream. Before Python 3.11 the writer can't replace its transport,
+        so a new stream is opened on the TLS transport and the receiver reads from the new stream
+        """
+        tls = self.connection.server.tls
+        if hasattr(self.writer, 'start_tls'):  # Python 3.11
+            await self.writer.start_tls(tls.ssl_context(), server_hostname=tls.sni or '')
+        else:
+            loop = asyncio.get_running_loop()
+            reader = asyncio.StreamReader(limit=self.socket_size)
+            protocol = asyncio.StreamReaderProtocol(reader)
+            transport = await loop.start_tls(self.writer.transport, protocol, tls.ssl_context(), server_hostname=tls.sni or '')
+            protocol.connection_made(transport)  # not called by start_tls()
+            listening = self.connection.listening
+            self._stop_listen()  # the receiver is waiting on the reader of the plain transport
+            self.reader, self.writer = reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+            if listening:
+                self._start_listen()
+        if tls.validate == ssl.CERT_REQUIRED or tls.validate == ssl.CERT_OPTIONAL:
+            check_hostname(self.writer.get_extra_info('ssl_object'), self.connection.server.host, tls.valid_names)
+
+    async def refresh_server_info(self):
+        """
+        Reads the DSA info and the schema from the server as requested by the get_info parameter of the Server
+        """
+        server = self.connection.server
+        if self.connection.closed:
+            return
+        if log_enabled(BASIC):
+            log(BASIC, 'refreshing server info for <%s>', self.connection)
+        try:
+            if server.get_info in [DSA, ALL]:
+                response, _ = await self.connection.search('', '(objectClass=*)', BASE, attributes=DSA_INFO_ATTRIBUTES, get_operational_attributes=True)
+                if len(response) == 1 and 'attributes' in response[0] and 'raw_attributes' in response[0]:
+                    with server.dit_lock:
+                        server._dsa_info = DsaInfo(response[0]['attributes'], response[0]['raw_attributes'])
+            if server.get_info in [SCHEMA, ALL]:
+                schema_entry = None
+                if server._dsa_info:  # subschemaSubentry already present in dsaInfo
+                    if isinstance(server._dsa_info.schema_entry, SEQUENCE_TYPES):
+                        schema_entry = server._dsa_info.schema_entry[0] if server._dsa_info.schema_entry else None
+                    else:
+                        schema_entry = server._dsa_info.schema_entry if server._dsa_info.schema_entry else None
+                else:
+                    response, _ = await self.connection.search('', '(objectClass=*)', BASE, attributes=['subschemaSubentry'], get_operational_attributes=True)
+                    if len(response) == 1 and 'raw_attributes' in response[0] and response[0]['raw_attributes'].get('subschemaSubentry'):
+                        schema_entry = response[0]['raw_attributes']['subschemaSubentry'][0]
+                if schema_entry:
+                    if isinstance(schema_entry, bytes):
+                        schema_entry = to_unicode(schema_entry, from_server=True)
+                    response, _ = await self.connection.search(schema_entry, '(objectClass=subschema)', BASE, attributes=SCHEMA_INFO_ATTRIBUTES, get_operational_attributes=True)
+                    with server.dit_lock:
+                        server._schema_info = None
+                        if len(response) == 1 and 'attributes' in response[0] and 'raw_attributes' in response[0]:
+                            server._set_schema_info(schema_entry, response[0])
+        except LDAPOperationResult:  # catch errors from server if raise_exception = True
+            server._dsa_info = None
+            server._schema_info = None
+
+    async def wait_response(self, message_id, timeout=None):
+        """
+        Waits for the whole response of message_id and returns the (response, result) tuple
+        """
+        if timeout is None:
+            timeout = get_config_parameter('RESPONSE_WAITING_TIMEOUT')
+        if self._batch:  # the request could be still waiting in the batch
+            self.flush()
+        if self._outstanding and message_id in self._outstanding and not self._terminated and not self._is_complete(message_id):
+            waiter = self._waiters.get(message_id)
+            if waiter is None:
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters[message_id] = waiter
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            except asyncio.TimeoutError:
+                pass  # get_response() raises LDAPResponseTimeoutError
+            finally:
+                self._waiters.pop(message_id, None)
+
+        return self.get_response(message_id, timeout)
+
+    async def wait_extended_response(self, operation, message_id):
+        """
+        Waits for the response of an extended operation of the extend namespace and returns its value
+        """
+        _, operation.result = await self.wait_response(message_id)
+        operation.decode_response(operation.result)
+        operation.populate_result()
+        operation.set_response()
+        return operation.response_value
+
+    async def wait_closed(self):
+        """
+        Waits for the stream to be closed
+        """
+        writer = self._closing
+        self._closing = None
+        if writer:
+            try:
+                await writer.wait_closed()
+            except Exception:  # the server could have already closed the stream
+                pass
+        return True
+
+    def _is_complete(self, message_id):
+        return message_id in self._responses and self._responses[message_id][-1] == RESPONSE_COMPLETE
+
+    def _wake_waiters(self):
+        for waiter in self._waiters.values():
+            if not waiter.done():
+                waiter.set_result(None)
+
+    async def _receive(self, reader):
+        """
+        Reads responses from the stream, computes the length of the messages and stores them in strategy._responses
+        Coroutines waiting for a response are woken up when the response is complete
+        """
+        receive_buffer = ReceiveBuffer(self.socket_size)
+        try:
+            while True:
+                data = await reader.read(self.socket_size)
+                if not data:
+                    break
+                receive_buffer.release()  # the received messages have been decoded
+                receive_buffer.feed(data)
+                message = receive_buffer.next_message()
+                while message is not None:
+                    if not self._receive_message(message):  # Notice of Disconnection
+                        return
+                    message = receive_buffer.next_message()
+        except socket.error as e:
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> for <%s>', str(e), self.connection)
+        finally:
+            if reader is self.reader:  # the stream has not been closed by the client
+                self._terminated = True
+                self.connection.listening = False
+                self._wake_waiters()
+
+    def _receive_message(self, message):
+        """
+        Decodes a message and adds it to the responses of its messageId
+        Returns False if the server has sent a Notice of Disconnection
+        """
+        if self.connection.usage:
+            self.connection._usage.update_received_message(len(message))
+            if log_enabled(NETWORK):
+                log(NETWORK, 'received %d bytes via <%s>', len(message), self.connection)
+        if self.connection.fast_decoder:
+            ldap_resp = decode_message_fast(message)  # no copy of the message
+            dict_response = self.decode_response_fast(ldap_resp)
+        else:
+            ldap_resp = decoder.decode(message.tobytes(), asn1Spec=LDAPMessage())[0]
+            dict_response = self.decode_response(ldap_resp)
+        message_id = int(ldap_resp['messageID'])
+        if log_enabled(NETWORK):
+            log(NETWORK, 'received 1 ldap message via <%s>', self.connection)
+        if log_enabled(EXTENDED):
+            log(EXTENDED, 'ldap message received via <%s>:%s', self.connection, format_ldap_message(ldap_resp, '<<'))
+        if message_id == 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
+            if dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
+                return False
+            self.connection.last_error = 'unknown unsolicited notification from server'
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+            return True
+
+        if message_id in self._responses:
+            self._responses[message_id].append(dict_response)
+        else:
+            self._responses[message_id] = [dict_response]
+        if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+            self._responses[message_id].append(RESPONSE_COMPLETE)
+            waiter = self._waiters.get(message_id)
+            if waiter and not waiter.done():
+                waiter.set_result(None)
+        return True
+
+    def _start_listen(self):
+        """
+        Starts the task that reads from the stream
+        """
+        if not self.connection.listening:
+            self.connection.listening = True
+            self.receiver = asyncio.ensure_future(self._receive(self.reader))
+
+    def _stop_listen(self):
+        self.connection.listening = False
+        if self.receiver and not self.receiver.done():
+            self.receiver.cancel()
+        self.receiver = None
+        self._wake_waiters()
+
+    def _close_socket(self):
+        """
+        Closes the stream, data already written (i.e. the Unbind request) is sent before closing
+        """
+        if self.writer:
+            self.writer.close()
+            self._closing = self.writer
+        self.reader = None
+        self.writer = None
+        self.connection.socket = None
+        self.connection.closed = True
+
+        if self.connection.usage:
+            self.connection._usage.closed_sockets += 1
+
+    def _send_data(self, data):
+        if not self.writer or self.writer.is_closing():
+            raise socket.error('stream is closed')
+        self.writer.write(data)
+
+    def _get_response(self, message_id, timeout):
+        """
+        Returns the responses of message_id already received, the waiting is performed by wait_response()
+        """
+        if self._is_complete(message_id):
+            return self._responses.pop(message_id)
+        if self._terminated:
+            return SESSION_TERMINATED_BY_SERVER
+        return None
+
+    def post_send_search(self, message_id):
+        """
+        Clears connection.response and returns the awaitable messageId
+        """
+        self.connection.response = None
+        self.connection.request = None
+        self.connection.result = None
+        return PendingResponse(message_id, self)
+
+    def post_send_single_response(self, message_id):
+        """
+        Clears connection.response and returns the awaitable messageId
+        """
+        self.connection.response = None
+        self.connection.request = None
+        self.connection.result = None
+        return PendingResponse(message_id, self)
+
+    def receiving(self):
+        raise NotImplementedError
+
+    def iter_response(self, message_id, timeout=None):
+        self.connection.last_error = 'iter_response is not available for the ' + self.connection.strategy_type + ' strategy'
+        if log_enabled(ERROR):
+            log(ERROR, '%s for <%s>', self.connection.last_error, self.connection)
+        raise LDAPInvalidValueError(self.connection.last_error)
+
+    def get_stream(self):
+        raise NotImplementedError
+
+    def set_stream(self, value):
+        raise NotImplementedError
@@ -31,8 +31,27 @@ try:  # try to discover if unix sockets are available for LDAP over IPC (ldapi:/
 except ImportError:
     unix_socket_available = False
 from struct import pack
+from collections import deque
 from platform import system
 from random import choice
+from select import select
+from time import time
+from threading import Lock
+from os import getpid
+from itertools import count
+try:
+    import selectors
+except ImportError:  # Python 2
+    selectors = None
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ..utils.ordDict import OrderedDict  # for Python 2.6
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # Python 2 without the futures backport
+    ThreadPoolExecutor = None
+import errno
 
 from .. import SYNC, ANONYMOUS, get_config_parameter, BASE, ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, NO_ATTRIBUTES
 from ..core.results import DO_NOT_RAISE_EXCEPTIONS, RESULT_REFERRAL
@@ -41,26 +60,26 @@ from ..core.exceptions import LDAPOperationResult, LDAPSASLBindInProgressError,
     LDAPSocketSendError, LDAPExceptionError, LDAPControlError, LDAPResponseTimeoutError, LDAPTransactionError
 from ..utils.uri import parse_uri
 from ..protocol.rfc4511 import LDAPMessage, ProtocolOp, MessageID, SearchResultEntry
-from ..operation.add import add_response_to_dict, add_request_to_dict
-from ..operation.modify import modify_request_to_dict, modify_response_to_dict
+from ..operation.add import add_response_to_dict, add_request_to_dict, add_request_to_dict_fast
+from ..operation.modify import modify_request_to_dict, modify_response_to_dict, modify_request_to_dict_fast
 from ..operation.search import search_result_reference_response_to_dict, search_result_done_response_to_dict,\
     search_result_entry_response_to_dict, search_request_to_dict, search_result_entry_response_to_dict_fast,\
-    search_result_reference_response_to_dict_fast, attributes_to_dict, attributes_to_dict_fast
+    search_result_reference_response_to_dict_fast, attributes_to_dict, attributes_to_dict_fast, search_request_to_dict_fast
 from ..operation.bind import bind_response_to_dict, bind_request_to_dict, sicily_bind_response_to_dict, bind_response_to_dict_fast, \
-    sicily_bind_response_to_dict_fast
-from ..operation.compare import compare_response_to_dict, compare_request_to_dict
-from ..operation.extended import extended_request_to_dict, extended_response_to_dict, intermediate_response_to_dict, extended_response_to_dict_fast, intermediate_response_to_dict_fast
+    sicily_bind_response_to_dict_fast, bind_request_to_dict_fast
+from ..operation.compare import compare_response_to_dict, compare_request_to_dict, compare_request_to_dict_fast
+from ..operation.extended import extended_request_to_dict, extended_response_to_dict, intermediate_response_to_dict, extended_response_to_dict_fast, intermediate_response_to_dict_fast, extended_request_to_dict_fast
 from ..core.server import Server
-from ..operation.modifyDn import modify_dn_request_to_dict, modify_dn_response_to_dict
-from ..operation.delete import delete_response_to_dict, delete_request_to_dict
+from ..operation.modifyDn import modify_dn_request_to_dict, modify_dn_response_to_dict, modify_dn_request_to_dict_fast
+from ..operation.delete import delete_response_to_dict, delete_request_to_dict, delete_request_to_dict_fast
 from ..protocol.convert import prepare_changes_for_request, build_controls_list
-from ..operation.abandon import abandon_request_to_dict
+from ..operation.abandon import abandon_request_to_dict, abandon_request_to_dict_fast
 from ..core.tls import Tls
 from ..protocol.oid import Oids
 from ..protocol.rfc2696 import RealSearchControlValue
 from ..protocol.microsoft import DirSyncControlResponseValue
 from ..utils.log import log, log_enabled, ERROR, BASIC, PROTOCOL, NETWORK, EXTENDED, format_ldap_message
-from ..utils.asn1 import encode, decoder, ldap_result_to_dict_fast, decode_sequence
+from ..utils.asn1 import encode, decoder, ldap_result_to_dict_fast, decode_sequence, encode_message_fast, decode_request_fast, decode_message_fast
 from ..utils.conv import to_unicode
 
 SESSION_TERMINATED_BY_SERVER = 'TERMINATED_BY_SERVER'
@@ -68,6 +87,26 @@ TRANSACTION_ERROR = 'TRANSACTION_ERROR'
 RESPONSE_COMPLETE = 'RESPONSE_FROM_SERVER_COMPLETE'
 
 
+def wait_for_sockets(sockets, timeout, write=False):
+    """
+    Returns the sockets ready to be read (or written, or with a pending error when write is True) within timeout seconds
+    selectors uses poll or epoll when available, so file descriptors over FD_SETSIZE (usually 1024) can be waited for
+    """
+    if selectors:
+        selector = selectors.DefaultSelector()
+        try:
+            for sock in sockets:
+                selector.register(sock, selectors.EVENT_WRITE if write else selectors.EVENT_READ)
+            return [key.fileobj for key, _ in selector.select(timeout)]
+        finally:
+            selector.close()
+    if write:
+        _, writable, exceptional = select([], sockets, sockets, timeout)
+        return list(set(writable + exceptional))
+    readable, _, _ = select(sockets, [], [], timeout)
+    return readable
+
+
 # noinspection PyProtectedMember
 class BaseStrategy(object):
     """
@@ -84,6 +123,14 @@ class BaseStrategy(object):
         self.can_stream = None  # indicates if a strategy keeps a stream of responses (i.e. LdifProducer can accumulate responses with a single header). Stream must be initialized and closed in _start_listen() and _stop_listen()
         self.referral_cache = {}
         self.thread_safe = False  # Indicates that connection can be used in a multithread application
+        self.awaitable = False  # Indicates that operations return awaitables to be used in an asyncio event loop
+        self.multiplexed = False  # Indicates that operations from different threads are sent at the same time on the same socket
+        self._batch = None  # encoded messages waiting to be sent in a single write, None when not batching
+        self._batch_size = 0
+        self._batch_flush_size = None
+        self._parallel_decoder = ParallelDecoder(ldap_connection)  # search result entries decoded by the decode_executor of the connection
+        self._streaming = None  # messageId of the search whose responses are being received by a SearchResponseStream
+        self._pipelining = False  # when True synchronous operations return the messageId and the response is read later with get_response() (used by Connection.bulk() and by the auto-range searches)
         if log_enabled(BASIC):
             log(BASIC, 'instantiated <%s>: <%s>', self.__class__.__name__, self)
 
@@ -126,7 +173,12 @@ class BaseStrategy(object):
 
             exception_history = []
             if not self.no_real_dsa:  # tries to connect to a real server
-                for candidate_address in self.connection.server.candidate_addresses():
+                candidate_addresses = self.connection.server.candidate_addresses()
+                happy_eyeballs_delay = get_config_parameter('HAPPY_EYEBALLS_DELAY')
+                if happy_eyeballs_delay and len(candidate_addresses) > 1 and not self.connection.server.ipc:
+                    self._open_concurrently(candidate_addresses, happy_eyeballs_delay, exception_history)
+                    candidate_addresses = []
+                for candidate_address in candidate_addresses:
                     try:
                         if log_enabled(BASIC):
                             log(BASIC, 'try to open candidate address %s', candidate_address[:-2])
@@ -170,6 +222,11 @@ class BaseStrategy(object):
                 log(NETWORK, 'deferred connection closed for <%s>', self.connection)
         else:
             if not self.connection.closed:
+                if self._batch:  # sends pending messages (i.e. the unbind request) before closing
+                    try:
+                        self.flush()
+                    except LDAPExceptionError:
+                        pass
                 self._stop_listen()
                 if not self. no_real_dsa:
                     self._close_socket()
@@ -193,44 +250,7 @@ class BaseStrategy(object):
         Tries to open and connect a socket to a Server
         raise LDAPExceptionError if unable to open or connect socket
         """
-        try:
-            self.connection.socket = socket.socket(*address[:3])
-        except Exception as e:
-            self.connection.last_error = 'socket creation error: ' + str(e)
-            if log_enabled(ERROR):
-                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
-            # raise communication_exception_factory(LDAPSocketOpenError, exc)(self.connection.last_error)
-            raise communication_exception_factory(LDAPSocketOpenError, type(e)(str(e)))(self.connection.last_error)
-        # Try to bind the socket locally before connecting to the remote address
-        # We go through our connection's source ports and try to bind our socket to our connection's source address
-        # with them.
-        # If no source address or ports were specified, this will have the same success/fail result as if we
-        # tried to connect to the remote server without binding locally first.
-        # This is actually a little bit better, as it lets us distinguish the case of "issue binding the socket
-        # locally" from "remote server is unavailable" with more clarity, though this will only really be an
-        # issue when no source address/port is specified if the system checking server availability is running
-        # as a very unprivileged user.
-        last_bind_exc = None
-        if unix_socket_available and self.connection.socket.family != socket.AF_UNIX:
-            socket_bind_succeeded = False
-            for source_port in self.connection.source_port_list:
-                try:
-                    self.connection.socket.bind((self.connection.source_address, source_port))
-                    socket_bind_succeeded = True
-                    break
-                except Exception as bind_ex:
-                    last_bind_exc = bind_ex
-                    # we'll always end up logging at error level if we cannot bind any ports to the address locally.
-                    # but if some work and some don't you probably don't want the ones that don't at ERROR level
-                    if log_enabled(NETWORK):
-                        log(NETWORK, 'Unable to bind to local address <%s> with source port <%s> due to <%s>',
-                            self.connection.source_address, source_port, bind_ex)
-            if not socket_bind_succeeded:
-                self.connection.last_error = 'socket connection error while locally binding: ' + str(last_bind_exc)
-                if log_enabled(ERROR):
-                    log(ERROR, 'Unable to locally bind to local address <%s> with any of the source ports <%s> for connection <%s due to <%s>',
-                        self.connection.source_address, self.connection.source_port_list, self.connection, last_bind_exc)
-                raise communication_exception_factory(LDAPSocketOpenError, type(last_bind_exc)(str(last_bind_exc)))(last_bind_exc)
+        self._create_socket(address)
 
         try:  # set socket timeout for opening connection
             if self.connection.server.connect_timeout:
@@ -243,6 +263,13 @@ class BaseStrategy(object):
             # raise communication_exception_factory(LDAPSocketOpenError, exc)(self.connection.last_error)
             raise communication_exception_factory(LDAPSocketOpenError, type(e)(str(e)))(self.connection.last_error)
 
+        self._setup_socket(use_ssl)
+
+    def _setup_socket(self, use_ssl):
+        """
+        Sets the receive timeout of the connected socket and wraps it if ssl is requested
+        raise LDAPExceptionError if unable to set up the socket
+        """
         # Set connection recv timeout (must be set after connect,
         # because socket.settimeout() affects both, connect() as
         # well as recv(). Set it before tls.wrap_socket() because
@@ -281,6 +308,175 @@ class BaseStrategy(object):
 
         self.connection.closed = False
 
+    def _open_concurrently(self, candidate_addresses, delay, exception_history):
+        """
+        Opens the connection as in RFC 8305 (Happy Eyeballs): a connection attempt to the next candidate address is started
+        every delay seconds (or when an attempt fails) without waiting for the previous ones to complete and the first
+        connected socket is kept. Address families are interleaved, starting with the family of the first candidate
+        Availability of the addresses is updated in the Server so failed addresses are not tried again for a while
+        """
+        first_family = candidate_addresses[0][0]
+        preferred = [address for address in candidate_addresses if address[0] == first_family]
+        others = [address for address in candidate_addresses if address[0] != first_family]
+        candidates = []
+        while preferred or others:
+            if preferred:
+                candidates.append(preferred.pop(0))
+            if others:
+                candidates.append(others.pop(0))
+
+        while candidates:
+            candidate_address = self._connect_concurrently(candidates, delay, exception_history)
+            if not candidate_address:
+                break
+            failed_addresses = [failed[1] for failed in exception_history]
+            candidates = [address for address in candidates if address != candidate_address and address[4] not in failed_addresses]  # retries only if the socket cannot be set up
+            try:
+                self._setup_socket(self.connection.server.ssl)
+                self.connection.server.current_address = candidate_address
+                self.connection.server.update_availability(candidate_address, True)
+                break
+            except Exception as e:
+                self._close_socket()
+                self.connection.server.update_availability(candidate_address, False)
+                exception_history.append((type(e)(str(e)), candidate_address[4]))
+
+    def _connect_concurrently(self, candidates, delay, exception_history):
+        """
+        Connects a socket to one of the candidate addresses, attempts are started every delay seconds or when an attempt fails
+        Returns the address of the connected socket (in connection.socket) or None, failed attempts are added to exception_history
+        """
+        connect_timeout = self.connection.server.connect_timeout
+        pending = candidates[:]
+        attempts = dict()  # socket: (address, start time)
+        connected = None
+        next_attempt = time()
+
+        def attempt_failed(sock, address, e):
+            if sock:
+                try:
+                    sock.close()
+                except (socket.error, OSError):
+                    pass
+            self.connection.last_error = 'socket connection error while opening: ' + str(e)
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+            self.connection.server.update_availability(address, False)
+            exception_history.append((communication_exception_factory(LDAPSocketOpenError, type(e)(str(e)))(self.connection.last_error), address[4]))
+
+        try:
+            while not connected and (pending or attempts):
+                now = time()
+                if pending and (now >= next_attempt or not attempts):  # starts a new connection attempt
+                    address = pending.pop(0)
+                    if log_enabled(BASIC):
+                        log(BASIC, 'try to open candidate address %s', address[:-2])
+                    sock = None
+                    try:
+                        self._create_socket(address)
+                        sock = self.connection.socket
+                        sock.setblocking(False)
+                        error = sock.connect_ex(address[4])
+                        if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035):  # 10035 is WSAEWOULDBLOCK on Windows
+                            raise socket.error(error, 'connect error %d' % error)
+                        attempts[sock] = (address, now)
+                    except Exception as e:
+                        attempt_failed(sock, address, e)
+                        next_attempt = now  # tries the next address at once
+                        continue
+                    next_attempt = now + delay
+                    continue
+
+                timeout = None
+                if pending:
+                    timeout = max(next_attempt - now, 0)
+                if connect_timeout:
+                    first_expiration = min(start for _, start in attempts.values()) + connect_timeout
+                    timeout = max(first_expiration - now, 0) if timeout is None else min(timeout, max(first_expiration - now, 0))
+                try:
+                    ready = wait_for_sockets(list(attempts), timeout, write=True)
+                except (OSError, ValueError, socket.error) as e:  # the attempts cannot be waited for, each one is failed
+                    for sock, (address, _) in list(attempts.items()):
+                        del attempts[sock]
+                        attempt_failed(sock, address, e)
+                    next_attempt = time()
+                    continue
+                for sock in ready:
+                    address, _ = attempts.pop(sock)
+                    error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if not error and not connected:
+                        connected = sock, address
+                    elif error:
+                        attempt_failed(sock, address, socket.error(error, 'connect error %d' % error))
+                        next_attempt = time()
+                    else:  # connected, but another socket was faster
+                        sock.close()
+                if connect_timeout and not connected:
+                    now = time()
+                    for sock, (address, start) in list(attempts.items()):
+                        if now - start >= connect_timeout:
+                            del attempts[sock]
+                            attempt_failed(sock, address, socket.timeout('timed out'))
+                            next_attempt = now
+        finally:
+            for sock in attempts:  # closes the slower attempts
+                try:
+                    sock.close()
+                except (socket.error, OSError):
+                    pass
+
+        if not connected:
+            self.connection.socket = None
+            return None
+        sock, address = connected
+        sock.settimeout(connect_timeout if connect_timeout else socket.getdefaulttimeout())  # as if connected by _open_socket
+        self.connection.socket = sock
+        return address
+
+    def _create_socket(self, address):
+        """
+        Creates the socket for address and binds it to the source address and port of the connection
+        raise LDAPExceptionError if unable to create or bind the socket
+        """
+        try:
+            self.connection.socket = socket.socket(*address[:3])
+        except Exception as e:
+            self.connection.last_error = 'socket creation error: ' + str(e)
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+            # raise communication_exception_factory(LDAPSocketOpenError, exc)(self.connection.last_error)
+            raise communication_exception_factory(LDAPSocketOpenError, type(e)(str(e)))(self.connection.last_error)
+        # Try to bind the socket locally before connecting to the remote address
+        # We go through our connection's source ports and try to bind our socket to our connection's source address
+        # with them.
+        # If no source address or ports were specified, this will have the same success/fail result as if we
+        # tried to connect to the remote server without binding locally first.
+        # This is actually a little bit better, as it lets us distinguish the case of "issue binding the socket
+        # locally" from "remote server is unavailable" with more clarity, though this will only really be an
+        # issue when no source address/port is specified if the system checking server availability is running
+        # as a very unprivileged user.
+        last_bind_exc = None
+        if unix_socket_available and self.connection.socket.family != socket.AF_UNIX:
+            socket_bind_succeeded = False
+            for source_port in self.connection.source_port_list:
+                try:
+                    self.connection.socket.bind((self.connection.source_address, source_port))
+                    socket_bind_succeeded = True
+                    break
+                except Exception as bind_ex:
+                    last_bind_exc = bind_ex
+                    # we'll always end up logging at error level if we cannot bind any ports to the address locally.
+                    # but if some work and some don't you probably don't want the ones that don't at ERROR level
+                    if log_enabled(NETWORK):
+                        log(NETWORK, 'Unable to bind to local address <%s> with source port <%s> due to <%s>',
+                            self.connection.source_address, source_port, bind_ex)
+            if not socket_bind_succeeded:
+                self.connection.last_error = 'socket connection error while locally binding: ' + str(last_bind_exc)
+                if log_enabled(ERROR):
+                    log(ERROR, 'Unable to locally bind to local address <%s> with any of the source ports <%s> for connection <%s due to <%s>',
+                        self.connection.source_address, self.connection.source_port_list, self.connection, last_bind_exc)
+                raise communication_exception_factory(LDAPSocketOpenError, type(last_bind_exc)(str(last_bind_exc)))(last_bind_exc)
+
     def _close_socket(self):
         """
         Try to close a socket
@@ -318,14 +514,22 @@ class BaseStrategy(object):
                 if log_enabled(ERROR):
                     log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
                 raise LDAPSASLBindInProgressError(self.connection.last_error)
-            message_id = self.connection.server.next_message_id()
-            ldap_message = LDAPMessage()
-            ldap_message['messageID'] = MessageID(message_id)
-            ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
-            message_controls = build_controls_list(controls)
-            if message_controls is not None:
-                ldap_message['controls'] = message_controls
-            self.connection.request = BaseStrategy.decode_request(message_type, request, controls)
+            if self._streaming is not None and message_type not in ['unbindRequest']:  # responses of the streamed search are still in the socket
+                self.connection.last_error = 'cannot send operation requests while a streamed search is in progress'
+                if log_enabled(ERROR):
+                    log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+                raise LDAPSocketSendError(self.connection.last_error)
+            message_id = self.next_message_id()
+            if isinstance(request, (bytes, bytearray)):  # request already encoded by the fast BER encoder
+                ldap_message = encode_message_fast(message_id, request, controls)
+            else:
+                ldap_message = LDAPMessage()
+                ldap_message['messageID'] = MessageID(message_id)
+                ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
+                message_controls = build_controls_list(controls)
+                if message_controls is not None:
+                    ldap_message['controls'] = message_controls
+            self.connection.request = LazyRequest(message_type, request, controls)  # decoded only if read
             self._outstanding[message_id] = self.connection.request
             self.sending(ldap_message)
         else:
@@ -336,6 +540,12 @@ class BaseStrategy(object):
 
         return message_id
 
+    def next_message_id(self):
+        """
+        Returns the messageId of the next request
+        """
+        return self.connection.server.next_message_id()
+
     def get_response(self, message_id, timeout=None, get_request=False):
         """
         Get response LDAP messages
@@ -347,6 +557,8 @@ class BaseStrategy(object):
         """
         if timeout is None:
             timeout = get_config_parameter('RESPONSE_WAITING_TIMEOUT')
+        if self._batch:  # the request could be still waiting in the batch
+            self.flush()
         response = None
         result = None
         request = None
@@ -358,20 +570,7 @@ class BaseStrategy(object):
                     log(ERROR, 'socket timeout, no response from server for <%s>', self.connection)
                 raise LDAPResponseTimeoutError('no response from server')
 
-            if responses == SESSION_TERMINATED_BY_SERVER:
-                try:  # try to close the session but don't raise any error if server has already closed the session
-                    self.close()
-                except (socket.error, LDAPExceptionError):
-                    pass
-                self.connection.last_error = 'session terminated by server'
-                if log_enabled(ERROR):
-                    log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
-                raise LDAPSessionTerminatedByServerError(self.connection.last_error)
-            elif responses == TRANSACTION_ERROR:  # Novell LDAP Transaction unsolicited notification
-                self.connection.last_error = 'transaction error'
-                if log_enabled(ERROR):
-                    log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
-                raise LDAPTransactionError(self.connection.last_error)
+            self._check_session(responses)
 
             # if referral in response opens a new connection to resolve referrals if requested
 
@@ -420,24 +619,7 @@ class BaseStrategy(object):
             if self.connection.empty_attributes:
                 for entry in response:
                     if entry['type'] == 'searchResEntry':
-                        for attribute_type in self._outstanding[message_id]['attributes']:
-                            if attribute_type not in entry['raw_attributes'] and attribute_type not in (ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, NO_ATTRIBUTES):
-                                entry['raw_attributes'][attribute_type] = list()
-                                entry['attributes'][attribute_type] = list()
-                                if log_enabled(PROTOCOL):
-                                    log(PROTOCOL, 'attribute set to empty list for missing attribute <%s> in <%s>', attribute_type, self)
-                        if not self.connection.auto_range:
-                            attrs_to_remove = []
-                            # removes original empty attribute in case a range tag is returned
-                            for attribute_type in entry['attributes']:
-                                if ';range' in attribute_type.lower():
-                                    orig_attr, _, _ = attribute_type.partition(';')
-                                    attrs_to_remove.append(orig_attr)
-                            for attribute_type in attrs_to_remove:
-                                if log_enabled(PROTOCOL):
-                                    log(PROTOCOL, 'attribute type <%s> removed in response because of same attribute returned as range by the server in <%s>', attribute_type, self)
-                                del entry['raw_attributes'][attribute_type]
-                                del entry['attributes'][attribute_type]
+                        self._set_empty_attributes(entry, self._outstanding[message_id])
 
             request = self._outstanding.pop(message_id)
         else:
@@ -450,6 +632,58 @@ class BaseStrategy(object):
         else:
             return response, result
 
+    def _check_session(self, responses):
+        """
+        Raises an exception if the session has been terminated by the server or a transaction error has been notified
+        """
+        if responses == SESSION_TERMINATED_BY_SERVER:
+            try:  # try to close the session but don't raise any error if server has already closed the session
+                self.close()
+            except (socket.error, LDAPExceptionError):
+                pass
+            self.connection.last_error = 'session terminated by server'
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+            raise LDAPSessionTerminatedByServerError(self.connection.last_error)
+        elif responses == TRANSACTION_ERROR:  # Novell LDAP Transaction unsolicited notification
+            self.connection.last_error = 'transaction error'
+            if log_enabled(ERROR):
+                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+            raise LDAPTransactionError(self.connection.last_error)
+
+    def _set_empty_attributes(self, entry, request):
+        """
+        Sets the requested attributes missing in the entry to an empty list
+        """
+        for attribute_type in request['attributes']:
+            if attribute_type not in entry['raw_attributes'] and attribute_type not in (ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, NO_ATTRIBUTES):
+                entry['raw_attributes'][attribute_type] = list()
+                entry['attributes'][attribute_type] = list()
+                if log_enabled(PROTOCOL):
+                    log(PROTOCOL, 'attribute set to empty list for missing attribute <%s> in <%s>', attribute_type, self)
+        if not self.connection.auto_range:
+            attrs_to_remove = []
+            # removes original empty attribute in case a range tag is returned
+            for attribute_type in entry['attributes']:
+                if ';range' in attribute_type.lower():
+                    orig_attr, _, _ = attribute_type.partition(';')
+                    attrs_to_remove.append(orig_attr)
+            for attribute_type in attrs_to_remove:
+                if log_enabled(PROTOCOL):
+                    log(PROTOCOL, 'attribute type <%s> removed in response because of same attribute returned as range by the server in <%s>', attribute_type, self)
+                del entry['raw_attributes'][attribute_type]
+                del entry['attributes'][attribute_type]
+
+    def iter_response(self, message_id, timeout=None):
+        """
+        Generator that yields the responses of message_id, the result is stored in connection.result at the end
+        Strategies receiving in background yield the responses as they arrive, here they are yielded when the operation is complete
+        """
+        response, result = self.get_response(message_id, timeout)
+        for entry in response:
+            yield entry
+        self.connection.result = result
+
     @staticmethod
     def compute_ldap_message_size(data):
         """
@@ -530,7 +764,7 @@ class BaseStrategy(object):
                 result = sicily_bind_response_to_dict_fast(ldap_message['payload'])
             result['type'] = 'bindResponse'
         elif ldap_message['protocolOp'] == 4:  # searchResEntry'
-            result = search_result_entry_response_to_dict_fast(ldap_message['payload'], self.connection.server.schema, self.connection.server.custom_formatter, self.connection.check_names)
+            result = search_result_entry_response_to_dict_fast(ldap_message['payload'], self.connection.server.schema, self.connection.server.custom_formatter, self.connection.check_names, self.connection.lazy_attributes)
             result['type'] = 'searchResEntry'
         elif ldap_message['protocolOp'] == 5:  # searchResDone
             result = ldap_result_to_dict_fast(ldap_message['payload'])
@@ -634,6 +868,8 @@ class BaseStrategy(object):
     def decode_request(message_type, component, controls=None):
         # message_type = ldap_message.getComponentByName('protocolOp').getName()
         # component = ldap_message['protocolOp'].getComponent()
+        if isinstance(component, (bytes, bytearray)):  # request already encoded by the fast BER encoder
+            return BaseStrategy.decode_request_fast(message_type, component, controls)
         if message_type == 'bindRequest':
             result = bind_request_to_dict(component)
         elif message_type == 'unbindRequest':
@@ -663,6 +899,38 @@ class BaseStrategy(object):
 
         return result
 
+    @staticmethod
+    def decode_request_fast(message_type, request, controls=None):
+        component = decode_request_fast(request)
+        if message_type == 'bindRequest':
+            result = bind_request_to_dict_fast(component)
+        elif message_type == 'unbindRequest':
+            result = dict()
+        elif message_type == 'addRequest':
+            result = add_request_to_dict_fast(component)
+        elif message_type == 'compareRequest':
+            result = compare_request_to_dict_fast(component)
+        elif message_type == 'delRequest':
+            result = delete_request_to_dict_fast(component)
+        elif message_type == 'extendedReq':
+            result = extended_request_to_dict_fast(component)
+        elif message_type == 'modifyRequest':
+            result = modify_request_to_dict_fast(component)
+        elif message_type == 'modDNRequest':
+            result = modify_dn_request_to_dict_fast(component)
+        elif message_type == 'searchRequest':
+            result = search_request_to_dict_fast(component)
+        elif message_type == 'abandonRequest':
+            result = abandon_request_to_dict_fast(component)
+        else:
+            if log_enabled(ERROR):
+                log(ERROR, 'unknown request <%s>', message_type)
+            raise LDAPUnknownRequestError('unknown request')
+        result['type'] = message_type
+        result['controls'] = controls
+
+        return result
+
     def valid_referral_list(self, referrals):
         referral_list = []
         for referral in referrals:
@@ -720,6 +988,7 @@ class BaseStrategy(object):
             done = True
 
     def do_search_on_auto_range(self, request, response):
+        ranged_attributes = []
         for resp in [r for r in response if r['type'] == 'searchResEntry']:
             for attr_name in list(resp['raw_attributes'].keys()):  # generate list to avoid changing of dict size error
                 if ';range=' in attr_name:
@@ -730,9 +999,81 @@ class BaseStrategy(object):
                         resp['raw_attributes'][attr_type] = list()
                     if attr_type not in resp['attributes'] or resp['attributes'][attr_type] is None:
                         resp['attributes'][attr_type] = list()
-                    self.do_next_range_search(request, resp, attr_name)
+                    ranged_attributes.append((resp, attr_name))
+
+        if self.no_real_dsa or len(ranged_attributes) == 1:
+            for resp, attr_name in ranged_attributes:
+                self.do_next_range_search(request, resp, attr_name)
+        else:
+            self.do_pipelined_range_search(request, ranged_attributes)
         return True
 
+    @staticmethod
+    def merge_range(entry, current_response, attr_name):
+        """
+        Adds the values of a range to the attribute of the entry, returns the next range to request or None if the range is the last one
+        """
+        attr_type, _, returned_range = attr_name.partition(';range=')
+        _, _, high_range = returned_range.partition('-')
+        entry['raw_attributes'][attr_type] += current_response['raw_attributes'][attr_name]
+        entry['attributes'][attr_type] += current_response['attributes'][attr_name]
+        if high_range != '*':
+            return attr_type + ';range=' + str(int(high_range) + 1) + '-*'
+        return None
+
+    def do_pipelined_range_search(self, request, ranged_attributes):
+        """
+        Requests the next range of all the ranged attributes at the same time, keeping up to AUTO_RANGE_WINDOW searches in flight
+        The values of an attribute are still read one range after the other, because each range starts after the end of the previous one
+        """
+        window = get_config_parameter('AUTO_RANGE_WINDOW')
+        to_send = deque()
+        for entry, attr_name in ranged_attributes:
+            requested_range = self.merge_range(entry, entry, attr_name)
+            if requested_range:
+                to_send.append((entry, requested_range))
+        if log_enabled(PROTOCOL):
+            log(PROTOCOL, 'performing pipelined auto-range searches for <%d> attributes via <%s>', len(to_send), self.connection)
+
+        in_flight = deque()
+        while to_send or in_flight:
+            while to_send and len(in_flight) < window:
+                entry, requested_range = to_send.popleft()
+                in_flight.append((entry, requested_range, self._send_range_search(request, entry, requested_range)))
+            entry, requested_range, message_id = in_flight.popleft()
+            current_response, _ = self.connection.get_response(message_id)
+            if not current_response:
+                continue
+            current_response = current_response[0]
+            if requested_range in current_response['raw_attributes'] and len(current_response['raw_attributes'][requested_range]) == 0:
+                del current_response['raw_attributes'][requested_range]
+                del current_response['attributes'][requested_range]
+            attr_names = [name for name in current_response['raw_attributes'] if ';range=' in name]
+            if attr_names:
+                requested_range = self.merge_range(entry, current_response, attr_names[0])
+                if requested_range:
+                    to_send.append((entry, requested_range))
+
+    def _send_range_search(self, request, entry, requested_range):
+        """
+        Sends the search of the next range without waiting for the response, returns the messageId
+        """
+        if log_enabled(PROTOCOL):
+            log(PROTOCOL, 'sending next search on auto-range <%s> of <%s> via <%s>', requested_range, entry['dn'], self.connection)
+        with self.connection.connection_lock:
+            self._pipelining = True
+            try:
+                message_id = self.connection.search(search_base=entry['dn'],
+                                                    search_filter='(objectclass=*)',
+                                                    search_scope=BASE,
+                                                    dereference_aliases=request['dereferenceAlias'],
+                                                    attributes=[requested_range])
+            finally:
+                self._pipelining = False
+        if self.thread_safe:  # status, result, response, request
+            message_id = message_id[0]
+        return message_id
+
     def create_referral_connection(self, referrals):
         referral_connection = None
         selected_referral = None
@@ -776,6 +1117,8 @@ class BaseStrategy(object):
                                                  check_names=self.connection.check_names,
                                                  raise_exceptions=self.connection.raise_exceptions,
                                                  fast_decoder=self.connection.fast_decoder,
+                                                 fast_encoder=self.connection.fast_encoder,
+                                                 lazy_attributes=self.connection.lazy_attributes,
                                                  receive_timeout=self.connection.receive_timeout,
                                                  sasl_mechanism=self.connection.sasl_mechanism,
                                                  sasl_credentials=self.connection.sasl_credentials)
@@ -867,12 +1210,23 @@ class BaseStrategy(object):
         if log_enabled(NETWORK):
             log(NETWORK, 'sending 1 ldap message for <%s>', self.connection)
         try:
-            encoded_message = encode(ldap_message)
-            self.connection.socket.sendall(encoded_message)
+            if isinstance(ldap_message, (bytes, bytearray)):  # message already encoded by the fast BER encoder
+                encoded_message = ldap_message
+                if log_enabled(EXTENDED):
+                    ldap_message = decode_message_fast(encoded_message)
+            else:
+                encoded_message = encode(ldap_message)
+            if self._batch is not None:
+                self._batch.append(encoded_message)
+                self._batch_size += len(encoded_message)
+                if log_enabled(NETWORK):
+                    log(NETWORK, 'batched %d bytes via <%s>', len(encoded_message), self.connection)
+            else:
+                self._send_data(encoded_message)
+                if log_enabled(NETWORK):
+                    log(NETWORK, 'sent %d bytes via <%s>', len(encoded_message), self.connection)
             if log_enabled(EXTENDED):
                 log(EXTENDED, 'ldap message sent via <%s>:%s', self.connection, format_ldap_message(ldap_message, '>>'))
-            if log_enabled(NETWORK):
-                log(NETWORK, 'sent %d bytes via <%s>', len(encoded_message), self.connection)
         except socket.error as e:
             self.connection.last_error = 'socket sending error' + str(e)
             encoded_message = None
@@ -882,6 +1236,56 @@ class BaseStrategy(object):
             raise communication_exception_factory(LDAPSocketSendError, type(e)(str(e)))(self.connection.last_error)
         if self.connection.usage:
             self.connection._usage.update_transmitted_message(self.connection.request, len(encoded_message))
+        if self._batch_flush_size and self._batch_size >= self._batch_flush_size:
+            self.flush()
+
+    def start_batch(self, flush_size=None):
+        """
+        Collects the messages to send until stop_batch() is called, they are sent with a single write
+        when a response is requested or when the collected messages reach flush_size bytes
+        """
+        self.flush()
+        self._batch = []
+        self._batch_size = 0
+        self._batch_flush_size = flush_size
+
+    def stop_batch(self):
+        """
+        Sends the collected messages and stops batching
+        """
+        try:
+            self.flush()
+        finally:
+            self._batch = None
+            self._batch_flush_size = None
+
+    def flush(self):
+        """
+        Sends the messages collected while batching with a single write
+        """
+        with self.connection.connection_lock:
+            if not self._batch:
+                return
+            encoded_messages = b''.join(self._batch)
+            if log_enabled(NETWORK):
+                log(NETWORK, 'sending %d batched ldap messages for <%s>', len(self._batch), self.connection)
+            del self._batch[:]
+            self._batch_size = 0
+            try:
+                self._send_data(encoded_messages)
+            except socket.error as e:
+                self.connection.last_error = 'socket sending error' + str(e)
+                if log_enabled(ERROR):
+                    log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+                raise communication_exception_factory(LDAPSocketSendError, type(e)(str(e)))(self.connection.last_error)
+            if log_enabled(NETWORK):
+                log(NETWORK, 'sent %d bytes via <%s>', len(encoded_messages), self.connection)
+
+    def _send_data(self, data):
+        """
+        Writes encoded messages to the connection socket
+        """
+        self.connection.socket.sendall(data)
 
     def _start_listen(self):
         # overridden on strategy class
@@ -913,3 +1317,407 @@ class BaseStrategy(object):
         while len(self.referral_cache) > 0:
             cachekey, referral_connection = self.referral_cache.popitem()
             referral_connection.unbind()
+
+
+class LazyRequest(dict):
+    """
+    The request of an operation in dict form, as returned by BaseStrategy.decode_request()
+    The request is decoded only when its content is read for the first time, type and controls are available without decoding
+    """
+    def __init__(self, message_type, request, controls=None):
+        dict.__init__(self, type=message_type, controls=controls)
+        self._type = message_type
+        self._request = request  # pyasn1 request object or BER encoded request, None when already decoded
+        self._lock = Lock()  # the request can be read by different threads, only one of them decodes it
+
+    def _decode(self):
+        if self._request is not None:
+            with self._lock:
+                if self._request is not None:  # not decoded by another thread while waiting for the lock
+                    decoded = BaseStrategy.decode_request(self._type, self._request, dict.__getitem__(self, 'controls'))
+                    dict.clear(self)  # keeps the keys order of the decoded request
+                    dict.update(self, decoded)
+                    self._request = None
+
+    def __getitem__(self, key):
+        if self._request is not None:
+            if key == 'type':  # the dict is emptied for a moment while another thread is decoding
+                return self._type
+            self._decode()
+        return dict.__getitem__(self, key)
+
+    def __setitem__(self, key, value):
+        self._decode()
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self._decode()
+        dict.__delitem__(self, key)
+
+    def __contains__(self, key):
+        self._decode()
+        return dict.__contains__(self, key)
+
+    def __iter__(self):
+        self._decode()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self._decode()
+        return dict.__len__(self)
+
+    def __eq__(self, other):
+        self._decode()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._decode()
+        return dict.__repr__(self)
+
+    def __str__(self):
+        return self.__repr__()
+
+    def __copy__(self):
+        with self._lock:
+            request_copy = LazyRequest(self._type, self._request, dict.get(self, 'controls'))
+            dict.update(request_copy, dict.items(self))
+        return request_copy
+
+    def copy(self):
+        return self.__copy__()
+
+    def __reduce__(self):
+        self._decode()
+        return dict, (dict(dict.items(self)), )
+
+    def get(self, key, default=None):
+        self._decode()
+        return dict.get(self, key, default)
+
+    def keys(self):
+        self._decode()
+        return dict.keys(self)
+
+    def values(self):
+        self._decode()
+        return dict.values(self)
+
+    def items(self):
+        self._decode()
+        return dict.items(self)
+
+    def pop(self, key, *args):
+        self._decode()
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        self._decode()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        self._decode()
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        self._decode()
+        dict.update(self, *args, **kwargs)
+
+    if str is bytes:  # Python 2
+        def has_key(self, key):
+            return self.__contains__(key)
+
+        def iterkeys(self):
+            self._decode()
+            return dict.iterkeys(self)
+
+        def itervalues(self):
+            self._decode()
+            return dict.itervalues(self)
+
+        def iteritems(self):
+            self._decode()
+            return dict.iteritems(self)
+
+
+class ReceiveBuffer(object):
+    """
+    Framing buffer for the receive loops of the strategies
+    Data is read from the socket with recv_into directly into a bytearray and complete LDAP messages
+    are returned as memoryviews of the buffer, without copying them. When the length of the pending
+    message is known room for the rest of the message is reserved, so a large message is read in place.
+    The buffer is reused: when there is not enough room after the received data the pending data is moved
+    to the beginning of the buffer, that grows (at least doubling its size) only when the pending message doesn't fit.
+    Returned messages must be consumed (or copied) before calling release(), after it they can be overwritten.
+    Until release() is called the pending data is moved to a new bytearray, so the returned messages stay valid.
+    The room of large messages is kept while they are received and given back when a small message is received
+    """
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size  # size of the buffer when it doesn't hold a large message
+        self.buffer = memoryview(bytearray(chunk_size))
+        self.start = 0  # beginning of the pending message
+        self.end = 0  # end of the received data
+        self._message_size = None  # size of the pending message, None if not yet known
+        self._released = True  # False while the messages returned by next_message() can be in use
+
+    def __len__(self):
+        return self.end - self.start
+
+    def message_size(self):
+        """
+        Returns the size of the pending message or -1 if too few data to compute it
+        """
+        if self._message_size is None:
+            size = BaseStrategy.compute_ldap_message_size(self.buffer[self.start:min(self.end, self.start + 129)].tobytes())  # tag, length and up to 127 length octets
+            if size == -1:
+                return -1
+            self._message_size = size
+
+        return self._message_size
+
+    def release(self):
+        """
+        The messages returned by next_message() have been consumed, their room in the buffer can be reused
+        """
+        self._released = True
+
+    def _reserve(self, wanted):
+        """
+        Makes room for at least wanted bytes after the received data
+        """
+        pending = len(self)
+        if not pending and self._released:
+            self.start = self.end = 0
+        if len(self.buffer) > 16 * self.chunk_size and self._message_size is not None and pending + wanted <= self.chunk_size:
+            self._move(self.chunk_size)  # the room of large messages is not kept when a small one is received
+        elif len(self.buffer) - self.end < wanted:
+            fits = pending + wanted <= len(self.buffer)
+            if fits and self._released:  # compacts the buffer
+                self.buffer[:pending] = self.buffer[self.start:self.end]
+                self.start = 0
+                self.end = pending
+            else:  # messages still in use are not overwritten
+                self._move(len(self.buffer) if fits else max(pending + wanted, 2 * len(self.buffer)))
+
+    def _move(self, size):
+        """
+        Moves the pending data to a new buffer of size bytes
+        """
+        pending = len(self)
+        buffer = memoryview(bytearray(size))
+        buffer[:pending] = self.buffer[self.start:self.end]
+        self.buffer = buffer
+        self.start = 0
+        self.end = pending
+
+    def receive(self, sock):
+        """
+        Reads data from the socket into the buffer
+        Returns the number of bytes received, 0 if the socket has been closed
+        """
+        size = self.message_size()
+        self._reserve(max(size - len(self), 1) if size != -1 else 1)
+        received = sock.recv_into(self.buffer[self.end:])
+        self.end += received
+        return received
+
+    def feed(self, data):
+        """
+        Appends data already read from the connection (i.e. by an asyncio stream reader) to the buffer
+        """
+        size = self.message_size()
+        self._reserve(max(size - len(self), len(data)) if size != -1 else len(data))
+        self.buffer[self.end:self.end + len(data)] = data
+        self.end += len(data)
+
+    def drain(self):
+        """
+        Returns the received data not yet returned as messages and empties the buffer
+        """
+        data = self.buffer[self.start:self.end].tobytes()
+        self.start = self.end
+        self._message_size = None
+        return data
+
+    def next_message(self):
+        """
+        Returns the next complete message as a memoryview of the buffer or None if the message is not yet complete
+        """
+        size = self.message_size()
+        if size == -1 or len(self) < size:
+            return None
+        message = self.buffer[self.start:self.start + size]
+        self.start += size
+        self._message_size = None
+        self._released = False
+        return message
+
+
+DECODE_CONTEXTS_SIZE = 16  # schemas and custom formatters kept by each process of the decode executor
+_decode_contexts = OrderedDict()  # token: (schema, custom_formatter)
+_decode_contexts_lock = Lock()
+_decode_context_tokens = count()
+
+
+def _store_decode_context(token, schema_formatter):
+    with _decode_contexts_lock:
+        _decode_contexts[token] = schema_formatter
+        while len(_decode_contexts) > DECODE_CONTEXTS_SIZE:
+            _decode_contexts.popitem(last=False)
+
+
+def decode_search_entries_fast(messages, token, context, check_names):
+    """
+    Decodes a chunk of searchResEntry messages in a worker of the decode executor
+    Must be a module level function to be sent to a process pool. The (schema, custom_formatter) context of the connection is
+    sent only until each worker has it, then it's read from the cache of the worker with token
+    Returns the pid of the worker and the entries, None instead of the entries when the context is neither sent nor cached
+    """
+    with _decode_contexts_lock:
+        schema_formatter = _decode_contexts.get(token)
+    if schema_formatter is None:
+        if context is None:
+            return getpid(), None
+        _store_decode_context(token, context)
+        schema_formatter = context
+    schema, custom_formatter = schema_formatter
+    entries = []
+    for message in messages:
+        ldap_message = decode_message_fast(message)
+        entry = search_result_entry_response_to_dict_fast(ldap_message['payload'], schema, custom_formatter, check_names)
+        entry['type'] = 'searchResEntry'
+        if ldap_message['controls']:
+            entry['controls'] = dict()
+            for control in ldap_message['controls']:
+                decoded_control = BaseStrategy.decode_control_fast(control[3])
+                entry['controls'][decoded_control[0]] = decoded_control[1]
+        entries.append(entry)
+    return getpid(), entries
+
+
+class PendingEntries(object):
+    """
+    Placeholder for a chunk of search result entries being decoded by the decode executor
+    retry() submits the chunk again with the context, for a worker that doesn't have it (i.e. a worker restarted by the executor)
+    """
+    __slots__ = ('future', 'retry')
+
+    def __init__(self, future, retry):
+        self.future = future
+        self.retry = retry
+
+    def result(self):
+        entries = self.future.result()[1]  # exceptions raised in the worker are raised here
+        if entries is None:
+            entries = self.retry().result()[1]
+        return entries
+
+
+class DecodeContext(object):
+    """
+    Schema and custom formatter of the server used by the workers of the decode executor, identified by token
+    """
+    __slots__ = ('schema', 'custom_formatter', 'token', 'workers')
+
+    def __init__(self, schema, custom_formatter):
+        self.schema = schema
+        self.custom_formatter = custom_formatter
+        self.token = '%d-%d' % (getpid(), next(_decode_context_tokens))
+        self.workers = set()  # pids of the workers that have the context
+        _store_decode_context(self.token, (schema, custom_formatter))  # used by a thread pool and by the processes forked from now on
+
+    def worker_ready(self, future):
+        if not future.cancelled() and future.exception() is None and future.result()[1] is not None:
+            self.workers.add(future.result()[0])
+
+
+class ParallelDecoder(object):
+    """
+    Hands the raw searchResEntry messages to the decode_executor of the connection in chunks of PARALLEL_DECODE_CHUNK_SIZE messages
+    Each chunk is added to the responses as a PendingEntries placeholder, resolve() puts the decoded entries back in their original place
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.chunk_size = get_config_parameter('PARALLEL_DECODE_CHUNK_SIZE')
+        self._chunks = dict()  # message_id: raw messages not yet sent to the executor
+        self._context = None
+
+    def enabled(self):
+        """
+        Lazy attributes are already converted only when read and the pyasn1 decoder and the extended log need the whole decoded message
+        """
+        return self.connection.decode_executor is not None and self.connection.fast_decoder and not self.connection.lazy_attributes and not log_enabled(EXTENDED)
+
+    def add(self, message_id, message, responses):
+        """
+        Adds a raw searchResEntry message, the chunk is sent to the executor when full
+        """
+        chunk = self._chunks.get(message_id)
+        if chunk is None:
+            chunk = self._chunks[message_id] = []
+        chunk.append(message.tobytes() if isinstance(message, memoryview) else bytes(message))  # the receive buffer can be reused
+        if len(chunk) >= self.chunk_size:
+            self.flush(message_id, responses)
+
+    def flush(self, message_id, responses):
+        """
+        Sends the pending entries of message_id to the executor, must be called before adding any other response to responses
+        """
+        chunk = self._chunks.pop(message_id, None)
+        if chunk:
+            executor = self.connection.decode_executor
+            context = self.decode_context()
+            check_names = self.connection.check_names
+            schema_formatter = (context.schema, context.custom_formatter)
+            future = executor.submit(decode_search_entries_fast, chunk, context.token, schema_formatter if self.send_context(context) else None, check_names)
+            future.add_done_callback(context.worker_ready)
+            responses.append(PendingEntries(future, lambda: executor.submit(decode_search_entries_fast, chunk, context.token, schema_formatter, check_names)))
+
+    def decode_context(self):
+        """
+        Returns the context of the schema and custom formatter of the server, a new one when they have changed
+        """
+        server = self.connection.server
+        if self._context is None or self._context.schema is not server.schema or self._context.custom_formatter is not server.custom_formatter:
+            self._context = DecodeContext(server.schema, server.custom_formatter)
+        return self._context
+
+    def send_context(self, context):
+        """
+        The context is sent with the chunks until all the workers of the executor have it, threads read it from the cache of this process
+        """
+        executor = self.connection.decode_executor
+        if ThreadPoolExecutor and isinstance(executor, ThreadPoolExecutor) or getpid() in context.workers:
+            return False
+        workers = getattr(executor, '_max_workers', None)
+        return not workers or len(context.workers) < workers
+
+    def drop(self, message_id):
+        """
+        Forgets the pending entries of message_id, its responses are discarded because iter_response() has been closed
+        """
+        self._chunks.pop(message_id, None)
+
+    def discard(self):
+        self._chunks = dict()
+
+    @staticmethod
+    def resolve(responses):
+        """
+        Replaces the PendingEntries in responses with the decoded entries, keeping the original order
+        """
+        if not isinstance(responses, list) or not any(isinstance(response, PendingEntries) for response in responses):
+            return responses
+        resolved = []
+        for response in responses:
+            if isinstance(response, PendingEntries):
+                resolved.extend(response.result())
+            else:
+                resolved.append(response)
+        return resolved
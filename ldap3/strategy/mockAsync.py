@@ -26,6 +26,7 @@
 from .. import ALL_ATTRIBUTES, ALL_OPERATIONAL_ATTRIBUTES, NO_ATTRIBUTES
 from .mockBase import MockBaseStrategy
 from .asynchronous import AsyncStrategy
+from .base import BaseStrategy
 from ..operation.search import search_result_done_response_to_dict, search_result_entry_response_to_dict
 from ..core.results import DO_NOT_RAISE_EXCEPTIONS
 from ..utils.log import log, log_enabled, ERROR, PROTOCOL
@@ -183,6 +184,9 @@ class MockAsyncStrategy(MockBaseStrategy, AsyncStrategy):  # class inheritance s
         return message_id
 
 
+    def iter_response(self, message_id, timeout=None):
+        return BaseStrategy.iter_response(self, message_id, timeout)  # responses are already complete
+
     def get_response(self, message_id, timeout=None, get_request=False):
         if message_id in self._responses:
             request, result, response = self._responses.pop(message_id)
@@ -885,7 +885,7 @@ class MockBaseStrategy(object):
     def send(self, message_type, request, controls=None):
         self.connection.request = self.decode_request(message_type, request, controls)
         if self.connection.listening:
-            message_id = self.connection.server.next_message_id()
+            message_id = self.next_message_id()
             if self.connection.usage:  # ldap message is built for updating metrics only
                 ldap_message = LDAPMessage()
                 ldap_message['messageID'] = MessageID(message_id)
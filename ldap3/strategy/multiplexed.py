@@ -0,0 +1,170 @@
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+from threading import Lock, local
+
+from .. import SEQUENCE_TYPES
+from ..core.exceptions import LDAPSocketReceiveError
+from ..protocol.rfc4511 import LDAP_MAX_INT
+from ..strategy.asynchronous import AsyncStrategy
+from ..strategy.base import SESSION_TERMINATED_BY_SERVER, ParallelDecoder
+from ..utils.log import log, log_enabled, ERROR, PROTOCOL
+
+
+class ThreadState(local):
+    """
+    Strategy state that must not be shared by the threads using the connection
+    """
+    def __init__(self):
+        self.referrals = []
+        self.pipelining = False
+
+
+# noinspection PyProtectedMember
+class MultiplexedStrategy(AsyncStrategy):
+    """
+    This strategy is thread safe and lets many threads use the same connection at the same time
+    Requests are sent as soon as they are issued, without waiting for the responses to the requests of other threads
+    The receiver thread dispatches the responses by messageId to the threads waiting for them
+    Requests return a tuple of 4 elements: status, result, response, request (as in the SAFE_SYNC strategy)
+    Connection.request, Connection.response and Connection.result are specific to each thread
+    """
+
+    def __init__(self, ldap_connection):
+        self._thread_state = ThreadState()  # must exist before BaseStrategy sets _referrals
+        AsyncStrategy.__init__(self, ldap_connection)
+        self.sync = True
+        self.thread_safe = True
+        self.multiplexed = True
+        self.send_lock = Lock()
+        self.message_id_lock = Lock()
+        self._message_counter = 0
+
+    def _get_referrals(self):
+        return self._thread_state.referrals
+
+    def _set_referrals(self, value):
+        self._thread_state.referrals = value
+
+    _referrals = property(_get_referrals, _set_referrals)
+
+    def _get_pipelining(self):
+        return self._thread_state.pipelining
+
+    def _set_pipelining(self, value):
+        self._thread_state.pipelining = value
+
+    _pipelining = property(_get_pipelining, _set_pipelining)
+
+    def _get_auto_range_searching(self):
+        return self._thread_state.auto_range_searching  # AttributeError when not searching, as expected by get_response()
+
+    def _set_auto_range_searching(self, value):
+        self._thread_state.auto_range_searching = value
+
+    def _del_auto_range_searching(self):
+        del self._thread_state.auto_range_searching
+
+    _auto_range_searching = property(_get_auto_range_searching, _set_auto_range_searching, _del_auto_range_searching)
+
+    def next_message_id(self):
+        """
+        messageId is unique in the connection, no need to share the counter with other connections
+        """
+        with self.message_id_lock:
+            self._message_counter += 1
+            if self._message_counter >= LDAP_MAX_INT:
+                self._message_counter = 1
+            if log_enabled(PROTOCOL):
+                log(PROTOCOL, 'new message id <%d> generated for <%s>', self._message_counter, self.connection)
+            return self._message_counter
+
+    def close(self):
+        """
+        Close connection and wake up the threads still waiting for a response
+        """
+        AsyncStrategy.close(self)
+        with self.event_lock:
+            for event in self._events.values():
+                event.set()
+
+    def _send_data(self, data):
+        """
+        Messages of different threads must not be interleaved in the socket
+        """
+        with self.send_lock:
+            self.connection.socket.sendall(data)
+
+    def post_send_single_response(self, message_id):
+        """
+        Executed after an Operation Request (except Search)
+        Waits for the response and returns the result message
+        When pipelining the messageId is returned, the response is read later with get_response()
+        """
+        self._add_event_for_message(message_id)
+        if self._pipelining:
+            return message_id
+        responses, result = self.get_response(message_id)
+        self.connection.result = result
+        if result['type'] == 'intermediateResponse':  # checks that all responses are intermediates (there should be only one)
+            for response in responses:
+                if response['type'] != 'intermediateResponse':
+                    self.connection.last_error = 'multiple messages received error'
+                    if log_enabled(ERROR):
+                        log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+                    raise LDAPSocketReceiveError(self.connection.last_error)
+
+        responses.append(result)
+        return responses
+
+    def post_send_search(self, message_id):
+        """
+        Executed after a search request
+        Waits for the response and returns the entries found, they are also stored in connection.response
+        When pipelining the messageId is returned, the response is read later with get_response()
+        """
+        self._add_event_for_message(message_id)
+        if self._pipelining:
+            return message_id
+        responses, result = self.get_response(message_id)
+        self.connection.result = result
+        if isinstance(responses, SEQUENCE_TYPES):
+            self.connection.response = responses[:]  # copy search result entries
+            return responses
+
+        self.connection.last_error = 'error receiving response'
+        if log_enabled(ERROR):
+            log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+        raise LDAPSocketReceiveError(self.connection.last_error)
+
+    def _get_response(self, message_id, timeout):
+        """
+        Waits for the receiver thread to complete the response
+        If the connection is closed while waiting the session is terminated
+        """
+        event = self._get_event_for_message(message_id)
+        if not event.wait(timeout):
+            return None  # timeout
+
+        with self.event_lock:
+            self._events.pop(message_id, None)
+        with self.async_lock:
+            responses = self._responses.pop(message_id, SESSION_TERMINATED_BY_SERVER)
+            self._release_responses(message_id)
+        return ParallelDecoder.resolve(responses)  # waits for the entries decoded by the decode executor
@@ -23,12 +23,13 @@
 # along with ldap3 in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 
-from time import sleep
+from time import sleep, time
+from random import random
 import socket
 
 from .. import get_config_parameter
 from .sync import SyncStrategy
-from ..core.exceptions import LDAPSocketOpenError, LDAPOperationResult, LDAPMaximumRetriesError, LDAPStartTLSError
+from ..core.exceptions import LDAPSocketOpenError, LDAPOperationResult, LDAPMaximumRetriesError, LDAPStartTLSError, LDAPCircuitBreakerOpenError
 from ..utils.log import log, log_enabled, ERROR, BASIC
 
 
@@ -42,6 +43,11 @@ class RestartableStrategy(SyncStrategy):
         self.can_stream = False
         self.restartable_sleep_time = get_config_parameter('RESTARTABLE_SLEEPTIME')
         self.restartable_tries = get_config_parameter('RESTARTABLE_TRIES')
+        self.restartable_backoff_factor = get_config_parameter('RESTARTABLE_BACKOFF_FACTOR')
+        self.restartable_max_sleep_time = get_config_parameter('RESTARTABLE_MAX_SLEEPTIME')
+        self.restartable_max_total_sleep_time = get_config_parameter('RESTARTABLE_MAX_TOTAL_SLEEPTIME')
+        self.restartable_jitter = get_config_parameter('RESTARTABLE_JITTER')
+        self._total_sleep_time = 0
         self._restarting = False
         self._last_bind_controls = None
         self._current_message_type = None
@@ -51,66 +57,66 @@ class RestartableStrategy(SyncStrategy):
         self.exception_history = []
 
     def open(self, reset_usage=False, read_server_info=True):
-        SyncStrategy.open(self, reset_usage, read_server_info)
-
-    def _open_socket(self, address, use_ssl=False, unix_socket=False):
         """
-        Try to open and connect a socket to a Server
-        raise LDAPExceptionError if unable to open or connect socket
-        if connection is restartable tries for the number of restarting requested or forever
+        Open the connection, if unable to open the socket tries for the number of restarting requested or forever
         """
         try:
-            SyncStrategy._open_socket(self, address, use_ssl, unix_socket)  # try to open socket using SyncWait
+            SyncStrategy.open(self, reset_usage, read_server_info)
+            self._server_success()
             self._reset_exception_history()
             return
         except Exception as e:  # machinery for restartable connection
             if log_enabled(ERROR):
                 log(ERROR, '<%s> while restarting <%s>', e, self.connection)
-                self._add_exception_to_history(type(e)(str(e)))
+            self._add_exception_to_history(type(e)(str(e)))
+            if self._restarting:  # already restarting in send()
+                raise
+            failed_server = self._server_failure()
+            failure_time = time()
 
-        if not self._restarting:  # if not already performing a restart
-            self._restarting = True
-            counter = self.restartable_tries
-            while counter > 0:  # includes restartable_tries == True
-                if log_enabled(BASIC):
-                    log(BASIC, 'try #%d to open Restartable connection <%s>', self.restartable_tries - counter, self.connection)
-                sleep(self.restartable_sleep_time)
-                if not self.connection.closed:
-                    try:  # resetting connection
-                        self.connection.unbind()
-                    except (socket.error, LDAPSocketOpenError):  # don't trace catch socket errors because socket could already be closed
-                        pass
-                    except Exception as e:
-                        if log_enabled(ERROR):
-                            log(ERROR, '<%s> while restarting <%s>', e, self.connection)
-                        self._add_exception_to_history(type(e)(str(e)))
-                try:  # reissuing same operation
-                    if self.connection.server_pool:
-                        new_server = self.connection.server_pool.get_server(self.connection)  # get a server from the server_pool if available
-                        if self.connection.server != new_server:
-                            self.connection.server = new_server
-                            if self.connection.usage:
-                                self.connection._usage.servers_from_pool += 1
-                    SyncStrategy._open_socket(self, address, use_ssl, unix_socket)  # calls super (not restartable) _open_socket()
-                    if self.connection.usage:
-                        self.connection._usage.restartable_successes += 1
-                    self.connection.closed = False
-                    self._restarting = False
-                    self._reset_exception_history()
-                    return
+        self._restarting = True
+        counter = self.restartable_tries
+        retry = 0
+        self._total_sleep_time = 0
+        while counter > 0:  # includes restartable_tries == True
+            if log_enabled(BASIC):
+                log(BASIC, 'try #%d to open Restartable connection <%s>', retry, self.connection)
+            if not self._wait_before_retry(retry, failed_server):  # total sleep time exhausted
+                break
+            retry += 1
+            if not self.connection.closed:
+                try:  # resetting connection
+                    self.connection.unbind()
+                except (socket.error, LDAPSocketOpenError):  # don't trace catch socket errors because socket could already be closed
+                    pass
                 except Exception as e:
                     if log_enabled(ERROR):
                         log(ERROR, '<%s> while restarting <%s>', e, self.connection)
                     self._add_exception_to_history(type(e)(str(e)))
-                    if self.connection.usage:
-                        self.connection._usage.restartable_failures += 1
-                if not isinstance(self.restartable_tries, bool):
-                    counter -= 1
-            self._restarting = False
-            self.connection.last_error = 'restartable connection strategy failed while opening socket'
-            if log_enabled(ERROR):
-                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
-            raise LDAPMaximumRetriesError(self.connection.last_error, self.exception_history, self.restartable_tries)
+            try:  # reopening connection
+                self._check_circuit_breaker()
+                SyncStrategy.open(self, False, read_server_info)  # calls super (not restartable) open()
+                if self.connection.usage:
+                    self.connection._usage.restartable_successes += 1
+                self._restarting = False
+                self._server_success(failed_server, failure_time)
+                self._reset_exception_history()
+                return
+            except Exception as e:
+                if log_enabled(ERROR):
+                    log(ERROR, '<%s> while restarting <%s>', e, self.connection)
+                self._add_exception_to_history(type(e)(str(e)))
+                if not isinstance(e, LDAPCircuitBreakerOpenError):
+                    self._server_failure()
+                if self.connection.usage:
+                    self.connection._usage.restartable_failures += 1
+            if not isinstance(self.restartable_tries, bool):
+                counter -= 1
+        self._restarting = False
+        self.connection.last_error = 'restartable connection strategy failed while opening socket'
+        if log_enabled(ERROR):
+            log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+        raise LDAPMaximumRetriesError(self.connection.last_error, self.exception_history, self.restartable_tries)
 
     def send(self, message_type, request, controls=None):
         self._current_message_type = message_type
@@ -131,11 +137,17 @@ class RestartableStrategy(SyncStrategy):
             self._add_exception_to_history(type(e)(str(e)))
         if not self._restarting:  # machinery for restartable connection
             self._restarting = True
+            failed_server = self._server_failure()
+            failure_time = time()
             counter = self.restartable_tries
+            retry = 0
+            self._total_sleep_time = 0
             while counter > 0:
                 if log_enabled(BASIC):
-                    log(BASIC, 'try #%d to send in Restartable connection <%s>', self.restartable_tries - counter, self.connection)
-                sleep(self.restartable_sleep_time)
+                    log(BASIC, 'try #%d to send in Restartable connection <%s>', retry, self.connection)
+                if not self._wait_before_retry(retry, failed_server):  # total sleep time exhausted
+                    break
+                retry += 1
                 if not self.connection.closed:
                     try:  # resetting connection
                         self.connection.unbind()
@@ -146,7 +158,9 @@ class RestartableStrategy(SyncStrategy):
                             log(ERROR, '<%s> while restarting <%s>', e, self.connection)
                         self._add_exception_to_history(type(e)(str(e)))
                 failure = False
+                circuit_open = False
                 try:  # reopening connection
+                    self._check_circuit_breaker()
                     self.connection.open(reset_usage=False, read_server_info=False)
                     if self._restart_tls:  # restart tls if start_tls was previously used
                         if self.connection.start_tls(read_server_info=False):
@@ -165,6 +179,7 @@ class RestartableStrategy(SyncStrategy):
                     if log_enabled(ERROR):
                         log(ERROR, '<%s> while restarting <%s>', e, self.connection)
                     self._add_exception_to_history(type(e)(str(e)))
+                    circuit_open = isinstance(e, LDAPCircuitBreakerOpenError)
                     failure = True
 
                 if not failure:
@@ -173,6 +188,7 @@ class RestartableStrategy(SyncStrategy):
                         if self.connection.usage:
                             self.connection._usage.restartable_successes += 1
                         self._restarting = False
+                        self._server_success(failed_server, failure_time)
                         self._reset_exception_history()
                         return ret_value  # successful send
                     except Exception as e:
@@ -181,8 +197,11 @@ class RestartableStrategy(SyncStrategy):
                         self._add_exception_to_history(type(e)(str(e)))
                         failure = True
 
-                if failure and self.connection.usage:
-                    self.connection._usage.restartable_failures += 1
+                if failure:
+                    if not circuit_open:
+                        self._server_failure()
+                    if self.connection.usage:
+                        self.connection._usage.restartable_failures += 1
 
                 if not isinstance(self.restartable_tries, bool):
                     counter -= 1
@@ -194,6 +213,51 @@ class RestartableStrategy(SyncStrategy):
             log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
         raise LDAPMaximumRetriesError(self.connection.last_error, self.exception_history, self.restartable_tries)
 
+    def _sleep_time(self, retry):
+        """
+        Exponential backoff with jitter, so connections restarting at the same time don't retry in lockstep
+        """
+        sleep_time = min(self.restartable_sleep_time * self.restartable_backoff_factor ** retry, self.restartable_max_sleep_time)
+        return sleep_time * (1 - self.restartable_jitter * random())
+
+    def _wait_before_retry(self, retry, failed_server):
+        """
+        The first retry goes straight to the next healthy server of the ServerPool, if any. Other retries wait for the backoff time,
+        returns False when the total sleep time of the retries is exhausted
+        """
+        if retry == 0 and self.connection.server_pool and len(self.connection.server_pool) > 1:
+            self.connection.server_pool.report_failure(self.connection, failed_server)
+            return True
+        sleep_time = self._sleep_time(retry)
+        if self.restartable_max_total_sleep_time and not isinstance(self.restartable_tries, bool):
+            remaining = self.restartable_max_total_sleep_time - self._total_sleep_time
+            if remaining <= 0:
+                if log_enabled(ERROR):
+                    log(ERROR, 'total sleep time of %s seconds exhausted for <%s>', self.restartable_max_total_sleep_time, self.connection)
+                return False
+            sleep_time = min(sleep_time, remaining)
+        self._total_sleep_time += sleep_time
+        sleep(sleep_time)
+        return True
+
+    def _check_circuit_breaker(self):
+        """
+        Without a ServerPool the server is not tried while its circuit breaker is open
+        """
+        if not self.connection.server_pool and self.connection.server.circuit_open:
+            raise LDAPCircuitBreakerOpenError('circuit breaker open for ' + self.connection.server.name)
+
+    def _server_failure(self):
+        server = self.connection.server
+        server.circuit_breaker_failure()
+        return server
+
+    def _server_success(self, failed_server=None, failure_time=None):
+        self.connection.server.circuit_breaker_success()
+        if failed_server and self.connection.server is not failed_server and self.connection.usage:
+            self.connection._usage.failovers += 1
+            self.connection._usage.failover_time += time() - failure_time
+
     def post_send_single_response(self, message_id):
         try:
             ret_value = SyncStrategy.post_send_single_response(self, message_id)
@@ -25,11 +25,12 @@
 
 from datetime import datetime
 from os import linesep
-from threading import Thread, Lock
-from time import sleep
+import socket
+from threading import Thread, Lock, Event
+from time import time
 
 from .. import RESTARTABLE, get_config_parameter, AUTO_BIND_DEFAULT, AUTO_BIND_NONE, AUTO_BIND_NO_TLS, AUTO_BIND_TLS_AFTER_BIND, AUTO_BIND_TLS_BEFORE_BIND
-from .base import BaseStrategy
+from .base import BaseStrategy, LazyRequest, wait_for_sockets
 from ..core.usage import ConnectionUsage
 from ..core.exceptions import LDAPConnectionPoolNameIsMandatoryError, LDAPConnectionPoolNotStartedError, LDAPOperationResult, LDAPExceptionError, LDAPResponseTimeoutError
 from ..utils.log import log, log_enabled, ERROR, BASIC
@@ -95,6 +96,9 @@ class ReusableStrategy(BaseStrategy):
                 if connection.pool_size and pool.pool_size != connection.pool_size:  # if pool size has changed terminate and recreate the connections
                     pool.terminate_pool()
                     pool.pool_size = connection.pool_size
+                    pool.set_limits(connection)
+                elif connection.pool_min_size is not None or connection.pool_max_size is not None:  # change limits, the pool resizes itself
+                    pool.set_limits(connection)
                 return pool
             else:
                 return object.__new__(cls)
@@ -107,11 +111,26 @@ class ReusableStrategy(BaseStrategy):
                 self.pool_size = connection.pool_size or get_config_parameter('REUSABLE_THREADED_POOL_SIZE')
                 self.lifetime = connection.pool_lifetime or get_config_parameter('REUSABLE_THREADED_LIFETIME')
                 self.keepalive = connection.pool_keepalive
+                self.min_size = self.pool_size
+                self.max_size = self.pool_size
+                self.set_limits(connection)
+                self.idle_timeout = get_config_parameter('REUSABLE_THREADED_IDLE_TIMEOUT')
+                self.grow_queue_size = get_config_parameter('REUSABLE_THREADED_GROW_QUEUE_SIZE')
+                self.grow_wait_time = get_config_parameter('REUSABLE_THREADED_GROW_WAIT_TIME')
+                self.health_check_interval = get_config_parameter('REUSABLE_THREADED_HEALTH_CHECK_INTERVAL')
+                self.health_manager = None
+                self.connections_replaced = 0
+                self.resize_callback = None  # called with (pool, old size, new size, reason) when the pool grows or shrinks
+                self.workers_added = 0
+                self.workers_retired = 0
+                self.peak_size = 0
+                self._starting_workers = 0
                 self.request_queue = Queue()
                 self.open_pool = False
                 self.bind_pool = False
                 self.tls_pool = False
                 self._incoming = dict()
+                self._events = dict()  # Event set when the response for a counter is in _incoming
                 self.counter = 0
                 self.terminated_usage = ConnectionUsage() if connection._usage else None
                 self.terminated = False
@@ -125,6 +144,13 @@ class ReusableStrategy(BaseStrategy):
             s = 'POOL: ' + str(self.name) + ' - status: ' + ('started' if self.started else 'terminated')
             s += ' - responses in queue: ' + str(len(self._incoming))
             s += ' - pool size: ' + str(self.pool_size)
+            s += ' - min size: ' + str(self.min_size)
+            s += ' - max size: ' + str(self.max_size)
+            s += ' - active workers: ' + str(len(self.workers))
+            s += ' - peak size: ' + str(self.peak_size)
+            s += ' - workers added: ' + str(self.workers_added)
+            s += ' - workers retired: ' + str(self.workers_retired)
+            s += ' - connections replaced: ' + str(self.connections_replaced)
             s += ' - lifetime: ' + str(self.lifetime)
             s += ' - keepalive: ' + str(self.keepalive)
             s += ' - open: ' + str(self.open_pool)
@@ -133,7 +159,7 @@ class ReusableStrategy(BaseStrategy):
             s += 'MASTER CONN: ' + str(self.master_connection) + linesep
             s += 'WORKERS:'
             if self.workers:
-                for i, worker in enumerate(self.workers):
+                for i, worker in enumerate(list(self.workers)):
                     s += linesep + str(i).rjust(5) + ': ' + str(worker)
             else:
                 s += linesep + '    no active workers in pool'
@@ -144,7 +170,7 @@ class ReusableStrategy(BaseStrategy):
             return self.__str__()
 
         def get_info_from_server(self):
-            for worker in self.workers:
+            for worker in list(self.workers):  # workers can be added or retired meanwhile
                 with worker.worker_lock:
                     if not worker.connection.server.schema or not worker.connection.server.info:
                         worker.get_info_from_server = True
@@ -152,7 +178,7 @@ class ReusableStrategy(BaseStrategy):
                         worker.get_info_from_server = False
 
         def rebind_pool(self):
-            for worker in self.workers:
+            for worker in list(self.workers):
                 with worker.worker_lock:
                     worker.connection.rebind(self.master_connection.user,
                                              self.master_connection.password,
@@ -166,6 +192,8 @@ class ReusableStrategy(BaseStrategy):
                 for worker in self.workers:
                     with worker.worker_lock:
                         worker.thread.start()
+                self.health_manager = ReusableStrategy.PoolHealthManager(self)
+                self.health_manager.start()
                 self.started = True
                 self.terminated = False
                 if log_enabled(BASIC):
@@ -176,21 +204,134 @@ class ReusableStrategy(BaseStrategy):
         def create_pool(self):
             if log_enabled(BASIC):
                 log(BASIC, 'created pool <%s>', self)
-            self.workers = [ReusableStrategy.PooledConnectionWorker(self.master_connection, self.request_queue) for _ in range(self.pool_size)]
+            workers = [None] * self.pool_size
+            errors = []
+
+            def create_worker(index):
+                try:
+                    workers[index] = ReusableStrategy.PooledConnectionWorker(self.master_connection, self.request_queue)
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [Thread(target=create_worker, args=(index, )) for index in range(self.pool_size)]  # connections are opened and bound at the same time
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if errors:
+                for worker in workers:
+                    if worker:
+                        try:
+                            worker.connection.unbind()
+                        except LDAPExceptionError:
+                            pass
+                raise errors[0]
+            self.workers = workers
+            self.peak_size = max(self.peak_size, len(self.workers))
+
+        def set_limits(self, connection):
+            """
+            Sets the minimum and maximum size of the pool, pool_size is always between them
+            """
+            if connection.pool_min_size is not None:
+                self.min_size = min(connection.pool_min_size, self.pool_size)
+            if connection.pool_max_size is not None:
+                self.max_size = max(connection.pool_max_size, self.pool_size)
+            self.min_size = min(self.min_size, self.pool_size)
+            self.max_size = max(self.max_size, self.pool_size)
+
+        def grow(self, reason):
+            """
+            Adds a worker to the pool if it can grow, the connection of the new worker is created in a separate thread
+            """
+            with self.pool_lock:
+                if not self.started or len(self.workers) + self._starting_workers >= self.max_size:
+                    return False
+                self._starting_workers += 1
+            thread = Thread(target=self._add_worker, args=(reason, ))
+            thread.daemon = True
+            thread.start()
+            return True
+
+        def _add_worker(self, reason):
+            try:
+                worker = ReusableStrategy.PooledConnectionWorker(self.master_connection, self.request_queue)
+            except LDAPExceptionError as e:
+                if log_enabled(ERROR):
+                    log(ERROR, 'unable to add worker to pool <%s>: <%s>', self.name, e)
+                with self.pool_lock:
+                    self._starting_workers -= 1
+                return
+            with self.pool_lock:
+                self._starting_workers -= 1
+                added = self.started
+                if added:
+                    self.workers.append(worker)
+                    worker.thread.start()
+                    self.workers_added += 1
+                    new_size = len(self.workers)
+                    self.peak_size = max(self.peak_size, new_size)
+            if added:
+                self._resized(new_size - 1, new_size, reason)
+            else:  # pool terminated while the connection was created
+                try:
+                    worker.connection.unbind()
+                except LDAPExceptionError:
+                    pass
+
+        def retire_worker(self, worker):
+            """
+            Removes an idle worker from the pool if it can shrink, returns True if the worker must terminate
+            """
+            if time() - worker.last_used < self.idle_timeout:
+                return False
+            with self.pool_lock:
+                if not self.started or len(self.workers) <= self.min_size or worker not in self.workers:
+                    return False
+                self.workers.remove(worker)
+                self.workers_retired += 1
+                new_size = len(self.workers)
+            self._resized(new_size + 1, new_size, 'idle timeout')
+            return True
+
+        def _resized(self, old_size, new_size, reason):
+            if log_enabled(BASIC):
+                log(BASIC, 'pool <%s> resized from %d to %d workers for %s', self.name, old_size, new_size, reason)
+            if self.resize_callback:
+                try:
+                    self.resize_callback(self, old_size, new_size, reason)
+                except Exception as e:  # the callback runs in the pool threads and must not stop them
+                    if log_enabled(ERROR):
+                        log(ERROR, 'resize callback error <%s> for pool <%s>', e, self.name)
 
         def terminate_pool(self):
             if not self.terminated:
                 if log_enabled(BASIC):
                     log(BASIC, 'terminating pool <%s>', self)
-                self.started = False
+                with self.pool_lock:  # workers are no more added or retired
+                    self.started = False
+                if self.health_manager:
+                    self.health_manager.stop_event.set()
                 self.request_queue.join()  # waits for all queue pending operations
-                for _ in range(len([worker for worker in self.workers if worker.thread.is_alive()])):  # put a TERMINATE signal on the queue for each active thread
-                    self.request_queue.put((TERMINATE_REUSABLE, None, None, None))
+                with self.pool_lock:
+                    active_workers = len([worker for worker in self.workers if worker.thread.is_alive()])
+                for _ in range(active_workers):  # put a TERMINATE signal on the queue for each active thread
+                    self.request_queue.put((TERMINATE_REUSABLE, None, None, None, None))
                 self.request_queue.join()  # waits for all queue terminate operations
                 self.terminated = True
                 if log_enabled(BASIC):
                     log(BASIC, 'pool terminated for <%s>', self)
 
+        def set_response(self, counter, response):
+            """
+            Stores the response in _incoming and wakes up the waiting connection
+            The response is discarded if the connection is no more waiting for it
+            """
+            with self.pool_lock:
+                if counter in self._events:
+                    self._incoming[counter] = response
+                    self._events[counter].set()
+
     class PooledConnectionThread(Thread):
         """
         The thread that holds the Reusable connection and receive operation request via the queue
@@ -210,13 +351,23 @@ class ReusableStrategy(BaseStrategy):
             terminate = False
             pool = self.master_connection.strategy.pool
             while not terminate:
+                timeout = pool.idle_timeout if pool.min_size < pool.max_size else None  # the pool can shrink, wakes up to check if the worker is idle
                 try:
-                    counter, message_type, request, controls = pool.request_queue.get(block=True, timeout=self.master_connection.strategy.pool.keepalive)
-                except Empty:  # issue an Abandon(0) operation to keep the connection live - Abandon(0) is a harmless operation
-                    if not self.worker.connection.closed:
-                        self.worker.connection.abandon(0)
+                    counter, message_type, request, controls, queued = pool.request_queue.get(block=True, timeout=timeout)
+                except Empty:
+                    if pool.retire_worker(self.worker):  # idle worker removed from the pool
+                        terminate = True
+                        with self.worker.worker_lock:
+                            if self.worker.connection.bound:
+                                try:
+                                    self.worker.connection.unbind()
+                                except LDAPExceptionError:
+                                    pass
                     continue
 
+                if queued and time() - queued > pool.grow_wait_time:  # requests are waiting too long
+                    pool.grow('wait time')
+
                 with self.worker.worker_lock:
                     self.worker.busy = True
                     if counter == TERMINATE_REUSABLE:
@@ -229,25 +380,13 @@ class ReusableStrategy(BaseStrategy):
                             except LDAPExceptionError:
                                 pass
                     else:
-                        if (datetime.now() - self.worker.creation_time).seconds >= self.master_connection.strategy.pool.lifetime:  # destroy and create a new connection
-                            try:
-                                self.worker.connection.unbind()
-                            except LDAPExceptionError:
-                                pass
-                            self.worker.new_connection()
+                        if self.worker.expired():  # usually the connection has already been replaced by the health manager
+                            self.worker.renew_connection()
                             if log_enabled(BASIC):
                                 log(BASIC, 'thread respawn')
                         if message_type not in ['bindRequest', 'unbindRequest']:
                             try:
-                                if pool.open_pool and self.worker.connection.closed:
-                                    self.worker.connection.open(read_server_info=False)
-                                    if pool.tls_pool and not self.worker.connection.tls_started:
-                                        self.worker.connection.start_tls(read_server_info=False)
-                                    if pool.bind_pool and not self.worker.connection.bound:
-                                        self.worker.connection.bind(read_server_info=False)
-                                elif pool.open_pool and not self.worker.connection.closed:  # connection already open, issues a start_tls
-                                    if pool.tls_pool and not self.worker.connection.tls_started:
-                                        self.worker.connection.start_tls(read_server_info=False)
+                                self.worker.prepare_connection(pool)
                                 if self.worker.get_info_from_server and counter:
                                     self.worker.connection.refresh_server_info()
                                     self.worker.get_info_from_server = False
@@ -258,12 +397,10 @@ class ReusableStrategy(BaseStrategy):
                                 else:
                                     response = self.worker.connection.post_send_single_response(self.worker.connection.send(message_type, request, controls))
                                 result = self.worker.connection.result
-                                with pool.pool_lock:
-                                    pool._incoming[counter] = (response, result, BaseStrategy.decode_request(message_type, request, controls))
+                                pool.set_response(counter, (response, result, LazyRequest(message_type, request, controls)))
                             except LDAPOperationResult as e:  # raise_exceptions has raised an exception. It must be redirected to the original connection thread
-                                with pool.pool_lock:
-                                    pool._incoming[counter] = (e, None, None)
-                                    # pool._incoming[counter] = (type(e)(str(e)), None, None)
+                                pool.set_response(counter, (e, None, None))
+                                # pool.set_response(counter, (type(e)(str(e)), None, None))
                             # except LDAPOperationResult as e:  # raise_exceptions has raised an exception. It must be redirected to the original connection thread
                             #     exc = e
                             # with pool.pool_lock:
@@ -273,6 +410,7 @@ class ReusableStrategy(BaseStrategy):
                             #         pool._incoming[counter] = (response, result, BaseStrategy.decode_request(message_type, request, controls))
 
                     self.worker.busy = False
+                    self.worker.last_used = self.worker.last_sent = time()
                     pool.request_queue.task_done()
                     self.worker.task_counter += 1
             if log_enabled(BASIC):
@@ -294,6 +432,8 @@ class ReusableStrategy(BaseStrategy):
             self.connection = None
             self.creation_time = None
             self.task_counter = 0
+            self.last_used = time()  # last operation performed
+            self.last_sent = self.last_used  # last operation or keepalive sent
             self.new_connection()
             self.thread = ReusableStrategy.PooledConnectionThread(self, self.master_connection)
             self.worker_lock = Lock()
@@ -331,6 +471,8 @@ class ReusableStrategy(BaseStrategy):
                                          raise_exceptions=self.master_connection.raise_exceptions,
                                          lazy=False,
                                          fast_decoder=self.master_connection.fast_decoder,
+                                         fast_encoder=self.master_connection.fast_encoder,
+                                         lazy_attributes=self.master_connection.lazy_attributes,
                                          receive_timeout=self.master_connection.receive_timeout,
                                          return_empty_attributes=self.master_connection.empty_attributes)
 
@@ -352,6 +494,94 @@ class ReusableStrategy(BaseStrategy):
                 self.connection.server_pool = self.master_connection.server_pool
                 self.connection.server_pool.initialize(self.connection)
 
+        def expired(self):
+            return (datetime.now() - self.creation_time).seconds >= self.master_connection.strategy.pool.lifetime
+
+        def renew_connection(self):
+            """
+            Destroys the connection and creates a new one
+            """
+            try:
+                self.connection.unbind()
+            except LDAPExceptionError:
+                pass
+            self.new_connection()
+
+        def prepare_connection(self, pool):
+            """
+            Opens the connection, starts tls and binds it as requested to the pool
+            """
+            if pool.open_pool and self.connection.closed:
+                self.connection.open(read_server_info=False)
+                if pool.tls_pool and not self.connection.tls_started:
+                    self.connection.start_tls(read_server_info=False)
+                if pool.bind_pool and not self.connection.bound:
+                    self.connection.bind(read_server_info=False)
+            elif pool.open_pool and not self.connection.closed:  # connection already open, issues a start_tls
+                if pool.tls_pool and not self.connection.tls_started:
+                    self.connection.start_tls(read_server_info=False)
+
+        def is_dead(self):
+            """
+            An idle connection with data to read has been closed by the server or has received a Notice of Disconnection
+            """
+            if self.connection.closed or not self.connection.socket:
+                return False
+            try:
+                readable = wait_for_sockets([self.connection.socket], 0)
+            except (OSError, ValueError, socket.error) as e:  # unable to check the socket, the connection is not considered dead
+                if log_enabled(ERROR):
+                    log(ERROR, '<%s> while checking <%s>', e, self.connection)
+                return False
+            return True if readable else False
+
+    class PoolHealthManager(Thread):
+        """
+        The thread that takes care of the idle connections of the pool
+        Expired and dead connections are replaced before a request is sent on them and Abandon(0) is sent on connections idle for keepalive seconds
+        """
+        def __init__(self, pool):
+            Thread.__init__(self)
+            self.daemon = True
+            self.pool = pool
+            self.stop_event = Event()
+            if log_enabled(BASIC):
+                log(BASIC, 'instantiated PoolHealthManager: <%r>', self)
+
+        def run(self):
+            while not self.stop_event.is_set():
+                interval = self.pool.health_check_interval
+                if self.pool.keepalive:
+                    interval = min(interval, self.pool.keepalive)
+                if self.stop_event.wait(interval):
+                    break
+                for worker in list(self.pool.workers):
+                    self.check_worker(worker)
+
+        def check_worker(self, worker):
+            if not worker.worker_lock.acquire(False):  # the worker is performing an operation
+                return
+            try:
+                if self.stop_event.is_set() or not worker.running or worker not in self.pool.workers:  # pool terminated or worker retired
+                    return
+                if worker.expired() or worker.is_dead():
+                    worker.renew_connection()
+                    worker.prepare_connection(self.pool)
+                    worker.last_sent = time()
+                    self.pool.connections_replaced += 1
+                    if log_enabled(BASIC):
+                        log(BASIC, 'connection replaced by health manager for <%s>', worker.connection)
+                elif worker.connection.closed:  # opens the connection before a request is sent on it
+                    worker.prepare_connection(self.pool)
+                elif self.pool.keepalive and time() - worker.last_sent >= self.pool.keepalive:  # issue an Abandon(0) operation to keep the connection live - Abandon(0) is a harmless operation
+                    worker.connection.abandon(0)
+                    worker.last_sent = time()
+            except LDAPExceptionError as e:  # the connection is opened again when the next request is performed
+                if log_enabled(ERROR):
+                    log(ERROR, 'health manager error <%s> for <%s>', e, worker.connection)
+            finally:
+                worker.worker_lock.release()
+
     # ReusableStrategy methods
     def __init__(self, ldap_connection):
         BaseStrategy.__init__(self, ldap_connection)
@@ -411,7 +641,10 @@ class ReusableStrategy(BaseStrategy):
                     if self.pool.counter > LDAP_MAX_INT:
                         self.pool.counter = 1
                     counter = self.pool.counter
-                self.pool.request_queue.put((counter, message_type, request, controls))
+                    self.pool._events[counter] = Event()
+                self.pool.request_queue.put((counter, message_type, request, controls, time()))
+                if self.pool.request_queue.qsize() > self.pool.grow_queue_size:  # requests are queuing up
+                    self.pool.grow('queue size')
             return counter
         if log_enabled(ERROR):
             log(ERROR, 'reusable connection pool not started')
@@ -445,7 +678,6 @@ class ReusableStrategy(BaseStrategy):
         return result
 
     def get_response(self, counter, timeout=None, get_request=False):
-        sleeptime = get_config_parameter('RESPONSE_SLEEPTIME')
         request=None
         if timeout is None:
             timeout = get_config_parameter('RESPONSE_WAITING_TIMEOUT')
@@ -463,19 +695,16 @@ class ReusableStrategy(BaseStrategy):
             result = {'result': 0, 'referrals': None, 'responseName': '1.3.6.1.4.1.1466.20037', 'type': 'extendedResp', 'description': 'success', 'responseValue': 'None', 'dn': '', 'message': '<bogus StartTls response>'}
             self.connection.starting_tls = False
         else:
-            response = None
-            result = None
-            while timeout >= 0:  # waiting for completed message to appear in _incoming
-                try:
-                    with self.connection.strategy.pool.pool_lock:
-                        response, result, request = self.connection.strategy.pool._incoming.pop(counter)
-                except KeyError:
-                    sleep(sleeptime)
-                    timeout -= sleeptime
-                    continue
-                break
-
-            if timeout <= 0:
+            event = self.pool._events.get(counter)
+            if event:  # waits until the worker thread stores the completed message in _incoming
+                event.wait(timeout)
+            with self.pool.pool_lock:
+                self.pool._events.pop(counter, None)
+                incoming = self.pool._incoming.pop(counter, None)
+
+            if incoming:
+                response, result, request = incoming
+            else:
                 if log_enabled(ERROR):
                     log(ERROR, 'no response from worker threads in Reusable connection')
                 raise LDAPResponseTimeoutError('no response from worker threads in Reusable connection')
@@ -27,10 +27,13 @@ import socket
 
 from .. import SEQUENCE_TYPES, get_config_parameter
 from ..core.exceptions import LDAPSocketReceiveError, communication_exception_factory, LDAPExceptionError, LDAPExtensionError, LDAPOperationResult
-from ..strategy.base import BaseStrategy, SESSION_TERMINATED_BY_SERVER, RESPONSE_COMPLETE, TRANSACTION_ERROR
+from ..strategy.base import BaseStrategy, SESSION_TERMINATED_BY_SERVER, RESPONSE_COMPLETE, TRANSACTION_ERROR, ReceiveBuffer, ParallelDecoder
 from ..protocol.rfc4511 import LDAPMessage
-from ..utils.log import log, log_enabled, ERROR, NETWORK, EXTENDED, format_ldap_message
-from ..utils.asn1 import decoder, decode_message_fast
+from ..core.results import DO_NOT_RAISE_EXCEPTIONS, RESULT_REFERRAL, RESULT_SUCCESS
+from ..utils.log import log, log_enabled, ERROR, BASIC, PROTOCOL, NETWORK, EXTENDED, format_ldap_message
+from ..utils.asn1 import decoder, decode_message_fast, peek_message_fast, IncrementalDecoder, encode_integer_fast, encode_octet_string_fast, encode_sequence_fast, \
+    ENTRY_START, ATTRIBUTE_START, VALUE, ENTRY_END, MESSAGE
+from ..utils.conv import to_unicode
 
 LDAP_MESSAGE_TEMPLATE = LDAPMessage()
 
@@ -51,8 +54,13 @@ class SyncStrategy(BaseStrategy):
         self.pooled = False
         self.can_stream = False
         self.socket_size = get_config_parameter('SOCKET_SIZE')
+        self._receive_buffer = ReceiveBuffer(self.socket_size)  # data received and not yet returned as messages
+        self.value_callback = None  # when set search result entries are decoded incrementally and their values are sent to this function
+        self._pipelined = dict()  # message_id: responses received for pipelined requests not yet requested with get_response()
 
     def open(self, reset_usage=True, read_server_info=True):
+        self._pipelined = dict()
+        self._receive_buffer = ReceiveBuffer(self.socket_size)
         BaseStrategy.open(self, reset_usage, read_server_info)
         if read_server_info and not self.connection._deferred_open:
             try:
@@ -69,55 +77,97 @@ class SyncStrategy(BaseStrategy):
         """
         Receives data over the socket
         Checks if the socket is closed
+        Returned messages are views of the receive buffer, they must be consumed before calling receiving() again
         """
+        if self.value_callback:
+            return self.receiving_values()
+
         messages = []
+        receive_buffer = self._receive_buffer
+        receive_buffer.release()  # messages returned by the previous call have been consumed
+        while True:
+            message = receive_buffer.next_message()
+            while message is not None:
+                if log_enabled(NETWORK):
+                    log(NETWORK, 'received %d bytes via <%s>', len(message), self.connection)
+                messages.append(message)
+                message = receive_buffer.next_message()
+            if messages:  # the rest of the data is kept in the receive buffer
+                break
+            try:
+                received = receive_buffer.receive(self.connection.socket)
+            except (OSError, socket.error, AttributeError) as e:
+                self._receive_error(e)
+            if received == 0:
+                break
+
+        if log_enabled(NETWORK):
+            log(NETWORK, 'received %d ldap messages via <%s>', len(messages), self.connection)
+        return messages
+
+    def receiving_values(self):
+        """
+        Receives data over the socket decoding search result entries while they arrive
+        Each attribute value is sent to value_callback as (dn, attribute type, raw value) and is not kept,
+        entries are returned as messages with the dn only
+        """
+        messages = []
+        incremental_decoder = IncrementalDecoder()
         receiving = True
-        unprocessed = b''
-        data = b''
-        get_more_data = True
-        exc = None
+        dn = attribute_type = None
+        pending = self._receive_buffer.drain()  # received after the previous response
         while receiving:
-            if get_more_data:
+            if pending:
+                data, pending = pending, None
+            else:
                 try:
                     data = self.connection.socket.recv(self.socket_size)
                 except (OSError, socket.error, AttributeError) as e:
-                    self.connection.last_error = 'error receiving data: ' + str(e)
-                    try:  # try to close the connection before raising exception
-                        self.close()
-                    except (socket.error, LDAPExceptionError):
-                        pass
-                    if log_enabled(ERROR):
-                        log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
-                    # raise communication_exception_factory(LDAPSocketReceiveError, exc)(self.connection.last_error)
-                    raise communication_exception_factory(LDAPSocketReceiveError, type(e)(str(e)))(self.connection.last_error)
-                unprocessed += data
+                    self._receive_error(e)
             if len(data) > 0:
-                length = BaseStrategy.compute_ldap_message_size(unprocessed)
-                if length == -1:  # too few data to decode message length
-                    get_more_data = True
-                    continue
-                if len(unprocessed) < length:
-                    get_more_data = True
-                else:
-                    if log_enabled(NETWORK):
-                        log(NETWORK, 'received %d bytes via <%s>', len(unprocessed[:length]), self.connection)
-                    messages.append(unprocessed[:length])
-                    unprocessed = unprocessed[length:]
-                    get_more_data = False
-                    if len(unprocessed) == 0:
-                        receiving = False
+                for event, message_id, value in incremental_decoder.feed(data):
+                    if event == VALUE:
+                        self.value_callback(dn, attribute_type, value)
+                    elif event == ATTRIBUTE_START:
+                        attribute_type = to_unicode(value, from_server=True)
+                    elif event == ENTRY_START:
+                        raw_dn = value
+                        dn = to_unicode(raw_dn, from_server=True)
+                    elif event == ENTRY_END:
+                        components = [encode_integer_fast(message_id), encode_sequence_fast([encode_octet_string_fast(raw_dn), encode_sequence_fast([])], 0x64)]  # entry without attributes
+                        if value:  # controls
+                            components.append(value)
+                        messages.append(encode_sequence_fast(components))
+                    else:  # MESSAGE
+                        messages.append(value)
+                    if log_enabled(NETWORK) and event in (ENTRY_END, MESSAGE):
+                        log(NETWORK, 'received 1 ldap message via <%s>', self.connection)
+                if messages and incremental_decoder.idle():  # stops at the end of a message
+                    receiving = False
             else:
                 receiving = False
 
-        if log_enabled(NETWORK):
-            log(NETWORK, 'received %d ldap messages via <%s>', len(messages), self.connection)
-        return messages
+        return [memoryview(message) for message in messages]
+
+    def _receive_error(self, e):
+        self.connection.last_error = 'error receiving data: ' + str(e)
+        try:  # try to close the connection before raising exception
+            self.close()
+        except (socket.error, LDAPExceptionError):
+            pass
+        if log_enabled(ERROR):
+            log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+        # raise communication_exception_factory(LDAPSocketReceiveError, exc)(self.connection.last_error)
+        raise communication_exception_factory(LDAPSocketReceiveError, type(e)(str(e)))(self.connection.last_error)
 
     def post_send_single_response(self, message_id):
         """
         Executed after an Operation Request (except Search)
         Returns the result message or None
+        When pipelining the messageId is returned, the response is read later with get_response()
         """
+        if self._pipelining:
+            return message_id
         responses, result = self.get_response(message_id)
         self.connection.result = result
         if result['type'] == 'intermediateResponse':  # checks that all responses are intermediates (there should be only one)
@@ -135,7 +185,10 @@ class SyncStrategy(BaseStrategy):
         """
         Executed after a search request
         Returns the result message and store in connection.response the objects found
+        When pipelining the messageId is returned, the response is read later with get_response()
         """
+        if self._pipelining:
+            return message_id
         responses, result = self.get_response(message_id)
         self.connection.result = result
         if isinstance(responses, SEQUENCE_TYPES):
@@ -150,9 +203,18 @@ class SyncStrategy(BaseStrategy):
     def _get_response(self, message_id, timeout):
         """
         Performs the capture of LDAP response for SyncStrategy
+        Search result entries are decoded in parallel if the connection has a decode_executor
         """
-        ldap_responses = []
+        if message_id in self._pipelined:  # received while reading the response of another pipelined request
+            ldap_responses = self._pipelined.pop(message_id)
+            if ldap_responses[-1] == RESPONSE_COMPLETE:
+                return ldap_responses
+        else:
+            ldap_responses = []
         response_complete = False
+        parallel_decoder = self._parallel_decoder if self._parallel_decoder.enabled() else None
+        if parallel_decoder:
+            parallel_decoder.discard()  # entries left by a failed operation
         while not response_complete:
             responses = self.receiving()
             if responses:
@@ -160,39 +222,32 @@ class SyncStrategy(BaseStrategy):
                     if len(response) > 0:
                         if self.connection.usage:
                             self.connection._usage.update_received_message(len(response))
-                        if self.connection.fast_decoder:
-                            ldap_resp = decode_message_fast(response)
-                            dict_response = self.decode_response_fast(ldap_resp)
-                        else:
-                            ldap_resp, _ = decoder.decode(response, asn1Spec=LDAP_MESSAGE_TEMPLATE)  # unprocessed unused because receiving() waits for the whole message
-                            dict_response = self.decode_response(ldap_resp)
-                        if log_enabled(EXTENDED):
-                            log(EXTENDED, 'ldap message received via <%s>:%s', self.connection, format_ldap_message(ldap_resp, '<<'))
-                        if int(ldap_resp['messageID']) == message_id:
+                        if parallel_decoder:
+                            received_message_id, protocol_op = peek_message_fast(response)
+                            if protocol_op == 4 and received_message_id == message_id:  # searchResEntry
+                                parallel_decoder.add(message_id, response, ldap_responses)
+                                continue
+                            parallel_decoder.flush(message_id, ldap_responses)
+                        received_message_id, dict_response = self._decode_message(response)
+                        if received_message_id == message_id:
                             ldap_responses.append(dict_response)
                             if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
                                 response_complete = True
-                        elif int(ldap_resp['messageID']) == 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
-                            if dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
-                                return SESSION_TERMINATED_BY_SERVER
-                            elif dict_response['responseName'] == '2.16.840.1.113719.1.27.103.4':  # Novell LDAP transaction error unsolicited notification
-                                return TRANSACTION_ERROR
-                            else:
-                                self.connection.last_error = 'unknown unsolicited notification from server'
-                                if log_enabled(ERROR):
-                                    log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
-                                raise LDAPSocketReceiveError(self.connection.last_error)
-                        elif int(ldap_resp['messageID']) != message_id and dict_response['type'] == 'extendedResp':
+                        elif received_message_id == 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
+                            return self._unsolicited_notification(dict_response)
+                        elif self._outstanding and received_message_id in self._outstanding:  # response of another pipelined request, kept until requested
+                            pipelined = self._pipelined.setdefault(received_message_id, [])
+                            pipelined.append(dict_response)
+                            if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                                pipelined.append(RESPONSE_COMPLETE)
+                        elif dict_response['type'] == 'extendedResp':
                             self.connection.last_error = 'multiple extended responses to a single extended request'
                             if log_enabled(ERROR):
                                 log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
                             raise LDAPExtensionError(self.connection.last_error)
                             # pass  # ignore message with invalid messageId when receiving multiple extendedResp. This is not allowed by RFC4511 but some LDAP server do it
                         else:
-                            self.connection.last_error = 'invalid messageId received'
-                            if log_enabled(ERROR):
-                                log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
-                            raise LDAPSocketReceiveError(self.connection.last_error)
+                            self._invalid_message_id()
                         # response = unprocessed
                         # if response:  # if this statement is removed unprocessed data will be processed as another message
                         #     self.connection.last_error = 'unprocessed substrate error'
@@ -201,12 +256,209 @@ class SyncStrategy(BaseStrategy):
                         #     raise LDAPSocketReceiveError(self.connection.last_error)
             else:
                 return SESSION_TERMINATED_BY_SERVER
+        if parallel_decoder:
+            ldap_responses = ParallelDecoder.resolve(ldap_responses)
         ldap_responses.append(RESPONSE_COMPLETE)
 
         return ldap_responses
 
+    def _decode_message(self, message):
+        """
+        Decodes a received LDAP message
+        Returns the messageId and the response in a dict form
+        """
+        if self.connection.fast_decoder:
+            ldap_resp = decode_message_fast(message)
+            dict_response = self.decode_response_fast(ldap_resp)
+        else:
+            ldap_resp, _ = decoder.decode(message.tobytes(), asn1Spec=LDAP_MESSAGE_TEMPLATE)  # unprocessed unused because the whole message has been received
+            dict_response = self.decode_response(ldap_resp)
+        if log_enabled(EXTENDED):
+            log(EXTENDED, 'ldap message received via <%s>:%s', self.connection, format_ldap_message(ldap_resp, '<<'))
+        return int(ldap_resp['messageID']), dict_response
+
+    def _unsolicited_notification(self, dict_response):
+        if dict_response['responseName'] == '1.3.6.1.4.1.1466.20036':  # Notice of Disconnection as per RFC4511 (paragraph 4.4.1)
+            return SESSION_TERMINATED_BY_SERVER
+        elif dict_response['responseName'] == '2.16.840.1.113719.1.27.103.4':  # Novell LDAP transaction error unsolicited notification
+            return TRANSACTION_ERROR
+        self.connection.last_error = 'unknown unsolicited notification from server'
+        if log_enabled(ERROR):
+            log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+        raise LDAPSocketReceiveError(self.connection.last_error)
+
+    def _invalid_message_id(self):
+        self.connection.last_error = 'invalid messageId received'
+        if log_enabled(ERROR):
+            log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
+        raise LDAPSocketReceiveError(self.connection.last_error)
+
+    def stream_search(self, message_id):
+        """
+        Executed after a search request sent with stream=True
+        Returns a SearchResponseStream that receives and decodes the responses one at a time
+        """
+        if self._batch:  # the request could be still waiting in the batch
+            self.flush()
+        self.connection.result = None
+        self.connection.response = None
+        return SearchResponseStream(self, message_id)
+
+    def receiving_messages(self):
+        """
+        Generator that receives data over the socket and yields each LDAP message as soon as it is complete
+        Only the data of the last read is kept in memory, the generator returns when the socket is closed by the server
+        Each message must be consumed before getting the next one
+        """
+        receive_buffer = self._receive_buffer
+        while True:
+            receive_buffer.release()  # the previous message has been consumed
+            message = receive_buffer.next_message()
+            if message is None:
+                try:
+                    received = receive_buffer.receive(self.connection.socket)
+                except (OSError, socket.error, AttributeError) as e:
+                    self._receive_error(e)
+                if received == 0:
+                    return
+                continue
+            if log_enabled(NETWORK):
+                log(NETWORK, 'received %d bytes via <%s>', len(message), self.connection)
+            yield message
+
     def set_stream(self, value):
         raise NotImplementedError
 
     def get_stream(self):
         raise NotImplementedError
+
+
+class SearchResponseStream(object):
+    """
+    Iterator returned by Connection.search() with stream=True on the synchronous strategies
+    The responses are received, decoded and yielded one at a time, so memory usage doesn't grow with the number of entries found.
+    When the iterator is exhausted the searchResDone result is available in the result attribute and in connection.result.
+    Entries with ranged attributes are kept until the search is done and are yielded at the end, when auto_range has read the
+    remaining values. If the iteration is stopped with close() the responses still to come are received and discarded
+    """
+
+    def __init__(self, strategy, message_id):
+        self.strategy = strategy
+        self.connection = strategy.connection
+        self.message_id = message_id
+        self.request = strategy._outstanding[message_id]
+        self.result = None
+        self._responses = self._receive()
+        strategy._streaming = message_id
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._responses)
+
+    next = __next__  # Python 2
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):
+        """
+        Stops the iteration, the responses not yet received are discarded to keep the connection usable
+        """
+        self._responses.close()
+        if self.strategy._streaming == self.message_id:  # iteration not started
+            self._discard(self.strategy.receiving_messages())
+            self.strategy._streaming = None
+            if self.strategy._outstanding:
+                self.strategy._outstanding.pop(self.message_id, None)
+
+    def _discard(self, messages):
+        if not self.connection.closed:
+            for message in messages:
+                received_message_id, protocol_op = peek_message_fast(message)
+                if received_message_id == self.message_id and protocol_op not in (4, 19, 25):  # searchResEntry, searchResRef, intermediateResponse
+                    break
+
+    def _entry(self, entry):
+        if self.connection.empty_attributes and entry['type'] == 'searchResEntry':
+            self.strategy._set_empty_attributes(entry, self.request)
+        if log_enabled(PROTOCOL):
+            log(PROTOCOL, 'SEARCH response %s <%s> received via <%s>', 'entry' if entry['type'] == 'searchResEntry' else 'reference', entry, self.connection)
+        return entry
+
+    def _receive(self):
+        strategy = self.strategy
+        connection = self.connection
+        ranged_entries = []  # completed by auto_range when the search is done
+        result = None
+        messages = strategy.receiving_messages()
+        try:
+            for message in messages:
+                if connection.usage:
+                    connection._usage.update_received_message(len(message))
+                received_message_id, response = strategy._decode_message(message)
+                if received_message_id == self.message_id:
+                    if response['type'] == 'searchResEntry' and connection.auto_range and any(';range=' in name for name in response['raw_attributes']):
+                        ranged_entries.append(response)
+                    elif response['type'] in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
+                        yield self._entry(response)
+                    else:
+                        result = response
+                        break
+                elif received_message_id == 0:  # 0 is reserved for 'Unsolicited Notification' from server as per RFC4511 (paragraph 4.4)
+                    strategy._check_session(strategy._unsolicited_notification(response))
+                else:
+                    strategy._invalid_message_id()
+            else:
+                strategy._check_session(SESSION_TERMINATED_BY_SERVER)
+        except GeneratorExit:  # iteration stopped before the end
+            self._discard(messages)
+            raise
+        finally:
+            strategy._streaming = None
+            if result is None and strategy._outstanding:
+                strategy._outstanding.pop(self.message_id, None)
+
+        referral_responses = []
+        if result['result'] == RESULT_REFERRAL:
+            if connection.usage:
+                connection._usage.referrals_received += 1
+            if connection.auto_referrals:
+                ref_response, ref_result = strategy.do_operation_on_referral(self.request, result['referrals'])
+                if ref_result is not None:
+                    referral_responses = ref_response or []
+                    result = ref_result
+                strategy._referrals = []
+
+        strategy._outstanding.pop(self.message_id, None)
+        if connection.raise_exceptions and result['result'] not in DO_NOT_RAISE_EXCEPTIONS:
+            if log_enabled(PROTOCOL):
+                log(PROTOCOL, 'operation result <%s> for <%s>', result, connection)
+            connection.result = result.copy()
+            raise LDAPOperationResult(result=result['result'], description=result['description'], dn=result['dn'], message=result['message'], response_type=result['type'])
+
+        for response in referral_responses:
+            yield self._entry(response)
+
+        if ranged_entries:  # the next ranges of all the entries are requested at the same time
+            strategy._auto_range_searching = result.copy()
+            if strategy.do_search_on_auto_range(self.request, ranged_entries):
+                for entry in ranged_entries:
+                    for key in [key for key in entry['raw_attributes'] if ';range=' in key]:
+                        del entry['raw_attributes'][key]
+                        del entry['attributes'][key]
+            del strategy._auto_range_searching
+        for entry in ranged_entries:
+            yield self._entry(entry)
+
+        self.result = result
+        connection.result = result
+        if result['result'] not in [RESULT_SUCCESS] and not connection.last_error:
+            connection.last_error = result['description']
+        if log_enabled(BASIC):
+            log(BASIC, 'done SEARCH operation, result <%s>', result['description'])
@@ -26,9 +26,12 @@
 from pyasn1 import __version__ as pyasn1_version
 from pyasn1.codec.ber import decoder  # for usage in other modules
 from pyasn1.codec.ber.encoder import Encoder # for monkeypatching of boolean value
+from .. import SEQUENCE_TYPES
 from ..core.results import RESULT_CODES
-from ..utils.conv import to_unicode
+from ..core.exceptions import LDAPControlError
+from ..utils.conv import to_unicode, to_raw
 from ..protocol.convert import referrals_to_list
+from ..protocol.rfc4511 import Control
 
 CLASSES = {(False, False): 0,  # Universal
            (False, True): 1,  # Application
@@ -99,8 +102,24 @@ def compute_ber_size(data):
         return value_length, bytes_length + 2
 
 
+def decode_ber_length(message, start):
+    """
+    Compute size according to BER definite length rules reading the length octets in place, without slicing the message
+    Returns size of value and value offset from start
+    """
+    octet = get_byte(message[start + 1])
+    if octet <= 127:  # BER definite length - short form
+        return octet, 2
+    bytes_length = octet - 128  # BER definite length - long form
+    value_length = 0
+    for position in range(start + 2, start + 2 + bytes_length):
+        value_length = value_length << 8 | get_byte(message[position])
+    return value_length, bytes_length + 2
+
+
 def decode_message_fast(message):
-    ber_len, ber_value_offset = compute_ber_size(get_bytes(message[:10]))  # get start of sequence, at maximum 3 bytes for length
+    message = memoryview(message)  # zero-copy view of the message, only leaf values are copied out of it
+    ber_len, ber_value_offset = decode_ber_length(message, 0)  # get start of sequence
     decoded = decode_sequence(message, ber_value_offset, ber_len + ber_value_offset, LDAP_MESSAGE_CONTEXT)
     return {
         'messageID': decoded[0][3],
@@ -110,6 +129,16 @@ def decode_message_fast(message):
     }
 
 
+def peek_message_fast(message):
+    """
+    Returns the messageID and the protocolOp tag number of an LDAP message without decoding it
+    """
+    ber_len, ber_value_offset = decode_ber_length(message, 0)  # LDAPMessage sequence
+    id_len, id_value_offset = decode_ber_length(message, ber_value_offset)  # messageID
+    id_start = ber_value_offset + id_value_offset
+    return decode_integer(message, id_start, id_start + id_len), get_byte(message[id_start + id_len]) & 0b00011111
+
+
 def decode_sequence(message, start, stop, context_decoders=None):
     decoded = []
     while start < stop:
@@ -118,7 +147,7 @@ def decode_sequence(message, start, stop, context_decoders=None):
         ber_constructed = bool(octet & 0b00100000)
         ber_type = octet & 0b00011111
         ber_decoder = DECODERS[(ber_class, octet & 0b00011111)] if ber_class < 2 else None
-        ber_len, ber_value_offset = compute_ber_size(get_bytes(message[start: start + 10]))
+        ber_len, ber_value_offset = decode_ber_length(message, start)
         start += ber_value_offset
         if ber_decoder:
             value = ber_decoder(message, start, start + ber_len, context_decoders)  # call value decode function
@@ -139,18 +168,19 @@ def decode_sequence(message, start, stop, context_decoders=None):
 def decode_integer(message, start, stop, context_decoders=None):
     first = message[start]
     value = -1 if get_byte(first) & 0x80 else 0
-    for octet in message[start: stop]:
-        value = value << 8 | get_byte(octet)
+    for position in range(start, stop):
+        value = value << 8 | get_byte(message[position])
 
     return value
 
 
 def decode_octet_string(message, start, stop, context_decoders=None):
-    return message[start: stop]
+    value = message[start: stop]
+    return value.tobytes() if isinstance(value, memoryview) else value  # message can be bytes when decode_sequence() is called directly
 
 
 def decode_boolean(message, start, stop, context_decoders=None):
-    return False if message[start: stop] == 0 else True
+    return False if get_byte(message[start]) == 0 else True
 
 
 def decode_bind_response(message, start, stop, context_decoders=None):
@@ -183,6 +213,126 @@ def ldap_result_to_dict_fast(response):
     return response_dict
 
 
+# a fast BER encoder for LDAP requests only
+def encode_ber_length(length):
+    """
+    Encode length according to BER definite length rules, as the pyasn1 encoder does
+    """
+    if length <= 127:  # short form
+        return OCTETS[length]
+    length_octets = []
+    while length:
+        length_octets.insert(0, OCTETS[length & 0xFF])
+        length >>= 8
+    return OCTETS[0x80 | len(length_octets)] + b''.join(length_octets)
+
+
+def encode_tlv(tag, value):
+    return OCTETS[tag] + encode_ber_length(len(value)) + value
+
+
+def encode_integer_fast(value, tag=0x02):  # Integer
+    if value == 0:
+        return OCTETS[tag] + b'\x01\x00'
+    value_octets = []
+    while True:
+        value_octets.insert(0, OCTETS[value & 0xFF])
+        value >>= 8
+        if (value == 0 and get_byte(value_octets[0][0]) < 0x80) or (value == -1 and get_byte(value_octets[0][0]) >= 0x80):  # minimal two's complement
+            break
+    return encode_tlv(tag, b''.join(value_octets))
+
+
+def encode_boolean_fast(value, tag=0x01):  # Boolean
+    return OCTETS[tag] + (b'\x01\xff' if value else b'\x01\x00')
+
+
+def encode_octet_string_fast(value, tag=0x04):  # Octet String
+    return encode_tlv(tag, to_raw(value))
+
+
+def encode_sequence_fast(components, tag=0x30):  # Sequence
+    return encode_tlv(tag, b''.join(components))
+
+
+def encode_controls_fast(controls):
+    """controls is a sequence of Control() or sequences
+    each sequence must have 3 elements: the control OID, the criticality, the value
+    criticality must be a boolean
+    """
+    if not controls:
+        return None
+
+    if not isinstance(controls, SEQUENCE_TYPES):
+        raise LDAPControlError('controls must be a sequence')
+
+    encoded_controls = []
+    for control in controls:
+        if isinstance(control, Control):
+            encoded_controls.append(encode(control))
+        elif len(control) == 3 and isinstance(control[1], bool):
+            control_components = [encode_octet_string_fast(control[0])]  # controlType
+            if control[1]:  # criticality, omitted when equal to the default (FALSE)
+                control_components.append(encode_boolean_fast(True))
+            if control[2] is not None:
+                control_components.append(encode_octet_string_fast(control[2]))  # controlValue
+            encoded_controls.append(encode_sequence_fast(control_components))
+        else:
+            raise LDAPControlError('control must be a sequence of 3 elements: controlType, criticality (boolean) and controlValue (None if not provided)')
+
+    return encode_sequence_fast(encoded_controls, 0xA0)  # [0] Controls
+
+
+def encode_message_fast(message_id, protocol_op, controls=None):
+    """
+    Build the BER encoded LDAPMessage from the messageID, the protocolOp already encoded by an operation fast encoder and the controls
+    """
+    components = [encode_integer_fast(message_id), protocol_op]
+    encoded_controls = encode_controls_fast(controls)
+    if encoded_controls is not None:
+        components.append(encoded_controls)
+    return encode_sequence_fast(components)
+
+
+def decode_request_fast(request):
+    """
+    Decode a protocolOp encoded by the fast BER encoder, returns the decoded components of the request
+    """
+    return decode_sequence(memoryview(request), 0, len(request))[0][3]
+
+
+def decode_bind_request(message, start, stop, context_decoders=None):
+    return decode_sequence(message, start, stop, BIND_REQUEST_CONTEXT)
+
+
+def decode_search_request(message, start, stop, context_decoders=None):
+    return decode_sequence(message, start, stop, FILTER_CONTEXT)
+
+
+def decode_modify_dn_request(message, start, stop, context_decoders=None):
+    return decode_sequence(message, start, stop, MODIFY_DN_REQUEST_CONTEXT)
+
+
+def decode_extended_request(message, start, stop, context_decoders=None):
+    return decode_sequence(message, start, stop, EXTENDED_REQUEST_CONTEXT)
+
+
+def decode_null(message, start, stop, context_decoders=None):
+    return None
+
+
+def decode_filter(message, start, stop, context_decoders=None):
+    return decode_sequence(message, start, stop, FILTER_CONTEXT)
+
+
+def decode_substring_filter(message, start, stop, context_decoders=None):
+    return decode_sequence(message, start, stop, SUBSTRING_FILTER_CONTEXT)
+
+
+def decode_matching_rule_assertion(message, start, stop, context_decoders=None):
+    return decode_sequence(message, start, stop, MATCHING_RULE_ASSERTION_CONTEXT)
+
+
 ######
 
 if str is not bytes:  # Python 3
@@ -198,6 +348,8 @@ else:  # Python 2
     def get_bytes(x):
         return bytearray(x)
 
+OCTETS = [bytes(bytearray((octet,))) for octet in range(256)]  # single octets, used by the fast BER encoder
+
 DECODERS = {
     # Universal
     (0, 1): decode_boolean,  # Boolean
@@ -207,15 +359,25 @@ DECODERS = {
     (0, 16): decode_sequence,  # Sequence
     (0, 17): decode_sequence,  # Set
     # Application
+    (1, 0): decode_bind_request,  # Bind request
     (1, 1): decode_bind_response,  # Bind response
+    (1, 2): decode_null,  # Unbind request
+    (1, 3): decode_search_request,  # Search request
     (1, 4): decode_sequence,  # Search result entry
     (1, 5): decode_sequence,  # Search result done
+    (1, 6): decode_sequence,  # Modify request
     (1, 7): decode_sequence,  # Modify response
+    (1, 8): decode_sequence,  # Add request
     (1, 9): decode_sequence,  # Add response
+    (1, 10): decode_octet_string,  # Delete request
     (1, 11): decode_sequence,  # Delete response
+    (1, 12): decode_modify_dn_request,  # ModifyDN request
     (1, 13): decode_sequence,  # ModifyDN response
+    (1, 14): decode_sequence,  # Compare request
     (1, 15): decode_sequence,  # Compare response
+    (1, 16): decode_integer,  # Abandon request
     (1, 19): decode_sequence,  # Search result reference
+    (1, 23): decode_extended_request,  # Extended request
     (1, 24): decode_extended_response,  # Extended response
     (1, 25): decode_intermediate_response,  # intermediate response
     (2, 3): decode_octet_string  #
@@ -243,3 +405,199 @@ LDAP_MESSAGE_CONTEXT = {
 CONTROLS_CONTEXT = {
     0: decode_sequence  # Control
 }
+
+BIND_REQUEST_CONTEXT = {
+    0: decode_octet_string,  # Simple
+    3: decode_sequence,  # SaslCredentials
+    9: decode_octet_string,  # SicilyPackageDiscovery
+    10: decode_octet_string,  # SicilyNegotiate
+    11: decode_octet_string  # SicilyResponse
+}
+
+MODIFY_DN_REQUEST_CONTEXT = {
+    0: decode_octet_string  # NewSuperior
+}
+
+EXTENDED_REQUEST_CONTEXT = {
+    0: decode_octet_string,  # RequestName
+    1: decode_octet_string  # RequestValue
+}
+
+FILTER_CONTEXT = {
+    0: decode_filter,  # And
+    1: decode_filter,  # Or
+    2: decode_filter,  # Not
+    3: decode_sequence,  # EqualityMatch
+    4: decode_substring_filter,  # SubstringFilter
+    5: decode_sequence,  # GreaterOrEqual
+    6: decode_sequence,  # LessOrEqual
+    7: decode_octet_string,  # Present
+    8: decode_sequence,  # ApproxMatch
+    9: decode_matching_rule_assertion  # ExtensibleMatch
+}
+
+SUBSTRING_FILTER_CONTEXT = {
+    0: decode_octet_string,  # Initial
+    1: decode_octet_string,  # Any
+    2: decode_octet_string  # Final
+}
+
+MATCHING_RULE_ASSERTION_CONTEXT = {
+    1: decode_octet_string,  # MatchingRule
+    2: decode_octet_string,  # Type
+    3: decode_octet_string,  # MatchValue
+    4: decode_boolean  # DnAttributes
+}
+
+# events returned by the IncrementalDecoder
+ENTRY_START = 'entryStart'
+ATTRIBUTE_START = 'attributeStart'
+VALUE = 'value'
+ENTRY_END = 'entryEnd'
+MESSAGE = 'message'
+
+# states of the IncrementalDecoder
+_DECODE_MESSAGE, _DECODE_DN, _DECODE_ATTRIBUTES, _DECODE_ATTRIBUTE, _DECODE_VALUE, _DECODE_ENTRY_END = range(6)
+
+
+class IncrementalDecoder(object):
+    """
+    Resumable event driven decoder for a stream of LDAP messages
+    Data is fed as it is received and the events that can be decoded are returned. SearchResultEntry
+    messages are not buffered: an event is returned for each attribute value, as soon as the value is
+    complete. Other messages are returned whole, to be decoded with decode_message_fast. Events are tuples:
+    (ENTRY_START, message_id, dn), (ATTRIBUTE_START, message_id, type), (VALUE, message_id, value),
+    (ENTRY_END, message_id, controls), (MESSAGE, message_id, message)
+    dn, type and value are raw bytes, controls is the encoded controls element of the entry or None
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offset = 0  # first byte of the buffer not yet decoded
+        self._state = _DECODE_MESSAGE
+        self._message_id = None
+        self._message_end = None  # ends are positions in the buffer
+        self._entry_end = None
+        self._attributes_end = None
+        self._values_end = None
+
+    def _header(self, position):
+        """
+        Returns (tag, length, start of value) of the element at position or None if the header is not complete
+        """
+        buffer = self._buffer
+        if len(buffer) - position < 2:
+            return None
+        length = buffer[position + 1]
+        start = position + 2
+        if length & 0x80:  # long form
+            start += length & 0x7F
+            if len(buffer) < start:
+                return None
+            length = 0
+            for octet in buffer[position + 2: start]:
+                length = length << 8 | octet
+
+        return buffer[position], length, start
+
+    def _value(self, position):
+        """
+        Returns (start, stop) of the value of the element at position or None if the element is not complete
+        """
+        header = self._header(position)
+        if header is None or len(self._buffer) < header[2] + header[1]:
+            return None
+        return header[2], header[2] + header[1]
+
+    def _step(self, events):
+        """
+        Decodes the next element, returns False if more data is needed
+        """
+        buffer = self._buffer
+        if self._state == _DECODE_MESSAGE:
+            header = self._header(self._offset)
+            message_id = self._value(header[2]) if header else None
+            operation = self._header(message_id[1]) if message_id else None
+            if operation is None:
+                return False
+            message_end = header[2] + header[1]
+            self._message_id = decode_integer(buffer, message_id[0], message_id[1])
+            if operation[0] != 0x64:  # not a SearchResultEntry, returns the whole message
+                if len(buffer) < message_end:
+                    return False
+                events.append((MESSAGE, self._message_id, bytes(buffer[self._offset: message_end])))
+                self._offset = message_end
+                return True
+            self._message_end = message_end
+            self._entry_end = operation[2] + operation[1]
+            self._offset = operation[2]
+            self._state = _DECODE_DN
+        elif self._state == _DECODE_DN:
+            dn = self._value(self._offset)
+            if dn is None:
+                return False
+            events.append((ENTRY_START, self._message_id, bytes(buffer[dn[0]: dn[1]])))
+            self._offset = dn[1]
+            self._state = _DECODE_ATTRIBUTES
+        elif self._state == _DECODE_ATTRIBUTES:
+            header = self._header(self._offset)
+            if header is None:
+                return False
+            self._attributes_end = header[2] + header[1]
+            self._offset = header[2]
+            self._state = _DECODE_ATTRIBUTE
+        elif self._state == _DECODE_ATTRIBUTE:
+            if self._offset >= self._attributes_end:
+                self._state = _DECODE_ENTRY_END
+                return True
+            header = self._header(self._offset)  # PartialAttribute
+            attribute_type = self._value(header[2]) if header else None
+            values = self._header(attribute_type[1]) if attribute_type else None
+            if values is None:
+                return False
+            events.append((ATTRIBUTE_START, self._message_id, bytes(buffer[attribute_type[0]: attribute_type[1]])))
+            self._values_end = values[2] + values[1]
+            self._offset = values[2]
+            self._state = _DECODE_VALUE
+        elif self._state == _DECODE_VALUE:
+            if self._offset >= self._values_end:
+                self._state = _DECODE_ATTRIBUTE
+                return True
+            value = self._value(self._offset)
+            if value is None:
+                return False
+            events.append((VALUE, self._message_id, bytes(buffer[value[0]: value[1]])))
+            self._offset = value[1]
+        elif self._state == _DECODE_ENTRY_END:
+            if len(buffer) < self._message_end:  # waits for controls
+                return False
+            events.append((ENTRY_END, self._message_id, bytes(buffer[self._entry_end: self._message_end]) if self._message_end > self._entry_end else None))
+            self._offset = self._message_end
+            self._state = _DECODE_MESSAGE
+        return True
+
+    def feed(self, data):
+        """
+        Adds received data to the decoder and returns the list of decoded events
+        """
+        self._buffer.extend(data)
+        events = []
+        while self._step(events):
+            pass
+        if self._offset:  # discards decoded data
+            del self._buffer[:self._offset]
+            if self._state != _DECODE_MESSAGE:
+                self._message_end -= self._offset
+                self._entry_end -= self._offset
+                if self._state in (_DECODE_ATTRIBUTE, _DECODE_VALUE, _DECODE_ENTRY_END):
+                    self._attributes_end -= self._offset
+                if self._state == _DECODE_VALUE:
+                    self._values_end -= self._offset
+            self._offset = 0
+        return events
+
+    def idle(self):
+        """
+        True if all the data received has been decoded and no message is in progress
+        """
+        return self._state == _DECODE_MESSAGE and not self._buffer
@@ -79,12 +79,27 @@ _POOLING_LOOP_TIMEOUT = 10  # number of seconds to wait before restarting a cycl
 _RESPONSE_SLEEPTIME = 0.05  # seconds to wait while waiting for a response in asynchronous strategies
 _RESPONSE_WAITING_TIMEOUT = 3  # waiting timeout for receiving a response in asynchronous strategies
 _SOCKET_SIZE = 4096  # socket byte size
+_PARALLEL_DECODE_CHUNK_SIZE = 500  # number of search result entries sent at once to the decode_executor of a connection
+_BULK_WINDOW = 100  # number of requests kept in flight by Connection.bulk() when the window is not specified
+_AUTO_RANGE_WINDOW = 100  # number of auto-range searches for the next range of different attributes kept in flight
+_PARALLEL_SEARCH_WORKERS = 4  # number of partitions searched at the same time by parallel_paged_search() on a thread safe connection when workers is not specified
 _CHECK_AVAILABILITY_TIMEOUT = 2.5  # default timeout for socket connect when checking availability
 _RESET_AVAILABILITY_TIMEOUT = 5  # default timeout for resetting the availability status when checking candidate addresses
+_HAPPY_EYEBALLS_DELAY = 0.25  # seconds to wait before trying the next candidate address while the previous attempts are still connecting. Set to 0 to try the addresses one at a time
 _RESTARTABLE_SLEEPTIME = 2  # time to wait in a restartable strategy before retrying the request
 _RESTARTABLE_TRIES = 30  # number of times to retry in a restartable strategy before giving up. Set to True for unlimited retries
+_RESTARTABLE_BACKOFF_FACTOR = 2  # the time to wait in a restartable strategy is multiplied by this factor at each retry. Set to 1 for a fixed time
+_RESTARTABLE_MAX_SLEEPTIME = 30  # maximum time to wait in a restartable strategy before retrying the request
+_RESTARTABLE_MAX_TOTAL_SLEEPTIME = 0  # maximum total time to wait in a restartable strategy while retrying a request, then it gives up even if tries are left. 0 (the default) for no limit (not applied with unlimited retries)
+_RESTARTABLE_JITTER = 0.5  # fraction of the time to wait in a restartable strategy that is randomly reduced, to spread the retries of many connections
+_CIRCUIT_BREAKER_THRESHOLD = 0  # number of consecutive failed connections after which a server is not tried for CIRCUIT_BREAKER_TIMEOUT seconds. 0 (the default) disables the circuit breaker
+_CIRCUIT_BREAKER_TIMEOUT = 30  # number of seconds a server is not tried after CIRCUIT_BREAKER_THRESHOLD consecutive failed connections
 _REUSABLE_THREADED_POOL_SIZE = 5
 _REUSABLE_THREADED_LIFETIME = 3600  # 1 hour
+_REUSABLE_THREADED_IDLE_TIMEOUT = 60  # seconds an idle connection is kept in a pool that can shrink
+_REUSABLE_THREADED_GROW_QUEUE_SIZE = 2  # a pool that can grow adds a connection when more requests than this are waiting in queue
+_REUSABLE_THREADED_GROW_WAIT_TIME = 0.1  # a pool that can grow adds a connection when a request has waited more than this in queue
+_REUSABLE_THREADED_HEALTH_CHECK_INTERVAL = 5  # seconds between the checks of the idle connections in a pool
 _DEFAULT_THREADED_POOL_NAME = 'REUSABLE_DEFAULT_POOL'
 _ADDRESS_INFO_REFRESH_TIME = 300  # seconds to wait before refreshing address info from dns
 _ADDITIONAL_SERVER_ENCODINGS = ['latin-1', 'koi8-r']  # some broken LDAP implementation may have different encoding than those expected by RFCs
@@ -92,6 +107,7 @@ _ADDITIONAL_CLIENT_ENCODINGS = ['utf-8']
 _IGNORE_MALFORMED_SCHEMA = False  # some flaky LDAP servers returns malformed schema. If True no expection is raised and schema is thrown away
 _DEFAULT_SERVER_ENCODING = 'utf-8'  # should always be utf-8
 _LDIF_LINE_LENGTH = 78  # as stated in RFC 2849
+_FILTER_CACHE_SIZE = 256  # number of compiled search filters kept in cache, 0 disables the cache
 
 if stdin and hasattr(stdin, 'encoding') and stdin.encoding:
     _DEFAULT_CLIENT_ENCODING = stdin.encoding
@@ -107,14 +123,29 @@ PARAMETERS = ['CASE_INSENSITIVE_ATTRIBUTE_NAMES',
               'RESPONSE_SLEEPTIME',
               'RESPONSE_WAITING_TIMEOUT',
               'SOCKET_SIZE',
+              'PARALLEL_DECODE_CHUNK_SIZE',
+              'BULK_WINDOW',
+              'AUTO_RANGE_WINDOW',
+              'PARALLEL_SEARCH_WORKERS',
               'CHECK_AVAILABILITY_TIMEOUT',
               'RESTARTABLE_SLEEPTIME',
               'RESTARTABLE_TRIES',
+              'RESTARTABLE_BACKOFF_FACTOR',
+              'RESTARTABLE_MAX_SLEEPTIME',
+              'RESTARTABLE_MAX_TOTAL_SLEEPTIME',
+              'RESTARTABLE_JITTER',
+              'CIRCUIT_BREAKER_THRESHOLD',
+              'CIRCUIT_BREAKER_TIMEOUT',
               'REUSABLE_THREADED_POOL_SIZE',
               'REUSABLE_THREADED_LIFETIME',
+              'REUSABLE_THREADED_IDLE_TIMEOUT',
+              'REUSABLE_THREADED_GROW_QUEUE_SIZE',
+              'REUSABLE_THREADED_GROW_WAIT_TIME',
+              'REUSABLE_THREADED_HEALTH_CHECK_INTERVAL',
               'DEFAULT_THREADED_POOL_NAME',
               'ADDRESS_INFO_REFRESH_TIME',
               'RESET_AVAILABILITY_TIMEOUT',
+              'HAPPY_EYEBALLS_DELAY',
               'DEFAULT_CLIENT_ENCODING',
               'DEFAULT_SERVER_ENCODING',
               'CLASSES_EXCLUDED_FROM_CHECK',
@@ -126,7 +157,8 @@ PARAMETERS = ['CASE_INSENSITIVE_ATTRIBUTE_NAMES',
               'IGNORE_MALFORMED_SCHEMA',
               'ATTRIBUTES_EXCLUDED_FROM_OBJECT_DEF',
               'IGNORED_MANDATORY_ATTRIBUTES_IN_OBJECT_DEF',
-              'LDIF_LINE_LENGTH'
+              'LDIF_LINE_LENGTH',
+              'FILTER_CACHE_SIZE'
               ]
 
 
@@ -145,22 +177,52 @@ def get_config_parameter(parameter):
         return _RESPONSE_WAITING_TIMEOUT
     elif parameter == 'SOCKET_SIZE':  # Integer
         return _SOCKET_SIZE
+    elif parameter == 'PARALLEL_DECODE_CHUNK_SIZE':  # Integer
+        return _PARALLEL_DECODE_CHUNK_SIZE
+    elif parameter == 'BULK_WINDOW':  # Integer
+        return _BULK_WINDOW
+    elif parameter == 'AUTO_RANGE_WINDOW':  # Integer
+        return _AUTO_RANGE_WINDOW
+    elif parameter == 'PARALLEL_SEARCH_WORKERS':  # Integer
+        return _PARALLEL_SEARCH_WORKERS
     elif parameter == 'CHECK_AVAILABILITY_TIMEOUT':  # Integer
         return _CHECK_AVAILABILITY_TIMEOUT
     elif parameter == 'RESTARTABLE_SLEEPTIME':  # Integer
         return _RESTARTABLE_SLEEPTIME
     elif parameter == 'RESTARTABLE_TRIES':  # Integer
         return _RESTARTABLE_TRIES
+    elif parameter == 'RESTARTABLE_BACKOFF_FACTOR':  # Float
+        return _RESTARTABLE_BACKOFF_FACTOR
+    elif parameter == 'RESTARTABLE_MAX_SLEEPTIME':  # Integer
+        return _RESTARTABLE_MAX_SLEEPTIME
+    elif parameter == 'RESTARTABLE_MAX_TOTAL_SLEEPTIME':  # Integer
+        return _RESTARTABLE_MAX_TOTAL_SLEEPTIME
+    elif parameter == 'RESTARTABLE_JITTER':  # Float
+        return _RESTARTABLE_JITTER
+    elif parameter == 'CIRCUIT_BREAKER_THRESHOLD':  # Integer
+        return _CIRCUIT_BREAKER_THRESHOLD
+    elif parameter == 'CIRCUIT_BREAKER_TIMEOUT':  # Integer
+        return _CIRCUIT_BREAKER_TIMEOUT
     elif parameter == 'REUSABLE_THREADED_POOL_SIZE':  # Integer
         return _REUSABLE_THREADED_POOL_SIZE
     elif parameter == 'REUSABLE_THREADED_LIFETIME':  # Integer
         return _REUSABLE_THREADED_LIFETIME
+    elif parameter == 'REUSABLE_THREADED_IDLE_TIMEOUT':  # Integer
+        return _REUSABLE_THREADED_IDLE_TIMEOUT
+    elif parameter == 'REUSABLE_THREADED_GROW_QUEUE_SIZE':  # Integer
+        return _REUSABLE_THREADED_GROW_QUEUE_SIZE
+    elif parameter == 'REUSABLE_THREADED_GROW_WAIT_TIME':  # Float
+        return _REUSABLE_THREADED_GROW_WAIT_TIME
+    elif parameter == 'REUSABLE_THREADED_HEALTH_CHECK_INTERVAL':  # Integer
+        return _REUSABLE_THREADED_HEALTH_CHECK_INTERVAL
     elif parameter == 'DEFAULT_THREADED_POOL_NAME':  # String
         return _DEFAULT_THREADED_POOL_NAME
     elif parameter == 'ADDRESS_INFO_REFRESH_TIME':  # Integer
         return _ADDRESS_INFO_REFRESH_TIME
     elif parameter == 'RESET_AVAILABILITY_TIMEOUT':  # Integer
         return _RESET_AVAILABILITY_TIMEOUT
+    elif parameter == 'HAPPY_EYEBALLS_DELAY':  # Float
+        return _HAPPY_EYEBALLS_DELAY
     elif parameter in ['DEFAULT_CLIENT_ENCODING', 'DEFAULT_ENCODING']:  # String - DEFAULT_ENCODING for backward compatibility
         return _DEFAULT_CLIENT_ENCODING
     elif parameter == 'DEFAULT_SERVER_ENCODING':  # String
@@ -209,6 +271,8 @@ def get_config_parameter(parameter):
             return [_IGNORED_MANDATORY_ATTRIBUTES_IN_OBJECT_DEF]
     elif parameter == 'LDIF_LINE_LENGTH':  # Integer
         return _LDIF_LINE_LENGTH
+    elif parameter == 'FILTER_CACHE_SIZE':  # Integer
+        return _FILTER_CACHE_SIZE
 
     raise LDAPConfigurationParameterError('configuration parameter %s not valid' % parameter)
 
@@ -235,6 +299,18 @@ def set_config_parameter(parameter, value):
     elif parameter == 'SOCKET_SIZE':
         global _SOCKET_SIZE
         _SOCKET_SIZE = value
+    elif parameter == 'PARALLEL_DECODE_CHUNK_SIZE':
+        global _PARALLEL_DECODE_CHUNK_SIZE
+        _PARALLEL_DECODE_CHUNK_SIZE = value
+    elif parameter == 'BULK_WINDOW':
+        global _BULK_WINDOW
+        _BULK_WINDOW = value
+    elif parameter == 'AUTO_RANGE_WINDOW':
+        global _AUTO_RANGE_WINDOW
+        _AUTO_RANGE_WINDOW = value
+    elif parameter == 'PARALLEL_SEARCH_WORKERS':
+        global _PARALLEL_SEARCH_WORKERS
+        _PARALLEL_SEARCH_WORKERS = value
     elif parameter == 'CHECK_AVAILABILITY_TIMEOUT':
         global _CHECK_AVAILABILITY_TIMEOUT
         _CHECK_AVAILABILITY_TIMEOUT = value
@@ -244,12 +320,42 @@ def set_config_parameter(parameter, value):
     elif parameter == 'RESTARTABLE_TRIES':
         global _RESTARTABLE_TRIES
         _RESTARTABLE_TRIES = value
+    elif parameter == 'RESTARTABLE_BACKOFF_FACTOR':
+        global _RESTARTABLE_BACKOFF_FACTOR
+        _RESTARTABLE_BACKOFF_FACTOR = value
+    elif parameter == 'RESTARTABLE_MAX_SLEEPTIME':
+        global _RESTARTABLE_MAX_SLEEPTIME
+        _RESTARTABLE_MAX_SLEEPTIME = value
+    elif parameter == 'RESTARTABLE_MAX_TOTAL_SLEEPTIME':
+        global _RESTARTABLE_MAX_TOTAL_SLEEPTIME
+        _RESTARTABLE_MAX_TOTAL_SLEEPTIME = value
+    elif parameter == 'RESTARTABLE_JITTER':
+        global _RESTARTABLE_JITTER
+        _RESTARTABLE_JITTER = value
+    elif parameter == 'CIRCUIT_BREAKER_THRESHOLD':
+        global _CIRCUIT_BREAKER_THRESHOLD
+        _CIRCUIT_BREAKER_THRESHOLD = value
+    elif parameter == 'CIRCUIT_BREAKER_TIMEOUT':
+        global _CIRCUIT_BREAKER_TIMEOUT
+        _CIRCUIT_BREAKER_TIMEOUT = value
     elif parameter == 'REUSABLE_THREADED_POOL_SIZE':
         global _REUSABLE_THREADED_POOL_SIZE
         _REUSABLE_THREADED_POOL_SIZE = value
     elif parameter == 'REUSABLE_THREADED_LIFETIME':
         global _REUSABLE_THREADED_LIFETIME
         _REUSABLE_THREADED_LIFETIME = value
+    elif parameter == 'REUSABLE_THREADED_IDLE_TIMEOUT':
+        global _REUSABLE_THREADED_IDLE_TIMEOUT
+        _REUSABLE_THREADED_IDLE_TIMEOUT = value
+    elif parameter == 'REUSABLE_THREADED_GROW_QUEUE_SIZE':
+        global _REUSABLE_THREADED_GROW_QUEUE_SIZE
+        _REUSABLE_THREADED_GROW_QUEUE_SIZE = value
+    elif parameter == 'REUSABLE_THREADED_GROW_WAIT_TIME':
+        global _REUSABLE_THREADED_GROW_WAIT_TIME
+        _REUSABLE_THREADED_GROW_WAIT_TIME = value
+    elif parameter == 'REUSABLE_THREADED_HEALTH_CHECK_INTERVAL':
+        global _REUSABLE_THREADED_HEALTH_CHECK_INTERVAL
+        _REUSABLE_THREADED_HEALTH_CHECK_INTERVAL = value
     elif parameter == 'DEFAULT_THREADED_POOL_NAME':
         global _DEFAULT_THREADED_POOL_NAME
         _DEFAULT_THREADED_POOL_NAME = value
@@ -259,6 +365,9 @@ def set_config_parameter(parameter, value):
     elif parameter == 'RESET_AVAILABILITY_TIMEOUT':
         global _RESET_AVAILABILITY_TIMEOUT
         _RESET_AVAILABILITY_TIMEOUT = value
+    elif parameter == 'HAPPY_EYEBALLS_DELAY':
+        global _HAPPY_EYEBALLS_DELAY
+        _HAPPY_EYEBALLS_DELAY = value
     elif parameter in ['DEFAULT_CLIENT_ENCODING', 'DEFAULT_ENCODING']:
         global _DEFAULT_CLIENT_ENCODING
         _DEFAULT_CLIENT_ENCODING = value
@@ -295,5 +404,8 @@ def set_config_parameter(parameter, value):
     elif parameter == 'LDIF_LINE_LENGTH':
         global _LDIF_LINE_LENGTH
         _LDIF_LINE_LENGTH = value
+    elif parameter == 'FILTER_CACHE_SIZE':
+        global _FILTER_CACHE_SIZE
+        _FILTER_CACHE_SIZE = value
     else:
         raise LDAPConfigurationParameterError('unable to set configuration parameter %s' % parameter)
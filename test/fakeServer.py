@@ -0,0 +1,140 @@
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+# Minimal LDAP servers for the tests that don't need a real DSA, each test module answers only the requests it needs
+
+import socket
+from threading import Thread
+
+try:
+    from socketserver import ThreadingTCPServer, BaseRequestHandler
+except ImportError:  # Python 2
+    # noinspection PyUnresolvedReferences
+    from SocketServer import ThreadingTCPServer, BaseRequestHandler
+
+from ldap3.strategy.base import BaseStrategy
+from ldap3.utils.asn1 import decode_message_fast, encode_message_fast, encode_sequence_fast, encode_octet_string_fast, encode_integer_fast
+
+
+def ldap_result(tag, result_code=0, extra=None):
+    """
+    LDAPResult with empty matchedDN and diagnosticMessage, tag is the protocolOp of the response
+    """
+    return encode_sequence_fast([encode_integer_fast(result_code, 0x0A), encode_octet_string_fast(''), encode_octet_string_fast('')] + (extra or []), tag)
+
+
+def ldap_entry(dn, attributes):
+    """
+    searchResEntry protocolOp, attributes is a sequence of (name, values) tuples
+    """
+    return encode_sequence_fast([encode_octet_string_fast(dn),
+                                 encode_sequence_fast([encode_sequence_fast([encode_octet_string_fast(name), encode_sequence_fast([encode_octet_string_fast(value) for value in values], 0x31)])
+                                                       for name, values in attributes])], 0x64)
+
+
+def indexed_entry(index, base):
+    """
+    searchResEntry of cn=entry<index>,<base>
+    """
+    return ldap_entry('cn=entry%d,%s' % (index, base), [('cn', ['entry%d' % index])])
+
+
+def search_response(message_id, entries, result=None, controls=None):
+    """
+    searchResEntry messages followed by the searchResDone message (success if result is None)
+    """
+    return b''.join([encode_message_fast(message_id, entry) for entry in entries]) + encode_message_fast(message_id, result or ldap_result(0x65), controls)
+
+
+def split_requests(data):
+    """
+    Returns the requests completely received in data and the bytes of the next request
+    """
+    requests = []
+    length = BaseStrategy.compute_ldap_message_size(data)
+    while length != -1 and len(data) >= length:
+        requests.append(decode_message_fast(data[:length]))
+        data = data[length:]
+        length = BaseStrategy.compute_ldap_message_size(data)
+    return requests, data
+
+
+def receive_requests(sock):
+    """
+    Yields the list of the requests completed by each read from sock until the connection is closed,
+    an empty list when the timeout of sock expires
+    """
+    data = b''
+    while True:
+        try:
+            received = sock.recv(4096)
+        except socket.timeout:
+            yield []
+            continue
+        except socket.error:
+            return
+        if not received:
+            return
+        requests, data = split_requests(data + received)
+        if requests:
+            yield requests
+
+
+class FakeRequestHandler(BaseRequestHandler):
+    """
+    Passes each request of the connection to answer(), the connection is closed when answer() returns False
+    """
+    def handle(self):
+        for requests in receive_requests(self.request):
+            for request in requests:
+                try:
+                    if self.answer(request) is False:
+                        return
+                except socket.error:  # the client has closed the connection
+                    return
+
+    def answer(self, request):
+        """
+        Answers to Bind requests with success and closes the connection on Unbind requests, subclasses answer to the other requests
+        """
+        if request['protocolOp'] == 0:  # bindRequest
+            self.request.sendall(encode_message_fast(request['messageID'], ldap_result(0x61)))
+        elif request['protocolOp'] == 2:  # unbindRequest
+            return False
+
+
+class FakeServer(ThreadingTCPServer):
+    """
+    Serves the connections on a free port of localhost, each connection in its own thread
+    The keyword arguments are set as attributes of the server and can be read by the handler in self.server
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handler, **attributes):
+        ThreadingTCPServer.__init__(self, ('127.0.0.1', 0), handler)
+        self.port = self.server_address[1]
+        for name in attributes:
+            setattr(self, name, attributes[name])
+        Thread(target=self.serve_forever).start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
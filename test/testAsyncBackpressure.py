@@ -0,0 +1,151 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# The buffer limits of the ASYNC strategy are tested against a minimal LDAP server that serves each connection in a thread
+
+import unittest
+from time import sleep
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # Python 2 without the futures backport
+    ThreadPoolExecutor = None
+
+from ldap3 import Server, Connection, ASYNC, MULTIPLEXED, NONE, get_config_parameter
+from ldap3.core.exceptions import LDAPResponseTimeoutError, LDAPInvalidValueError
+from ldap3.utils.asn1 import encode_message_fast
+from test.fakeServer import FakeServer, FakeRequestHandler, indexed_entry, search_response
+
+ENTRIES = 5000
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to Search requests with ENTRIES entries, o=small searches return 10 entries
+    """
+    def answer(self, request):
+        if request['protocolOp'] == 3:  # searchRequest
+            base = request['payload'][0][3].decode('utf-8')
+            self.request.sendall(search_response(request['messageID'], [indexed_entry(index, base) for index in range(10 if base == 'o=small' else ENTRIES)]))
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler)
+
+    def tearDown(self):
+        self.fake_server.stop()
+
+    def connection(self, **kwargs):
+        return Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), client_strategy=ASYNC, auto_bind=True, **kwargs)
+
+    def wait_for_pause(self, strategy):
+        """
+        Waits for the receiver to fill the buffer and stop reading the socket
+        """
+        for _ in range(500):
+            with strategy.async_lock:
+                if strategy.receiver_pauses and strategy._buffer_full():
+                    break
+            sleep(0.01)
+
+    def slow_consumer(self, connection, check):
+        dns = []
+        for entry in connection.iter_response(connection.search('o=test', '(objectClass=*)'), timeout=5):
+            if len(dns) in (0, 1000, 3000):
+                self.wait_for_pause(connection.strategy)  # lets the receiver fill the buffer
+                check(connection.strategy)
+            dns.append(entry['dn'])
+        self.assertEqual(dns, ['cn=entry%d,o=test' % index for index in range(ENTRIES)])
+        self.assertEqual(connection.result['description'], 'success')
+        self.assertTrue(connection.strategy.receiver_pauses > 0)
+        self.assertEqual((connection.strategy._buffered_entries, connection.strategy._buffered_bytes, connection.strategy._buffered), (0, 0, dict()))
+
+    def test_max_buffered_entries(self):
+        connection = self.connection(max_buffered_entries=100)
+        per_read = 2 * get_config_parameter('SOCKET_SIZE') // len(encode_message_fast(1, indexed_entry(0, 'o=test'))) + 1  # messages of a single read, the receive buffer can have more free room than SOCKET_SIZE
+        self.slow_consumer(connection, lambda strategy: self.assertTrue(100 <= strategy._buffered_entries <= 100 + per_read))
+        connection.unbind()
+
+    def test_max_buffered_bytes(self):
+        connection = self.connection(max_buffered_bytes=8192)
+        self.slow_consumer(connection, lambda strategy: self.assertTrue(8192 <= strategy._buffered_bytes <= 8192 + 2 * get_config_parameter('SOCKET_SIZE')))
+        connection.unbind()
+
+    def test_get_response_within_limits(self):
+        connection = self.connection(max_buffered_entries=100)
+        message_ids = [connection.search('o=small', '(objectClass=*)') for _ in range(20)]  # 220 responses
+        for message_id in message_ids:
+            response, result = connection.get_response(message_id, timeout=5)
+            self.assertEqual((len(response), result['description']), (10, 'success'))
+        self.assertEqual(connection.strategy._buffered_entries, 0)
+        connection.unbind()
+
+    def test_get_response_exceeding_limits(self):
+        for limits in ({'max_buffered_entries': 100}, {'max_buffered_bytes': 8192}):
+            connection = self.connection(**limits)
+            message_id = connection.search('o=test', '(objectClass=*)')
+            self.wait_for_pause(connection.strategy)  # the receiver is paused before get_response() is called
+            response, result = connection.get_response(message_id, timeout=5)
+            self.assertEqual((len(response), result['description']), (ENTRIES, 'success'))
+            self.assertEqual((connection.strategy._buffered_entries, connection.strategy._buffered_bytes), (0, 0))
+            connection.unbind()
+
+    def test_get_response_timeout_discards_responses(self):
+        connection = self.connection(max_buffered_entries=100)
+        message_id = connection.search('o=test', '(objectClass=*)')
+        with self.assertRaises(LDAPResponseTimeoutError):
+            connection.get_response(message_id, timeout=0)
+        self.assertFalse(message_id in connection.strategy._outstanding)
+        response, result = connection.get_response(connection.search('o=small', '(objectClass=*)'), timeout=5)  # the connection is still usable
+        self.assertEqual((len(response), result['description']), (10, 'success'))
+        self.assertEqual(connection.strategy._buffered_entries, 0)
+        self.assertEqual(connection.strategy._discarded, set())  # the searchResDone of the discarded search has been received
+        connection.unbind()
+
+    def test_unbind_while_paused(self):
+        connection = self.connection(max_buffered_entries=100)
+        connection.search('o=test', '(objectClass=*)')
+        self.wait_for_pause(connection.strategy)
+        self.assertTrue(connection.strategy.receiver_pauses > 0)
+        receiver = connection.strategy.receiver
+        connection.unbind()
+        receiver.join(5)
+        self.assertFalse(receiver.is_alive())
+
+    @unittest.skipIf(ThreadPoolExecutor is None, 'concurrent.futures not available')
+    def test_limit_smaller_than_decode_chunk(self):
+        executor = ThreadPoolExecutor(2)
+        connection = self.connection(max_buffered_entries=100, decode_executor=executor)  # chunks are flushed when the receiver stops
+        self.slow_consumer(connection, lambda strategy: None)
+        connection.unbind()
+        executor.shutdown()
+
+    def test_multiplexed(self):
+        server = Server('127.0.0.1', port=self.fake_server.port, get_info=NONE)
+        with self.assertRaises(LDAPInvalidValueError):
+            Connection(server, client_strategy=MULTIPLEXED, max_buffered_entries=100)
+        with self.assertRaises(LDAPInvalidValueError):
+            Connection(server, client_strategy=MULTIPLEXED, max_buffered_bytes=1024 * 1024)
+        connection = Connection(server, client_strategy=MULTIPLEXED, auto_bind=True)  # no limits
+        self.assertEqual(len(connection.search('o=small', '(objectClass=*)')[2]), 10)
+        connection.unbind()
@@ -0,0 +1,182 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# iter_response() of the ASYNC strategy is tested against a minimal LDAP server that serves each connection in a thread
+
+import unittest
+from threading import Event
+from time import time
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:  # Python 2 without the futures backport
+    ThreadPoolExecutor = None
+
+from ldap3 import Server, Connection, ASYNC, ASYNCIO, MOCK_ASYNC, NONE, get_config_parameter, set_config_parameter
+from ldap3.core.connection import CLIENT_STRATEGIES
+from ldap3.core.exceptions import LDAPResponseTimeoutError, LDAPSessionTerminatedByServerError, LDAPNoSuchObjectResult, LDAPInvalidValueError
+from ldap3.strategy.base import RESPONSE_COMPLETE
+from ldap3.utils.asn1 import encode_message_fast
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_result, indexed_entry, search_response
+
+ENTRIES = 10
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to Search requests with ENTRIES entries
+    Searches with base o=slow send the first entries and the others when the server is released, o=error returns noSuchObject, o=close closes the connection
+    """
+    def answer(self, request):
+        if request['protocolOp'] == 3:  # searchRequest
+            message_id = request['messageID']
+            base = request['payload'][0][3].decode('utf-8')
+            if base == 'o=error':
+                self.request.sendall(encode_message_fast(message_id, ldap_result(0x65, 32)))
+            elif base in ['o=slow', 'o=close']:
+                self.request.sendall(b''.join([encode_message_fast(message_id, indexed_entry(index, base)) for index in range(2)]))
+                self.server.released.wait(10)
+                if base == 'o=close':
+                    self.request.close()
+                    return False
+                self.request.sendall(search_response(message_id, [indexed_entry(index, base) for index in range(2, ENTRIES)]))
+            else:
+                self.request.sendall(search_response(message_id, [indexed_entry(index, base) for index in range(ENTRIES)]))
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler, released=Event())
+
+    def tearDown(self):
+        self.fake_server.released.set()
+        self.fake_server.stop()
+
+    def connection(self, **kwargs):
+        return Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), client_strategy=ASYNC, auto_bind=True, **kwargs)
+
+    def test_entries_before_search_done(self):
+        connection = self.connection()
+        message_id = connection.search('o=slow', '(objectClass=*)', attributes=['cn', 'sn'])
+        entries = connection.iter_response(message_id, timeout=5)
+        first = next(entries)  # the server is still holding the other entries
+        self.assertEqual(first['dn'], 'cn=entry0,o=slow')
+        self.assertEqual(first['attributes']['sn'], [])  # empty attributes are added as in get_response()
+        self.assertEqual(next(entries)['dn'], 'cn=entry1,o=slow')
+        self.fake_server.released.set()
+        self.assertEqual([entry['dn'] for entry in entries], ['cn=entry%d,o=slow' % index for index in range(2, ENTRIES)])
+        self.assertEqual(connection.result['description'], 'success')
+        self.assertEqual(connection.strategy._responses, dict())
+        self.assertEqual(connection.strategy._events, dict())
+        self.assertEqual(connection.strategy._stream_events, dict())
+        self.assertFalse(message_id in connection.strategy._outstanding)
+        connection.unbind()
+
+    def test_stop_iterating(self):
+        connection = self.connection()
+        message_id = connection.search('o=slow', '(objectClass=*)')
+        entries = connection.iter_response(message_id, timeout=5)
+        self.assertEqual(next(entries)['dn'], 'cn=entry0,o=slow')
+        entries.close()
+        self.assertEqual(connection.strategy._discarded, set([message_id]))
+        self.fake_server.released.set()
+        response, result = connection.get_response(connection.search('o=test', '(objectClass=*)'))  # later responses are discarded
+        self.assertEqual(len(response), ENTRIES)
+        self.assertEqual(connection.strategy._discarded, set())
+        self.assertEqual(connection.strategy._responses, dict())
+        connection.unbind()
+
+    def test_stop_iterating_after_search_done(self):
+        connection = self.connection()
+        message_id = connection.search('o=test', '(objectClass=*)')
+        deadline = time() + 5
+        while RESPONSE_COMPLETE not in connection.strategy._responses.get(message_id, []) and time() < deadline:  # the whole response is received
+            self.fake_server.released.wait(0.01)
+        entries = connection.iter_response(message_id, timeout=5)
+        self.assertEqual(next(entries)['dn'], 'cn=entry0,o=test')
+        entries.close()  # searchResDone is already in the batch read by the generator
+        self.assertEqual(connection.strategy._discarded, set())
+        connection.unbind()
+
+    @unittest.skipIf(ThreadPoolExecutor is None, 'concurrent.futures not available')
+    def test_stop_iterating_with_decode_executor(self):
+        chunk_size = get_config_parameter('PARALLEL_DECODE_CHUNK_SIZE')
+        set_config_parameter('PARALLEL_DECODE_CHUNK_SIZE', 3)  # the first two entries are kept by the receiver until the chunk is full
+        executor = ThreadPoolExecutor(2)
+        try:
+            connection = self.connection(decode_executor=executor)
+            message_id = connection.search('o=slow', '(objectClass=*)')
+            entries = connection.iter_response(message_id, timeout=0.2)
+            with self.assertRaises(LDAPResponseTimeoutError):
+                next(entries)
+            self.assertEqual(connection.strategy._discarded, set([message_id]))
+            self.fake_server.released.set()
+            response, result = connection.get_response(connection.search('o=test', '(objectClass=*)'))
+            self.assertEqual([entry['dn'] for entry in response], ['cn=entry%d,o=test' % index for index in range(ENTRIES)])
+            self.assertEqual(connection.strategy._discarded, set())
+            self.assertEqual(connection.strategy._parallel_decoder._chunks, dict())  # the pending entries of the closed iter_response() are dropped
+            connection.unbind()
+        finally:
+            set_config_parameter('PARALLEL_DECODE_CHUNK_SIZE', chunk_size)
+            executor.shutdown()
+
+    def test_asyncio(self):
+        if ASYNCIO not in CLIENT_STRATEGIES:
+            self.skipTest('ASYNCIO strategy not available')
+        connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), client_strategy=ASYNCIO)
+        with self.assertRaises(LDAPInvalidValueError):
+            connection.iter_response(1)
+        self.assertEqual(connection.last_error, 'iter_response is not available for the ASYNCIO strategy')
+
+    def test_timeout(self):
+        connection = self.connection()
+        message_id = connection.search('o=slow', '(objectClass=*)')
+        entries = connection.iter_response(message_id, timeout=0.2)
+        next(entries)
+        next(entries)
+        with self.assertRaises(LDAPResponseTimeoutError):
+            next(entries)
+        connection.unbind()
+
+    def test_session_terminated(self):
+        connection = self.connection()
+        message_id = connection.search('o=close', '(objectClass=*)')
+        entries = connection.iter_response(message_id, timeout=5)
+        next(entries)
+        next(entries)
+        self.fake_server.released.set()
+        with self.assertRaises(LDAPSessionTerminatedByServerError):
+            next(entries)
+
+    def test_raise_exceptions(self):
+        connection = self.connection(raise_exceptions=True)
+        with self.assertRaises(LDAPNoSuchObjectResult):
+            list(connection.iter_response(connection.search('o=error', '(objectClass=*)')))
+        connection.unbind()
+
+    def test_mock_async(self):
+        connection = Connection(Server('my_fake_server'), user='cn=user,o=test', password='password', client_strategy=MOCK_ASYNC)
+        connection.strategy.add_entry('cn=user,o=test', {'userPassword': 'password', 'cn': 'user'})
+        connection.bind()
+        self.assertEqual([entry['dn'] for entry in connection.iter_response(connection.search('o=test', '(cn=user)'))], ['cn=user,o=test'])
+        self.assertEqual(connection.result['description'], 'success')
+        connection.unbind()
@@ -0,0 +1,218 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# The ASYNCIO strategy is tested against a minimal LDAP server running in the same event loop (Python 3 only)
+
+import unittest
+import asyncio
+import ssl
+import os
+
+from ldap3 import Server, Connection, Tls, ASYNCIO, NONE, MODIFY_REPLACE
+from ldap3.core.exceptions import LDAPSessionTerminatedByServerError
+from ldap3.strategy.asyncioStrategy import PendingResponse
+from ldap3.utils.asn1 import encode_message_fast, encode_octet_string_fast
+from test.fakeServer import ldap_result, indexed_entry, search_response, split_requests
+
+
+class FakeServer(object):
+    """
+    Answers to Bind, Search, Modify, WhoAmI and StartTLS requests, search responses are sent in reverse order of arrival
+    """
+    writer_start_tls = getattr(asyncio.StreamWriter, 'start_tls', None)  # Python 3.11, kept when the client is tested without it
+
+    def __init__(self):
+        self.server = None
+        self.port = None
+        self.requests = []
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.serve, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def serve(self, reader, writer):
+        data = b''
+        while True:
+            received = await reader.read(4096)
+            if not received:
+                break
+            requests, data = split_requests(data + received)
+            for request in requests:
+                self.requests.append(request['protocolOp'])
+                if not self.answer(request, writer):
+                    writer.close()
+                    return
+                if request['protocolOp'] == 23 and request['payload'][0][3] == b'1.3.6.1.4.1.1466.20037':  # StartTLS
+                    await FakeServer.writer_start_tls(writer, self.ssl_context())
+        writer.close()
+
+    def answer(self, request, writer):
+        message_id = request['messageID']
+        payload = request['payload']
+        if request['protocolOp'] == 0:  # bindRequest
+            writer.write(encode_message_fast(message_id, ldap_result(0x61, 0 if payload[2][3] == b'password' else 49)))
+        elif request['protocolOp'] == 2:  # unbindRequest
+            return False
+        elif request['protocolOp'] == 3:  # searchRequest
+            base = payload[0][3].decode('utf-8')
+            if base == 'o=close':
+                return False
+            asyncio.ensure_future(self.search_response(message_id, base, writer))
+        elif request['protocolOp'] == 6:  # modifyRequest
+            writer.write(encode_message_fast(message_id, ldap_result(0x67)))
+        elif request['protocolOp'] == 23 and payload[0][3] == b'1.3.6.1.4.1.1466.20037':  # StartTLS
+            writer.write(encode_message_fast(message_id, ldap_result(0x78)))
+        elif request['protocolOp'] == 23:  # extendedReq
+            writer.write(encode_message_fast(message_id, ldap_result(0x78, extra=[encode_octet_string_fast('dn:cn=user,o=test', 0x8B)])))
+        return True
+
+    @staticmethod
+    def ssl_context():
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.set_ciphers('DEFAULT@SECLEVEL=0')  # the test certificate is signed with a weak digest
+        path = os.path.dirname(os.path.abspath(__file__))
+        context.load_cert_chain(os.path.join(path, 'lab-edir-testlab-cert.pem'), os.path.join(path, 'lab-edir-testlab-key.pem'))
+        return context
+
+    @staticmethod
+    async def search_response(message_id, base, writer):
+        await asyncio.sleep(0.001 * (1000 - message_id % 1000))  # later requests are answered first
+        writer.write(search_response(message_id, [indexed_entry(index, base) for index in range(3)]))
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.fake_server = FakeServer()
+        self.loop.run_until_complete(self.fake_server.start())
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.fake_server.stop())
+        self.loop.close()
+
+    def connection(self, **kwargs):
+        return Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='password', client_strategy=ASYNCIO, **kwargs)
+
+    def test_bind_and_search(self):
+        async def run():
+            connection = self.connection()
+            await connection.open()
+            response, result = await connection.bind()
+            self.assertTrue(connection.bound)
+            self.assertEqual(result['type'], 'bindResponse')
+            message_id = connection.search('o=test', '(objectClass=*)', attributes=['cn'])
+            self.assertTrue(isinstance(message_id, PendingResponse))
+            response, result = await message_id
+            self.assertEqual(result['type'], 'searchResDone')
+            self.assertEqual([entry['dn'] for entry in response], ['cn=entry0,o=test', 'cn=entry1,o=test', 'cn=entry2,o=test'])
+            self.assertEqual(response[0]['attributes']['cn'], ['entry0'])
+            self.assertTrue(await connection.unbind())
+            self.assertTrue(connection.closed)
+        self.loop.run_until_complete(run())
+
+    def test_auto_bind_on_open(self):
+        async def run():
+            connection = self.connection(auto_bind=True)
+            self.assertFalse(connection.bound)
+            await connection.open()
+            self.assertTrue(connection.bound)
+            await connection.unbind()
+        self.loop.run_until_complete(run())
+
+    def test_invalid_credentials(self):
+        async def run():
+            connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='wrong', client_strategy=ASYNCIO)
+            _, result = await connection.bind()  # opens the connection
+            self.assertFalse(connection.bound)
+            self.assertEqual(result['result'], 49)
+            await connection.unbind()
+        self.loop.run_until_complete(run())
+
+    def test_concurrent_operations(self):
+        async def run():
+            connection = self.connection()
+            await connection.bind()
+            bases = ['ou=%d,o=test' % index for index in range(200)]
+            results = await asyncio.gather(*[connection.search(base, '(objectClass=*)', attributes=['cn']) for base in bases])
+            for base, (response, result) in zip(bases, results):
+                self.assertEqual(result['result'], 0)
+                self.assertEqual([entry['dn'] for entry in response], ['cn=entry%d,%s' % (index, base) for index in range(3)])
+            self.assertEqual(connection.strategy._outstanding, dict())
+            await connection.unbind()
+        self.loop.run_until_complete(run())
+
+    def test_modify(self):
+        async def run():
+            connection = self.connection(fast_encoder=True)
+            await connection.bind()
+            _, result = await connection.modify('cn=user,o=test', {'sn': [(MODIFY_REPLACE, ['surname'])]})
+            self.assertEqual(result['type'], 'modifyResponse')
+            self.assertEqual(result['result'], 0)
+            await connection.unbind()
+        self.loop.run_until_complete(run())
+
+    def test_extended_operation(self):
+        async def run():
+            connection = self.connection()
+            await connection.bind()
+            self.assertEqual(await connection.extend.standard.who_am_i(), 'dn:cn=user,o=test')
+            await connection.unbind()
+        self.loop.run_until_complete(run())
+
+    def start_tls(self):
+        async def run():
+            connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE, tls=Tls(validate=ssl.CERT_NONE)), user='cn=user,o=test', password='password', client_strategy=ASYNCIO)
+            await connection.open()
+            plain_writer = connection.strategy.writer  # closes the plain transport when garbage collected in Python 3.11
+            self.assertTrue(await connection.start_tls())
+            self.assertTrue(connection.tls_started)
+            self.assertIsNotNone(connection.strategy.writer.get_extra_info('ssl_object'))
+            await connection.bind()
+            response, result = await connection.search('o=test', '(objectClass=*)')  # the receiver reads from the TLS stream
+            self.assertEqual([entry['dn'] for entry in response], ['cn=entry%d,o=test' % index for index in range(3)])
+            await connection.unbind()
+            self.assertTrue(plain_writer.transport.is_closing())
+        self.loop.run_until_complete(run())
+
+    @unittest.skipIf(not hasattr(asyncio.StreamWriter, 'start_tls'), 'the fake server needs StreamWriter.start_tls')
+    def test_start_tls(self):
+        self.start_tls()
+
+    @unittest.skipIf(not hasattr(asyncio.StreamWriter, 'start_tls'), 'the fake server needs StreamWriter.start_tls')
+    def test_start_tls_new_stream(self):
+        start_tls = asyncio.StreamWriter.start_tls
+        del asyncio.StreamWriter.start_tls  # the client opens a new stream on the TLS transport as before Python 3.11
+        try:
+            self.start_tls()
+        finally:
+            asyncio.StreamWriter.start_tls = start_tls
+
+    def test_session_terminated_by_server(self):
+        async def run():
+            connection = self.connection()
+            await connection.bind()
+            with self.assertRaises(LDAPSessionTerminatedByServerError):
+                await connection.search('o=close', '(objectClass=*)')
+            self.assertTrue(connection.closed)
+        self.loop.run_until_complete(run())
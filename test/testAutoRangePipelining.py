@@ -0,0 +1,135 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+# Pipelined auto-range searches are tested against a minimal LDAP server that serves each connection in a thread
+
+import unittest
+from time import sleep
+
+from ldap3 import Server, Connection, SYNC, SAFE_SYNC, ASYNC, MULTIPLEXED, NONE, get_config_parameter, set_config_parameter
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_entry, search_response, receive_requests
+
+GROUPS = 5
+MEMBERS = 7
+RANGE_SIZE = 2
+
+
+def members(group):
+    return ['cn=member%d-%d,o=range' % (group, index) for index in range(MEMBERS)]
+
+
+def member_range(group, low):
+    high = low + RANGE_SIZE - 1
+    if high >= MEMBERS - 1:
+        return 'member;range=%d-*' % low, members(group)[low:]
+    return 'member;range=%d-%d' % (low, high), members(group)[low:high + 1]
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to Search requests, the members of the groups are returned in ranges of RANGE_SIZE values
+    """
+    def handle(self):
+        for requests in receive_requests(self.request):
+            range_requests = len([request for request in requests if request['protocolOp'] == 3 and request['payload'][0][3] != b'o=range'])
+            self.server.max_range_requests = max(self.server.max_range_requests, range_requests)  # range requests received at the same time
+            for request in requests:
+                if self.answer(request) is False:
+                    return
+
+    def answer(self, request):
+        if request['protocolOp'] == 3:  # searchRequest
+            base = request['payload'][0][3].decode('utf-8')
+            if base == 'o=range':
+                entries = [ldap_entry('cn=group%d,o=range' % group, [('cn', ['group%d' % group]), member_range(group, 0)]) for group in range(GROUPS)]
+            else:
+                sleep(0.02)  # the next range requests are queued in the socket
+                self.server.range_searches += 1
+                group = int(base.split(',')[0][len('cn=group'):])
+                low = int(request['payload'][7][3][0][3].decode('utf-8').split('=')[1].split('-')[0])
+                entries = [ldap_entry(base, [member_range(group, low)])]
+            self.request.sendall(search_response(request['messageID'], entries))
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler, max_range_requests=0, range_searches=0)
+        self.connections = []
+        self.auto_range_window = get_config_parameter('AUTO_RANGE_WINDOW')
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.unbind()
+        self.fake_server.stop()
+        set_config_parameter('AUTO_RANGE_WINDOW', self.auto_range_window)
+
+    def connection(self, **kwargs):
+        connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='password', auto_bind=True, **kwargs)
+        self.connections.append(connection)
+        return connection
+
+    def check_groups(self, entries):
+        self.assertEqual(len(entries), GROUPS)
+        for entry in entries:
+            group = int(entry['attributes']['cn'][0][len('group'):])
+            self.assertEqual(entry['attributes']['member'], members(group))
+            self.assertEqual([name for name in entry['attributes'] if ';range=' in name], [])
+        self.assertEqual(self.fake_server.range_searches, GROUPS * 3)
+
+    def search(self, connection):
+        result = connection.search('o=range', '(objectClass=*)', attributes=['cn', 'member'])
+        if connection.strategy.thread_safe:
+            return result[2]
+        if not connection.strategy.sync:
+            return connection.get_response(result)[0]
+        return connection.response
+
+    def test_sync(self):
+        connection = self.connection(client_strategy=SYNC)
+        self.check_groups(self.search(connection))
+        self.assertTrue(self.fake_server.max_range_requests > 1)  # requests are pipelined
+        self.assertEqual(connection.strategy._outstanding, dict())
+        self.assertEqual(connection.strategy._pipelined, dict())
+        self.assertEqual(connection.result['type'], 'searchResDone')
+
+    def test_safe_sync(self):
+        self.check_groups(self.search(self.connection(client_strategy=SAFE_SYNC)))
+        self.assertTrue(self.fake_server.max_range_requests > 1)
+
+    def test_async(self):
+        self.check_groups(self.search(self.connection(client_strategy=ASYNC)))
+        self.assertTrue(self.fake_server.max_range_requests > 1)
+
+    def test_multiplexed(self):
+        self.check_groups(self.search(self.connection(client_strategy=MULTIPLEXED)))
+        self.assertTrue(self.fake_server.max_range_requests > 1)
+
+    def test_stream(self):
+        connection = self.connection(client_strategy=SYNC)
+        self.check_groups(list(connection.search('o=range', '(objectClass=*)', attributes=['cn', 'member'], stream=True)))
+        self.assertTrue(self.fake_server.max_range_requests > 1)
+
+    def test_window(self):
+        set_config_parameter('AUTO_RANGE_WINDOW', 1)
+        self.check_groups(self.search(self.connection(client_strategy=SYNC)))
+        self.assertEqual(self.fake_server.max_range_requests, 1)
@@ -0,0 +1,79 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ldap3 import Server, Connection, ASYNC
+from ldap3.strategy.base import BaseStrategy
+from ldap3.utils.asn1 import decode_message_fast
+
+
+class RecordingSocket(object):
+    """
+    Records the data written with sendall
+    """
+    def __init__(self):
+        self.writes = []
+
+    def sendall(self, data):
+        self.writes.append(bytes(data))
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.connection = Connection(Server('dummy'), client_strategy=ASYNC)
+        self.connection.socket = RecordingSocket()
+        self.connection.listening = True
+        self.connection.closed = False
+        self.connection.strategy._outstanding = dict()
+
+    def decode_message_ids(self, data):
+        message_ids = []
+        while data:
+            length = BaseStrategy.compute_ldap_message_size(data)
+            message_ids.append(decode_message_fast(data[:length])['messageID'])
+            data = data[length:]
+        return message_ids
+
+    def test_batch_single_write(self):
+        with self.connection.batch():
+            message_ids = [self.connection.delete('cn=user%d,o=test' % index) for index in range(100)]
+            self.assertEqual(self.connection.socket.writes, [])
+        self.assertEqual(len(self.connection.socket.writes), 1)
+        self.assertEqual(self.decode_message_ids(self.connection.socket.writes[0]), message_ids)
+
+    def test_batch_flush_size(self):
+        with self.connection.batch(flush_size=200):
+            message_ids = [self.connection.delete('cn=user%d,o=test' % index) for index in range(100)]
+            self.assertTrue(1 < len(self.connection.socket.writes) < 100)
+        self.assertEqual(self.decode_message_ids(b''.join(self.connection.socket.writes)), message_ids)
+
+    def test_batch_explicit_flush(self):
+        with self.connection.batch():
+            first_id = self.connection.delete('cn=user1,o=test')
+            self.connection.strategy.flush()
+            second_id = self.connection.delete('cn=user2,o=test')
+            self.assertEqual(len(self.connection.socket.writes), 1)
+        self.assertEqual([self.decode_message_ids(data) for data in self.connection.socket.writes], [[first_id], [second_id]])
+
+    def test_no_batch(self):
+        for index in range(3):
+            self.connection.delete('cn=user%d,o=test' % index)
+        self.assertEqual(len(self.connection.socket.writes), 3)
@@ -0,0 +1,161 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+# Bulk operations are tested against a minimal LDAP server that answers the pending requests in reverse order
+
+import unittest
+
+from ldap3 import Server, Connection, SYNC, SAFE_SYNC, ASYNC, MULTIPLEXED, RESTARTABLE, MOCK_SYNC, LDIF, NONE, MODIFY_REPLACE
+from ldap3.core.exceptions import LDAPInvalidValueError
+from ldap3.utils.asn1 import encode_message_fast
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_result, receive_requests
+
+RESPONSES = {8: 0x69, 10: 0x6B, 6: 0x67, 12: 0x6D, 14: 0x6F}  # request protocolOp: response tag
+FLUSH_SIZE = 5  # pending requests are answered when they reach this number or when no more requests are received
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to Bind, Add, Delete, Modify, ModifyDn and Compare requests, entries with dn starting with cn=exists already exist
+    """
+    def handle(self):
+        self.pending = []
+        self.request.settimeout(0.1)
+        for requests in receive_requests(self.request):
+            for request in requests:
+                if self.answer(request) is False:
+                    return
+            if self.pending and (not requests or len(self.pending) >= FLUSH_SIZE):  # nothing received before the timeout
+                self.request.sendall(b''.join(reversed(self.pending)))
+                self.pending = []
+
+    def answer(self, request):
+        if request['protocolOp'] in RESPONSES:
+            dn = request['payload'] if request['protocolOp'] == 10 else request['payload'][0][3]
+            if request['protocolOp'] == 14:  # compareTrue
+                result_code = 6
+            elif dn.startswith(b'cn=exists'):
+                result_code = 68 if request['protocolOp'] == 8 else 0
+            else:
+                result_code = 0
+            self.pending.append(encode_message_fast(request['messageID'], ldap_result(RESPONSES[request['protocolOp']], result_code)))
+            self.server.max_pending = max(self.server.max_pending, len(self.pending))
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+
+def operations(count):
+    for index in range(count):
+        dn = 'cn=%s%d,o=test' % ('exists' if index % 10 == 0 else 'user', index)
+        yield [('add', dn, 'inetOrgPerson', {'sn': 'user'}),
+               ('modify', dn, {'sn': [(MODIFY_REPLACE, ['user%d' % index])]}),
+               ('compare', dn, 'sn', 'user'),
+               ('modify_dn', dn, 'cn=new%d' % index),
+               ('delete', dn)][index % 5]
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler, max_pending=0)
+        self.connections = []
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.unbind()
+        self.fake_server.stop()
+
+    def connection(self, **kwargs):
+        connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='password', auto_bind=True, **kwargs)
+        self.connections.append(connection)
+        return connection
+
+    def check_bulk(self, connection, window=FLUSH_SIZE):
+        bulk = connection.bulk(operations(50), window)
+        results = list(bulk)
+        self.assertEqual([result.index for result in results], list(range(50)))
+        self.assertEqual([result.operation[0] for result in results[:5]], ['add', 'modify', 'compare', 'modify_dn', 'delete'])
+        self.assertEqual([result.index for result in bulk.failures], [0, 10, 20, 30, 40])
+        self.assertEqual(bulk.failures[0].result['result'], 68)
+        self.assertEqual([result.result['type'] for result in results[5:10]], ['addResponse', 'modifyResponse', 'compareResponse', 'modDNResponse', 'delResponse'])
+        self.assertTrue(results[2].succeeded)  # compareTrue
+        self.assertEqual(bulk.completed, 50)
+        self.assertTrue(bulk.ops_per_second > 0)
+        self.assertTrue(self.fake_server.max_pending <= window)
+        self.assertEqual(connection.strategy._outstanding, dict())
+
+    def test_bulk_sync(self):
+        connection = self.connection(client_strategy=SYNC)
+        self.check_bulk(connection)
+        self.assertEqual(self.fake_server.max_pending, FLUSH_SIZE)  # requests are pipelined
+        self.assertEqual(connection.strategy._pipelined, dict())
+        self.assertTrue(connection.delete('cn=user0,o=test'))  # synchronous operations are not affected
+
+    def test_bulk_safe_sync(self):
+        self.check_bulk(self.connection(client_strategy=SAFE_SYNC))
+
+    def test_bulk_restartable(self):
+        self.check_bulk(self.connection(client_strategy=RESTARTABLE))
+
+    def test_bulk_async(self):
+        self.check_bulk(self.connection(client_strategy=ASYNC))
+
+    def test_bulk_multiplexed(self):
+        connection = self.connection(client_strategy=MULTIPLEXED)
+        self.check_bulk(connection)
+        status, result, _, _ = connection.delete('cn=user0,o=test')
+        self.assertTrue(status)
+
+    def test_window(self):
+        self.check_bulk(self.connection(client_strategy=SYNC), window=3)
+        self.assertEqual(self.fake_server.max_pending, 3)
+
+    def test_invalid_operations(self):
+        connection = self.connection(client_strategy=SYNC)
+        failures = connection.bulk([('add', 'cn=user0,o=test', 'inetOrgPerson'), ('search', 'o=test', '(objectClass=*)'), 'delete', ('delete', 'invalid dn'), ('delete', 'cn=user1,o=test')]).run()
+        self.assertEqual([failure.index for failure in failures], [1, 2, 3])
+        self.assertTrue(all(isinstance(failure.error, LDAPInvalidValueError) for failure in failures[:2]))
+        self.assertIsNone(failures[0].result)
+
+    def test_raise_exceptions(self):
+        connection = self.connection(client_strategy=SYNC, raise_exceptions=True)
+        bulk = connection.bulk(operations(20))
+        bulk.run()
+        self.assertEqual([failure.index for failure in bulk.failures], [0, 10])
+        self.assertEqual(bulk.failures[0].result['description'], 'entryAlreadyExists')
+        self.assertEqual(bulk.failures[0].error.result, 68)
+        self.assertEqual(bulk.completed, 20)
+
+    def test_mock_sync(self):
+        connection = Connection(Server('mock_server'), user='cn=user,o=test', password='password', client_strategy=MOCK_SYNC)
+        connection.strategy.add_entry('cn=user,o=test', {'userPassword': 'password', 'sn': 'user'})
+        connection.bind()
+        bulk = connection.bulk([('add', 'cn=user%d,o=test' % index, 'inetOrgPerson', {'sn': 'user%d' % index}) for index in range(10)] +
+                               [('add', 'cn=user0,o=test', 'inetOrgPerson', {'sn': 'user0'}), ('compare', 'cn=user1,o=test', 'sn', 'user1')])
+        results = list(bulk)
+        self.assertEqual([failure.index for failure in bulk.failures], [10])
+        self.assertEqual(results[11].result['description'], 'compareTrue')
+        self.assertTrue(connection.search('o=test', '(sn=user*)'))
+        self.assertEqual(len(connection.response), 11)
+
+    def test_not_available(self):
+        connection = Connection(Server('127.0.0.1'), client_strategy=LDIF)
+        with self.assertRaises(LDAPInvalidValueError):
+            connection.bulk([('delete', 'cn=user0,o=test')])
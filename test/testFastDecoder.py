@@ -0,0 +1,103 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ldap3 import Server, Connection
+from ldap3.protocol.rfc4511 import LDAPMessage
+from ldap3.utils.asn1 import decoder, decode_message_fast, decode_sequence, decode_ber_length, encode_ber_length, encode_message_fast, encode_sequence_fast, \
+    encode_octet_string_fast, encode_integer_fast, encode_boolean_fast
+
+
+def search_result_entry(dn, attributes):
+    attribute_list = [encode_sequence_fast([encode_octet_string_fast(attribute), encode_sequence_fast([encode_octet_string_fast(value) for value in values], 0x31)]) for attribute, values in attributes]
+    return encode_sequence_fast([encode_octet_string_fast(dn), encode_sequence_fast(attribute_list)], 0x64)  # [APPLICATION 4] SearchResultEntry
+
+
+def search_result_done(result_code=0, matched_dn='', message=''):
+    return encode_sequence_fast([encode_integer_fast(result_code, 0x0A), encode_octet_string_fast(matched_dn), encode_octet_string_fast(message)], 0x65)  # [APPLICATION 5] SearchResultDone
+
+
+def paged_control(size, cookie, criticality):
+    control_value = encode_sequence_fast([encode_integer_fast(size), encode_octet_string_fast(cookie)])
+    components = [encode_octet_string_fast('1.2.840.113556.1.4.319')]
+    if criticality:
+        components.append(encode_boolean_fast(True))
+    components.append(encode_octet_string_fast(control_value))
+    return encode_sequence_fast([encode_sequence_fast(components)], 0xA0)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.connection = Connection(Server('dummy'), check_names=False)
+
+    def test_ber_length(self):
+        for length in (0, 1, 127, 128, 255, 256, 65535, 65536, 16777216):
+            encoded = b'\x04' + encode_ber_length(length)
+            self.assertEqual(decode_ber_length(memoryview(encoded), 0), (length, len(encoded)))
+
+    def test_decode_input_types(self):
+        message = encode_message_fast(7, search_result_done(32, 'o=test', 'no such object'))
+        decoded = decode_message_fast(message)
+        self.assertEqual(decoded, decode_message_fast(bytearray(message)))
+        self.assertEqual(decoded, decode_message_fast(memoryview(message)))
+        self.assertEqual(decoded, decode_message_fast(memoryview(b'garbage' + message)[7:]))
+        self.assertEqual(decoded['messageID'], 7)
+        self.assertEqual(decoded['protocolOp'], 5)
+        self.assertEqual(decoded['payload'][1][3], b'o=test')
+
+    def test_decode_sequence_input_types(self):
+        for message in (b'\x04\x03abc', bytearray(b'\x04\x03abc'), memoryview(b'\x04\x03abc')):
+            self.assertEqual(decode_sequence(message, 0, 5), [(0, False, 4, b'abc')])
+
+    def test_leaf_values_are_bytes(self):
+        decoded = decode_message_fast(encode_message_fast(1, search_result_entry('cn=test,o=test', [('cn', ['test'])])))
+        self.assertIs(type(decoded['payload'][0][3]), bytes)
+        self.assertIs(type(decoded['payload'][1][3][0][3][1][3][0][3]), bytes)
+
+    def test_decode_negative_integers(self):
+        for value in (0, 1, -1, 127, 128, -128, -129, 65535, -65536, 2147483647, -2147483648):
+            self.assertEqual(decode_message_fast(encode_message_fast(value, search_result_done()))['messageID'], value)
+
+    def test_decode_search_result_entry(self):
+        values = ['member-%d,o=test' % index for index in range(5000)]
+        message = encode_message_fast(2, search_result_entry(u'cn=grüppe,o=test', [('member', values), ('cn', [u'grüppe']), ('jpegPhoto', [b'\xff\xd8\xff' * 1000])]))
+        response = self.connection.strategy.decode_response_fast(decode_message_fast(message))
+        self.assertEqual(response['type'], 'searchResEntry')
+        self.assertEqual(response['dn'], u'cn=grüppe,o=test')
+        self.assertEqual(response['attributes']['member'], values)
+        self.assertEqual(response['attributes']['cn'], [u'grüppe'])
+        self.assertEqual(response['raw_attributes']['jpegPhoto'], [b'\xff\xd8\xff' * 1000])
+
+    def test_decode_same_as_pyasn1(self):
+        message = encode_message_fast(3, search_result_entry('cn=test,o=test', [('sn', ['a', 'b']), ('givenName', ['c'])]))
+        fast_response = self.connection.strategy.decode_response_fast(decode_message_fast(message))
+        response = self.connection.strategy.decode_response(decoder.decode(message, asn1Spec=LDAPMessage())[0])
+        self.assertEqual(fast_response['dn'], response['dn'])
+        self.assertEqual(fast_response['attributes'], response['attributes'])
+        self.assertEqual(fast_response['raw_attributes'], response['raw_attributes'])
+
+    def test_decode_controls(self):
+        for criticality in (True, False):
+            message = encode_sequence_fast([encode_integer_fast(4), search_result_done(), paged_control(500, b'\x00\x01cookie', criticality)])
+            response = self.connection.strategy.decode_response_fast(decode_message_fast(message))
+            control = response['controls']['1.2.840.113556.1.4.319']
+            self.assertEqual(control['criticality'], criticality)
+            self.assertEqual(control['value'], {'size': 500, 'cookie': b'\x00\x01cookie'})
@@ -0,0 +1,218 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ldap3 import Server, Connection, SYNC, MOCK_SYNC, SIMPLE, ANONYMOUS, SASL, SUBTREE, BASE, LEVEL, DEREF_ALWAYS, DEREF_NEVER, ALL_ATTRIBUTES, MODIFY_REPLACE, MODIFY_ADD, MODIFY_DELETE, MODIFY_INCREMENT
+from ldap3.core.exceptions import LDAPControlError, LDAPUserNameIsMandatoryError, LDAPPasswordIsMandatoryError
+from ldap3.operation.abandon import abandon_operation, abandon_operation_fast
+from ldap3.operation.add import add_operation, add_operation_fast
+from ldap3.operation.bind import bind_operation, bind_operation_fast
+from ldap3.operation.compare import compare_operation, compare_operation_fast
+from ldap3.operation.delete import delete_operation, delete_operation_fast
+from ldap3.operation.extended import extended_operation, extended_operation_fast
+from ldap3.operation.modify import modify_operation, modify_operation_fast
+from ldap3.operation.modifyDn import modify_dn_operation, modify_dn_operation_fast
+from ldap3.operation.search import search_operation, search_operation_fast
+from ldap3.operation.unbind import unbind_operation, unbind_operation_fast
+from ldap3.protocol.controls import build_control
+from ldap3.protocol.convert import build_controls_list
+from ldap3.protocol.rfc2696 import paged_search_control
+from ldap3.protocol.rfc4511 import LDAPMessage, MessageID, ProtocolOp
+from ldap3.strategy.base import BaseStrategy
+from ldap3.utils.asn1 import encode, encode_message_fast, encode_integer_fast, encode_ber_length
+from test.config import test_auto_escape, test_auto_encode, test_validator, test_check_names
+
+
+def pyasn1_message(message_id, message_type, request, controls=None):
+    ldap_message = LDAPMessage()
+    ldap_message['messageID'] = MessageID(message_id)
+    ldap_message['protocolOp'] = ProtocolOp().setComponentByName(message_type, request)
+    message_controls = build_controls_list(controls)
+    if message_controls is not None:
+        ldap_message['controls'] = message_controls
+    return encode(ldap_message)
+
+
+class Test(unittest.TestCase):
+    def check_request(self, message_type, request, fast_request, controls=None):
+        for message_id in (1, 127, 128, 255, 65536):
+            self.assertEqual(encode_message_fast(message_id, fast_request, controls), pyasn1_message(message_id, message_type, request, controls))
+        self.assertEqual(BaseStrategy.decode_request(message_type, fast_request, controls), BaseStrategy.decode_request(message_type, request, controls))
+
+    def check_search(self, search_filter, attributes=None, scope=SUBTREE, dereference_aliases=DEREF_ALWAYS, size_limit=0, time_limit=0, types_only=False, controls=None):
+        parameters = ('o=test', search_filter, scope, dereference_aliases, attributes, size_limit, time_limit, types_only, test_auto_escape, test_auto_encode)
+        self.check_request('searchRequest',
+                           search_operation(*parameters, validator=test_validator, check_names=test_check_names),
+                           search_operation_fast(*parameters, validator=test_validator, check_names=test_check_names),
+                           controls)
+
+    def test_ber_length(self):
+        self.assertEqual(encode_ber_length(0), b'\x00')
+        self.assertEqual(encode_ber_length(127), b'\x7f')
+        self.assertEqual(encode_ber_length(128), b'\x81\x80')
+        self.assertEqual(encode_ber_length(256), b'\x82\x01\x00')
+        self.assertEqual(encode_ber_length(70000), b'\x83\x01\x11\x70')
+
+    def test_integer(self):
+        self.assertEqual(encode_integer_fast(0), b'\x02\x01\x00')
+        self.assertEqual(encode_integer_fast(127), b'\x02\x01\x7f')
+        self.assertEqual(encode_integer_fast(128), b'\x02\x02\x00\x80')
+        self.assertEqual(encode_integer_fast(-1), b'\x02\x01\xff')
+        self.assertEqual(encode_integer_fast(-129), b'\x02\x02\xff\x7f')
+        self.assertEqual(encode_integer_fast(2147483647), b'\x02\x04\x7f\xff\xff\xff')
+
+    def test_bind_simple(self):
+        self.check_request('bindRequest',
+                           bind_operation(3, SIMPLE, 'cn=admin,o=test', 'password'),
+                           bind_operation_fast(3, SIMPLE, 'cn=admin,o=test', 'password'))
+
+    def test_bind_simple_unicode(self):
+        self.check_request('bindRequest',
+                           bind_operation(3, SIMPLE, u'cn=àèìòù,o=test', u'pàssword', auto_encode=True),
+                           bind_operation_fast(3, SIMPLE, u'cn=àèìòù,o=test', u'pàssword', auto_encode=True))
+
+    def test_bind_anonymous(self):
+        self.check_request('bindRequest',
+                           bind_operation(3, ANONYMOUS, None, ''),
+                           bind_operation_fast(3, ANONYMOUS, None, ''))
+
+    def test_bind_sasl(self):
+        self.check_request('bindRequest',
+                           bind_operation(3, SASL, None, None, 'EXTERNAL', None),
+                           bind_operation_fast(3, SASL, None, None, 'EXTERNAL', None))
+        self.check_request('bindRequest',
+                           bind_operation(3, SASL, None, None, 'DIGEST-MD5', b'\x00credentials'),
+                           bind_operation_fast(3, SASL, None, None, 'DIGEST-MD5', b'\x00credentials'))
+
+    def test_bind_sicily_package_discovery(self):
+        self.check_request('bindRequest',
+                           bind_operation(3, 'SICILY_PACKAGE_DISCOVERY', None),
+                           bind_operation_fast(3, 'SICILY_PACKAGE_DISCOVERY', None))
+
+    def test_bind_errors(self):
+        self.assertRaises(LDAPUserNameIsMandatoryError, bind_operation_fast, 3, SIMPLE, '', 'password')
+        self.assertRaises(LDAPPasswordIsMandatoryError, bind_operation_fast, 3, SIMPLE, 'cn=admin,o=test', '')
+
+    def test_unbind(self):
+        self.check_request('unbindRequest', unbind_operation(), unbind_operation_fast())
+
+    def test_abandon(self):
+        for message_id in (0, 5, 200, 70000):
+            self.check_request('abandonRequest', abandon_operation(message_id), abandon_operation_fast(message_id))
+
+    def test_delete(self):
+        self.check_request('delRequest', delete_operation(u'cn=tëst,o=test'), delete_operation_fast(u'cn=tëst,o=test'))
+
+    def test_add(self):
+        attributes = {'objectClass': ['inetOrgPerson', 'top'],
+                      'sn': u'tëst',
+                      'givenName': ['given'],
+                      'jpegPhoto': b'\x00\x01\x02' * 100,
+                      'userCertificate': b'\xff\xfe\xfd',
+                      'description': []}
+        self.check_request('addRequest',
+                           add_operation(u'cn=tëst,o=test', attributes, test_auto_encode, validator=test_validator, check_names=test_check_names),
+                           add_operation_fast(u'cn=tëst,o=test', attributes, test_auto_encode, validator=test_validator, check_names=test_check_names))
+
+    def test_modify(self):
+        changes = {'sn': [(MODIFY_REPLACE, [u'tëst'])],
+                   'givenName': [(MODIFY_ADD, ['given-1', 'given-2']), (MODIFY_DELETE, 'given-3')],
+                   'description': [(MODIFY_DELETE, [])],
+                   'uidNumber': [(MODIFY_INCREMENT, [1])]}
+        self.check_request('modifyRequest',
+                           modify_operation('cn=test,o=test', changes, test_auto_encode, validator=test_validator, check_names=test_check_names),
+                           modify_operation_fast('cn=test,o=test', changes, test_auto_encode, validator=test_validator, check_names=test_check_names))
+
+    def test_modify_dn(self):
+        self.check_request('modDNRequest',
+                           modify_dn_operation('cn=test,o=test', 'cn=test2'),
+                           modify_dn_operation_fast('cn=test,o=test', 'cn=test2'))
+        self.check_request('modDNRequest',
+                           modify_dn_operation('cn=test,o=test', 'cn=test2', False, 'ou=moved,o=test'),
+                           modify_dn_operation_fast('cn=test,o=test', 'cn=test2', False, 'ou=moved,o=test'))
+
+    def test_compare(self):
+        self.check_request('compareRequest',
+                           compare_operation('cn=test,o=test', 'sn', u'tëst', test_auto_encode, validator=test_validator, check_names=test_check_names),
+                           compare_operation_fast('cn=test,o=test', 'sn', u'tëst', test_auto_encode, validator=test_validator, check_names=test_check_names))
+
+    def test_extended(self):
+        self.check_request('extendedReq',
+                           extended_operation('1.3.6.1.4.1.4203.1.11.3'),
+                           extended_operation_fast('1.3.6.1.4.1.4203.1.11.3'))
+        self.check_request('extendedReq',
+                           extended_operation('1.3.6.1.4.1.4203.1.11.1', b'\x30\x00'),
+                           extended_operation_fast('1.3.6.1.4.1.4203.1.11.1', b'\x30\x00'))
+        self.check_request('extendedReq',
+                           extended_operation('1.2.3.4', 'value'),
+                           extended_operation_fast('1.2.3.4', 'value'))
+        self.check_request('extendedReq',
+                           extended_operation('1.2.3.4', 'value', no_encode=True),
+                           extended_operation_fast('1.2.3.4', 'value', no_encode=True))
+
+    def test_search_equality(self):
+        self.check_search('(cn=test)', ['cn', 'sn'])
+
+    def test_search_unicode(self):
+        self.check_search(u'(cn=tëst)', [ALL_ATTRIBUTES])
+
+    def test_search_present(self):
+        self.check_search('(objectClass=*)', None, BASE, DEREF_NEVER, 10, 20, True)
+
+    def test_search_complex(self):
+        self.check_search('(&(|(cn=a*b*c)(!(sn=x)))(objectClass=*)(givenName>=m)(givenName<=n)(description~=approx))', ['cn'], LEVEL)
+
+    def test_search_substrings(self):
+        self.check_search('(cn=*middle*)')
+        self.check_search('(cn=initial*)')
+        self.check_search('(cn=*final)')
+        self.check_search('(cn=i*a1*a2*f)')
+
+    def test_search_extensible(self):
+        self.check_search('(cn:caseExactMatch:=Fred Flintstone)')
+        self.check_search('(:2.4.6:=x)')
+        self.check_search('(cn:dn:2.4.6:=x)')
+        self.check_search('(cn:=\\c3\\a0)')
+
+    def test_search_escaped(self):
+        self.check_search('(cn=\\28test\\29\\2a\\00)')
+
+    def test_search_large(self):
+        self.check_search('(|' + ''.join(['(cn=user%d)' % i for i in range(200)]) + ')', ['cn%d' % i for i in range(50)])
+
+    def test_controls(self):
+        controls = [('1.2.3', False, None),
+                    ('1.2.4', True, b'ab'),
+                    ('1.2.5', False, u'à'),
+                    build_control('1.2.6', True, None),
+                    paged_search_control(True, 100, b'cookie')]
+        self.check_search('(cn=test)', ['cn'], controls=controls)
+        self.check_request('delRequest', delete_operation('cn=test,o=test'), delete_operation_fast('cn=test,o=test'), controls)
+
+    def test_fast_encoder_disabled_for_mock_strategies(self):
+        connection = Connection(Server('dummy'), client_strategy=MOCK_SYNC, fast_encoder=True)
+        self.assertFalse(connection.fast_encoder)
+        connection = Connection(Server('dummy'), client_strategy=SYNC, fast_encoder=True)
+        self.assertTrue(connection.fast_encoder)
+
+    def test_controls_errors(self):
+        self.assertRaises(LDAPControlError, encode_message_fast, 1, delete_operation_fast('cn=test'), 'control')
+        self.assertRaises(LDAPControlError, encode_message_fast, 1, delete_operation_fast('cn=test'), [('1.2.3', 'true', None)])
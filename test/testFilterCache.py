@@ -0,0 +1,94 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from threading import Thread
+
+from ldap3 import SUBTREE, DEREF_ALWAYS, get_config_parameter, set_config_parameter
+from ldap3.core.usage import ConnectionUsage
+from ldap3.operation.search import search_operation, search_operation_fast, compile_search_filter, filter_cache
+from ldap3.utils.asn1 import encode
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.cache_size = get_config_parameter('FILTER_CACHE_SIZE')
+        filter_cache.clear()
+        self.usage = ConnectionUsage()
+
+    def tearDown(self):
+        set_config_parameter('FILTER_CACHE_SIZE', self.cache_size)
+        filter_cache.clear()
+
+    def compile(self, search_filter, auto_escape=True, fast=True):
+        return compile_search_filter(search_filter, None, auto_escape, True, None, True, fast=fast, usage=self.usage)
+
+    def test_hits_and_misses(self):
+        compiled_filter = self.compile('(&(objectClass=person)(uid=jdoe))')
+        self.assertTrue(self.compile('(&(objectClass=person)(uid=jdoe))') is compiled_filter)
+        self.compile('(&(objectClass=person)(uid=jsmith))')
+        self.compile('(&(objectClass=person)(uid=jdoe))', auto_escape=False)
+        self.compile('(&(objectClass=person)(uid=jdoe))', fast=False)
+        self.assertEqual(self.usage.filter_cache_hits, 1)
+        self.assertEqual(self.usage.filter_cache_misses, 4)
+
+    def test_least_recently_used_evicted(self):
+        set_config_parameter('FILTER_CACHE_SIZE', 2)
+        self.compile('(cn=a)')
+        self.compile('(cn=b)')
+        self.compile('(cn=a)')
+        self.compile('(cn=c)')  # evicts (cn=b)
+        self.compile('(cn=a)')
+        self.compile('(cn=b)')
+        self.assertEqual(self.usage.filter_cache_hits, 2)
+        self.assertEqual(self.usage.filter_cache_misses, 4)
+
+    def test_cache_disabled(self):
+        set_config_parameter('FILTER_CACHE_SIZE', 0)
+        self.compile('(cn=a)')
+        self.compile('(cn=a)')
+        self.assertEqual(self.usage.filter_cache_hits, 0)
+        self.assertEqual(self.usage.filter_cache_misses, 0)
+
+    def test_pyasn1_filter_not_shared(self):
+        first_filter = self.compile('(&(objectClass=person)(uid=jdoe))', fast=False)
+        second_filter = self.compile('(&(objectClass=person)(uid=jdoe))', fast=False)
+        self.assertFalse(first_filter is second_filter)  # pyasn1 objects are mutable, each request has its own Filter
+        self.assertEqual(encode(first_filter), encode(second_filter))
+        self.assertEqual(self.usage.filter_cache_hits, 1)
+
+    def test_counters_from_many_threads(self):
+        def compile_filters():
+            for index in range(500):
+                self.compile('(cn=%d)' % (index % 10))
+
+        threads = [Thread(target=compile_filters) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.usage.filter_cache_hits + self.usage.filter_cache_misses, 8 * 500)
+
+    def test_cached_filter_in_requests(self):
+        parameters = ('o=test', '(&(objectClass=person)(!(uid=jdoe)))', SUBTREE, DEREF_ALWAYS, ['cn'], 0, 0, False, True, True)
+        first_request = encode(search_operation(*parameters, usage=self.usage))
+        self.assertEqual(encode(search_operation(*parameters, usage=self.usage)), first_request)
+        self.assertEqual(search_operation_fast(*parameters, usage=self.usage), search_operation_fast(*parameters, usage=self.usage))
+        self.assertEqual(self.usage.filter_cache_hits, 2)
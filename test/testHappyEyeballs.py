@@ -0,0 +1,151 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Candidate addresses are faked with local listening sockets: a listener with a full backlog never completes the connection
+
+import unittest
+import socket
+from datetime import datetime
+from time import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from ldap3 import Server, Connection, NONE, IP_V4_PREFERRED, get_config_parameter, set_config_parameter
+from ldap3.core.exceptions import LDAPSocketOpenError
+from ldap3.strategy import base
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.sockets = []
+        self.delay = get_config_parameter('HAPPY_EYEBALLS_DELAY')
+        self.server = Server('127.0.0.1', get_info=NONE, mode=IP_V4_PREFERRED, connect_timeout=5)
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+        set_config_parameter('HAPPY_EYEBALLS_DELAY', self.delay)
+
+    def open_file_descriptors(self, count):
+        """
+        Opens sockets until count file descriptors are used, skips the test if the limit of the process is too low
+        """
+        if resource is None:
+            self.skipTest('resource module not available')
+        soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft_limit != resource.RLIM_INFINITY and soft_limit < count + 100:
+            if hard_limit != resource.RLIM_INFINITY and hard_limit < count + 100:
+                self.skipTest('file descriptors limit too low')
+            resource.setrlimit(resource.RLIMIT_NOFILE, (count + 100, hard_limit))
+            self.addCleanup(resource.setrlimit, resource.RLIMIT_NOFILE, (soft_limit, hard_limit))
+        while not self.sockets or self.sockets[-1].fileno() < count:
+            self.sockets.append(socket.socket(socket.AF_INET, socket.SOCK_STREAM))
+
+    def listener(self, stalled=False):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.listen(0)
+        self.sockets.append(sock)
+        if stalled:  # fills the backlog, next connections are not completed
+            filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            filler.connect(sock.getsockname())
+            self.sockets.append(filler)
+        return sock.getsockname()[1]
+
+    def refused(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        return port
+
+    def set_candidates(self, *ports):
+        self.server._address_info = [[socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', ('127.0.0.1', port), None, None] for port in ports]
+        self.server._address_info_resolved_time = datetime.now()
+
+    def test_stalled_address_is_raced(self):
+        stalled_port = self.listener(stalled=True)
+        port = self.listener()
+        self.set_candidates(stalled_port, port)
+        connection = Connection(self.server)
+        start = time()
+        connection.open()
+        self.assertTrue(time() - start < 2)  # doesn't wait for the connect timeout of the first address
+        self.assertEqual(connection.server.current_address[4], ('127.0.0.1', port))
+        self.assertEqual(connection.socket.getpeername(), ('127.0.0.1', port))
+        self.assertEqual(connection.socket.gettimeout(), 5)
+        connection.unbind()
+
+    def test_failed_address_is_deprioritized(self):
+        refused_port = self.refused()
+        port = self.listener()
+        self.set_candidates(refused_port, port)
+        connection = Connection(self.server)
+        connection.open()
+        self.assertEqual(connection.server.current_address[4], ('127.0.0.1', port))
+        self.assertEqual([address[5] for address in self.server.address_info], [False, True])
+        self.assertEqual([address[4][1] for address in self.server.candidate_addresses()], [port])  # not tried again next time
+        connection.unbind()
+
+    def test_all_addresses_failed(self):
+        self.set_candidates(self.refused(), self.refused())
+        connection = Connection(self.server)
+        with self.assertRaises(LDAPSocketOpenError):
+            connection.open()
+        self.assertEqual([address[5] for address in self.server.address_info], [False, False])
+
+    def test_sequential_attempts(self):
+        set_config_parameter('HAPPY_EYEBALLS_DELAY', 0)
+        refused_port = self.refused()
+        port = self.listener()
+        self.set_candidates(refused_port, port)
+        connection = Connection(self.server)
+        connection.open()
+        self.assertEqual(connection.server.current_address[4], ('127.0.0.1', port))
+        connection.unbind()
+
+    def test_file_descriptors_over_fd_setsize(self):
+        self.open_file_descriptors(1100)
+        stalled_port = self.listener(stalled=True)
+        port = self.listener()
+        self.set_candidates(stalled_port, port)
+        connection = Connection(self.server)
+        connection.open()
+        self.assertEqual(connection.server.current_address[4], ('127.0.0.1', port))
+        self.assertTrue(connection.socket.fileno() >= 1024)
+        connection.unbind()
+
+    def test_wait_error_fails_the_attempts(self):
+        def wait_error(sockets, timeout, write=False):
+            raise ValueError('filedescriptor out of range in select()')
+
+        self.set_candidates(self.listener(stalled=True), self.listener(stalled=True))
+        connection = Connection(self.server)
+        wait_for_sockets = base.wait_for_sockets
+        base.wait_for_sockets = wait_error
+        try:
+            with self.assertRaises(LDAPSocketOpenError):
+                connection.open()
+        finally:
+            base.wait_for_sockets = wait_for_sockets
+        self.assertEqual([address[5] for address in self.server.address_info], [False, False])
@@ -0,0 +1,144 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+import logging
+
+import socket
+from threading import Thread
+
+from ldap3 import Server, Connection, ASYNC
+from ldap3.core.exceptions import LDAPInvalidValueError
+from ldap3.strategy.base import BaseStrategy
+from ldap3.utils.log import logger, NETWORK, set_library_log_detail_level, get_library_log_detail_level, set_library_log_activation_level, get_library_log_activation_lavel
+from ldap3.utils.asn1 import IncrementalDecoder, ENTRY_START, ATTRIBUTE_START, VALUE, ENTRY_END, MESSAGE, encode_message_fast, \
+    encode_sequence_fast, encode_integer_fast, decode_message_fast
+from test.testFastDecoder import search_result_entry, search_result_done, paged_control
+
+
+def entry_events(message_id, dn, attributes, controls=None):
+    events = [(ENTRY_START, message_id, dn)]
+    for attribute, values in attributes:
+        events.append((ATTRIBUTE_START, message_id, attribute))
+        events.extend([(VALUE, message_id, value) for value in values])
+    events.append((ENTRY_END, message_id, controls))
+    return events
+
+
+def serve(server_socket, responses):
+    """
+    Answers a single request with the responses built by responses(message_id)
+    """
+    data = b''
+    while BaseStrategy.compute_ldap_message_size(data) == -1 or len(data) < BaseStrategy.compute_ldap_message_size(data):
+        data += server_socket.recv(4096)
+    server_socket.sendall(b''.join(responses(decode_message_fast(data)['messageID'])))
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.members = [b'cn=member%d,o=test' % index for index in range(20000)]
+        self.entry = (b'cn=group,o=test', [(b'member', self.members), (b'cn', [b'group']), (b'description', [])])
+        self.done = encode_message_fast(2, search_result_done())
+        self.stream = encode_message_fast(2, search_result_entry(*self.entry)) + encode_message_fast(2, search_result_entry(b'cn=user,o=test', [])) + self.done
+        self.events = entry_events(2, *self.entry) + entry_events(2, b'cn=user,o=test', []) + [(MESSAGE, 2, self.done)]
+
+    def feed(self, chunk_size, stream=None):
+        stream = stream or self.stream
+        incremental_decoder = IncrementalDecoder()
+        events = []
+        for position in range(0, len(stream), chunk_size):
+            events.extend(incremental_decoder.feed(stream[position: position + chunk_size]))
+        self.assertTrue(incremental_decoder.idle())
+        return events
+
+    def test_events(self):
+        for chunk_size in (len(self.stream), 4096, 100, 7):
+            self.assertEqual(self.feed(chunk_size), self.events)
+
+    def test_events_byte_by_byte(self):
+        stream = encode_message_fast(3, search_result_entry(b'cn=test,o=test', [(b'cn', [b'test']), (b'sn', [b'a', b'b'])])) + encode_message_fast(3, search_result_done())
+        self.assertEqual(self.feed(1, stream), entry_events(3, b'cn=test,o=test', [(b'cn', [b'test']), (b'sn', [b'a', b'b'])]) + [(MESSAGE, 3, encode_message_fast(3, search_result_done()))])
+
+    def test_buffer_is_released(self):
+        incremental_decoder = IncrementalDecoder()
+        for position in range(0, len(self.stream), 4096):
+            incremental_decoder.feed(self.stream[position: position + 4096])
+            self.assertTrue(len(incremental_decoder._buffer) < 4096 + 100)
+
+    def test_entry_controls(self):
+        controls = paged_control(10, b'cookie', False)
+        stream = encode_sequence_fast([encode_integer_fast(4), search_result_entry(b'cn=test,o=test', [(b'cn', [b'test'])]), controls])
+        self.assertEqual(self.feed(3, stream), entry_events(4, b'cn=test,o=test', [(b'cn', [b'test'])], controls))
+
+    def test_search_value_callback(self):
+        connection = Connection(Server('dummy'), check_names=False)
+        connection.socket, server_socket = socket.socketpair()
+        connection.listening = True
+        connection.strategy._outstanding = dict()
+        server = Thread(target=serve, args=(server_socket, lambda message_id: [encode_message_fast(message_id, search_result_entry(*self.entry)), encode_message_fast(message_id, search_result_done())]))
+        server.start()
+        values = []
+        try:
+            self.assertTrue(connection.search('o=test', '(cn=group)', attributes=['member', 'cn', 'description'], value_callback=lambda dn, attribute, value: values.append((dn, attribute, value))))
+        finally:
+            server.join()
+            connection.socket.close()
+            server_socket.close()
+        self.assertEqual(values, [(u'cn=group,o=test', u'member', member) for member in self.members] + [(u'cn=group,o=test', u'cn', b'group')])
+        self.assertEqual(len(connection.response), 1)
+        self.assertEqual(connection.response[0]['dn'], u'cn=group,o=test')
+        self.assertEqual(connection.result['description'], 'success')
+        self.assertIsNone(connection.strategy.value_callback)
+
+    def test_search_value_callback_with_network_logging(self):
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        detail_level = get_library_log_detail_level()
+        activation_level = get_library_log_activation_lavel()
+        logger_level = logger.level
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        set_library_log_activation_level(logging.DEBUG)
+        set_library_log_detail_level(NETWORK)
+        connection = Connection(Server('dummy'), check_names=False)
+        connection.socket, server_socket = socket.socketpair()
+        connection.listening = True
+        connection.strategy._outstanding = dict()
+        server = Thread(target=serve, args=(server_socket, lambda message_id: [encode_message_fast(message_id, search_result_entry(b'cn=test,o=test', [(b'cn', [b'test'])])), encode_message_fast(message_id, search_result_done())]))
+        server.start()
+        values = []
+        try:
+            self.assertTrue(connection.search('o=test', '(cn=test)', attributes=['cn'], value_callback=lambda dn, attribute, value: values.append(value)))
+        finally:
+            server.join()
+            connection.socket.close()
+            server_socket.close()
+            logger.removeHandler(handler)
+            logger.setLevel(logger_level)
+            set_library_log_detail_level(detail_level)
+            set_library_log_activation_level(activation_level)
+        self.assertEqual(values, [b'test'])
+        self.assertEqual(len([record for record in records if 'received 1 ldap message' in record.getMessage()]), 2)  # the entry and the searchResDone
+
+    def test_value_callback_not_available_for_async(self):
+        connection = Connection(Server('dummy'), client_strategy=ASYNC)
+        self.assertRaises(LDAPInvalidValueError, connection.search, 'o=test', '(cn=test)', value_callback=lambda dn, attribute, value: None)
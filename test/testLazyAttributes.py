@@ -0,0 +1,103 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import pickle
+from copy import deepcopy
+
+from ldap3 import Server, Connection
+from ldap3.operation.search import LazyAttributesDict
+from ldap3.utils.asn1 import decode_message_fast, encode_message_fast
+from ldap3.utils.ciDict import CaseInsensitiveDict
+from ldap3.utils.conv import format_json
+from test.testFastDecoder import search_result_entry
+
+
+def decoded_entry(attributes):
+    return decode_message_fast(encode_message_fast(2, search_result_entry('cn=test,o=test', attributes)))['payload']
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.attributes = [('cn', ['test']), ('sn', [u'tëst']), ('jpegPhoto', [b'\xff\xd8\xff']), ('description', [])]
+        self.converted = []
+
+    def lazy_attributes(self, case_insensitive=True):
+        def converter(name, vals):
+            self.converted.append(name)
+            return [val[3] for val in vals]
+        return LazyAttributesDict(decoded_entry(self.attributes)[1][3], converter, case_insensitive)
+
+    def test_convert_on_first_read(self):
+        attributes = self.lazy_attributes()
+        self.assertEqual(len(attributes), 4)
+        self.assertTrue('CN' in attributes)
+        self.assertFalse('givenName' in attributes)
+        self.assertEqual(list(attributes), ['cn', 'sn', 'jpegPhoto', 'description'])
+        self.assertEqual(self.converted, [])
+        self.assertEqual(attributes['cn'], [b'test'])
+        self.assertEqual(attributes['CN'], [b'test'])
+        self.assertEqual(self.converted, ['cn'])
+        self.assertEqual(dict(attributes.items()), {'cn': [b'test'], 'sn': [u'tëst'.encode('utf-8')], 'jpegPhoto': [b'\xff\xd8\xff'], 'description': []})
+        self.assertEqual(sorted(self.converted), ['cn', 'description', 'jpegPhoto', 'sn'])
+
+    def test_case_sensitive(self):
+        attributes = self.lazy_attributes(case_insensitive=False)
+        self.assertEqual(attributes['cn'], [b'test'])
+        self.assertRaises(KeyError, attributes.__getitem__, 'CN')
+        self.assertIs(type(attributes.copy()), dict)
+
+    def test_case_insensitive_dict_in_both_modes(self):
+        for case_insensitive in (True, False):
+            attributes = self.lazy_attributes(case_insensitive)
+            self.assertIsInstance(attributes, CaseInsensitiveDict)
+            self.assertEqual(len(attributes), 4)
+            self.assertEqual(list(attributes.keys()), ['cn', 'sn', 'jpegPhoto', 'description'])
+            self.assertEqual(self.converted, [])
+            self.assertEqual(format_json(attributes), {'cn': [b'test'], 'sn': [u'tëst'.encode('utf-8')], 'jpegPhoto': [b'\xff\xd8\xff'], 'description': []})
+            self.converted = []
+
+    def test_modify(self):
+        attributes = self.lazy_attributes()
+        attributes['SN'] = ['replaced']
+        del attributes['jpegPhoto']
+        attributes['givenName'] = []
+        self.assertEqual(attributes, {'cn': [b'test'], 'sn': ['replaced'], 'description': [], 'givenName': []})
+        self.assertEqual(self.converted, ['cn', 'description'])
+
+    def test_copy(self):
+        attributes = self.lazy_attributes()
+        for attributes_copy in (attributes.copy(), deepcopy(attributes), pickle.loads(pickle.dumps(attributes))):
+            self.assertIs(type(attributes_copy), CaseInsensitiveDict)
+            self.assertEqual(attributes_copy, attributes)
+
+    def test_decode_search_result_entry(self):
+        for check_names in (True, False):
+            message = decode_message_fast(encode_message_fast(2, search_result_entry(u'cn=tëst,o=test', self.attributes)))
+            eager = Connection(Server('dummy'), check_names=check_names).strategy.decode_response_fast(message)
+            lazy = Connection(Server('dummy'), check_names=check_names, lazy_attributes=True).strategy.decode_response_fast(message)
+            self.assertIsInstance(lazy['attributes'], LazyAttributesDict)
+            self.assertEqual(lazy['dn'], eager['dn'])
+            self.assertEqual(lazy['attributes']['sn'], eager['attributes']['sn'])
+            self.assertEqual(lazy['attributes'], eager['attributes'])
+            self.assertEqual(lazy['raw_attributes'], eager['raw_attributes'])
+            self.assertEqual(str(lazy['attributes']), str(eager['attributes']))
+            self.assertEqual(format_json(lazy['attributes']), format_json(eager['attributes']))
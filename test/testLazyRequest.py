@@ -0,0 +1,85 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from copy import copy, deepcopy
+from threading import Thread
+
+from ldap3 import Server, Connection, ASYNC, SUBTREE, DEREF_ALWAYS
+from ldap3.operation.search import search_operation, search_operation_fast
+from ldap3.strategy.base import BaseStrategy, LazyRequest
+from test.testBatch import RecordingSocket
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.parameters = ('o=test', '(&(objectClass=person)(uid=jdoe))', SUBTREE, DEREF_ALWAYS, ['cn'], 0, 0, False, True, True)
+
+    def test_decoded_on_first_read(self):
+        for request in (search_operation(*self.parameters), search_operation_fast(*self.parameters)):
+            lazy_request = LazyRequest('searchRequest', request)
+            self.assertEqual(lazy_request['type'], 'searchRequest')
+            self.assertTrue(lazy_request._request is not None)
+            self.assertEqual(lazy_request['filter'], '(&(objectClass=person)(uid=jdoe))')
+            self.assertTrue(lazy_request._request is None)
+            self.assertEqual(lazy_request, BaseStrategy.decode_request('searchRequest', request))
+
+    def test_dict_interface(self):
+        expected = BaseStrategy.decode_request('searchRequest', search_operation_fast(*self.parameters))
+        self.assertEqual(dict(LazyRequest('searchRequest', search_operation_fast(*self.parameters))), expected)
+        self.assertEqual(sorted(LazyRequest('searchRequest', search_operation_fast(*self.parameters)).keys()), sorted(expected.keys()))
+        self.assertTrue('base' in LazyRequest('searchRequest', search_operation_fast(*self.parameters)))
+        self.assertEqual(LazyRequest('searchRequest', search_operation_fast(*self.parameters)).get('base'), 'o=test')
+        self.assertEqual(str(LazyRequest('searchRequest', search_operation_fast(*self.parameters))), str(expected))
+        self.assertEqual(deepcopy(LazyRequest('searchRequest', search_operation_fast(*self.parameters))), expected)
+
+    def test_decoded_once_by_concurrent_readers(self):
+        request = search_operation_fast(*self.parameters)
+        expected = BaseStrategy.decode_request('searchRequest', request)
+        for _ in range(50):
+            lazy_request = LazyRequest('searchRequest', request)
+            results = []
+            readers = [Thread(target=lambda key=key: results.append((key, lazy_request[key]))) for key in ('type', 'base', 'filter', 'attributes') * 4]
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join()
+            self.assertEqual(len(results), 16)
+            for key, value in results:
+                self.assertEqual(value, expected[key])
+            self.assertEqual(list(lazy_request.keys()), list(expected.keys()))
+
+    def test_copy_is_lazy(self):
+        lazy_request = LazyRequest('searchRequest', search_operation_fast(*self.parameters))
+        request_copy = copy(lazy_request)
+        self.assertTrue(request_copy._request is not None)
+        self.assertEqual(request_copy['base'], 'o=test')
+        self.assertTrue(lazy_request._request is not None)
+
+    def test_not_decoded_when_sent(self):
+        connection = Connection(Server('dummy'), client_strategy=ASYNC, collect_usage=True)
+        connection.socket = RecordingSocket()
+        connection.listening = True
+        connection.closed = False
+        connection.strategy._outstanding = dict()
+        message_id = connection.delete('cn=user1,o=test')
+        self.assertTrue(connection.strategy._outstanding[message_id]._request is not None)
+        self.assertEqual(connection.usage.delete_operations, 1)
+        self.assertEqual(connection.strategy._outstanding[message_id]['entry'], 'cn=user1,o=test')
@@ -0,0 +1,174 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# The MULTIPLEXED strategy is tested against a minimal LDAP server running in a thread
+
+import unittest
+from threading import Thread, Lock, Event
+
+from ldap3 import Server, Connection, MULTIPLEXED, NONE, MODIFY_REPLACE
+from ldap3.core.exceptions import LDAPSessionTerminatedByServerError, LDAPInvalidValueError
+from ldap3.utils.asn1 import encode_message_fast, encode_octet_string_fast
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_result, indexed_entry
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to Bind, Search, Modify and WhoAmI requests
+    Searches are answered in reverse order of arrival when hold_searches requests have been received
+    """
+    def finish(self):
+        self.server.closed.set()
+
+    def write(self, message_id, message):
+        with self.server.write_lock:
+            self.request.sendall(encode_message_fast(message_id, message))
+
+    def answer(self, request):
+        message_id = request['messageID']
+        payload = request['payload']
+        self.server.message_ids.append(message_id)
+        if request['protocolOp'] == 0:  # bindRequest
+            self.write(message_id, ldap_result(0x61, 0 if payload[2][3] == b'password' else 49))
+        elif request['protocolOp'] == 3:  # searchRequest
+            base = payload[0][3].decode('utf-8')
+            if base == 'o=close':
+                return False
+            self.server.held.append((message_id, base))
+            if len(self.server.held) >= self.server.hold_searches:
+                for held_message_id, held_base in reversed(self.server.held):
+                    self.search_response(held_message_id, held_base)
+                del self.server.held[:]
+        elif request['protocolOp'] == 6:  # modifyRequest
+            self.write(message_id, ldap_result(0x67))
+        elif request['protocolOp'] == 23:  # extendedReq
+            self.write(message_id, ldap_result(0x78, extra=[encode_octet_string_fast('dn:cn=user,o=test', 0x8B)]))
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+    def search_response(self, message_id, base):
+        for index in range(3):
+            self.write(message_id, indexed_entry(index, base))
+        self.write(message_id, ldap_result(0x65))
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler, hold_searches=1, held=[], message_ids=[], write_lock=Lock(), closed=Event())
+
+    def tearDown(self):
+        self.fake_server.stop()
+
+    def connection(self, hold_searches=1):
+        self.fake_server.hold_searches = hold_searches
+        return Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='password', client_strategy=MULTIPLEXED, auto_bind=True)
+
+    def run_threads(self, target, count):
+        errors = []
+
+        def run(index):
+            try:
+                target(index)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [Thread(target=run, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(errors, [])
+
+    def test_bind_and_search(self):
+        connection = self.connection()
+        self.assertTrue(connection.bound)
+        status, result, response, request = connection.search('o=test', '(objectClass=*)', attributes=['cn'])
+        self.assertTrue(status)
+        self.assertEqual(result['type'], 'searchResDone')
+        self.assertEqual([entry['dn'] for entry in response], ['cn=entry0,o=test', 'cn=entry1,o=test', 'cn=entry2,o=test'])
+        self.assertEqual(request['base'], 'o=test')
+        status, result, _, _ = connection.modify('cn=user,o=test', {'sn': [(MODIFY_REPLACE, ['surname'])]})
+        self.assertTrue(status)
+        self.assertEqual(result['type'], 'modifyResponse')
+        self.assertEqual(connection.extend.standard.who_am_i(), 'dn:cn=user,o=test')
+        connection.unbind()
+        self.assertTrue(connection.closed)
+
+    def test_concurrent_requests_in_flight(self):
+        threads = 16
+        connection = self.connection(hold_searches=threads)  # no search is answered until all of them have been received
+
+        def search(index):
+            base = 'ou=%d,o=test' % index
+            status, result, response, _ = connection.search(base, '(objectClass=*)', attributes=['cn'])
+            self.assertTrue(status)
+            self.assertEqual([entry['dn'] for entry in response], ['cn=entry%d,%s' % (entry, base) for entry in range(3)])
+            self.assertEqual(connection.result, result)  # each thread sees its own result
+
+        self.run_threads(search, threads)
+        self.assertEqual(connection.strategy._outstanding, dict())
+        connection.unbind()
+
+    def test_many_threads(self):
+        connection = self.connection()
+
+        def operations(index):
+            for _ in range(10):
+                self.assertTrue(connection.search('ou=%d,o=test' % index, '(objectClass=*)')[0])
+                self.assertTrue(connection.modify('cn=%d,o=test' % index, {'sn': [(MODIFY_REPLACE, ['surname'])]})[0])
+
+        self.run_threads(operations, 32)
+        connection.unbind()
+
+    def test_message_id_per_connection(self):
+        connection = self.connection()
+        status = connection.search('o=test', '(objectClass=*)')[0]
+        self.assertTrue(status)
+        connection.unbind()
+        self.fake_server.closed.wait(10)
+        self.assertEqual(self.fake_server.message_ids, [1, 2, 3])  # bind, search and unbind
+
+    def test_session_terminated_wakes_waiting_threads(self):
+        connection = self.connection(hold_searches=1000)  # searches are never answered
+        waiting = Event()
+        errors = []
+
+        def search():
+            try:
+                waiting.set()
+                connection.search('o=test', '(objectClass=*)')
+            except LDAPSessionTerminatedByServerError as e:
+                errors.append(e)
+
+        thread = Thread(target=search)
+        thread.start()
+        waiting.wait(5)
+        with self.assertRaises(LDAPSessionTerminatedByServerError):
+            connection.search('o=close', '(objectClass=*)')
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(errors), 1)
+        self.assertTrue(connection.closed)
+
+    def test_value_callback_not_available(self):
+        connection = self.connection()
+        with self.assertRaises(LDAPInvalidValueError):
+            connection.search('o=test', '(objectClass=*)', value_callback=lambda dn, attribute_type, value: None)
+        connection.unbind()
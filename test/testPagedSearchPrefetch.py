@@ -0,0 +1,122 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+# Prefetching of paged searches is tested against a minimal LDAP server that serves each connection in a thread
+
+import unittest
+from time import sleep
+
+from ldap3 import Server, Connection, SYNC, ASYNC, MULTIPLEXED, NONE
+from ldap3.core.exceptions import LDAPNoSuchObjectResult
+from ldap3.utils.asn1 import encode_message_fast, encode_sequence_fast, encode_octet_string_fast, encode_integer_fast
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_result, ldap_entry, search_response
+
+PAGED_SEARCH_CONTROL = '1.2.840.113556.1.4.319'
+ENTRIES = ['cn=entry%02d,o=test' % index for index in range(40)]
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to paged Search requests with ENTRIES, the cookie is the offset of the next page
+    """
+    def answer(self, request):
+        if request['protocolOp'] == 3:  # searchRequest
+            message_id = request['messageID']
+            self.server.pages += 1
+            if request['payload'][0][3] == b'o=missing':
+                self.request.sendall(encode_message_fast(message_id, ldap_result(0x65, 32)))
+            elif not request['controls']:
+                self.request.sendall(search_response(message_id, [ldap_entry(dn, []) for dn in ENTRIES]))
+            else:
+                value = request['controls'][0][3][1][3]  # paged search control value
+                size = value[4]  # size is a single byte integer
+                offset = int(value[7:] or b'0')  # cookie
+                cookie = str(offset + size) if offset + size < len(ENTRIES) else ''
+                controls = [(PAGED_SEARCH_CONTROL, False, encode_sequence_fast([encode_integer_fast(0), encode_octet_string_fast(cookie)]))]
+                sleep(0.02)
+                self.request.sendall(search_response(message_id, [ldap_entry(dn, []) for dn in ENTRIES[offset:offset + size]], controls=controls))
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler, pages=0)
+        self.connections = []
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.unbind()
+        self.fake_server.stop()
+
+    def connection(self, **kwargs):
+        connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='password', auto_bind=True, **kwargs)
+        self.connections.append(connection)
+        return connection
+
+    def pages_requested_while_reading_first_page(self, connection, prefetch):
+        entries = connection.extend.standard.paged_search('o=test', '(objectClass=*)', paged_size=5, prefetch=prefetch)
+        dns = [next(entries)['dn']]
+        sleep(0.3)  # the next pages are received while the first one is read
+        pages = self.fake_server.pages
+        dns.extend(entry['dn'] for entry in entries)
+        self.assertEqual(dns, ENTRIES)  # order sent by the server
+        self.assertEqual(self.fake_server.pages, 8)
+        return pages
+
+    def test_prefetch_async(self):
+        self.assertEqual(self.pages_requested_while_reading_first_page(self.connection(client_strategy=ASYNC), 1), 2)
+
+    def test_prefetch_depth(self):
+        self.assertEqual(self.pages_requested_while_reading_first_page(self.connection(client_strategy=ASYNC), 3), 4)
+
+    def test_prefetch_multiplexed(self):
+        self.assertEqual(self.pages_requested_while_reading_first_page(self.connection(client_strategy=MULTIPLEXED), 2), 3)
+
+    def test_prefetch_ignored_on_sync(self):
+        connection = self.connection(client_strategy=SYNC)
+        entries = connection.extend.standard.paged_search('o=test', '(objectClass=*)', paged_size=5, prefetch=2)
+        next(entries)
+        sleep(0.1)
+        self.assertEqual(self.fake_server.pages, 1)
+        self.assertEqual(len(list(entries)), len(ENTRIES) - 1)
+
+    def test_same_order_with_and_without_prefetch(self):
+        for client_strategy in (SYNC, ASYNC, MULTIPLEXED):
+            connection = self.connection(client_strategy=client_strategy)
+            for prefetch in (0, 2):
+                entries = connection.extend.standard.paged_search('o=test', '(objectClass=*)', paged_size=5, prefetch=prefetch)
+                self.assertEqual([entry['dn'] for entry in entries], ENTRIES)
+
+    def test_stop_before_the_end(self):
+        connection = self.connection(client_strategy=ASYNC)
+        entries = connection.extend.standard.paged_search('o=test', '(objectClass=*)', paged_size=5, prefetch=2)
+        next(entries)
+        entries.close()
+        pages = self.fake_server.pages
+        sleep(0.1)
+        self.assertEqual(self.fake_server.pages, pages)  # no more pages are requested
+        self.assertEqual(len(connection.get_response(connection.search('o=test', '(objectClass=*)'))[0]), len(ENTRIES))
+
+    def test_prefetch_raise_exceptions(self):
+        connection = self.connection(client_strategy=ASYNC, raise_exceptions=True)
+        with self.assertRaises(LDAPNoSuchObjectResult):
+            list(connection.extend.standard.paged_search('o=missing', '(objectClass=*)', paged_size=5, prefetch=2))
@@ -0,0 +1,186 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Search result entries are decoded by an executor, responses come from a minimal LDAP server running in a thread
+
+import unittest
+
+try:
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+except ImportError:  # Python 2 without the futures backport
+    ThreadPoolExecutor = ProcessPoolExecutor = None
+
+from ldap3 import Server, Connection, SYNC, ASYNC, MULTIPLEXED, NONE, get_config_parameter, set_config_parameter
+from ldap3.strategy import base as strategy_base
+from ldap3.utils.asn1 import encode_message_fast, encode_sequence_fast, encode_octet_string_fast, peek_message_fast
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_result, ldap_entry
+
+ENTRIES = 50
+
+
+if ThreadPoolExecutor:
+    class CountingExecutor(ThreadPoolExecutor):
+        submitted = 0
+
+        def submit(self, *args, **kwargs):
+            self.submitted += 1
+            return ThreadPoolExecutor.submit(self, *args, **kwargs)
+
+    class ContextCountingExecutor(ProcessPoolExecutor):
+        contexts = 0  # chunks submitted with the schema and the custom formatter
+
+        def submit(self, *args, **kwargs):
+            if args[3] is not None:
+                self.contexts += 1
+            return ProcessPoolExecutor.submit(self, *args, **kwargs)
+
+
+def search_entry(index, base):
+    return ldap_entry('cn=entry%d,%s' % (index, base), [('cn', ['entry%d' % index]), ('sn', ['surname%d' % index, 'other'])])
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to Search requests with ENTRIES entries and a reference in the middle of them
+    """
+    def answer(self, request):
+        if request['protocolOp'] == 3:  # searchRequest
+            message_id = request['messageID']
+            base = request['payload'][0][3].decode('utf-8')
+            messages = [encode_message_fast(message_id, search_entry(index, base)) for index in range(ENTRIES)]
+            messages.insert(ENTRIES // 2, encode_message_fast(message_id, encode_sequence_fast([encode_octet_string_fast('ldap://other/' + base)], 0x73)))  # searchResRef
+            messages.append(encode_message_fast(message_id, ldap_result(0x65)))
+            self.request.sendall(b''.join(messages))
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler)
+        self.chunk_size = get_config_parameter('PARALLEL_DECODE_CHUNK_SIZE')
+        set_config_parameter('PARALLEL_DECODE_CHUNK_SIZE', 7)
+
+    def tearDown(self):
+        self.fake_server.stop()
+        set_config_parameter('PARALLEL_DECODE_CHUNK_SIZE', self.chunk_size)
+
+    def connection(self, client_strategy=SYNC, decode_executor=None):
+        return Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), client_strategy=client_strategy, auto_referrals=False,
+                          decode_executor=decode_executor, auto_bind=True)
+
+    def search(self, connection, base='o=test'):
+        result = connection.search(base, '(objectClass=*)', attributes=['cn', 'sn'])
+        if connection.strategy.sync:
+            return result[2] if connection.strategy.thread_safe else connection.response
+        return connection.get_response(result)[0]
+
+    def expected(self, client_strategy=SYNC):
+        connection = self.connection(client_strategy)
+        response = self.search(connection)
+        connection.unbind()
+        self.assertEqual(len(response), ENTRIES + 1)
+        return response
+
+    def test_peek_message(self):
+        self.assertEqual(peek_message_fast(encode_message_fast(300, search_entry(1, 'o=test'))), (300, 4))
+        self.assertEqual(peek_message_fast(encode_message_fast(7, ldap_result(0x65))), (7, 5))
+
+    @unittest.skipIf(ThreadPoolExecutor is None, 'concurrent.futures not available')
+    def test_sync_thread_pool(self):
+        expected = self.expected()
+        executor = CountingExecutor(4)
+        connection = self.connection(decode_executor=executor)
+        for _ in range(3):
+            self.assertEqual(self.search(connection), expected)
+        self.assertEqual(executor.submitted, 3 * 8)  # 25 entries before and after the reference, in chunks of 7
+        self.assertEqual(connection.strategy._parallel_decoder._chunks, dict())
+        connection.unbind()
+        executor.shutdown()
+
+    @unittest.skipIf(ProcessPoolExecutor is None, 'concurrent.futures not available')
+    def test_sync_process_pool(self):
+        expected = self.expected()
+        executor = ProcessPoolExecutor(2)
+        connection = self.connection(decode_executor=executor)
+        self.assertEqual(self.search(connection), expected)
+        connection.unbind()
+        executor.shutdown()
+
+    @unittest.skipIf(ThreadPoolExecutor is None, 'concurrent.futures not available')
+    def test_async_thread_pool(self):
+        expected = self.expected(ASYNC)
+        executor = ThreadPoolExecutor(4)
+        connection = self.connection(ASYNC, decode_executor=executor)
+        bases = ['ou=%d,o=test' % index for index in range(5)]
+        message_ids = [connection.search(base, '(objectClass=*)', attributes=['cn', 'sn']) for base in bases]  # responses of different searches are interleaved
+        for base, message_id in zip(bases, message_ids):
+            response = connection.get_response(message_id)[0]
+            self.assertEqual(len(response), ENTRIES + 1)
+            self.assertEqual([entry['dn'] if 'dn' in entry else entry['uri'] for entry in response],
+                             [entry['dn'].replace('o=test', base) if 'dn' in entry else [entry['uri'][0].replace('o=test', base)] for entry in expected])
+        self.assertEqual(self.search(connection), expected)
+        connection.unbind()
+        executor.shutdown()
+
+    @unittest.skipIf(ThreadPoolExecutor is None, 'concurrent.futures not available')
+    def test_multiplexed_thread_pool(self):
+        expected = self.expected()
+        executor = ThreadPoolExecutor(4)
+        connection = self.connection(MULTIPLEXED, decode_executor=executor)
+        self.assertEqual(self.search(connection), expected)
+        connection.unbind()
+        executor.shutdown()
+
+    @unittest.skipIf(ProcessPoolExecutor is None, 'concurrent.futures not available')
+    def test_context_sent_until_workers_have_it(self):
+        expected = self.expected()
+        try:
+            from multiprocessing import get_context
+            executor = ContextCountingExecutor(2, mp_context=get_context('spawn'))  # workers don't inherit the context of this process
+        except (ImportError, TypeError):  # mp_context not available
+            executor = ContextCountingExecutor(2)
+        connection = self.connection(decode_executor=executor)
+        for _ in range(20):
+            self.assertEqual(self.search(connection), expected)
+        self.assertEqual(connection.strategy._parallel_decoder._context.workers, set(process.pid for process in executor._processes.values()))
+        contexts = executor.contexts
+        self.assertTrue(contexts < 20 * 8)
+        self.assertEqual(self.search(connection), expected)
+        self.assertEqual(executor.contexts, contexts)  # only the raw messages are sent to the workers
+        connection.unbind()
+        executor.shutdown()
+
+    @unittest.skipIf(ThreadPoolExecutor is None, 'concurrent.futures not available')
+    def test_context_missing_in_worker(self):
+        expected = self.expected()
+        executor = CountingExecutor(2)
+        connection = self.connection(decode_executor=executor)
+        self.assertEqual(self.search(connection), expected)
+        self.assertEqual(executor.submitted, 8)
+        with strategy_base._decode_contexts_lock:
+            strategy_base._decode_contexts.clear()  # as for a worker restarted by the executor
+        self.assertEqual(self.search(connection), expected)  # the chunks are sent again with the context
+        submitted = executor.submitted
+        self.assertTrue(submitted > 8 + 8)
+        self.assertEqual(self.search(connection), expected)
+        self.assertEqual(executor.submitted, submitted + 8)  # the worker has the context again
+        connection.unbind()
+        executor.shutdown()
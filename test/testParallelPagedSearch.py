@@ -0,0 +1,163 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+
+# Parallel paged searches are tested against a minimal LDAP server that serves each connection in a thread
+
+import unittest
+from threading import Thread, Lock
+from time import sleep
+
+from ldap3 import Server, Connection, SYNC, MULTIPLEXED, REUSABLE, NONE
+from ldap3.core.exceptions import LDAPOperationsErrorResult
+from ldap3.utils.asn1 import encode_sequence_fast, encode_octet_string_fast, encode_integer_fast
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_result, ldap_entry, search_response
+
+PAGED_SEARCH_CONTROL = '1.2.840.113556.1.4.319'
+TREE = dict([('o=test', {'o': ['test']})] +
+            [('ou=%s,o=test' % ou, {'ou': [ou]}) for ou in 'abcd'] +
+            [('cn=%s%d,ou=%s,o=test' % (ou, index, ou), {'cn': ['%s%d' % (ou, index)], 'shard': [str(index % 2)]}) for ou in 'abcd' for index in range(10)])
+
+
+def equality_matches(search_filter):
+    if search_filter[2] == 3 and search_filter[1]:  # equalityMatch
+        return [(search_filter[3][0][3].decode('utf-8'), search_filter[3][1][3].decode('utf-8'))]
+    if search_filter[1]:
+        return [match for component in search_filter[3] for match in equality_matches(component)]
+    return []
+
+
+def in_scope(dn, base, scope):
+    if scope == 0:
+        return dn == base
+    if scope == 1:
+        return dn.endswith(',' + base) and ',' not in dn[:-len(base) - 1]
+    return dn == base or dn.endswith(',' + base)
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to paged Search requests on TREE, the cookie is the offset of the next page
+    Each search is answered by a thread, as a server would do with the requests of a multiplexed connection
+    """
+    def setup(self):
+        self.send_lock = Lock()
+
+    def answer(self, request):
+        if request['protocolOp'] == 3:  # searchRequest
+            Thread(target=self.search, args=(request['messageID'], request)).start()  # searches of the same connection are executed at the same time
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+    def search(self, message_id, request):
+        with self.server.lock:
+            self.server.searching += 1
+            self.server.max_searching = max(self.server.max_searching, self.server.searching)
+            self.server.connections.add(id(self))
+        sleep(0.1)  # longer than the delayed acknowledgement, requests of a connection are not held by the Nagle algorithm
+        base = request['payload'][0][3].decode('utf-8')
+        scope = request['payload'][1][3]
+        matches = equality_matches(request['payload'][6])
+        if ('shard', 'error') in matches:
+            messages = []
+            result = ldap_result(0x65, 1)  # operationsError
+        else:
+            messages = [(dn, attributes) for dn, attributes in sorted(TREE.items()) if in_scope(dn, base, scope) and all(value in attributes.get(name, []) for name, value in matches)]
+            result = ldap_result(0x65)
+        controls = None
+        for control in request['controls'] or []:
+            if control[3][0][3] == PAGED_SEARCH_CONTROL.encode('utf-8'):
+                value = control[3][1][3]
+                size = value[4]  # size is a single byte integer
+                offset = int(value[7:] or b'0')  # cookie
+                messages = messages[offset:offset + size]
+                cookie = str(offset + size) if offset + size < len(TREE) and len(messages) == size else ''
+                controls = [(PAGED_SEARCH_CONTROL, False, encode_sequence_fast([encode_integer_fast(0), encode_octet_string_fast(cookie)]))]
+        with self.server.lock:
+            self.server.searching -= 1
+        with self.send_lock:
+            self.request.sendall(search_response(message_id, [ldap_entry(dn, attributes.items()) for dn, attributes in messages], result, controls))
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler, lock=Lock(), searching=0, max_searching=0, connections=set())
+        self.connections = []
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.unbind()
+        self.fake_server.stop()
+
+    def connection(self, **kwargs):
+        connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='password', auto_bind=True, **kwargs)
+        self.connections.append(connection)
+        return connection
+
+    def test_children_partitions_on_many_connections(self):
+        connections = [self.connection(client_strategy=SYNC) for _ in range(3)]
+        dns = [entry['dn'] for entry in connections[0].extend.standard.parallel_paged_search('o=test', '(objectClass=*)', attributes=['cn'], paged_size=3, connections=connections)]
+        self.assertEqual(sorted(dns), sorted(TREE))  # each entry once
+        self.assertEqual(len(self.fake_server.connections), 3)
+        self.assertTrue(self.fake_server.max_searching > 1)
+        for connection in connections:
+            self.assertTrue(connection.search('o=test', '(objectClass=*)'))
+
+    def test_shards_on_multiplexed_connection(self):
+        connection = self.connection(client_strategy=MULTIPLEXED)
+        entries = list(connection.extend.standard.parallel_paged_search('o=test', '(objectClass=*)', attributes=['cn', 'shard'], paged_size=3, shards=['(shard=0)', '(shard=1)']))
+        self.assertEqual(sorted(entry['dn'] for entry in entries), sorted(dn for dn in TREE if dn.startswith('cn=')))
+        self.assertEqual(len([entry for entry in entries if entry['attributes']['shard'] == ['1']]), 20)
+        self.assertTrue(self.fake_server.max_searching > 1)
+
+    def test_reusable_pool(self):
+        connection = self.connection(client_strategy=REUSABLE, pool_name='parallel_paged_search_%d' % id(self), pool_size=3)
+        connection.auto_referrals = True
+        dns = [entry['dn'] for entry in connection.extend.standard.parallel_paged_search('o=test', '(objectClass=*)', paged_size=4)]
+        self.assertEqual(sorted(dns), sorted(TREE))
+        self.assertTrue(self.fake_server.max_searching > 1)
+        self.assertTrue(connection.auto_referrals)
+
+    def test_workers(self):
+        connection = self.connection(client_strategy=MULTIPLEXED)
+        dns = [entry['dn'] for entry in connection.extend.standard.parallel_paged_search('o=test', '(objectClass=*)', paged_size=3, workers=1)]
+        self.assertEqual(sorted(dns), sorted(TREE))
+        self.assertEqual(self.fake_server.max_searching, 1)
+
+    def test_size_limit(self):
+        connection = self.connection(client_strategy=MULTIPLEXED)
+        self.assertEqual(len(list(connection.extend.standard.parallel_paged_search('o=test', '(objectClass=*)', size_limit=7, paged_size=3))), 7)
+        status, _, response, _ = connection.search('o=test', '(objectClass=*)')
+        self.assertEqual(len(response), len(TREE))
+
+    def test_stop_before_the_end(self):
+        connections = [self.connection(client_strategy=SYNC) for _ in range(2)]
+        entries = connections[0].extend.standard.parallel_paged_search('o=test', '(objectClass=*)', paged_size=2, connections=connections)
+        for _ in range(3):
+            next(entries)
+        entries.close()  # workers are stopped
+        for connection in connections:
+            self.assertTrue(connection.search('o=test', '(objectClass=*)'))
+            self.assertEqual(len(connection.response), len(TREE))
+
+    def test_partition_error(self):
+        connection = self.connection(client_strategy=MULTIPLEXED, raise_exceptions=True)
+        with self.assertRaises(LDAPOperationsErrorResult):
+            list(connection.extend.standard.parallel_paged_search('o=test', '(objectClass=*)', shards=['(shard=0)', '(shard=error)']))
@@ -0,0 +1,89 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ldap3 import Server, Connection, ASYNC, MOCK_SYNC, SUBTREE, DEREF_ALWAYS
+from ldap3.core.exceptions import LDAPInvalidFilterError
+from ldap3.operation.search import search_operation_fast, search_operation_template
+from ldap3.utils.conv import escape_filter_chars
+from test.config import test_auto_escape, test_auto_encode, test_validator, test_check_names
+from test.testBatch import RecordingSocket
+
+
+class Test(unittest.TestCase):
+    def check_template(self, filter_template, values, attributes=None):
+        parameters = ('o=test', SUBTREE, DEREF_ALWAYS, attributes, 0, 0, False, test_auto_escape, test_auto_encode)
+        template = search_operation_template(parameters[0], filter_template, *parameters[1:], validator=test_validator, check_names=test_check_names)
+        filter_parts = filter_template.split('?')
+        search_filter = filter_parts[0] + ''.join([escape_filter_chars(value) + filter_part for value, filter_part in zip(values, filter_parts[1:])])
+        self.assertEqual(template.encode(values), search_operation_fast(parameters[0], search_filter, *parameters[1:], validator=test_validator, check_names=test_check_names))
+
+    def test_equality(self):
+        self.check_template('(uid=?)', ['jdoe'])
+        self.check_template('(&(objectClass=person)(uid=?))', ['jdoe'], ['cn', 'mail'])
+
+    def test_many_placeholders(self):
+        self.check_template('(|(&(objectClass=person)(uid=?))(!(mail=?))(cn>=?)(cn<=?)(cn~=?))', ['jdoe', 'jdoe@example.com', 'a', 'z', 'john'])
+
+    def test_substrings_and_extensible(self):
+        self.check_template('(&(cn=?*)(sn=*?*)(givenName=*?)(cn:caseExactMatch:=?))', ['jo', 'oh', 'hn', 'John'])
+
+    def test_special_characters_are_escaped(self):
+        self.check_template('(&(objectClass=person)(uid=?))', ['*)(uid=*'])
+        self.check_template('(uid=?)', [u'Jörg\\'])
+
+    def test_large_values(self):
+        self.check_template('(&(objectClass=person)(description=?))', ['x' * 70000])
+
+    def test_wrong_values_number(self):
+        template = search_operation_template('o=test', '(&(uid=?)(cn=?))', SUBTREE, DEREF_ALWAYS, None, 0, 0, False, test_auto_escape, test_auto_encode)
+        self.assertRaises(LDAPInvalidFilterError, template.encode, ['jdoe'])
+
+    def test_prepared_search_sent(self):
+        connection = Connection(Server('dummy'), client_strategy=ASYNC)
+        connection.socket = RecordingSocket()
+        connection.listening = True
+        connection.closed = False
+        connection.strategy._outstanding = dict()
+        prepared = connection.prepare_search('o=test', '(&(objectClass=person)(uid=?))', attributes=['cn'])
+        message_id = prepared.search('jdoe')
+        request = connection.strategy._outstanding[message_id]
+        self.assertEqual(request['filter'], '(&(objectClass=person)(uid=jdoe))')
+        self.assertEqual(request['attributes'], ['cn'])
+        self.assertEqual(len(connection.socket.writes), 1)
+        self.assertTrue(message_id > 0)
+
+    def test_placeholder_inside_value(self):
+        connection = Connection(Server('dummy'))
+        self.assertRaises(LDAPInvalidFilterError, connection.prepare_search, 'o=test', '(uid=a?b)')
+
+    def test_prepared_search_mock(self):
+        connection = Connection(Server('dummy'), user='cn=user1,o=test', password='test1111', client_strategy=MOCK_SYNC)
+        connection.strategy.add_entry('cn=user1,o=test', {'userPassword': 'test1111', 'uid': 'jdoe', 'objectClass': 'person'})
+        connection.strategy.add_entry('cn=user2,o=test', {'userPassword': 'test2222', 'uid': 'jdoe*', 'objectClass': 'person'})
+        connection.bind()
+        prepared = connection.prepare_search('o=test', '(&(objectClass=person)(uid=?))', attributes=['uid'])
+        self.assertTrue(prepared.search('jdoe'))
+        self.assertEqual([entry['dn'] for entry in connection.response], ['cn=user1,o=test'])
+        self.assertTrue(prepared.search('jdoe*'))
+        self.assertEqual([entry['dn'] for entry in connection.response], ['cn=user2,o=test'])
+        self.assertFalse(prepared.search('nobody'))
+        connection.unbind()
@@ -0,0 +1,125 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+import socket
+from threading import Thread
+
+from ldap3 import Server, Connection
+from ldap3.strategy.base import ReceiveBuffer
+from ldap3.utils.asn1 import encode_message_fast
+from test.testFastDecoder import search_result_entry, search_result_done
+
+
+class ChunkedSocket(object):
+    """
+    Delivers the data in chunks of the given size
+    """
+    def __init__(self, data, chunk_size):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.position = 0
+        self.reads = 0
+
+    def recv_into(self, buffer):
+        size = min(len(buffer), self.chunk_size, len(self.data) - self.position)
+        buffer[:size] = self.data[self.position:self.position + size]
+        self.position += size
+        self.reads += 1
+        return size
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.small_messages = [encode_message_fast(index, search_result_entry('cn=user%d,o=test' % index, [('cn', ['user%d' % index])])) for index in range(1, 300)]
+        self.large_message = encode_message_fast(300, search_result_entry('cn=group,o=test', [('member', ['cn=member%d,o=test' % index for index in range(50000)])]))
+        self.messages = self.small_messages + [self.large_message, encode_message_fast(301, search_result_done())]
+
+    def receive_all(self, receive_buffer, sock, release=False):
+        messages = []
+        buffers = set()  # bytearrays used by the receive buffer
+        while receive_buffer.receive(sock):
+            buffers.add(id(receive_buffer.buffer.obj))
+            message = receive_buffer.next_message()
+            while message is not None:
+                messages.append(message.tobytes() if release else message)
+                message = receive_buffer.next_message()
+            if release:
+                receive_buffer.release()
+        self.buffers = len(buffers)
+        return messages
+
+    def test_framing(self):
+        for messages, chunk_size in ((self.small_messages, 1), (self.small_messages, 3), (self.messages, 100), (self.messages, 4096), (self.messages, 10000000)):
+            receive_buffer = ReceiveBuffer(4096)
+            received = self.receive_all(receive_buffer, ChunkedSocket(b''.join(messages), chunk_size))
+            self.assertEqual([message.tobytes() for message in received], messages)
+            self.assertEqual(len(receive_buffer), 0)
+
+    def test_framing_with_release(self):
+        for messages, chunk_size in ((self.small_messages, 1), (self.small_messages, 3), (self.messages, 100), (self.messages, 4096), (self.messages, 10000000)):
+            receive_buffer = ReceiveBuffer(4096)
+            self.assertEqual(self.receive_all(receive_buffer, ChunkedSocket(b''.join(messages), chunk_size), release=True), messages)
+            self.assertEqual(len(receive_buffer), 0)
+
+    def test_buffer_reused(self):
+        receive_buffer = ReceiveBuffer(4096)
+        sock = ChunkedSocket(b''.join(self.small_messages * 20), 4096)
+        self.assertEqual(len(self.receive_all(receive_buffer, sock, release=True)), len(self.small_messages) * 20)
+        self.assertEqual(sock.reads, len(b''.join(self.small_messages * 20)) // 4096 + 2)
+        self.assertEqual(self.buffers, 1)  # the pending data is moved to the beginning of the same buffer
+
+    def test_large_messages_not_copied(self):
+        receive_buffer = ReceiveBuffer(4096)
+        sock = ChunkedSocket(self.large_message * 3, 4096)
+        self.assertEqual(self.receive_all(receive_buffer, sock, release=True), [self.large_message] * 3)
+        self.assertEqual(self.buffers, 2)  # grown once for the first message, reused for the others
+        self.assertEqual(len(receive_buffer.buffer), len(self.large_message))
+        sock = ChunkedSocket(b''.join(self.small_messages), 4096)
+        self.assertEqual(self.receive_all(receive_buffer, sock, release=True), self.small_messages)
+        self.assertEqual(len(receive_buffer.buffer), 4096)  # the room of the large messages is not kept when small ones are received
+
+    def test_unreleased_messages_not_overwritten(self):
+        receive_buffer = ReceiveBuffer(4096)
+        messages = self.receive_all(receive_buffer, ChunkedSocket(b''.join(self.small_messages), 4096))
+        self.assertEqual([message.tobytes() for message in messages], self.small_messages)
+
+    def test_large_message_read_in_place(self):
+        sock = ChunkedSocket(self.large_message, 10000000)
+        receive_buffer = ReceiveBuffer(4096)
+        messages = self.receive_all(receive_buffer, sock)
+        self.assertEqual(messages[0].tobytes(), self.large_message)
+        self.assertEqual(sock.reads, 3)  # message header, message remainder, end of data
+
+    def test_sync_receiving(self):
+        connection = Connection(Server('dummy'))
+        connection.socket, server_socket = socket.socketpair()
+        try:
+            sender = Thread(target=server_socket.sendall, args=(b''.join(self.messages), ))
+            sender.start()
+            received = []
+            while len(received) < len(self.messages):
+                received.extend(message.tobytes() for message in connection.strategy.receiving())  # messages are consumed before the next call
+            sender.join()
+            self.assertEqual(received, self.messages)
+        finally:
+            connection.socket.close()
+            server_socket.close()
@@ -24,12 +24,110 @@
 # If not, see <http://www.gnu.org/licenses/>.
 
 import unittest
+import socket
+from time import time
 
 from test.config import test_server, test_user, test_password, test_lazy_connection, test_get_info, test_server_mode, test_base, test_strategy, test_server_type
-from ldap3 import Server, Connection, ServerPool, RESTARTABLE, ROUND_ROBIN, BASE, MOCK_SYNC, MOCK_ASYNC
+from ldap3 import Server, Connection, ServerPool, RESTARTABLE, ROUND_ROBIN, FIRST, BASE, MOCK_SYNC, MOCK_ASYNC, NONE, get_config_parameter, set_config_parameter
+from ldap3.core.exceptions import LDAPMaximumRetriesError, LDAPCircuitBreakerOpenError
 
 
 class Test(unittest.TestCase):
+    def setUp(self):
+        self.parameters = dict((parameter, get_config_parameter(parameter)) for parameter in ['RESTARTABLE_SLEEPTIME', 'RESTARTABLE_TRIES', 'RESTARTABLE_BACKOFF_FACTOR', 'RESTARTABLE_MAX_SLEEPTIME', 'RESTARTABLE_MAX_TOTAL_SLEEPTIME', 'RESTARTABLE_JITTER', 'CIRCUIT_BREAKER_THRESHOLD', 'CIRCUIT_BREAKER_TIMEOUT'])
+        self.sockets = []
+
+    def tearDown(self):
+        for parameter in self.parameters:
+            set_config_parameter(parameter, self.parameters[parameter])
+        for sock in self.sockets:
+            sock.close()
+
+    def local_server(self, listening=True):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        if listening:
+            sock.listen(5)
+            self.sockets.append(sock)
+        else:  # connections are refused
+            sock.close()
+        return Server('127.0.0.1', port=port, get_info=NONE)
+
+    def test_exponential_backoff(self):
+        set_config_parameter('RESTARTABLE_SLEEPTIME', 2)
+        set_config_parameter('RESTARTABLE_BACKOFF_FACTOR', 2)
+        set_config_parameter('RESTARTABLE_MAX_SLEEPTIME', 30)
+        set_config_parameter('RESTARTABLE_JITTER', 0)
+        strategy = Connection(self.local_server(), client_strategy=RESTARTABLE).strategy
+        self.assertEqual([strategy._sleep_time(retry) for retry in range(6)], [2, 4, 8, 16, 30, 30])
+        strategy.restartable_jitter = 0.5
+        for retry in range(6):
+            self.assertTrue(min(2 * 2 ** retry, 30) / 2.0 <= strategy._sleep_time(retry) <= min(2 * 2 ** retry, 30))
+
+    def test_total_sleep_time_bounded(self):
+        set_config_parameter('RESTARTABLE_SLEEPTIME', 0.1)
+        set_config_parameter('RESTARTABLE_TRIES', 30)
+        set_config_parameter('RESTARTABLE_BACKOFF_FACTOR', 2)
+        set_config_parameter('RESTARTABLE_MAX_SLEEPTIME', 30)
+        set_config_parameter('RESTARTABLE_MAX_TOTAL_SLEEPTIME', 1)
+        set_config_parameter('RESTARTABLE_JITTER', 0)
+        set_config_parameter('CIRCUIT_BREAKER_THRESHOLD', 0)
+        connection = Connection(self.local_server(listening=False), client_strategy=RESTARTABLE)
+        start = time()
+        with self.assertRaises(LDAPMaximumRetriesError) as context:
+            connection.open()
+        self.assertTrue(time() - start < 5)
+        self.assertEqual(len(context.exception.args[1]), 5)  # first failure plus retries after 0.1, 0.2, 0.4 and 0.3 (the rest of the total) seconds
+        self.assertAlmostEqual(connection.strategy._total_sleep_time, 1)
+
+    def test_all_tries_by_default(self):
+        set_config_parameter('RESTARTABLE_SLEEPTIME', 0.001)
+        set_config_parameter('RESTARTABLE_BACKOFF_FACTOR', 1)
+        connection = Connection(self.local_server(listening=False), client_strategy=RESTARTABLE)
+        with self.assertRaises(LDAPMaximumRetriesError) as context:
+            connection.open()
+        self.assertEqual(len(context.exception.args[1]), get_config_parameter('RESTARTABLE_TRIES') + 1)  # no total sleep time limit and no circuit breaker
+        self.assertFalse(any(isinstance(e, LDAPCircuitBreakerOpenError) for e in context.exception.args[1]))
+
+    def test_circuit_breaker(self):
+        set_config_parameter('CIRCUIT_BREAKER_THRESHOLD', 2)
+        set_config_parameter('CIRCUIT_BREAKER_TIMEOUT', 30)
+        server = self.local_server()
+        server.circuit_breaker_failure()
+        self.assertFalse(server.circuit_open)
+        server.circuit_breaker_failure()
+        self.assertTrue(server.circuit_open)
+        set_config_parameter('CIRCUIT_BREAKER_TIMEOUT', 0)  # half open
+        self.assertFalse(server.circuit_open)
+        set_config_parameter('CIRCUIT_BREAKER_TIMEOUT', 30)
+        server.circuit_breaker_success()
+        self.assertFalse(server.circuit_open)
+
+    def test_circuit_breaker_stops_retries(self):
+        set_config_parameter('RESTARTABLE_SLEEPTIME', 0.01)
+        set_config_parameter('RESTARTABLE_TRIES', 3)
+        set_config_parameter('CIRCUIT_BREAKER_THRESHOLD', 1)
+        server = self.local_server(listening=False)
+        connection = Connection(server, client_strategy=RESTARTABLE)
+        with self.assertRaises(LDAPMaximumRetriesError) as context:
+            connection.open()
+        self.assertTrue(server.circuit_open)
+        self.assertEqual([isinstance(e, LDAPCircuitBreakerOpenError) for e in context.exception.args[1]], [False, True, True, True])  # the server is tried only once
+
+    def test_failover_to_next_server(self):
+        set_config_parameter('RESTARTABLE_SLEEPTIME', 10)
+        server_pool = ServerPool([self.local_server(listening=False), self.local_server()], FIRST, active=False)
+        connection = Connection(server_pool, client_strategy=RESTARTABLE, collect_usage=True)
+        start = time()
+        connection.open()
+        self.assertTrue(time() - start < 5)  # doesn't wait before the first retry
+        self.assertTrue(connection.server is server_pool.servers[1])
+        self.assertEqual(connection.usage.failovers, 1)
+        self.assertTrue(0 < connection.usage.failover_time < 5)
+        self.assertTrue(server_pool.servers[1].circuit_open is False)
+        connection.unbind()
+
     def test_restartable_invalid_server(self):
         if test_server_type != 'NONE' and test_strategy not in [MOCK_SYNC, MOCK_ASYNC]:
             if isinstance(test_server, (list, tuple)):
@@ -0,0 +1,191 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# The REUSABLE strategy is tested against a minimal LDAP server that serves each connection in a thread
+
+import unittest
+import socket
+from threading import Event
+from time import time, sleep
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from ldap3 import Server, Connection, REUSABLE, NONE, get_config_parameter, set_config_parameter
+from ldap3.core.exceptions import LDAPResponseTimeoutError
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_entry, search_response
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to Bind and Search requests, searches with base o=hold are answered when the server is released
+    """
+    def setup(self):
+        self.server.client_sockets.append(self.request)
+
+    def answer(self, request):
+        if request['protocolOp'] == 3:  # searchRequest
+            base = request['payload'][0][3].decode('utf-8')
+            if base == 'o=hold':
+                self.server.released.wait(10)
+            self.request.sendall(search_response(request['messageID'], [ldap_entry('cn=entry,' + base, [])]))
+        else:
+            if request['protocolOp'] == 0:  # bindRequest
+                sleep(self.server.bind_delay)
+            return FakeRequestHandler.answer(self, request)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler, released=Event(), bind_delay=0, client_sockets=[])
+        self.health_check_interval = get_config_parameter('REUSABLE_THREADED_HEALTH_CHECK_INTERVAL')
+        self.connections = []
+        self.connection = self.pooled_connection(pool_size=4)
+
+    def tearDown(self):
+        self.fake_server.released.set()
+        for connection in self.connections:
+            connection.unbind()
+        self.fake_server.stop()
+        set_config_parameter('REUSABLE_THREADED_HEALTH_CHECK_INTERVAL', self.health_check_interval)
+
+    def pooled_connection(self, **kwargs):
+        connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='password',
+                                client_strategy=REUSABLE, pool_name='reusable_test_%d_%d' % (id(self), len(self.connections)), auto_bind=True, **kwargs)
+        self.connections.append(connection)
+        return connection
+
+    @staticmethod
+    def wait_for(condition, timeout=5):
+        start = time()
+        while not condition() and time() - start < timeout:
+            sleep(0.01)
+        return condition()
+
+    def test_response_without_polling_delay(self):
+        operations = 20
+        start = time()
+        for index in range(operations):
+            response, result = self.connection.get_response(self.connection.search('ou=%d,o=test' % index, '(objectClass=*)'))
+            self.assertEqual(result['result'], 0)
+            self.assertEqual(response[0]['dn'], 'cn=entry,ou=%d,o=test' % index)
+        self.assertTrue(time() - start < operations * get_config_parameter('RESPONSE_SLEEPTIME') / 2)  # responses are not polled
+        self.assertEqual(self.connection.strategy.pool._events, dict())
+        self.assertEqual(self.connection.strategy.pool._incoming, dict())
+
+    def test_response_timeout(self):
+        counter = self.connection.search('o=hold', '(objectClass=*)')
+        start = time()
+        with self.assertRaises(LDAPResponseTimeoutError):
+            self.connection.get_response(counter, timeout=0.2)
+        self.assertTrue(0.2 <= time() - start < 2)
+        self.fake_server.released.set()
+        self.connection.strategy.pool.request_queue.join()  # the late response is discarded
+        self.assertEqual(self.connection.strategy.pool._events, dict())
+        self.assertEqual(self.connection.strategy.pool._incoming, dict())
+
+    def test_elastic_pool_grows_and_shrinks(self):
+        connection = self.pooled_connection(pool_size=1, pool_min_size=1, pool_max_size=3)
+        pool = connection.strategy.pool
+        resizes = []
+        pool.resize_callback = lambda resized_pool, old_size, new_size, reason: resizes.append((old_size, new_size))
+        pool.idle_timeout = 0.2
+        self.assertEqual((pool.min_size, pool.max_size, len(pool.workers)), (1, 3, 1))
+        counters = [connection.search('o=hold', '(objectClass=*)') for _ in range(6)]  # the first worker is stuck, requests queue up
+        self.assertTrue(self.wait_for(lambda: len(pool.workers) == 3))
+        self.fake_server.released.set()
+        for counter in counters:
+            response, result = connection.get_response(counter)
+            self.assertEqual(result['result'], 0)
+        self.assertEqual((pool.workers_added, pool.peak_size), (2, 3))
+        self.assertTrue(self.wait_for(lambda: len(pool.workers) == 1))  # idle workers are retired down to min_size
+        self.assertEqual(pool.workers_retired, 2)
+        self.assertEqual(sorted(resizes), [(1, 2), (2, 1), (2, 3), (3, 2)])
+        response, result = connection.get_response(connection.search('o=test', '(objectClass=*)'))
+        self.assertEqual(result['result'], 0)
+
+    def test_fixed_pool_does_not_grow(self):
+        pool = self.connection.strategy.pool
+        counters = [self.connection.search('o=hold', '(objectClass=*)') for _ in range(8)]
+        sleep(0.2)
+        self.assertEqual((pool.min_size, pool.max_size, len(pool.workers), pool.workers_added), (4, 4, 4, 0))
+        self.fake_server.released.set()
+        for counter in counters:
+            self.assertEqual(self.connection.get_response(counter)[1]['result'], 0)
+
+    def test_parallel_warm_up(self):
+        self.fake_server.bind_delay = 0.2
+        start = time()
+        connection = self.pooled_connection(pool_size=5)
+        self.assertTrue(time() - start < 0.6)  # 5 sequential binds would take 1 second
+        self.assertEqual(len(connection.strategy.pool.workers), 5)
+
+    def test_health_manager_replaces_dead_connections(self):
+        set_config_parameter('REUSABLE_THREADED_HEALTH_CHECK_INTERVAL', 0.05)
+        connection = self.pooled_connection(pool_size=2)
+        pool = connection.strategy.pool
+        self.assertTrue(self.wait_for(lambda: all(worker.connection.bound for worker in pool.workers)))  # closed connections are opened in advance
+        old_connections = [worker.connection for worker in pool.workers]
+        for client_socket in self.fake_server.client_sockets:  # the server drops the idle connections
+            try:
+                client_socket.shutdown(socket.SHUT_RDWR)
+            except socket.error:  # already closed
+                pass
+        self.assertTrue(self.wait_for(lambda: pool.connections_replaced == 2))
+        self.assertEqual([worker.connection in old_connections for worker in pool.workers], [False, False])
+        self.assertTrue(self.wait_for(lambda: all(worker.connection.bound for worker in pool.workers)))
+        response, result = connection.get_response(connection.search('o=test', '(objectClass=*)'))
+        self.assertEqual(result['result'], 0)
+
+    def test_health_manager_with_file_descriptors_over_fd_setsize(self):
+        if resource is None:
+            self.skipTest('resource module not available')
+        soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft_limit != resource.RLIM_INFINITY and soft_limit < 1200:
+            if hard_limit != resource.RLIM_INFINITY and hard_limit < 1200:
+                self.skipTest('file descriptors limit too low')
+            resource.setrlimit(resource.RLIMIT_NOFILE, (1200, hard_limit))
+            self.addCleanup(resource.setrlimit, resource.RLIMIT_NOFILE, (soft_limit, hard_limit))
+        sockets = []
+        while not sockets or sockets[-1].fileno() < 1100:
+            sockets.append(socket.socket(socket.AF_INET, socket.SOCK_STREAM))
+        try:
+            set_config_parameter('REUSABLE_THREADED_HEALTH_CHECK_INTERVAL', 0.05)
+            connection = self.pooled_connection(pool_size=2)
+            pool = connection.strategy.pool
+            self.assertTrue(self.wait_for(lambda: all(worker.connection.bound for worker in pool.workers)))
+            self.assertTrue(all(worker.connection.socket.fileno() >= 1024 for worker in pool.workers))
+            sleep(0.3)
+            self.assertEqual(pool.connections_replaced, 0)  # idle connections are alive
+        finally:
+            for sock in sockets:
+                sock.close()
+
+    def test_health_manager_replaces_expired_connections(self):
+        set_config_parameter('REUSABLE_THREADED_HEALTH_CHECK_INTERVAL', 0.05)
+        connection = self.pooled_connection(pool_size=2)
+        pool = connection.strategy.pool
+        pool.lifetime = 0
+        self.assertTrue(self.wait_for(lambda: pool.connections_replaced >= 2))
+        pool.lifetime = 3600
+        response, result = connection.get_response(connection.search('o=test', '(objectClass=*)'))
+        self.assertEqual(result['result'], 0)
@@ -0,0 +1,168 @@
+# encoding: utf-8
+"""
+"""
+
+# This file is part of ldap3.
+#
+# ldap3 is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# ldap3 is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with ldap3 in the COPYING and COPYING.LESSER files.
+# If not, see <http://www.gnu.org/licenses/>.
+
+# Streamed searches are tested against a minimal LDAP server that serves each connection in a thread
+
+import unittest
+
+from ldap3 import Server, Connection, SYNC, SAFE_SYNC, ASYNC, NONE
+from ldap3.core.exceptions import LDAPInvalidValueError, LDAPSocketSendError, LDAPNoSuchObjectResult
+from ldap3.utils.asn1 import encode_sequence_fast, encode_octet_string_fast, encode_integer_fast
+from test.fakeServer import FakeServer, FakeRequestHandler, ldap_result, ldap_entry, search_response
+
+
+class RequestHandler(FakeRequestHandler):
+    """
+    Answers to Search requests, the search base selects the response
+    """
+    def setup(self):
+        self.paged_searches = 0
+
+    def answer(self, request):
+        if request['protocolOp'] == 3:  # searchRequest
+            base = request['payload'][0][3].decode('utf-8')
+            attributes = [attribute[3].decode('utf-8') for attribute in request['payload'][7][3]]
+            entries = []
+            controls = None
+            result = ldap_result(0x65)
+            if base == 'o=test':
+                entries = [ldap_entry('cn=entry%d,o=test' % index, [('cn', ['entry%d' % index])]) for index in range(5)]
+            elif base == 'o=many':
+                entries = [ldap_entry('cn=entry%d,o=many' % index, [('cn', ['entry%d' % index])]) for index in range(2000)]
+            elif base == 'o=paged':
+                self.paged_searches += 1
+                entries = [ldap_entry('cn=entry%d-%d,o=paged' % (self.paged_searches, index), []) for index in range(2)]
+                cookie = 'page%d' % (self.paged_searches + 1) if self.paged_searches < 3 else ''
+                controls = [('1.2.840.113556.1.4.319', False, encode_sequence_fast([encode_integer_fast(0), encode_octet_string_fast(cookie)]))]
+            elif base == 'o=range':
+                entries = [ldap_entry('cn=group,o=range', [('member;range=0-1', ['m0', 'm1'])]),
+                           ldap_entry('cn=user,o=range', [('cn', ['user'])])]
+            elif base == 'cn=group,o=range':
+                entries = [ldap_entry('cn=group,o=range', [(attributes[0], ['m2', 'm3'])])]
+            elif base == 'o=referral':
+                result = ldap_result(0x65, 10, [encode_sequence_fast([encode_octet_string_fast('ldap://127.0.0.1:%d/o=test' % self.server.port)], 0xA3)])
+            elif base == 'o=missing':
+                result = ldap_result(0x65, 32)
+            self.request.sendall(search_response(request['messageID'], entries, result, controls))
+        else:
+            return FakeRequestHandler.answer(self, request)
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.fake_server = FakeServer(RequestHandler)
+        self.connections = []
+
+    def tearDown(self):
+        for connection in self.connections:
+            connection.unbind()
+        self.fake_server.stop()
+
+    def connection(self, **kwargs):
+        connection = Connection(Server('127.0.0.1', port=self.fake_server.port, get_info=NONE), user='cn=user,o=test', password='password', auto_bind=True, **kwargs)
+        self.connections.append(connection)
+        return connection
+
+    def test_stream_entries(self):
+        connection = self.connection(client_strategy=SYNC)
+        entries = connection.search('o=test', '(objectClass=*)', attributes=['cn', 'sn'], stream=True)
+        self.assertIsNone(entries.result)
+        streamed = []
+        for entry in entries:
+            self.assertIsNone(connection.response)  # entries are not kept
+            streamed.append(entry)
+        self.assertEqual([entry['dn'] for entry in streamed], ['cn=entry%d,o=test' % index for index in range(5)])
+        self.assertEqual(streamed[0]['attributes']['cn'], ['entry0'])
+        self.assertEqual(streamed[0]['attributes']['sn'], [])  # empty attributes are set
+        self.assertEqual(entries.result['type'], 'searchResDone')
+        self.assertEqual(connection.result, entries.result)
+        self.assertEqual(entries.request['base'], 'o=test')
+        self.assertEqual(connection.strategy._outstanding, dict())
+        self.assertTrue(connection.search('o=test', '(objectClass=*)'))
+        self.assertEqual(len(connection.response), 5)
+
+    def test_stream_safe_sync(self):
+        connection = self.connection(client_strategy=SAFE_SYNC)
+        entries = connection.search('o=test', '(objectClass=*)', stream=True)
+        self.assertEqual(len(list(entries)), 5)
+        self.assertEqual(entries.result['result'], 0)
+        status, result, response, _ = connection.search('o=test', '(objectClass=*)')
+        self.assertTrue(status)
+        self.assertEqual(len(response), 5)
+
+    def test_close_discards_remaining_responses(self):
+        connection = self.connection(client_strategy=SYNC)
+        with connection.search('o=many', '(objectClass=*)', stream=True) as entries:
+            self.assertEqual(next(entries)['dn'], 'cn=entry0,o=many')
+        self.assertTrue(connection.search('o=test', '(objectClass=*)'))
+        self.assertEqual([entry['dn'] for entry in connection.response], ['cn=entry%d,o=test' % index for index in range(5)])
+        connection.search('o=many', '(objectClass=*)', stream=True).close()  # not started
+        self.assertTrue(connection.search('o=test', '(objectClass=*)'))
+        self.assertEqual(len(connection.response), 5)
+
+    def test_operations_not_allowed_while_streaming(self):
+        connection = self.connection(client_strategy=SYNC)
+        entries = connection.search('o=test', '(objectClass=*)', stream=True)
+        next(entries)
+        with self.assertRaises(LDAPSocketSendError):
+            connection.search('o=test', '(objectClass=*)')
+        self.assertEqual(len(list(entries)), 4)
+        self.assertTrue(connection.search('o=test', '(objectClass=*)'))
+
+    def test_stream_paged_search(self):
+        connection = self.connection(client_strategy=SYNC)
+        cookie = None
+        dns = []
+        while True:
+            entries = connection.search('o=paged', '(objectClass=*)', paged_size=2, paged_cookie=cookie, stream=True)
+            dns.extend(entry['dn'] for entry in entries)
+            cookie = entries.result['controls']['1.2.840.113556.1.4.319']['value']['cookie']
+            if not cookie:
+                break
+        self.assertEqual(dns, ['cn=entry%d-%d,o=paged' % (page, index) for page in range(1, 4) for index in range(2)])
+
+    def test_stream_auto_range(self):
+        connection = self.connection(client_strategy=SYNC)
+        entries = list(connection.search('o=range', '(objectClass=*)', attributes=['member', 'cn'], stream=True))
+        self.assertEqual([entry['dn'] for entry in entries], ['cn=user,o=range', 'cn=group,o=range'])  # ranged entries are yielded at the end
+        self.assertEqual(entries[1]['attributes']['member'], ['m0', 'm1', 'm2', 'm3'])
+        self.assertEqual([name for name in entries[1]['attributes'] if ';range=' in name], [])
+        self.assertEqual(connection.result['result'], 0)
+
+    def test_stream_referral(self):
+        connection = self.connection(client_strategy=SYNC)
+        entries = connection.search('o=referral', '(objectClass=*)', stream=True)
+        self.assertEqual([entry['dn'] for entry in entries], ['cn=entry%d,o=test' % index for index in range(5)])
+        self.assertEqual(entries.result['result'], 0)
+
+    def test_stream_raise_exceptions(self):
+        connection = self.connection(client_strategy=SYNC, raise_exceptions=True)
+        with self.assertRaises(LDAPNoSuchObjectResult):
+            list(connection.search('o=missing', '(objectClass=*)', stream=True))
+        self.assertEqual(connection.result['result'], 32)
+        self.assertTrue(connection.search('o=test', '(objectClass=*)'))
+
+    def test_stream_not_available(self):
+        connection = self.connection(client_strategy=ASYNC)
+        with self.assertRaises(LDAPInvalidValueError):
+            connection.search('o=test', '(objectClass=*)', stream=True)
+        connection = self.connection(client_strategy=SYNC)
+        with self.assertRaises(LDAPInvalidValueError):
+            connection.search('o=test', '(objectClass=*)', stream=True, value_callback=lambda dn, attribute_type, value: None)